@@ -0,0 +1,275 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import AsyncIterator, Callable, Iterable, Iterator, List, Optional, Union
+
+from archive_engine import ArchiveChecker, ScanEngine, get_archive_format
+from format_backends import BACKENDS
+from sampling import SamplingPolicy
+from guards import ResourceLimits
+from scan_rules import ScanRules
+from throttle import IOLimiter
+from page_cache import ReadHints
+from prefetch import ReadAhead
+from encryption import PasswordStore
+# Состояния и запись результата - общие с ResultStore и службой проверки
+from results import (
+    STATUS_CORRUPTED, STATUS_ENCRYPTED, STATUS_MISSING, STATUS_OK, STATUS_SUSPICIOUS, STATUS_UNSUPPORTED,
+    STATUS_UNVERIFIED, ArchiveResult
+)
+
+PathLike = Union[str, Path]
+
+
+class CancellationToken:
+    """
+    Признак отмены проверки, который можно передать в другой поток или задачу asyncio.
+    После cancel() новые архивы не берутся в работу, а начатые проверки прерываются.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Отмена (повторные вызовы ничего не делают)"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """Функция, вызываемая при отмене (сразу, если отмена уже произошла)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание отмены; True, если проверка отменена"""
+        return self._event.wait(timeout)
+
+
+def all_extensions() -> List[str]:
+    """Расширения всех поддерживаемых форматов"""
+    return [ext for backend in BACKENDS.values() for ext in backend.extensions]
+
+
+class ArchiveVerifier:
+    """
+    Проверка архивов для встраивания в другие программы: результаты выдаются
+    по мере готовности (итератор или асинхронный итератор), без накопления всего списка.
+
+    Пример:
+        with ArchiveVerifier(max_workers=4) as verifier:
+            for result in verifier.iter_results(paths):
+                if not result.ok:
+                    print(result.path, result.error)
+
+    Пул потоков создается при первой проверке и сохраняется до close(),
+    поэтому повторные вызовы не тратят время на запуск.
+    """
+
+    def __init__(self, extensions: Optional[List[str]] = None, max_workers: Optional[int] = None,
+                 recursive: bool = True, sampling: Optional[SamplingPolicy] = None,
+                 limits: Optional[ResourceLimits] = None, rules: Optional[ScanRules] = None,
+                 io_limiter: Optional[IOLimiter] = None, read_hints: Optional[ReadHints] = None,
+                 read_ahead: Optional[ReadAhead] = None, passwords: Optional[PasswordStore] = None,
+                 quick: bool = False, metrics=None):
+        """
+        Args:
+            extensions (List[str]): Расширения архивов при поиске в директориях (по умолчанию - все форматы)
+            max_workers (int): Количество потоков проверки (по умолчанию - по числу ядер)
+            recursive (bool): Искать архивы в подпапках директорий
+            sampling (SamplingPolicy): Выборочная проверка больших ZIP архивов
+            limits (ResourceLimits): Ограничения ресурсов на архив
+            rules (ScanRules): Правила поиска архивов в директориях
+            io_limiter (IOLimiter): Ограничение нагрузки на диск
+            read_hints (ReadHints): Подсказки кешу страниц при чтении архивов
+            read_ahead (ReadAhead): Упреждающее чтение (закрывается вместе с ArchiveVerifier)
+            passwords (PasswordStore): Пароли зашифрованных архивов
+            quick (bool): Быстрая проверка по заголовкам и оглавлению без распаковки
+            metrics (ScanMetrics): Метрики проверки
+        """
+        self.sampling = sampling
+        self.limits = limits
+        self.io_limiter = io_limiter
+        self.read_hints = read_hints
+        self.read_ahead = read_ahead
+        self.passwords = passwords
+        self.quick = quick
+        # Движок используется для поиска и проверки отдельных архивов, очередью управляет итератор
+        self.engine = ScanEngine(Path("."), extensions or all_extensions(), recursive, max_workers,
+                                 metrics=metrics, sampling=sampling, limits=limits, rules=rules,
+                                 io_limiter=io_limiter, read_hints=read_hints, read_ahead=read_ahead,
+                                 passwords=passwords, quick=quick)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "ArchiveVerifier":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Остановка пула потоков"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+        if self.read_ahead:
+            self.read_ahead.close()
+        if self.passwords:
+            self.passwords.flush()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.engine.max_workers,
+                                                    thread_name_prefix="verify")
+            return self._executor
+
+    def expand(self, paths: Iterable[PathLike]) -> Iterator[Path]:
+        """Архивы из списка путей: файлы передаются как есть, директории заменяются найденными архивами"""
+        engine = self.engine
+        for path in paths:
+            path = Path(path)
+            if path.is_dir():
+                finder = ScanEngine(path, engine.extensions, engine.recursive, rules=engine.rules)
+                yield from finder.find_archives()
+            else:
+                yield path
+
+    def _verify(self, path: Path, checker: ArchiveChecker) -> Optional[ArchiveResult]:
+        fmt = get_archive_format(path)
+        if not path.is_file():
+            return ArchiveResult(path, fmt, STATUS_MISSING, "Путь не найден")
+        result = self.engine.verify_archive(path, checker)
+        if result is None:
+            # Проверка прервана отменой
+            return None if checker.stop_flag else ArchiveResult(path, fmt, STATUS_UNSUPPORTED)
+        return ArchiveResult.from_check(path, fmt, *result)
+
+    def _new_checker(self) -> ArchiveChecker:
+        # У каждого вызова свой проверяющий объект: отмена одного перебора не затрагивает другие
+        return ArchiveChecker(Path("."), sampling=self.sampling, limits=self.limits, io_limiter=self.io_limiter,
+                              read_hints=self.read_hints, read_ahead=self.read_ahead, passwords=self.passwords,
+                              quick=self.quick)
+
+    def verify(self, path: PathLike) -> ArchiveResult:
+        """Проверка одного архива в текущем потоке"""
+        return self._verify(Path(path), self._new_checker())
+
+    def iter_results(self, paths: Iterable[PathLike],
+                     token: Optional[CancellationToken] = None) -> Iterator[ArchiveResult]:
+        """
+        Проверка архивов с выдачей результатов в порядке готовности
+
+        Args:
+            paths: Файлы архивов и директории (можно генератор: пути берутся по мере
+                освобождения потоков, в работе не больше 2 * max_workers архивов)
+            token (CancellationToken): Отмена проверки из другого потока
+
+        Yields:
+            ArchiveResult: Результаты проверки (после отмены больше не выдаются)
+        """
+        checker = self._new_checker()
+
+        def stop() -> None:
+            checker.stop_flag = True
+            checker.resume()
+
+        if token:
+            token.add_callback(stop)
+        executor = self._get_executor()
+        window = self.engine.max_workers * 2
+        archives = self.expand(paths)
+        pending = set()
+        try:
+            exhausted = False
+            while not checker.stop_flag:
+                while not exhausted and len(pending) < window:
+                    archive = next(archives, None)
+                    if archive is None:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(self._verify, archive, checker))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is not None and not checker.stop_flag:
+                        yield result
+        finally:
+            # Отмена, ошибка или прекращение перебора вызывающей стороной
+            stop()
+            for future in pending:
+                future.cancel()
+            if token:
+                token.remove_callback(stop)
+
+    async def aiter_results(self, paths: Iterable[PathLike],
+                            token: Optional[CancellationToken] = None) -> AsyncIterator[ArchiveResult]:
+        """
+        Асинхронный вариант iter_results: проверка идет в потоках, цикл событий не блокируется.
+        Отмена задачи asyncio тоже прерывает проверку.
+        """
+        import asyncio
+
+        # Собственный признак отмены: отмена задачи не должна менять переданный token
+        internal = CancellationToken()
+        if token:
+            token.add_callback(internal.cancel)
+        iterator = self.iter_results(paths, internal)
+        loop = asyncio.get_running_loop()
+        finished = object()
+        running = False
+        try:
+            while True:
+                running = True
+                result = await loop.run_in_executor(None, next, iterator, finished)
+                running = False
+                if result is finished:
+                    break
+                yield result
+        finally:
+            internal.cancel()
+            if not running:
+                # Во время выполнения next() генератор закроется сам после отмены
+                iterator.close()
+            if token:
+                token.remove_callback(internal.cancel)
+
+
+def iter_results(paths: Iterable[PathLike], token: Optional[CancellationToken] = None,
+                 **options) -> Iterator[ArchiveResult]:
+    """Проверка архивов с выдачей результатов по мере готовности (параметры - см. ArchiveVerifier)"""
+    with ArchiveVerifier(**options) as verifier:
+        yield from verifier.iter_results(paths, token)
+
+
+async def aiter_results(paths: Iterable[PathLike], token: Optional[CancellationToken] = None,
+                        **options) -> AsyncIterator[ArchiveResult]:
+    """Асинхронная проверка архивов (параметры - см. ArchiveVerifier)"""
+    verifier = ArchiveVerifier(**options)
+    try:
+        async for result in verifier.aiter_results(paths, token):
+            yield result
+    finally:
+        verifier.close()
@@ -0,0 +1,363 @@
+import sys
+import time
+import queue
+import signal
+import logging
+import argparse
+import threading
+from pathlib import Path
+
+from archive_engine import ScanEngine
+from metrics import ScanMetrics, start_exporters
+from sampling import MB, SamplingPolicy
+from guards import ResourceLimits
+from scan_rules import ScanRules
+from scrub import GB, VerificationHistory, run_scrub
+from throttle import IOLimiter, parse_schedule
+from page_cache import ReadHints
+from prefetch import ReadAhead
+from encryption import PasswordStore
+from settings_manager import SettingsManager
+
+# Настраиваем логирование
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def save_report(corrupted_archives: dict, output_file: str, suspicious_archives: dict = None,
+                encrypted_archives: dict = None, unverified_archives: dict = None) -> None:
+    """
+    Сохранение отчета о поврежденных архивах в файл
+
+    Args:
+        corrupted_archives (dict): Словарь {путь: ошибка}
+        output_file (str): Имя файла для сохранения отчета
+        suspicious_archives (dict): Подозрительные архивы {путь: причина}
+        encrypted_archives (dict): Зашифрованные архивы, которые не удалось проверить {путь: причина}
+        unverified_archives (dict): Архивы, проверенные только по заголовкам (нет unrar/7z) {путь: причина}
+    """
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write("Список поврежденных архивов:\n\n")
+        for archive_path, error in corrupted_archives.items():
+            f.write(f"Файл: {archive_path}\n")
+            f.write(f"Ошибка: {error}\n")
+            f.write("-" * 80 + "\n")
+        if suspicious_archives:
+            f.write("\nСписок подозрительных архивов (нарушены ограничения ресурсов):\n\n")
+            for archive_path, reason in suspicious_archives.items():
+                f.write(f"Файл: {archive_path}\n")
+                f.write(f"Причина: {reason}\n")
+                f.write("-" * 80 + "\n")
+        if encrypted_archives:
+            f.write("\nСписок зашифрованных архивов (не проверены):\n\n")
+            for archive_path, reason in encrypted_archives.items():
+                f.write(f"Файл: {archive_path}\n")
+                f.write(f"Причина: {reason}\n")
+                f.write("-" * 80 + "\n")
+        if unverified_archives:
+            f.write("\nСписок архивов, проверенных только по заголовкам (не найдена программа проверки):\n\n")
+            for archive_path, reason in unverified_archives.items():
+                f.write(f"Файл: {archive_path}\n")
+                f.write(f"Причина: {reason}\n")
+                f.write("-" * 80 + "\n")
+    logger.info(f"Отчет сохранен в файл: {output_file}")
+
+
+def control_loop(engine: ScanEngine, stream) -> None:
+    """
+    Команды управления проверкой, по одной в строке:
+        first <папка>  - проверить архивы из папки раньше остальных
+        recent <часы>  - проверить раньше архивы, измененные за последние часы
+        pause          - пауза (начатые проверки приостанавливаются)
+        drain          - пауза, начатые проверки завершаются
+        resume         - продолжение проверки
+    """
+    for line in stream:
+        command, _, argument = line.strip().partition(" ")
+        argument = argument.strip()
+        try:
+            if command == "first" and argument:
+                engine.prioritize_folder(argument)
+            elif command == "recent":
+                engine.prioritize_recent(float(argument or 24) * 3600)
+            elif command in ("pause", "drain"):
+                engine.pause(suspend=command == "pause")
+            elif command == "resume":
+                engine.resume()
+            elif command:
+                logger.warning(f"Неизвестная команда: {line.strip()}")
+        except ValueError:
+            logger.warning(f"Некорректный аргумент команды: {line.strip()}")
+
+
+def signal_loop(engine: ScanEngine, requests: queue.SimpleQueue) -> None:
+    """
+    Пауза и продолжение по сигналам SIGUSR1/SIGUSR2. Обработчик сигнала только
+    кладет номер сигнала в очередь (SimpleQueue.put допускает вызов из обработчика):
+    сигнал выполняется в основном потоке между любыми инструкциями, и вызов
+    engine.pause() оттуда мог бы ждать блокировку, которую держит сам основной поток
+    """
+    while True:
+        if requests.get() == signal.SIGUSR1:
+            engine.pause()
+        else:
+            engine.resume()
+
+
+def build_parser(settings: SettingsManager) -> argparse.ArgumentParser:
+    """Описание аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Проверка целостности архивов без графического интерфейса")
+    parser.add_argument("directory", nargs="?", default=settings.get_default_directory(),
+                        help="Директория с архивами (по умолчанию - из настроек)")
+    parser.add_argument("--extensions", default=",".join(settings.get_enabled_extensions()),
+                        help="Расширения через запятую (по умолчанию - из настроек)")
+    parser.add_argument("--threads", type=int,
+                        help="Количество потоков проверки (по умолчанию - из настроек)")
+    parser.add_argument("--auto-threads", action="store_true", default=None,
+                        help="Подбирать количество потоков во время проверки")
+    parser.add_argument("--no-recursive", action="store_true", help="Не проверять подпапки")
+    parser.add_argument("--include", action="append", default=[], metavar="PATTERN",
+                        help="Искать архивы только в путях по шаблону .gitignore (можно указать несколько раз)")
+    parser.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                        help="Исключить файлы и директории по шаблону .gitignore (можно указать несколько раз)")
+    parser.add_argument("--min-size", type=float, metavar="MB",
+                        help="Проверять архивы не меньше заданного размера, МБ")
+    parser.add_argument("--max-size", type=float, metavar="MB",
+                        help="Проверять архивы не больше заданного размера, МБ")
+    parser.add_argument("--min-age", type=float, metavar="DAYS",
+                        help="Проверять архивы, измененные не позже заданного числа дней назад")
+    parser.add_argument("--max-age", type=float, metavar="DAYS",
+                        help="Проверять архивы, измененные за последние дни")
+    parser.add_argument("--recent-first", action="store_true",
+                        help="Проверять недавно измененные архивы раньше остальных")
+    parser.add_argument("--first", action="append", default=[], metavar="FOLDER",
+                        help="Проверить архивы из папки раньше остальных (можно указать несколько раз)")
+    parser.add_argument("--control", action="store_true",
+                        help="Читать команды управления из stdin во время проверки "
+                             "(first <папка>, recent <часы>, pause, drain, resume)")
+    parser.add_argument("--dedup", action="store_true", default=None,
+                        help="Проверять одинаковые архивы один раз (результат копируется на копии)")
+    parser.add_argument("--max-total-mb", type=int,
+                        help="Максимальный объем распакованных данных одного архива, МБ (0 - без ограничения)")
+    parser.add_argument("--max-ratio", type=int,
+                        help="Максимальный коэффициент сжатия (0 - без ограничения)")
+    parser.add_argument("--max-depth", type=int,
+                        help="Максимальная глубина вложенных ZIP архивов (0 - не проверять вложенные)")
+    parser.add_argument("--tool-cpu-seconds", type=int,
+                        help="Лимит процессорного времени 7z/unrar/распаковщиков, сек.")
+    parser.add_argument("--tool-memory-mb", type=int,
+                        help="Лимит памяти 7z/unrar/распаковщиков, МБ")
+    parser.add_argument("--io-mbps", type=float,
+                        help="Ограничение скорости чтения архивов, МБ/с (0 - без ограничения)")
+    parser.add_argument("--io-iops", type=float,
+                        help="Ограничение операций чтения в секунду (0 - без ограничения)")
+    parser.add_argument("--io-schedule",
+                        help='Ограничения по времени суток, например "09:00-19:00=50/200; 19:00-23:00=200/0" '
+                             "(МБ/с/IOPS; вне интервалов действуют --io-mbps и --io-iops)")
+    parser.add_argument("--nice", type=int, help="Приоритет процессора 7z/unrar/распаковщиков (0-19)")
+    parser.add_argument("--idle-io", action="store_true", default=None,
+                        help="7z/unrar/распаковщики читают диск только при его простое (ionice -c3)")
+    parser.add_argument("--keep-cache", action="store_true",
+                        help="Не освобождать проверенные данные из кеша страниц (POSIX_FADV_DONTNEED)")
+    parser.add_argument("--read-block-kb", type=int,
+                        help="Размер блока чтения архивов, КБ (0 - стандартный; округляется до блока ФС)")
+    parser.add_argument("--read-ahead", type=int,
+                        help="Упреждающее чтение: сколько блоков архива читать заранее (0 - выключено)")
+    parser.add_argument("--passwords", metavar="FILE",
+                        help="Файл паролей зашифрованных архивов (по одному в строке)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Быстрая проверка по заголовкам и оглавлению без распаковки (ZIP, RAR, 7Z; "
+                             "остальные форматы проверяются полностью)")
+    parser.add_argument("--sample-members", type=int,
+                        help="Выборочная проверка ZIP: сколько файлов архива распаковывать")
+    parser.add_argument("--sample-mb", type=int,
+                        help="Выборочная проверка ZIP: сколько МБ сжатых данных архива читать")
+    parser.add_argument("--sample-seed", type=int, default=0,
+                        help="Начальное значение выборки (тот же seed - те же файлы)")
+    parser.add_argument("--scrub", action="store_true",
+                        help="Перепроверка: проверить архивы, которые не проверялись дольше всех, "
+                             "в пределах бюджета времени и объема (по истории проверок)")
+    parser.add_argument("--scrub-minutes", type=float,
+                        help="Бюджет перепроверки по времени, мин. (0 - без ограничения)")
+    parser.add_argument("--scrub-gb", type=float,
+                        help="Бюджет перепроверки по объему, ГБ (0 - без ограничения)")
+    parser.add_argument("--history",
+                        help="Файл истории проверок (при обычной проверке результаты тоже записываются в него)")
+    parser.add_argument("--report", help="Файл отчета о поврежденных архивах")
+    parser.add_argument("--results", metavar="FILE",
+                        help="Файл результатов всех архивов (JSON Lines: путь, формат, состояние, "
+                             "класс ошибки, размер, время)")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Порт локального HTTP-сервера метрик (http://127.0.0.1:PORT/metrics)")
+    parser.add_argument("--metrics-file",
+                        help="Файл метрик для textfile collector node_exporter (*.prom)")
+    parser.add_argument("--metrics-interval", type=float, default=15.0,
+                        help="Период обновления файла метрик, сек.")
+    parser.add_argument("--metrics-linger", type=float, default=0.0,
+                        help="Сколько секунд продолжать отдавать метрики по HTTP после завершения")
+    return parser
+
+
+def main(argv=None) -> int:
+    """
+    Проверка архивов из командной строки
+
+    Returns:
+        int: 0 - все архивы корректны, 1 - найдены поврежденные, 2 - ошибка запуска,
+            3 - поврежденных нет, но есть подозрительные,
+            4 - поврежденных и подозрительных нет, но есть зашифрованные, которые не удалось проверить.
+            Архивы, не проверенные из-за отсутствия unrar/7z, на код возврата не влияют
+    """
+    settings = SettingsManager()
+    args = build_parser(settings).parse_args(argv)
+
+    directory = Path(args.directory)
+    if not directory.exists():
+        logger.error(f"Директория {directory} не существует")
+        return 2
+
+    extensions = [ext.strip() for ext in args.extensions.split(",") if ext.strip()]
+    metrics = ScanMetrics()
+    exporters = start_exporters(metrics, args.metrics_port, args.metrics_file, args.metrics_interval)
+
+    # Явно заданное количество потоков отключает автоподбор из настроек
+    autotune = args.auto_threads if args.auto_threads is not None else (
+        args.threads is None and settings.get_auto_threads()
+    )
+    threads = args.threads or (None if autotune else settings.get_max_threads())
+    # Параметры выборки из командной строки заменяют настройки
+    if args.sample_members or args.sample_mb:
+        sampling = SamplingPolicy(args.sample_members, (args.sample_mb or 0) * MB, args.sample_seed)
+    else:
+        sampling = SamplingPolicy.from_settings(settings.get_sampling())
+    limit_settings = settings.get_limits()
+    for key, value in (("max_total_mb", args.max_total_mb), ("max_ratio", args.max_ratio),
+                       ("max_depth", args.max_depth), ("cpu_seconds", args.tool_cpu_seconds),
+                       ("memory_mb", args.tool_memory_mb)):
+        if value is not None:
+            limit_settings[key] = value
+    # Шаблоны из командной строки добавляются к правилам корня, ограничения - заменяют их
+    rule_settings = settings.get_scan_rules(str(directory))
+    rule_settings["include"] = rule_settings["include"] + args.include
+    rule_settings["exclude"] = rule_settings["exclude"] + args.exclude
+    for key, value in (("min_size_mb", args.min_size), ("max_size_mb", args.max_size),
+                       ("min_age_days", args.min_age), ("max_age_days", args.max_age)):
+        if value is not None:
+            rule_settings[key] = value
+    io_settings = settings.get_io_limits()
+    for key, value in (("mb_per_sec", args.io_mbps), ("iops", args.io_iops),
+                       ("nice", args.nice), ("idle_io", args.idle_io)):
+        if value is not None:
+            io_settings[key] = value
+    io_limiter = IOLimiter.from_settings(io_settings)
+    if args.io_schedule is not None:
+        try:
+            schedule = parse_schedule(args.io_schedule)
+        except ValueError as e:
+            logger.error(str(e))
+            return 2
+        io_limiter = IOLimiter(io_settings["mb_per_sec"], io_settings["iops"], schedule,
+                               io_settings["nice"], io_settings["idle_io"])
+    if io_limiter:
+        logger.info(f"Ограничение нагрузки на диск: {io_limiter}")
+    cache_settings = settings.get_page_cache()
+    if args.keep_cache:
+        cache_settings["drop_behind"] = False
+    if args.read_block_kb is not None:
+        cache_settings["block_kb"] = args.read_block_kb
+    engine = ScanEngine(directory, extensions, not args.no_recursive, threads,
+                        metrics=metrics, autotune=autotune, sampling=sampling,
+                        deduplicate=args.dedup if args.dedup is not None else settings.get_deduplicate(),
+                        limits=ResourceLimits.from_settings(limit_settings),
+                        recent_first=args.recent_first,
+                        rules=ScanRules.from_settings(rule_settings),
+                        io_limiter=io_limiter,
+                        read_hints=ReadHints.from_settings(cache_settings),
+                        passwords=PasswordStore.from_settings(settings.get_passwords(), args.passwords),
+                        quick=args.quick)
+    read_ahead_settings = settings.get_read_ahead()
+    if args.read_ahead is not None:
+        read_ahead_settings["depth"] = args.read_ahead
+    # Пул буферов рассчитывается на итоговое количество потоков проверки
+    engine.read_ahead = ReadAhead.from_settings(read_ahead_settings, engine.max_workers)
+    for folder in args.first:
+        engine.prioritize_folder(folder)
+    # Пауза и продолжение сигналами: kill -USR1 <pid> / kill -USR2 <pid>
+    if hasattr(signal, "SIGUSR1"):
+        signal_requests = queue.SimpleQueue()
+        threading.Thread(target=signal_loop, args=(engine, signal_requests), name="signals", daemon=True).start()
+        signal.signal(signal.SIGUSR1, lambda signum, frame: signal_requests.put(signum))
+        signal.signal(signal.SIGUSR2, lambda signum, frame: signal_requests.put(signum))
+    if args.control:
+        threading.Thread(target=control_loop, args=(engine, sys.stdin), name="control", daemon=True).start()
+    scrub_settings = settings.get_scrub()
+    history = None
+    if args.scrub or args.history:
+        history = VerificationHistory(args.history or scrub_settings["history_file"])
+    try:
+        if args.scrub:
+            minutes = args.scrub_minutes if args.scrub_minutes is not None else scrub_settings["minutes"]
+            max_gb = args.scrub_gb if args.scrub_gb is not None else scrub_settings["max_gb"]
+            corrupted_archives, _ = run_scrub(engine, history, int(max_gb * GB), minutes * 60)
+        else:
+            if history:
+                engine.on_archive = history.record_result
+            corrupted_archives = engine.run()
+            if history and engine.duplicates:
+                history.record_copies(engine.duplicates, engine.start_time)
+    except KeyboardInterrupt:
+        engine.stop()
+        logger.warning("Проверка прервана")
+        return 2
+    finally:
+        if history:
+            history.flush()
+        if args.metrics_linger > 0 and args.metrics_port is not None:
+            time.sleep(args.metrics_linger)
+        for exporter in exporters:
+            exporter.stop()
+
+    stats = engine.get_stats()
+    logger.info(
+        f"Проверено архивов: {stats['processed_files']} из {stats['total_files']}, "
+        f"поврежденных: {stats['corrupted_files']}, подозрительных: {stats['suspicious_files']}, "
+        f"зашифрованных: {stats['encrypted_files']}, не проверено без unrar/7z: {stats['unverified_files']}, "
+        f"время: {stats['elapsed_time']} сек."
+    )
+    if stats.get('duplicate_files'):
+        logger.info(f"Копий, получивших результат без проверки: {stats['duplicate_files']}")
+    if 'coverage' in stats:
+        logger.info(
+            f"Выборочная проверка: проверено не полностью {stats['sampled_files']} архивов, "
+            f"покрытие ZIP: {engine.checker.coverage.total}"
+        )
+    if io_limiter and io_limiter.waited:
+        logger.info(f"Ожидание из-за ограничения нагрузки на диск (сумма по потокам): {io_limiter.waited:.0f} сек.")
+    if engine.read_ahead and engine.read_ahead.prefetched:
+        logger.info(
+            f"Упреждающее чтение: прочитано заранее {engine.read_ahead.prefetched / MB:.0f} МБ, "
+            f"ожидание данных потоками проверки: {engine.read_ahead.waited:.1f} сек."
+        )
+    unverified_archives = engine.unverified_archives
+    if unverified_archives:
+        # Не влияет на код возврата: архив не поврежден по заголовкам, но и не проверен
+        logger.warning(f"Архивов, проверенных только по заголовкам (установите unrar/7z): {len(unverified_archives)}")
+    if args.report and (corrupted_archives or engine.suspicious_archives or engine.encrypted_archives
+                        or unverified_archives):
+        save_report(corrupted_archives, args.report, engine.suspicious_archives, engine.encrypted_archives,
+                    unverified_archives)
+    if args.results:
+        engine.results.save(args.results)
+        logger.info(f"Результаты сохранены в файл: {args.results}")
+    if corrupted_archives:
+        return 1
+    if engine.suspicious_archives:
+        return 3
+    return 4 if engine.encrypted_archives else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,636 @@
+import os
+import sys
+import json
+import stat
+import time
+import heapq
+import signal
+import logging
+import argparse
+import itertools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from archive_engine import ArchiveChecker, ScanEngine, get_archive_format
+from metrics import OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE, ScanMetrics
+from sampling import SamplingPolicy
+from guards import ResourceLimits
+from scan_rules import ScanRules
+from throttle import IOLimiter
+from page_cache import ReadHints
+from prefetch import ReadAhead
+from results import STATUS_CORRUPTED, STATUS_MISSING, STATUS_UNSUPPORTED, ArchiveResult
+from scrub import VerificationHistory
+from encryption import PasswordStore
+from settings_manager import SettingsManager
+
+# Настраиваем логирование
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+# Уровни проверки: full - полная распаковка, sample - выборочная проверка ZIP (раздел "sampling" настроек),
+# quick - заголовки и оглавление без распаковки
+LEVELS = ("full", "sample", "quick")
+
+# Сколько завершенных заданий хранить для запросов состояния
+MAX_FINISHED_JOBS = 1000
+
+# Наибольший размер тела POST-запроса (больше - ответ 413 без чтения тела)
+MAX_REQUEST_BYTES = 1 << 20
+
+# Состояния задания
+JOB_QUEUED = "queued"  # Поиск архивов в указанных путях
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_CANCELLED = "cancelled"
+
+
+class Job:
+    """Задание на проверку: список путей, уровень проверки, приоритет и результаты по мере готовности"""
+
+    def __init__(self, job_id: str, paths: List[str], level: str, priority: int, use_cache: bool):
+        self.id = job_id
+        self.paths = paths
+        self.level = level
+        self.priority = priority
+        self.use_cache = use_cache
+        self.state = JOB_QUEUED
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.total = 0  # Найдено архивов (растет во время поиска)
+        self.pending = 0  # Архивов ждут проверки или проверяются
+        self.results: List[ArchiveResult] = []
+        self.cached: Set[int] = set()  # Номера результатов, взятых из кеша службы
+        self.condition = threading.Condition()
+
+    @property
+    def active(self) -> bool:
+        return self.state in (JOB_QUEUED, JOB_RUNNING)
+
+    def _finish(self, state: str) -> None:
+        """Завершение задания (вызывается под condition)"""
+        self.state = state
+        self.finished = time.time()
+        self.condition.notify_all()
+
+    def add_archives(self, count: int) -> None:
+        with self.condition:
+            self.total += count
+            self.pending += count
+
+    def expanded(self) -> None:
+        """Поиск архивов закончен"""
+        with self.condition:
+            if self.state == JOB_QUEUED:
+                self.state = JOB_RUNNING
+                if not self.pending:
+                    self._finish(JOB_DONE)
+
+    def add_result(self, record: ArchiveResult, cached: bool = False) -> None:
+        """Результат проверки архива, учтенного в add_archives"""
+        with self.condition:
+            if not self.active:
+                return
+            if cached:
+                self.cached.add(len(self.results))
+            self.results.append(record)
+            self.pending -= 1
+            self.condition.notify_all()
+            if self.state == JOB_RUNNING and not self.pending:
+                self._finish(JOB_DONE)
+
+    def cancel(self) -> bool:
+        with self.condition:
+            if not self.active:
+                return False
+            self._finish(JOB_CANCELLED)
+            return True
+
+    def wait_results(self, start: int, timeout: float = 1.0) -> Tuple[List[dict], bool]:
+        """
+        Ожидание результатов, начиная с номера start
+
+        Returns:
+            Tuple[List[dict], bool]: (новые результаты в виде словарей, задание завершено)
+        """
+        with self.condition:
+            if len(self.results) <= start and self.active:
+                self.condition.wait(timeout)
+            records = [{**record.to_dict(), "cached": index in self.cached}
+                       for index, record in enumerate(self.results[start:], start)]
+            return records, not self.active
+
+    def to_dict(self) -> dict:
+        with self.condition:
+            counts: Dict[str, int] = {}
+            for record in self.results:
+                counts[record.status] = counts.get(record.status, 0) + 1
+            return {
+                "id": self.id,
+                "state": self.state,
+                "level": self.level,
+                "priority": self.priority,
+                "paths": self.paths,
+                "total": self.total,
+                "done": len(self.results),
+                "counts": counts,
+                "created": self.created,
+                "finished": self.finished,
+            }
+
+
+class VerificationDaemon:
+    """
+    Служба проверки архивов: принимает задания, держит пул потоков и проверяющие
+    объекты "прогретыми" между заданиями, кеширует результаты неизмененных архивов.
+
+    Архивы всех заданий стоят в одной очереди: сначала задания с большим приоритетом,
+    при равном приоритете - в порядке поступления. Поэтому небольшое срочное задание
+    не ждет окончания большой проверки, а только освобождения потока.
+    """
+
+    def __init__(self, settings: SettingsManager, max_workers: Optional[int] = None,
+                 history: Optional[VerificationHistory] = None, cache_size: int = 100000):
+        """
+        Args:
+            settings (SettingsManager): Настройки (расширения, ограничения, выборка, правила поиска)
+            max_workers (int): Количество потоков проверки (по умолчанию - из настроек)
+            history (VerificationHistory): История проверок, в которую записываются результаты
+            cache_size (int): Сколько результатов хранить в памяти
+        """
+        self.settings = settings
+        self.extensions = settings.get_enabled_extensions()
+        self.metrics = ScanMetrics()
+        limits = ResourceLimits.from_settings(settings.get_limits())
+        io_limiter = IOLimiter.from_settings(settings.get_io_limits())
+        read_hints = ReadHints.from_settings(settings.get_page_cache())
+        self.passwords = PasswordStore.from_settings(settings.get_passwords())
+        # Движок используется только для проверки отдельных архивов, очередью управляет служба
+        self.engine = ScanEngine(Path("."), self.extensions, max_workers=max_workers or settings.get_max_threads(),
+                                 metrics=self.metrics, limits=limits, io_limiter=io_limiter,
+                                 read_hints=read_hints, passwords=self.passwords)
+        read_ahead = ReadAhead.from_settings(settings.get_read_ahead(), self.engine.max_workers)
+        self.engine.read_ahead = read_ahead
+        sampling = SamplingPolicy.from_settings({**settings.get_sampling(), "enabled": True})
+        self.checkers = {
+            "full": ArchiveChecker(Path("."), limits=limits, io_limiter=io_limiter, read_hints=read_hints,
+                                   read_ahead=read_ahead, passwords=self.passwords),
+            "sample": ArchiveChecker(Path("."), sampling=sampling, limits=limits, io_limiter=io_limiter,
+                                     read_hints=read_hints, read_ahead=read_ahead, passwords=self.passwords),
+            "quick": ArchiveChecker(Path("."), limits=limits, io_limiter=io_limiter, read_hints=read_hints,
+                                    read_ahead=read_ahead, passwords=self.passwords, quick=True),
+        }
+        self.history = history
+        self.cache_size = cache_size
+        # (путь, размер, mtime, уровень) -> результат
+        self._cache: "OrderedDict[tuple, ArchiveResult]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._job_ids = itertools.count(1)
+        self._heap: List[tuple] = []
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._running = 0
+        self._stop = False
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.dispatcher: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Запуск пула потоков и диспетчера очереди"""
+        self.executor = ThreadPoolExecutor(max_workers=self.engine.max_workers, thread_name_prefix="verify")
+        self.dispatcher = threading.Thread(target=self._dispatch, name="dispatcher", daemon=True)
+        self.dispatcher.start()
+        self.metrics.scan_started(0, self.engine.concurrency)
+
+    def stop(self) -> None:
+        """Остановка: начатые проверки прерываются, задания отменяются"""
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        for checker in self.checkers.values():
+            checker.stop_flag = True
+            checker.resume()
+        for job in list(self.jobs.values()):
+            job.cancel()
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.engine.read_ahead:
+            self.engine.read_ahead.close()
+        if self.passwords:
+            self.passwords.flush()
+        if self.history:
+            self.history.flush()
+        self.metrics.scan_finished()
+
+    def submit(self, paths: Iterable[str], level: str = "full", priority: int = 0,
+               use_cache: bool = True, recursive: bool = True) -> Job:
+        """
+        Новое задание. Поиск архивов в директориях идет в отдельном потоке,
+        поэтому ответ возвращается сразу, а архивы попадают в очередь по мере поиска.
+
+        Args:
+            paths: Файлы архивов и директории
+            level (str): Уровень проверки (см. LEVELS)
+            priority (int): Приоритет (больше - раньше)
+            use_cache (bool): Использовать результаты предыдущих проверок неизмененных архивов
+            recursive (bool): Искать архивы в подпапках директорий
+
+        Raises:
+            ValueError: Некорректные параметры задания
+        """
+        if level not in LEVELS:
+            raise ValueError(f"Неизвестный уровень проверки: {level} (доступны: {', '.join(LEVELS)})")
+        if isinstance(paths, (str, bytes)):
+            # Строка - тоже последовательность: без проверки путями стали бы отдельные символы
+            raise ValueError("Пути передаются списком, а не строкой")
+        paths = list(paths)
+        if not paths:
+            raise ValueError("Не указаны пути для проверки")
+        if not all(isinstance(path, (str, os.PathLike)) and str(path) for path in paths):
+            raise ValueError("Пути должны быть непустыми строками")
+        paths = [str(path) for path in paths]
+        job = Job(str(next(self._job_ids)), paths, level, int(priority), bool(use_cache))
+        with self._cond:
+            self.jobs[job.id] = job
+            self._forget_finished()
+        threading.Thread(target=self._expand, args=(job, recursive), name=f"job-{job.id}", daemon=True).start()
+        logger.info(f"Задание {job.id}: {len(paths)} путей, уровень {level}, приоритет {priority}")
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Отмена задания: архивы из очереди не проверяются, начатые проверки завершаются"""
+        job = self.jobs.get(job_id)
+        if job and job.cancel():
+            logger.info(f"Задание {job.id} отменено")
+        return job
+
+    def status(self) -> dict:
+        """Состояние службы"""
+        with self._cond:
+            jobs = list(self.jobs.values())
+            return {
+                "workers": self.engine.concurrency,
+                "running": self._running,
+                "queued": len(self._heap),
+                "active_jobs": sum(job.active for job in jobs),
+                "jobs": len(jobs),
+                "cached_results": len(self._cache),
+            }
+
+    def _forget_finished(self) -> None:
+        """Удаление самых старых завершенных заданий сверх MAX_FINISHED_JOBS (под _cond)"""
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _find_archives(self, path: Path, recursive: bool) -> List[Path]:
+        rules = ScanRules.from_settings(self.settings.get_scan_rules(str(path)))
+        return ScanEngine(path, self.extensions, recursive, rules=rules).find_archives()
+
+    def _expand(self, job: Job, recursive: bool) -> None:
+        """Поиск архивов задания и постановка их в очередь"""
+        for raw_path in job.paths:
+            if not job.active:
+                return
+            path = Path(raw_path)
+            if path.is_dir():
+                archives = self._find_archives(path, recursive)
+            elif path.is_file():
+                archives = [path]
+            else:
+                job.add_archives(1)
+                job.add_result(ArchiveResult(path, get_archive_format(path), STATUS_MISSING, "Путь не найден"))
+                continue
+            job.add_archives(len(archives))
+            queued = []
+            for archive in archives:
+                record = self._cached(archive, job.level) if job.use_cache else None
+                if record:
+                    job.add_result(record, cached=True)
+                else:
+                    queued.append(archive)
+            with self._cond:
+                for archive in queued:
+                    heapq.heappush(self._heap, (-job.priority, next(self._order), job, archive))
+                self._cond.notify_all()
+            self.metrics.add_queued(len(queued))
+        job.expanded()
+
+    @staticmethod
+    def _cache_key(path: Path, level: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), st.st_size, st.st_mtime_ns, level
+
+    def _cached(self, path: Path, level: str) -> Optional[ArchiveResult]:
+        key = self._cache_key(path, level)
+        with self._cache_lock:
+            record = self._cache.get(key) if key else None
+            if record is None:
+                return None
+            self._cache.move_to_end(key)
+        return ArchiveResult(path, record.format, record.status, record.error, record.size, record.duration)
+
+    def _remember(self, key: Optional[tuple], record: ArchiveResult) -> None:
+        if not key or not self.cache_size:
+            return
+        with self._cache_lock:
+            self._cache[key] = record
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _dispatch(self) -> None:
+        """Выдача архивов в пул: в работе не больше engine.concurrency архивов"""
+        with self._cond:
+            while not self._stop:
+                while self._heap and self._running < self.engine.concurrency:
+                    _, _, job, archive = heapq.heappop(self._heap)
+                    if not job.active:
+                        self.metrics.add_queued(-1)
+                        continue
+                    self._running += 1
+                    self.executor.submit(self._verify, job, archive)
+                    if self.engine.read_ahead and self._heap:
+                        self.engine.read_ahead.warm(self._heap[0][3])
+                self._cond.wait(0.5)
+
+    def _verify(self, job: Job, archive: Path) -> None:
+        """Проверка архива задания в потоке пула"""
+        try:
+            if not job.active:
+                self.metrics.add_queued(-1)
+                return
+            key = self._cache_key(archive, job.level)
+            result = self.engine.verify_archive(archive, self.checkers[job.level])
+            if result is None:
+                if self._stop:
+                    return
+                record = ArchiveResult(archive, get_archive_format(archive), STATUS_UNSUPPORTED)
+            else:
+                is_valid, error_msg, size, duration = result
+                record = ArchiveResult.from_check(archive, get_archive_format(archive), is_valid, error_msg,
+                                                  size, duration)
+                self._remember(key, record)
+                if self.history:
+                    self.history.record_result(archive, is_valid, error_msg, duration)
+            job.add_result(record)
+        except Exception as e:
+            logger.error(f"Ошибка при проверке {archive}: {e}")
+            job.add_result(ArchiveResult(archive, get_archive_format(archive), STATUS_CORRUPTED, str(e)))
+        finally:
+            with self._cond:
+                self._running -= 1
+                self._cond.notify_all()
+
+
+def make_handler(daemon: VerificationDaemon, allowed_hosts: Optional[Iterable[str]] = None):
+    """
+    Обработчик HTTP-запросов к службе (allowed_hosts - допустимые имена в заголовке Host,
+    None - без проверки, для Unix-сокета):
+        POST   /jobs               - новое задание {"paths": [...], "level": "full", "priority": 0,
+                                     "cache": true, "recursive": true}
+        GET    /jobs               - состояние всех заданий
+        GET    /jobs/ID            - состояние задания
+        GET    /jobs/ID/results    - результаты по мере готовности (по одной JSON-записи в строке)
+                                     ?from=N - начиная с N-го, ?wait=0 - не ждать окончания задания
+        DELETE /jobs/ID            - отмена задания
+        GET    /status             - состояние службы
+        GET    /metrics            - метрики OpenMetrics/Prometheus
+
+    Проверка Host защищает от DNS rebinding (страница в браузере обращается к службе
+    под чужим именем), обязательный Content-Type: application/json у POST - от отправки
+    заданий простыми формами с других сайтов (CSRF).
+    """
+    # http.server тянет за собой email и http.client, импортируем только при запуске службы
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import parse_qs, urlsplit
+
+    hosts = {host.lower().strip("[]") for host in allowed_hosts} if allowed_hosts is not None else None
+
+    class Handler(BaseHTTPRequestHandler):
+        def send_json(handler, data, code: int = 200) -> None:
+            body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+            handler.send_response(code)
+            handler.send_header("Content-Type", "application/json; charset=utf-8")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+
+        def send_error_json(handler, code: int, message: str) -> None:
+            handler.send_json({"error": message}, code)
+
+        def check_host(handler) -> bool:
+            """Запрос адресован службе по разрешенному имени (иначе ответ 403)"""
+            if hosts is None:
+                return True
+            try:
+                host = urlsplit("//" + handler.headers.get("Host", "")).hostname
+            except ValueError:
+                host = None
+            if host not in hosts:
+                handler.send_error_json(403, "Недопустимый заголовок Host")
+                return False
+            return True
+
+        def find_job(handler, parts: List[str]) -> Optional[Job]:
+            job = daemon.jobs.get(parts[1]) if len(parts) > 1 else None
+            if job is None:
+                handler.send_error_json(404, "Задание не найдено")
+            return job
+
+        def do_GET(handler):
+            if not handler.check_host():
+                return
+            url = urlsplit(handler.path)
+            parts = [part for part in url.path.split("/") if part]
+            if parts == ["status"]:
+                handler.send_json(daemon.status())
+            elif parts == ["metrics"]:
+                openmetrics = "application/openmetrics-text" in handler.headers.get("Accept", "")
+                body = daemon.metrics.render(openmetrics).encode("utf-8")
+                handler.send_response(200)
+                handler.send_header(
+                    "Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+                )
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+            elif parts == ["jobs"]:
+                handler.send_json([job.to_dict() for job in list(daemon.jobs.values())])
+            elif len(parts) == 2 and parts[0] == "jobs":
+                job = handler.find_job(parts)
+                if job:
+                    handler.send_json(job.to_dict())
+            elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "results":
+                job = handler.find_job(parts)
+                if job:
+                    query = parse_qs(url.query)
+                    start = query.get("from", ["0"])[0]
+                    if not start.isdigit():
+                        handler.send_error_json(400, f"Некорректный параметр from: {start}")
+                        return
+                    handler.stream_results(job, int(start), query.get("wait", ["1"])[0] != "0")
+            else:
+                handler.send_error_json(404, "Неизвестный запрос")
+
+        def stream_results(handler, job: Job, start: int, follow: bool) -> None:
+            """Передача результатов строками JSON по мере готовности; конец ответа - закрытие соединения"""
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/x-ndjson; charset=utf-8")
+            handler.send_header("Connection", "close")
+            handler.end_headers()
+            position = start
+            try:
+                while True:
+                    records, finished = job.wait_results(position, 1.0 if follow else 0)
+                    for record in records:
+                        handler.wfile.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                    handler.wfile.flush()
+                    position += len(records)
+                    if (finished and not records) or not follow or daemon._stop:
+                        break
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Клиент закрыл соединение
+
+        def do_POST(handler):
+            if not handler.check_host():
+                return
+            if urlsplit(handler.path).path.rstrip("/") != "/jobs":
+                handler.send_error_json(404, "Неизвестный запрос")
+                return
+            content_type = handler.headers.get("Content-Type", "").split(";")[0].strip().lower()
+            if content_type != "application/json":
+                handler.send_error_json(415, "Задание передается в формате application/json")
+                return
+            try:
+                length = int(handler.headers.get("Content-Length", 0))
+            except ValueError:
+                handler.send_error_json(400, "Некорректный заголовок Content-Length")
+                return
+            if length < 0 or length > MAX_REQUEST_BYTES:
+                # Тело не читается, поэтому соединение закрывается
+                handler.close_connection = True
+                handler.send_error_json(413 if length > 0 else 400,
+                                        f"Размер задания должен быть от 0 до {MAX_REQUEST_BYTES} байт")
+                return
+            try:
+                request = json.loads(handler.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("задание передается объектом JSON")
+                paths = request["paths"] if "paths" in request else [request.get("path")]
+                if not isinstance(paths, list) or not paths or not all(isinstance(path, str) and path
+                                                                        for path in paths):
+                    raise ValueError("paths - непустой список строк")
+                job = daemon.submit(paths, request.get("level", "full"), request.get("priority", 0),
+                                    request.get("cache", True), request.get("recursive", True))
+            except (ValueError, TypeError, AttributeError) as e:
+                handler.send_error_json(400, f"Некорректное задание: {e}")
+                return
+            handler.send_json(job.to_dict(), 201)
+
+        def do_DELETE(handler):
+            if not handler.check_host():
+                return
+            parts = [part for part in urlsplit(handler.path).path.split("/") if part]
+            if len(parts) != 2 or parts[0] != "jobs":
+                handler.send_error_json(404, "Неизвестный запрос")
+                return
+            job = daemon.cancel(parts[1])
+            if job is None:
+                handler.send_error_json(404, "Задание не найдено")
+            else:
+                handler.send_json(job.to_dict())
+
+        def log_message(handler, format, *args):
+            logger.debug(format % args)
+
+    return Handler
+
+
+def create_server(daemon: VerificationDaemon, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                  socket_path: Optional[str] = None):
+    """
+    HTTP-сервер службы на локальном порту или на Unix-сокете (только для пользователей
+    с доступом к файлу сокета)
+
+    Raises:
+        OSError: Если порт занят или путь сокета занят файлом, который не является сокетом
+    """
+    import socketserver
+    from http.server import ThreadingHTTPServer
+
+    if socket_path:
+        class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+            daemon_threads = True
+
+        if os.path.lexists(socket_path):
+            if not stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+                raise OSError(f"{socket_path} существует и не является сокетом")
+            os.unlink(socket_path)  # Сокет от предыдущего запуска
+        # Сокет сразу создается с правами 0660: между bind и chmod к нему успели бы подключиться
+        umask = os.umask(0o117)
+        try:
+            server = UnixHTTPServer(socket_path, make_handler(daemon))
+        finally:
+            os.umask(umask)
+        logger.info(f"Служба проверки архивов слушает сокет {socket_path}")
+    else:
+        server = ThreadingHTTPServer((host, port), make_handler(daemon, {"localhost", "127.0.0.1", "::1", host}))
+        server.daemon_threads = True
+        logger.info(f"Служба проверки архивов слушает http://{host}:{server.server_address[1]}")
+    return server
+
+
+def main(argv=None) -> int:
+    """Запуск службы проверки архивов"""
+    settings = SettingsManager()
+    parser = argparse.ArgumentParser(description="Служба проверки архивов (локальный HTTP или Unix-сокет)")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес для HTTP (по умолчанию только локальный)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Порт HTTP")
+    parser.add_argument("--socket", help="Слушать Unix-сокет вместо порта")
+    parser.add_argument("--threads", type=int, help="Количество потоков проверки (по умолчанию - из настроек)")
+    parser.add_argument("--history", help="Файл истории проверок для записи результатов")
+    parser.add_argument("--cache-size", type=int, default=100000,
+                        help="Сколько результатов неизмененных архивов хранить в памяти (0 - не кешировать)")
+    args = parser.parse_args(argv)
+
+    history = VerificationHistory(args.history) if args.history else None
+    daemon = VerificationDaemon(settings, args.threads, history, args.cache_size)
+    try:
+        server = create_server(daemon, args.host, args.port, args.socket)
+    except OSError as e:
+        logger.error(f"Не удалось запустить службу: {e}")
+        return 2
+    daemon.start()
+
+    def shutdown(signum, frame):
+        # shutdown() ждет выхода из serve_forever, поэтому вызывается из другого потока
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+    logger.info("Служба проверки архивов остановлена")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
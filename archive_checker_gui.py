@@ -7,20 +7,26 @@ from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QPushButton,
     QTextEdit, QFileDialog, QProgressBar, QLabel, QMessageBox,
     QHBoxLayout, QComboBox, QSpacerItem, QSizePolicy, QLineEdit,
-    QCheckBox, QGroupBox, QGridLayout, QStyle, QStyleFactory
+    QCheckBox, QGroupBox, QGridLayout, QStyle, QStyleFactory,
+    QTreeView, QSplitter, QMenu, QTabWidget
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize
-from PyQt6.QtGui import QShortcut, QKeySequence, QIcon
-from check_archives import ArchiveChecker
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QSize, QDir
+from PyQt6.QtGui import QShortcut, QKeySequence, QIcon, QFileSystemModel
+from archive_engine import ScanEngine, logger as engine_logger
+from tracing import PhaseTracer
+from sampling import SamplingPolicy
+from guards import ResourceLimits
+from scan_rules import ScanRules
+from throttle import IOLimiter
+from page_cache import ReadHints
+from prefetch import ReadAhead
+from encryption import PasswordStore
+from autotune import available_cpu_count
 from settings_manager import SettingsManager
 from settings_dialog import SettingsDialog
+from results_view import ResultsPanel
 import logging
 from pathlib import Path
-import zipfile
-import zlib
-import subprocess
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import multiprocessing
 
 # Настраиваем логирование
 logging.basicConfig(
@@ -32,6 +38,12 @@ logger = logging.getLogger(__name__)
 # Версия программы
 VERSION = "1.0.0"
 
+# Пункт списка потоков, включающий автоподбор
+AUTO_THREADS = "Авто"
+
+# "Недавно измененные" архивы для поднятия в очереди - за последние сутки
+RECENT_AGE = 24 * 3600
+
 class ArchiveCheckerWorker(QThread):
     """
     Отдельный поток для проверки архивов
@@ -41,173 +53,78 @@ class ArchiveCheckerWorker(QThread):
     finished_signal = pyqtSignal(dict)
     stats_signal = pyqtSignal(dict)
     
-    def __init__(self, directory, extensions, recursive=True, max_workers=None):
+    def __init__(self, directory, extensions, recursive=True, max_workers=None, tracer=None, autotune=False,
+                 sampling=None, deduplicate=False, limits=None, recent_first=False, rules=None,
+                 io_limiter=None, read_hints=None, read_ahead_settings=None, passwords=None):
         super().__init__()
         self.directory = directory
         self.extensions = extensions
         self.recursive = recursive
-        self.start_time = None
-        self.total_files = 0
-        self.processed_files = 0
-        self.stop_flag = False
-        self.executor = None  # Сохраняем ссылку на executor
-        # Если max_workers не указано, используем количество ядер процессора
-        self.max_workers = max_workers or max(1, multiprocessing.cpu_count() - 1)
+        # Вся логика проверки находится в движке, поток только передает сигналы
+        self.engine = ScanEngine(directory, extensions, recursive, max_workers, tracer,
+                                 autotune=autotune, sampling=sampling, deduplicate=deduplicate,
+                                 limits=limits, recent_first=recent_first, rules=rules,
+                                 io_limiter=io_limiter, read_hints=read_hints, passwords=passwords)
+        if read_ahead_settings:
+            self.engine.read_ahead = ReadAhead.from_settings(read_ahead_settings, self.engine.max_workers)
+        self.engine.on_progress = self.progress_percent_signal.emit
+        self.engine.on_stats = self.stats_signal.emit
+        self.max_workers = self.engine.max_workers
         
         # Создаем handler для отправки логов в GUI
         self.log_handler = GUILogHandler(self.progress_signal)
         self.logger = logging.getLogger(__name__)
         self.logger.addHandler(self.log_handler)
+        engine_logger.addHandler(self.log_handler)
 
     def stop(self):
         """Остановка проверки"""
-        self.stop_flag = True
         self.logger.info("Остановка проверки...")
-        if self.executor:
-            self.executor.shutdown(wait=False)  # Принудительно завершаем все задачи
+        self.engine.stop()
 
     def force_stop(self):
         """Принудительная остановка всех процессов"""
-        self.stop_flag = True
-        if self.executor:
-            # Принудительно завершаем все задачи
-            self.executor.shutdown(wait=False)
+        self.engine.stop()
         # Принудительно завершаем текущий поток
         self.terminate()
 
-    def count_archives(self):
-        """
-        Подсчет общего количества архивов в директории
-        """
-        count = 0
-        if self.recursive:
-            for root, _, files in os.walk(self.directory):
-                count += sum(1 for f in files if any(f.lower().endswith(ext.lower()) for ext in self.extensions))
-        else:
-            files = os.listdir(self.directory)
-            count = sum(1 for f in files if any(f.lower().endswith(ext.lower()) for ext in self.extensions))
-        return count
-
-    def process_archive(self, file_path, checker):
-        """
-        Обработка одного архива в отдельном потоке
-        """
-        if self.stop_flag:
-            return None
-            
-        # Определяем метод проверки
-        check_methods = {
-            '.zip': checker.check_zip,
-            '.7z': checker.check_7z,
-            '.rar': checker.check_rar,
-            '.r00': checker.check_rar,
-            '.part1.rar': checker.check_rar,
-            '.001': checker.check_rar
-        }
-        
-        check_method = None
-        for ext, method in check_methods.items():
-            if file_path.name.lower().endswith(ext):
-                check_method = method
-                break
-        
-        if check_method:
-            try:
-                # Периодически проверяем stop_flag во время проверки
-                checker.stop_flag = self.stop_flag
-                is_valid, error_msg = check_method(file_path)
-                
-                # Проверяем stop_flag после длительной операции
-                if self.stop_flag:
-                    return None
-                
-                # Обновляем прогресс
-                self.processed_files += 1
-                progress = int((self.processed_files / self.total_files) * 100)
-                self.progress_percent_signal.emit(progress)
-                
-                # Обновляем статистику
-                elapsed_time = time.time() - self.start_time
-                stats = {
-                    'total_files': self.total_files,
-                    'processed_files': self.processed_files,
-                    'corrupted_files': 0,  # Будет обновлено позже
-                    'elapsed_time': int(elapsed_time),
-                    'avg_time_per_file': round(elapsed_time / self.processed_files, 2) if self.processed_files > 0 else 0
-                }
-                self.stats_signal.emit(stats)
-                
-                if not is_valid:
-                    self.logger.error(f"Проверка архива: {file_path.name}; Ошибка: {error_msg}")
-                    return str(file_path), error_msg
-                else:
-                    self.logger.info(f"Проверка архива: {file_path.name}; OK!")
-                    return None
-            except Exception as e:
-                if not self.stop_flag:  # Логируем ошибку только если это не остановка
-                    self.logger.error(f"Ошибка при проверке {file_path.name}: {str(e)}")
-                return str(file_path), str(e)
-        return None
-
     def run(self):
         try:
-            self.start_time = time.time()
-            self.total_files = self.count_archives()
-            self.processed_files = 0
-            self.stop_flag = False
-            
-            checker = ArchiveChecker(self.directory)
-            corrupted_archives = {}
-            
-            # Собираем список всех архивов для проверки
-            archives_to_check = []
-            if self.recursive:
-                for file_path in self.directory.rglob("*"):
-                    if any(file_path.name.lower().endswith(ext.lower()) for ext in self.extensions):
-                        archives_to_check.append(file_path)
-            else:
-                for file_path in self.directory.iterdir():
-                    if file_path.is_file() and any(file_path.name.lower().endswith(ext.lower()) for ext in self.extensions):
-                        archives_to_check.append(file_path)
-            
-            # Создаем пул потоков для параллельной обработки
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                self.executor = executor  # Сохраняем ссылку на executor
-                # Запускаем задачи на проверку архивов
-                future_to_archive = {
-                    executor.submit(self.process_archive, archive, checker): archive
-                    for archive in archives_to_check
-                }
-                
-                # Собираем результаты по мере их готовности
-                for future in as_completed(future_to_archive):
-                    if self.stop_flag:
-                        executor.shutdown(wait=False)
-                        break
-                        
-                    result = future.result()
-                    if result:
-                        file_path, error_msg = result
-                        corrupted_archives[file_path] = error_msg
-                        
-                        # Обновляем статистику поврежденных файлов
-                        stats = {
-                            'total_files': self.total_files,
-                            'processed_files': self.processed_files,
-                            'corrupted_files': len(corrupted_archives),
-                            'elapsed_time': int(time.time() - self.start_time),
-                            'avg_time_per_file': round((time.time() - self.start_time) / self.processed_files, 2) if self.processed_files > 0 else 0
-                        }
-                        self.stats_signal.emit(stats)
-            
+            corrupted_archives = self.engine.run()
             self.finished_signal.emit(corrupted_archives)
-            
         except Exception as e:
             self.logger.error(f"Ошибка: {str(e)}")
             self.finished_signal.emit({})
         finally:
-            self.executor = None
             self.logger.removeHandler(self.log_handler)
+            engine_logger.removeHandler(self.log_handler)
+
+class ReverifyWorker(QThread):
+    """
+    Повторная проверка выбранных архивов движком завершенной проверки
+    """
+    progress_signal = pyqtSignal(str)
+    finished_signal = pyqtSignal(int)
+
+    def __init__(self, engine, paths):
+        super().__init__()
+        self.engine = engine
+        self.paths = [Path(path) for path in paths]
+        self.log_handler = GUILogHandler(self.progress_signal)
+        engine_logger.addHandler(self.log_handler)
+
+    def stop(self):
+        self.engine.stop()
+
+    def run(self):
+        checked = 0
+        try:
+            checked = self.engine.reverify(self.paths)
+        except Exception as e:
+            engine_logger.error(f"Ошибка: {str(e)}")
+        finally:
+            engine_logger.removeHandler(self.log_handler)
+            self.finished_signal.emit(checked)
 
 class GUILogHandler(logging.Handler):
     def __init__(self, signal):
@@ -251,6 +168,9 @@ class MainWindow(QMainWindow):
         # Флаг для отслеживания состояния проверки
         self.is_checking = False
         
+        # Замер фаз проверки (включается флажком, в том числе во время проверки)
+        self.tracer = PhaseTracer()
+        
         self.setup_ui(layout)
         self.current_stats = {}
         
@@ -266,6 +186,8 @@ class MainWindow(QMainWindow):
         QShortcut(QKeySequence("Ctrl+S"), self).activated.connect(self.start_check)
         # Ctrl+X для остановки
         QShortcut(QKeySequence("Ctrl+X"), self).activated.connect(self.stop_check)
+        # Ctrl+P для паузы и продолжения
+        QShortcut(QKeySequence("Ctrl+P"), self).activated.connect(self.toggle_pause)
         # Ctrl+Q для выхода
         QShortcut(QKeySequence("Ctrl+Q"), self).activated.connect(self.confirm_exit)
 
@@ -304,13 +226,25 @@ class MainWindow(QMainWindow):
         self.report_format.addItems(["TXT", "CSV", "HTML", "JSON"])
         options_layout.addWidget(self.report_format)
         
+        # Флажок замера фаз проверки
+        self.trace_check = QCheckBox("Замер фаз")
+        self.trace_check.setToolTip("Время по фазам проверки в отчете и трасса для chrome://tracing")
+        self.trace_check.toggled.connect(self.toggle_tracing)
+        options_layout.addWidget(self.trace_check)
+        
+        # Флажок порядка проверки
+        self.recent_first_check = QCheckBox("Сначала новые")
+        self.recent_first_check.setToolTip("Проверять недавно измененные архивы раньше остальных")
+        options_layout.addWidget(self.recent_first_check)
+        
         # Добавляем растяжку между элементами
         options_layout.addStretch()
         
         # Выбор количества потоков
         options_layout.addWidget(QLabel("Количество потоков:"))
         self.threads_combo = QComboBox()
-        self.threads_combo.addItems([str(i) for i in range(1, self.max_workers + 1)])
+        self.threads_combo.addItem(AUTO_THREADS)
+        self.threads_combo.addItems([str(i) for i in range(1, max(self.max_workers, available_cpu_count() * 2) + 1)])
         self.threads_combo.setCurrentText(str(self.max_workers))
         options_layout.addWidget(self.threads_combo)
         
@@ -319,14 +253,34 @@ class MainWindow(QMainWindow):
         dir_group.setLayout(dir_layout)
         layout.addWidget(dir_group)
         
-        # Область лога
-        log_group = QGroupBox("Лог проверки")
+        # Дерево папок (через контекстное меню папку можно проверить первой), лог и таблица результатов
+        log_group = QGroupBox("Лог и результаты проверки")
         log_layout = QVBoxLayout()
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.folder_model = QFileSystemModel()
+        self.folder_model.setFilter(QDir.Filter.AllDirs | QDir.Filter.NoDotAndDotDot)
+        self.folder_tree = QTreeView()
+        self.folder_tree.setModel(self.folder_model)
+        for column in range(1, self.folder_model.columnCount()):
+            self.folder_tree.hideColumn(column)
+        self.folder_tree.setHeaderHidden(True)
+        self.folder_tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.folder_tree.customContextMenuRequested.connect(self.show_folder_menu)
+        splitter.addWidget(self.folder_tree)
         self.log_area = QTextEdit()
         self.log_area.setReadOnly(True)
-        log_layout.addWidget(self.log_area)
+        self.results_panel = ResultsPanel()
+        self.results_panel.reverify_requested.connect(self.reverify_archives)
+        self.results_panel.set_reverify_enabled(False)
+        self.tabs = QTabWidget()
+        self.tabs.addTab(self.log_area, "Лог")
+        self.tabs.addTab(self.results_panel, "Результаты")
+        splitter.addWidget(self.tabs)
+        splitter.setStretchFactor(1, 3)
+        log_layout.addWidget(splitter)
         log_group.setLayout(log_layout)
         layout.addWidget(log_group)
+        self.dir_edit.textChanged.connect(self.update_folder_tree)
         
         # Прогресс и статистика
         progress_group = QGroupBox("Прогресс и статистика")
@@ -368,6 +322,10 @@ class MainWindow(QMainWindow):
         self.stop_btn.clicked.connect(self.stop_check)
         self.stop_btn.hide()  # Изначально скрыта
         center_layout.addWidget(self.stop_btn)
+        self.pause_btn = QPushButton("Пауза (Ctrl+P)")
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.pause_btn.hide()  # Изначально скрыта
+        center_layout.addWidget(self.pause_btn)
         center_layout.addStretch()
         buttons_layout.addLayout(center_layout)
         
@@ -413,25 +371,68 @@ class MainWindow(QMainWindow):
         
         # Устанавливаем количество потоков
         max_threads = self.settings_manager.get_max_threads()
+        if self.settings_manager.get_auto_threads():
+            max_threads = AUTO_THREADS
         index = self.threads_combo.findText(str(max_threads))
         if index >= 0:
             self.threads_combo.setCurrentIndex(index)
 
+    def update_folder_tree(self, directory):
+        """Показ в дереве подпапок выбранной директории"""
+        if os.path.isdir(directory):
+            self.folder_tree.setRootIndex(self.folder_model.setRootPath(directory))
+
+    def show_folder_menu(self, position):
+        """Контекстное меню дерева папок: изменение порядка проверки"""
+        index = self.folder_tree.indexAt(position)
+        checking = self.is_checking and hasattr(self, 'worker')
+        menu = QMenu(self)
+        first_action = menu.addAction("Проверить эту папку первой")
+        first_action.setEnabled(checking and index.isValid())
+        recent_action = menu.addAction("Проверить первыми архивы, измененные за сутки")
+        recent_action.setEnabled(checking)
+        action = menu.exec(self.folder_tree.viewport().mapToGlobal(position))
+        if action is first_action:
+            self.worker.engine.prioritize_folder(self.folder_model.filePath(index))
+        elif action is recent_action:
+            self.worker.engine.prioritize_recent(RECENT_AGE)
+
     def show_settings(self):
         """Показ диалога настроек"""
         dialog = SettingsDialog(self.settings_manager, self)
         if dialog.exec():
             self.load_settings()
 
+    def toggle_tracing(self, enabled):
+        """Включение/выключение замера фаз (действует сразу, в том числе во время проверки)"""
+        self.tracer.enabled = enabled
+
     def get_extensions(self):
         """Получение списка расширений из поля ввода"""
         return [ext.strip().lower() for ext in self.ext_edit.text().split(",") if ext.strip()]
     
+    def toggle_pause(self):
+        """Пауза проверки (начатые проверки приостанавливаются) и ее продолжение"""
+        if not self.is_checking or not hasattr(self, 'worker'):
+            return
+        engine = self.worker.engine
+        if engine.paused:
+            engine.resume()
+            self.pause_btn.setText("Пауза (Ctrl+P)")
+        else:
+            engine.pause()
+            self.pause_btn.setText("Продолжить (Ctrl+P)")
+
     def stop_check(self):
         """Остановка проверки архивов"""
         # Проверяем, идет ли проверка
         if not self.is_checking:
             return
+        
+        # Повторная проверка останавливается без ожидания, завершение - в reverify_finished
+        if hasattr(self, 'reverify_worker') and self.reverify_worker.isRunning():
+            self.reverify_worker.stop()
+            return
             
         if hasattr(self, 'worker') and self.worker.isRunning():
             # Сначала пробуем остановить мягко
@@ -452,6 +453,7 @@ class MainWindow(QMainWindow):
                 self.log_area.append('<span style="color: #ff6b6b;">Проверка остановлена.</span>')
             
             self.stop_btn.hide()
+            self.pause_btn.hide()
             
             # Включаем элементы управления
             self.dir_edit.setEnabled(True)
@@ -462,10 +464,33 @@ class MainWindow(QMainWindow):
             self.ext_edit.setEnabled(True)
             self.start_btn.setEnabled(True)
             self.start_btn.setText("Начать проверку (Ctrl+S)")
+            self.results_panel.stop_updates()
+            self.results_panel.set_reverify_enabled(True)
             
             # Сбрасываем флаг проверки
             self.is_checking = False
 
+    def reverify_archives(self, paths):
+        """Повторная проверка архивов, выбранных в таблице результатов"""
+        if self.is_checking or not hasattr(self, 'worker'):
+            return
+        self.is_checking = True
+        self.start_btn.setEnabled(False)
+        self.results_panel.set_reverify_enabled(False)
+        self.log_area.append(f"Повторная проверка архивов: {len(paths)}")
+        self.reverify_worker = ReverifyWorker(self.worker.engine, paths)
+        self.reverify_worker.progress_signal.connect(self.update_log)
+        self.reverify_worker.finished_signal.connect(self.reverify_finished)
+        self.results_panel.timer.start()
+        self.reverify_worker.start()
+
+    def reverify_finished(self, checked):
+        self.is_checking = False
+        self.start_btn.setEnabled(True)
+        self.results_panel.stop_updates()
+        self.results_panel.set_reverify_enabled(True)
+        self.log_area.append(f"Повторно проверено архивов: {checked}")
+
     def start_check(self):
         """Запуск проверки архивов"""
         # Проверяем, не идет ли уже проверка
@@ -496,21 +521,39 @@ class MainWindow(QMainWindow):
         self.start_btn.setText("Проверка...")
         self.stop_btn.show()
         self.stop_btn.setEnabled(True)
+        self.pause_btn.setText("Пауза (Ctrl+P)")
+        self.pause_btn.show()
         
         # Очищаем предыдущие результаты
         self.log_area.clear()
+        self.tracer.clear()
         self.progress_bar.setValue(0)
         self.progress_bar.show()
         self.progress_label.show()
         
         # Запускаем проверку в отдельном потоке
+        auto_threads = self.threads_combo.currentText() == AUTO_THREADS
         self.worker = ArchiveCheckerWorker(
             Path(directory),
             self.get_extensions(),
             self.recursive_check.isChecked(),
-            int(self.threads_combo.currentText())
+            None if auto_threads else int(self.threads_combo.currentText()),
+            self.tracer,
+            autotune=auto_threads,
+            sampling=SamplingPolicy.from_settings(self.settings_manager.get_sampling()),
+            deduplicate=self.settings_manager.get_deduplicate(),
+            limits=ResourceLimits.from_settings(self.settings_manager.get_limits()),
+            recent_first=self.recent_first_check.isChecked(),
+            rules=ScanRules.from_settings(self.settings_manager.get_scan_rules(directory)),
+            io_limiter=IOLimiter.from_settings(self.settings_manager.get_io_limits()),
+            read_hints=ReadHints.from_settings(self.settings_manager.get_page_cache()),
+            read_ahead_settings=self.settings_manager.get_read_ahead(),
+            passwords=PasswordStore.from_settings(self.settings_manager.get_passwords())
         )
         
+        self.results_panel.set_reverify_enabled(False)
+        self.results_panel.set_store(self.worker.engine.results)
+        
         # Подключаем сигналы
         self.worker.progress_signal.connect(self.update_log)
         self.worker.progress_percent_signal.connect(self.update_progress)
@@ -529,9 +572,20 @@ class MainWindow(QMainWindow):
             f"Всего файлов: {stats.get('total_files', 0)}\n"
             f"Обработано файлов: {stats.get('processed_files', 0)}\n"
             f"Поврежденных файлов: {stats.get('corrupted_files', 0)}\n"
+            f"Подозрительных файлов: {stats.get('suspicious_files', 0)}\n"
+            f"Зашифрованных файлов: {stats.get('encrypted_files', 0)}\n"
+            f"Не проверено (нет unrar/7z): {stats.get('unverified_files', 0)}\n"
             f"Затраченное время: {stats.get('elapsed_time', 0)} сек.\n"
-            f"Среднее время на файл: {stats.get('avg_time_per_file', 0)} сек."
+            f"Среднее время на файл: {stats.get('avg_time_per_file', 0)} сек.\n"
+            f"Потоков: {stats.get('workers', 0)}"
         )
+        if stats.get('duplicate_files'):
+            stats_text += f"\nКопий (без проверки): {stats['duplicate_files']}"
+        if 'coverage' in stats:
+            stats_text += (
+                f"\nВыборочно проверено архивов: {stats['sampled_files']}, "
+                f"покрытие: {stats['coverage']}%"
+            )
         self.stats_label.setText(f"Статистика проверки:\n{stats_text}")
     
     def update_progress(self, percent):
@@ -578,6 +632,12 @@ class MainWindow(QMainWindow):
                 f.write(f"{key}: {value}\n")
             f.write("\n")
             
+            # Время по фазам проверки
+            if self.tracer.events:
+                f.write("Время по фазам проверки:\n")
+                f.write("-" * 20 + "\n")
+                f.write(self.tracer.format_histograms() + "\n\n")
+            
             # Поврежденные архивы
             f.write("Поврежденные архивы:\n")
             f.write("-" * 20 + "\n")
@@ -629,6 +689,8 @@ class MainWindow(QMainWindow):
                 f.write(f'    "total_files": {report_data["total_files"]},\n')
                 f.write(f'    "processed_files": {report_data["processed_files"]},\n')
                 f.write(f'    "corrupted_files": {report_data["corrupted_files"]},\n')
+                if self.tracer.events:
+                    f.write(f'    "phase_stats": {json.dumps(self.tracer.histograms(), ensure_ascii=False)},\n')
                 f.write('    "corrupted_archives": [\n')
                 
                 # Записываем информацию о каждом поврежденном архиве
@@ -714,6 +776,7 @@ class MainWindow(QMainWindow):
             <p><strong>Обработано файлов:</strong> {self.current_stats.get('processed_files', 0)}</p>
             <p><strong>Найдено поврежденных архивов:</strong> {len(corrupted_archives)}</p>
         </div>
+        {f"<h2>Время по фазам проверки</h2><pre>{self.tracer.format_histograms()}</pre>" if self.tracer.events else ""}
         
         <h2>Список поврежденных архивов</h2>
         <table>
@@ -766,9 +829,12 @@ class MainWindow(QMainWindow):
         self.start_btn.setText("Начать проверку (Ctrl+S)")
         self.stop_btn.hide()
         self.stop_btn.setEnabled(False)
+        self.pause_btn.hide()
         
         # Сбрасываем флаг проверки
         self.is_checking = False
+        self.results_panel.stop_updates()
+        self.results_panel.set_reverify_enabled(True)
         
         # Скрываем прогресс-бар
         self.progress_bar.hide()
@@ -785,11 +851,18 @@ class MainWindow(QMainWindow):
             f"Всего файлов: {total_files}\n"
             f"Обработано файлов: {processed_files}\n"
             f"Поврежденных архивов: {len(corrupted_archives)}\n"
+            f"Подозрительных архивов: {len(self.worker.engine.suspicious_archives)}\n"
+            f"Зашифрованных архивов (не проверены): {len(self.worker.engine.encrypted_archives)}\n"
+            f"Проверено только по заголовкам (нет unrar/7z): {len(self.worker.engine.unverified_archives)}\n"
             f"Затраченное время: {elapsed_time} сек.\n"
             f"Среднее время на файл: {avg_time} сек.\n"
         )
         self.log_area.append(stats_text)
         
+        # Статистика по фазам, если замер был включен
+        if self.tracer.events:
+            self.log_area.append(f"<pre>Время по фазам проверки:\n{self.tracer.format_histograms()}</pre>")
+        
         # Если есть поврежденные архивы, предлагаем сохранить отчет
         if corrupted_archives:
             reply = QMessageBox.question(
@@ -822,6 +895,12 @@ class MainWindow(QMainWindow):
                     elif file_path.lower().endswith('.json'):
                         success = self.save_report_json(corrupted_archives, file_path)
                     
+                    # Рядом с отчетом сохраняем трассу для chrome://tracing
+                    if self.tracer.events:
+                        trace_path = str(Path(file_path).with_suffix('.trace.json'))
+                        self.tracer.export_chrome_trace(trace_path)
+                        self.log_area.append(f"Трасса сохранена в {trace_path}")
+                    
                     if not success:
                         QMessageBox.warning(
                             self,
@@ -848,6 +927,9 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         """Обработка закрытия окна"""
+        if hasattr(self, 'reverify_worker') and self.reverify_worker.isRunning():
+            self.reverify_worker.stop()
+            self.reverify_worker.wait(3000)
         if hasattr(self, 'worker') and self.worker.isRunning():
             reply = QMessageBox.question(
                 self,
@@ -868,153 +950,6 @@ class MainWindow(QMainWindow):
         else:
             event.accept()
 
-class ArchiveChecker:
-    """Класс для проверки целостности архивов"""
-    
-    def __init__(self, directory):
-        self.directory = directory
-        self.stop_flag = False  # Флаг для остановки проверки
-        
-    def find_multipart_files(self, base_file):
-        """
-        Поиск всех частей многотомного архива
-        """
-        base_path = Path(base_file)
-        base_name = base_path.stem
-        directory = base_path.parent
-        
-        # Шаблоны для разных форматов многотомных архивов
-        patterns = [
-            # ZIP: name.z01, name.z02, ..., name.zip
-            (f"{base_name}.z[0-9][0-9]", f"{base_name}.zip"),
-            # RAR: name.part1.rar, name.part2.rar, ...
-            (f"{base_name}.part[0-9]*.rar", None),
-            # RAR (старый формат): name.r00, name.r01, ..., name.rar
-            (f"{base_name}.r[0-9][0-9]", f"{base_name}.rar"),
-            # 7z: name.001, name.002, ..., name.7z
-            (f"{base_name}.[0-9][0-9][0-9]", f"{base_name}.7z")
-        ]
-        
-        found_parts = []
-        for pattern, last_part in patterns:
-            parts = list(directory.glob(pattern))
-            if parts:
-                if last_part:
-                    last = directory / last_part
-                    if last.exists():
-                        parts.append(last)
-                found_parts.extend(parts)
-                break
-        
-        return sorted(found_parts) if found_parts else []
-
-    def check_multipart_sequence(self, parts):
-        """
-        Проверка последовательности частей многотомного архива
-        """
-        if not parts:
-            return False, "Не найдены части многотомного архива"
-            
-        # Определяем формат по первому файлу
-        first_part = parts[0].name
-        base_name = parts[0].stem
-        
-        if first_part.endswith('.z01'):  # ZIP
-            expected = [f"{base_name}.z{i:02d}" for i in range(1, len(parts))]
-            expected.append(f"{base_name}.zip")
-        elif '.part' in first_part:  # RAR (новый формат)
-            expected = [f"{base_name}.part{i}.rar" for i in range(1, len(parts) + 1)]
-        elif first_part.endswith('.r00'):  # RAR (старый формат)
-            expected = [f"{base_name}.r{i:02d}" for i in range(0, len(parts) - 1)]
-            expected.append(f"{base_name}.rar")
-        elif first_part.endswith('.001'):  # 7z
-            expected = [f"{base_name}.{i:03d}" for i in range(1, len(parts))]
-            expected.append(f"{base_name}.7z")
-        else:
-            return False, "Неизвестный формат многотомного архива"
-            
-        actual = [p.name for p in parts]
-        missing = set(expected) - set(actual)
-        
-        if missing:
-            return False, f"Отсутствуют части архива: {', '.join(sorted(missing))}"
-            
-        return True, ""
-
-    def check_zip(self, file_path):
-        """Проверка ZIP архива"""
-        try:
-            with zipfile.ZipFile(file_path, 'r') as zip_file:
-                # Проверяем каждый файл в архиве
-                for file_info in zip_file.infolist():
-                    if self.stop_flag:  # Проверяем флаг остановки
-                        return False, "Проверка прервана пользователем"
-                    try:
-                        # Проверяем CRC32
-                        with zip_file.open(file_info.filename) as f:
-                            while f.read(8192):  # Читаем по частям
-                                if self.stop_flag:  # Проверяем флаг остановки
-                                    return False, "Проверка прервана пользователем"
-                    except (zipfile.BadZipFile, zlib.error) as e:
-                        return False, f"Ошибка CRC в файле {file_info.filename}: {str(e)}"
-                return True, None
-        except zipfile.BadZipFile as e:
-            return False, f"Поврежденный ZIP архив: {str(e)}"
-        except Exception as e:
-            return False, f"Ошибка при проверке архива: {str(e)}"
-            
-    def check_rar(self, file_path):
-        """Проверка RAR архива"""
-        try:
-            # Проверяем наличие мультичастей
-            parts = self.find_multipart_files(file_path)
-            if parts:
-                if self.stop_flag:  # Проверяем флаг остановки
-                    return False, "Проверка прервана пользователем"
-                return self.check_multipart_sequence(parts)
-            
-            # Проверяем с помощью unrar
-            result = subprocess.run(
-                ['unrar', 't', '-inul', str(file_path)],
-                capture_output=True,
-                text=True
-            )
-            
-            if self.stop_flag:  # Проверяем флаг остановки
-                return False, "Проверка прервана пользователем"
-                
-            if result.returncode != 0:
-                return False, f"Ошибка в RAR архиве: {result.stderr}"
-            return True, None
-        except Exception as e:
-            return False, f"Ошибка при проверке архива: {str(e)}"
-            
-    def check_7z(self, file_path):
-        """Проверка 7Z архива"""
-        try:
-            # Проверяем наличие мультичастей
-            parts = self.find_multipart_files(file_path)
-            if parts:
-                if self.stop_flag:  # Проверяем флаг остановки
-                    return False, "Проверка прервана пользователем"
-                return self.check_multipart_sequence(parts)
-            
-            # Проверяем с помощью 7z
-            result = subprocess.run(
-                ['7z', 't', str(file_path)],
-                capture_output=True,
-                text=True
-            )
-            
-            if self.stop_flag:  # Проверяем флаг остановки
-                return False, "Проверка прервана пользователем"
-                
-            if result.returncode != 0:
-                return False, f"Ошибка в 7Z архиве: {result.stderr}"
-            return True, None
-        except Exception as e:
-            return False, f"Ошибка при проверке архива: {str(e)}"
-
 def main():
     try:
         print("Проверка наличия DISPLAY...")
@@ -0,0 +1,1228 @@
+import io
+import os
+import time
+import zlib
+import logging
+import threading
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from tracing import PhaseTracer
+from metrics import ScanMetrics
+from autotune import ConcurrencyController, available_cpu_count
+from format_backends import backend_for_path, get_backend, load_module
+from stream_verifiers import verify_stream
+from sampling import CoverageLog, SampleCoverage, SamplingPolicy
+from dedup import DedupInterrupted, DuplicateGroups, find_duplicates
+from scheduler import ArchiveQueue
+from results import (
+    STATUS_CORRUPTED, STATUS_ENCRYPTED, STATUS_SUSPICIOUS, STATUS_UNVERIFIED, STOPPED_MESSAGE, ErrorMessage,
+    ResultStore, error_class_of, result_status
+)
+from scan_rules import ScanRules
+from throttle import IOLimiter, open_archive_file
+from page_cache import ReadHints
+from prefetch import ReadAhead
+from encryption import EncryptedMessage, PasswordStore, is_encrypted_result, zip_encrypted_members
+from rar_headers import RarFormatError, check_rar_file
+from sevenzip_headers import SevenZipFormatError, check_7z_file
+from zip_directory import ZIP_STORED, ZipFormatError, local_data_offset, read_directory
+from parallel_crc import PARALLEL_CRC_MIN_BYTES, parallel_crc32
+from guards import (
+    ChildProcesses, DecompressionBudget, ResourceLimits, SuspiciousArchive, limit_violation, run_limited
+)
+
+logger = logging.getLogger(__name__)
+
+# Минимальный размер локального заголовка файла в ZIP
+ZIP_LOCAL_HEADER_SIZE = 30
+
+# Вложенные ZIP архивы до этого размера проверяются рекурсивно (распаковываются в память)
+NESTED_ZIP_MAX_BYTES = 256 << 20
+
+# Метод сжатия записи ZIP, зашифрованной AES (WinZip)
+ZIP_AES = 99
+
+# Сколько зашифрованных файлов ZIP проверяется при подборе пароля
+ZIP_PASSWORD_PROBES = 3
+
+# Флаг ZIP: имя файла в кодировке UTF-8
+ZIP_FLAG_UTF8 = 0x800
+
+# Оглавления ZIP с таким числом записей читаются в массивы NumPy (zip_directory), а не в ZipInfo;
+# при быстрой проверке - любые оглавления
+ZIP_VECTOR_MIN_ENTRIES = 20000
+
+
+class ZipPasswordMismatch(Exception):
+    """Зашифрованный файл ZIP не распаковался с паролем, прошедшим проверочные байты"""
+
+
+def tool_missing(tool: str, file_path) -> Tuple[None, ErrorMessage]:
+    """
+    Результат полной проверки без внешней программы: архив не поврежден по заголовкам,
+    но данные не проверены (состояние STATUS_UNVERIFIED: не исправный и не подозрительный)
+    """
+    logger.warning(f"{tool} не найден: {Path(file_path).name} проверен только по заголовкам")
+    return None, ErrorMessage("unverified", f"Не проверен: программа {tool} не найдена (проверены только заголовки)")
+
+
+def get_archive_format(file_path) -> Optional[str]:
+    """Определение формата архива по имени файла"""
+    backend = backend_for_path(file_path)
+    return backend.name if backend else None
+
+
+class ArchiveChecker:
+    """
+    Класс для проверки целостности архивов.
+    Методы check_* возвращают (результат, сообщение): True - архив корректен,
+    False - поврежден, None - подозрителен (нарушены ограничения ResourceLimits).
+    Сообщение - ErrorMessage с классом ошибки (см. results.ERROR_CLASSES).
+    При быстрой проверке (quick) форматы с FormatBackend.supports_quick проверяются
+    по заголовкам и оглавлению без распаковки данных, остальные - полностью.
+    """
+
+    def __init__(self, directory, tracer: Optional[PhaseTracer] = None,
+                 sampling: Optional[SamplingPolicy] = None, limits: Optional[ResourceLimits] = None,
+                 io_limiter: Optional[IOLimiter] = None, read_hints: Optional[ReadHints] = None,
+                 read_ahead: Optional[ReadAhead] = None, passwords: Optional[PasswordStore] = None,
+                 quick: bool = False):
+        self.directory = directory
+        self.quick = quick  # Быстрая проверка без распаковки (см. quick_for)
+        self.stop_flag = False  # Флаг для остановки проверки
+        self.tracer = tracer or PhaseTracer()  # Замер фаз (по умолчанию выключен)
+        self.sampling = sampling if sampling and sampling.enabled else None  # Выборочная проверка ZIP
+        self.coverage = CoverageLog()
+        self.limits = limits or ResourceLimits()  # Защита от zip-бомб
+        self.io_limiter = io_limiter  # Ограничение нагрузки на диск
+        self.read_hints = read_hints  # Подсказки кешу страниц при чтении в процессе
+        self.read_ahead = read_ahead  # Упреждающее чтение в потоках ввода-вывода
+        self.passwords = passwords  # Пароли зашифрованных архивов
+        # Запущенные 7z, unrar, распаковщики
+        self.children = ChildProcesses(io_limiter.nice, io_limiter.idle_io) if io_limiter else ChildProcesses()
+        self._running = threading.Event()  # Сброшен, пока проверка приостановлена
+        self._running.set()
+
+    def quick_for(self, fmt: str) -> bool:
+        """Быстрая проверка формата: включена и формат ее поддерживает (FormatBackend.supports_quick)"""
+        backend = get_backend(fmt)
+        return self.quick and backend is not None and backend.supports_quick
+
+    def parallel_members(self, fmt: str) -> bool:
+        """Файлы архива формата можно проверять в нескольких потоках (FormatBackend.supports_parallel_members)"""
+        backend = get_backend(fmt)
+        return backend is not None and backend.supports_parallel_members
+
+    def suspend(self) -> None:
+        """Приостановка начатых проверок: чтение останавливается, внешние программы получают SIGSTOP"""
+        self._running.clear()
+        self.children.suspend()
+
+    def resume(self) -> None:
+        """Продолжение приостановленных проверок"""
+        self.children.resume()
+        self._running.set()
+
+    def checkpoint(self) -> bool:
+        """
+        Точка приостановки внутри проверки: ждет окончания паузы
+
+        Returns:
+            bool: True, если проверку нужно прервать
+        """
+        if not self._running.is_set():
+            self._running.wait()
+        return self.stop_flag
+
+    def find_multipart_files(self, base_file):
+        """
+        Поиск всех частей многотомного архива
+        """
+        base_path = Path(base_file)
+        base_name = base_path.stem
+        directory = base_path.parent
+
+        # Шаблоны для разных форматов многотомных архивов
+        patterns = [
+            # ZIP: name.z01, name.z02, ..., name.zip
+            (f"{base_name}.z[0-9][0-9]", f"{base_name}.zip"),
+            # RAR: name.part1.rar, name.part2.rar, ...
+            (f"{base_name}.part[0-9]*.rar", None),
+            # RAR (старый формат): name.r00, name.r01, ..., name.rar
+            (f"{base_name}.r[0-9][0-9]", f"{base_name}.rar"),
+            # 7z: name.001, name.002, ..., name.7z
+            (f"{base_name}.[0-9][0-9][0-9]", f"{base_name}.7z")
+        ]
+
+        found_parts = []
+        for pattern, last_part in patterns:
+            parts = list(directory.glob(pattern))
+            if parts:
+                if last_part:
+                    last = directory / last_part
+                    if last.exists():
+                        parts.append(last)
+                found_parts.extend(parts)
+                break
+
+        return sorted(found_parts) if found_parts else []
+
+    def check_multipart_sequence(self, parts):
+        """
+        Проверка последовательности частей многотомного архива
+        """
+        if not parts:
+            return False, ErrorMessage("multipart", "Не найдены части многотомного архива")
+
+        # Определяем формат по первому файлу
+        first_part = parts[0].name
+        base_name = parts[0].stem
+
+        if first_part.endswith('.z01'):  # ZIP
+            expected = [f"{base_name}.z{i:02d}" for i in range(1, len(parts))]
+            expected.append(f"{base_name}.zip")
+        elif '.part' in first_part:  # RAR (новый формат)
+            expected = [f"{base_name}.part{i}.rar" for i in range(1, len(parts) + 1)]
+        elif first_part.endswith('.r00'):  # RAR (старый формат)
+            expected = [f"{base_name}.r{i:02d}" for i in range(0, len(parts) - 1)]
+            expected.append(f"{base_name}.rar")
+        elif first_part.endswith('.001'):  # 7z
+            expected = [f"{base_name}.{i:03d}" for i in range(1, len(parts))]
+            expected.append(f"{base_name}.7z")
+        else:
+            return False, ErrorMessage("multipart", "Неизвестный формат многотомного архива")
+
+        actual = [p.name for p in parts]
+        missing = set(expected) - set(actual)
+
+        if missing:
+            return False, ErrorMessage("multipart", f"Отсутствуют части архива: {', '.join(sorted(missing))}")
+
+        return True, ""
+
+    def check_zip_structure(self, zip_file) -> Optional[str]:
+        """
+        Проверка оглавления ZIP без распаковки: данные каждого файла должны
+        помещаться между его смещением и началом центрального каталога
+
+        Returns:
+            Optional[str]: Описание ошибки или None
+        """
+        directory_start = zip_file.start_dir
+        for file_info in zip_file.infolist():
+            end = file_info.header_offset + ZIP_LOCAL_HEADER_SIZE + file_info.compress_size
+            if file_info.header_offset < 0 or end > directory_start:
+                return (f"Файл {file_info.filename} выходит за границы данных архива "
+                        f"(смещение {file_info.header_offset}, размер {file_info.compress_size})")
+        return None
+
+    def check_zip_overlaps(self, zip_file) -> Optional[str]:
+        """
+        Поиск перекрывающихся записей: несколько файлов, ссылающихся на одни и те же
+        сжатые данные, - прием zip-бомб без вложенных архивов
+
+        Returns:
+            Optional[str]: Описание перекрытия или None
+        """
+        entries = sorted(zip_file.infolist(), key=lambda info: info.header_offset)
+        for current, following in zip(entries, entries[1:]):
+            if current.flag_bits & ZIP_FLAG_UTF8:
+                name_length = len(current.orig_filename.encode('utf-8'))
+            else:
+                name_length = len(current.orig_filename)
+            end = current.header_offset + ZIP_LOCAL_HEADER_SIZE + name_length + current.compress_size
+            if following.header_offset < end:
+                return f"Записи {current.filename} и {following.filename} перекрываются"
+        return None
+
+    def check_zip_duplicates(self, zip_file) -> Optional[str]:
+        """
+        Поиск повторяющихся имен файлов: распаковщики по-разному выбирают одну
+        из записей, чем пользуются для подмены содержимого
+
+        Returns:
+            Optional[str]: Описание повтора или None
+        """
+        if len(zip_file.NameToInfo) == len(zip_file.infolist()):
+            return None
+        seen = set()
+        for file_info in zip_file.infolist():
+            if file_info.filename in seen:
+                return f"Повторяющееся имя файла в оглавлении: {file_info.filename}"
+            seen.add(file_info.filename)
+        return None
+
+    def check_zip(self, file_path):
+        """Проверка ZIP архива (при включенной выборке - структура и часть файлов)"""
+        zipfile = load_module("zip")
+        try:
+            with self.tracer.span("open"):
+                fp = open_archive_file(file_path, self.io_limiter, self.read_hints, self.read_ahead)
+            with fp:
+                size = os.fstat(fp.fileno()).st_size
+                budget = DecompressionBudget(self.limits, size, Path(file_path).name)
+                quick = self.quick_for("zip")
+                with self.tracer.span("directory"):
+                    directory = read_directory(fp, size, 0 if quick else ZIP_VECTOR_MIN_ENTRIES)
+                if directory is not None and (quick or not directory.encrypted
+                                              and not directory.unsupported_methods()):
+                    return self.verify_zip_directory(fp, file_path, directory, budget)
+                return self.verify_zip(fp, file_path, budget)
+        except SuspiciousArchive as e:
+            return None, ErrorMessage("limits", f"Подозрительный архив: {str(e)}")
+        except (zipfile.BadZipFile, ZipFormatError) as e:
+            return False, ErrorMessage(error_class_of(e, "headers"), f"Поврежденный ZIP архив: {str(e)}")
+        except Exception as e:
+            return False, ErrorMessage("other", f"Ошибка при проверке архива: {str(e)}")
+
+    def select_zip_members(self, zip_file, file_path, budget: DecompressionBudget, depth: int) -> list:
+        """
+        Проверка оглавления ZIP и выбор файлов для распаковки
+
+        Raises:
+            SuspiciousArchive: Если записи перекрываются или объявленные размеры превышают ограничения
+            zipfile.BadZipFile: Если данные файлов выходят за границы архива
+        """
+        error = self.check_zip_structure(zip_file)
+        if error:
+            raise load_module("zip").BadZipFile(error)
+        overlap = self.check_zip_overlaps(zip_file) or self.check_zip_duplicates(zip_file)
+        if overlap:
+            raise SuspiciousArchive(overlap)
+
+        members = zip_file.infolist()
+        if self.quick_for("zip"):
+            return []  # Быстрая проверка: только оглавление
+        if self.sampling and depth == 0:
+            members = self.sampling.select(Path(file_path).name, members, lambda info: info.compress_size)
+        for file_info in members:
+            self.limits.check_declared(file_info.filename, file_info.file_size, file_info.compress_size)
+        self.limits.check_declared(
+            Path(file_path).name, budget.total + sum(info.file_size for info in members), budget.compressed_size
+        )
+        return members
+
+    def verify_zip(self, fp, file_path, budget: DecompressionBudget, depth: int = 0):
+        """
+        Проверка ZIP архива из открытого файла; вложенные ZIP архивы проверяются
+        рекурсивно до глубины limits.max_depth
+
+        Raises:
+            SuspiciousArchive: Если нарушены ограничения ресурсов
+            zipfile.BadZipFile: Если не читается оглавление архива
+        """
+        zipfile = load_module("zip")
+        limits = self.limits
+        with self.tracer.span("directory"):
+            zip_file = zipfile.ZipFile(fp, 'r')
+            try:
+                members = self.select_zip_members(zip_file, file_path, budget, depth)
+            except Exception:
+                zip_file.close()
+                raise
+        with zip_file:
+            if self.quick_for("zip"):
+                return True, None  # Оглавление проверено, данные не распаковываются
+            encrypted = zip_encrypted_members(zip_file.infolist())
+            if any(info.compress_type == ZIP_AES for info in encrypted):
+                # AES (WinZip) стандартная библиотека не расшифровывает - проверка программой 7z
+                kind = f"{len(encrypted)} из {len(zip_file.infolist())} файлов, AES"
+                if depth:
+                    return None, EncryptedMessage(f"Зашифрованный архив ({kind})")
+                return self.check_encrypted_external(
+                    ['7z', 't', str(file_path)], file_path, kind
+                )
+            if encrypted:
+                return self.verify_encrypted_zip(zip_file, fp, file_path, members, encrypted, budget, depth)
+            return self.verify_zip_members(zip_file, fp, file_path, members, budget, depth)
+
+    def verify_zip_members(self, zip_file, fp, file_path, members: list, budget: DecompressionBudget,
+                           depth: int, check_password: bool = False):
+        """
+        Распаковка выбранных файлов ZIP с проверкой CRC
+
+        Args:
+            check_password (bool): Ошибка в зашифрованном файле означает возможно неверный пароль
+
+        Raises:
+            ZipPasswordMismatch: Если check_password и зашифрованный файл не распаковался
+            SuspiciousArchive: Если нарушены ограничения ресурсов
+        """
+        zipfile = load_module("zip")
+        limits = self.limits
+        with self.tracer.span("decompress"):
+            # Проверяем каждый (выбранный) файл в архиве
+            for file_info in members:
+                if self.checkpoint():  # Пауза и проверка флага остановки
+                    return False, STOPPED_MESSAGE
+                nested = (limits.max_depth and get_archive_format(file_info.filename) == "zip"
+                          and file_info.file_size <= NESTED_ZIP_MAX_BYTES)
+                if nested and depth + 1 > limits.max_depth:
+                    raise SuspiciousArchive(
+                        f"Превышена глубина вложенности архивов ({limits.max_depth}): {file_info.filename}"
+                    )
+                if (depth == 0 and not nested and self.parallel_members("zip")
+                        and file_info.compress_type == ZIP_STORED and not file_info.flag_bits & 0x1
+                        and file_info.file_size >= PARALLEL_CRC_MIN_BYTES):
+                    try:
+                        data_offset = local_data_offset(fp, file_info.header_offset)
+                    except ZipFormatError as e:
+                        return False, ErrorMessage(e.error_class, f"Ошибка CRC в файле {file_info.filename}: {str(e)}")
+                    failure = self.verify_stored_member(fp, file_path, file_info.filename, data_offset,
+                                                        file_info.compress_size, file_info.file_size,
+                                                        file_info.CRC, budget)
+                    if failure:
+                        return failure
+                    continue
+                buffer = io.BytesIO() if nested else None
+                try:
+                    # Проверяем CRC32
+                    with zip_file.open(file_info) as f:
+                        while True:
+                            chunk = f.read(8192)  # Читаем по частям
+                            if not chunk:
+                                break
+                            budget.consume(len(chunk))
+                            if buffer is not None:
+                                buffer.write(chunk)
+                            if self.checkpoint():  # Пауза и проверка флага остановки
+                                return False, STOPPED_MESSAGE
+                except (zipfile.BadZipFile, zlib.error) as e:
+                    message = ErrorMessage("data", f"Ошибка CRC в файле {file_info.filename}: {str(e)}")
+                    if check_password and file_info.flag_bits & 0x1:
+                        raise ZipPasswordMismatch(message)
+                    return False, message
+                if buffer is not None:
+                    failure = self.verify_nested_zip(buffer, file_info.filename, budget, depth)
+                    if failure:
+                        return failure
+        if self.sampling and depth == 0:
+            self.record_coverage(file_path, SampleCoverage(
+                len(members), len(zip_file.infolist()),
+                sum(info.compress_size for info in members),
+                sum(info.compress_size for info in zip_file.infolist())
+            ))
+        return True, None
+
+    def verify_stored_member(self, fp, file_path, name: str, data_offset: int, compress_size: int,
+                             file_size: int, crc: int, budget: DecompressionBudget):
+        """
+        Проверка CRC большого файла без сжатия: части файла хешируются в нескольких
+        потоках и склеиваются crc32_combine (см. parallel_crc)
+
+        Returns:
+            Optional[Tuple]: (False, сообщение), если файл поврежден или проверка прервана, иначе None
+        """
+        if compress_size != file_size:
+            return False, ErrorMessage(
+                "data", f"Ошибка CRC в файле {name}: Размер данных {compress_size} вместо {file_size} по оглавлению"
+            )
+        if data_offset + file_size > os.fstat(fp.fileno()).st_size:
+            return False, ErrorMessage(
+                "truncated", f"Ошибка CRC в файле {name}: Данные файла выходят за конец файла архива"
+            )
+        try:
+            actual = parallel_crc32(file_path, data_offset, file_size, self.io_limiter, self.read_hints,
+                                    self.checkpoint, budget.consume)
+        except (OSError, EOFError) as e:
+            error_class = "truncated" if isinstance(e, EOFError) else "other"
+            return False, ErrorMessage(error_class, f"Ошибка CRC в файле {name}: {str(e)}")
+        if actual is None:
+            return False, STOPPED_MESSAGE
+        if actual != crc:
+            return False, ErrorMessage("data", f"Ошибка CRC в файле {name}: Неверная CRC-32 файла {name}")
+        return None
+
+    def verify_nested_zip(self, buffer: io.BytesIO, name: str, budget: DecompressionBudget, depth: int):
+        """
+        Проверка распакованного в память вложенного ZIP архива
+
+        Returns:
+            Optional[Tuple]: (результат, сообщение), если вложенный архив поврежден или зашифрован, иначе None
+        """
+        buffer.seek(0)
+        try:
+            is_valid, error_msg = self.verify_zip(buffer, name, budget, depth + 1)
+        except load_module("zip").BadZipFile as e:
+            is_valid, error_msg = False, ErrorMessage("headers", f"Поврежденный ZIP архив: {str(e)}")
+        if is_encrypted_result(is_valid, error_msg):
+            return None, EncryptedMessage(f"Вложенный архив {name}: {error_msg}")
+        if not is_valid:
+            return False, ErrorMessage(error_class_of(error_msg), f"Вложенный архив {name}: {error_msg}")
+        return None
+
+    def verify_zip_directory(self, fp, file_path, directory, budget: DecompressionBudget):
+        """
+        Проверка ZIP архива по оглавлению в массивах NumPy (см. zip_directory): файлы
+        распаковываются по смещениям и размерам из оглавления, объекты ZipInfo не создаются.
+        Используется для огромных оглавлений и при быстрой проверке; зашифрованные архивы
+        и методы сжатия, кроме stored, deflate и bzip2, проверяет verify_zip.
+
+        Raises:
+            SuspiciousArchive: Если нарушены ограничения ресурсов
+        """
+        limits = self.limits
+        with self.tracer.span("directory"):
+            error = directory.check_bounds()
+            if error:
+                return False, ErrorMessage("headers", f"Поврежденный ZIP архив: {error}")
+            overlap = directory.check_overlaps() or directory.check_duplicates()
+            if overlap:
+                raise SuspiciousArchive(overlap)
+            if self.quick_for("zip"):
+                return True, None  # Оглавление проверено, данные не распаковываются
+
+            name = Path(file_path).name
+            members = range(len(directory))
+            if self.sampling:
+                members = self.sampling.select(name, members, directory.compress_size)
+            declared = directory.check_declared(limits, members)
+            limits.check_declared(name, budget.total + declared, budget.compressed_size)
+
+        with self.tracer.span("decompress"):
+            for index in members:
+                if self.checkpoint():  # Пауза и проверка флага остановки
+                    return False, STOPPED_MESSAGE
+                member_name = directory.name(index)
+                file_size = int(directory.entries["file_size"][index])
+                nested = (limits.max_depth and get_archive_format(member_name) == "zip"
+                          and file_size <= NESTED_ZIP_MAX_BYTES)
+                if (not nested and self.parallel_members("zip")
+                        and int(directory.entries["method"][index]) == ZIP_STORED
+                        and file_size >= PARALLEL_CRC_MIN_BYTES):
+                    try:
+                        data_offset = directory.data_offset(fp, index)
+                    except ZipFormatError as e:
+                        return False, ErrorMessage(e.error_class, f"Ошибка CRC в файле {member_name}: {str(e)}")
+                    failure = self.verify_stored_member(fp, file_path, member_name, data_offset,
+                                                        directory.compress_size(index), file_size,
+                                                        int(directory.entries["crc"][index]), budget)
+                    if failure:
+                        return failure
+                    continue
+                buffer = io.BytesIO() if nested else None
+                try:
+                    for chunk in directory.read_member(fp, index):
+                        budget.consume(len(chunk))
+                        if buffer is not None:
+                            buffer.write(chunk)
+                        if self.checkpoint():  # Пауза и проверка флага остановки
+                            return False, STOPPED_MESSAGE
+                except ZipFormatError as e:
+                    return False, ErrorMessage(e.error_class, f"Ошибка CRC в файле {member_name}: {str(e)}")
+                if buffer is not None:
+                    failure = self.verify_nested_zip(buffer, member_name, budget, 0)
+                    if failure:
+                        return failure
+        if self.sampling:
+            total = int(directory.entries["compress_size"].sum())
+            self.record_coverage(file_path, SampleCoverage(
+                len(members), len(directory), sum(directory.compress_size(i) for i in members), total
+            ))
+        return True, None
+
+    def verify_encrypted_zip(self, zip_file, fp, file_path, members: list, encrypted: list,
+                             budget: DecompressionBudget, depth: int):
+        """
+        Проверка ZIP с зашифрованными файлами (ZipCrypto) с перебором паролей. Проверочный
+        байт ZipCrypto совпадает с неверным паролем в 1 случае из 256, поэтому пароль считается
+        подошедшим (и запоминается) только после распаковки данных без ошибок CRC; при ошибке
+        пробуется следующий пароль. Если данные не распаковались ни с одним паролем,
+        прошедшим проверочные байты, архив считается поврежденным, только если среди них был
+        пароль, уже подходивший к этому архиву; иначе - зашифрованным без подходящего пароля.
+        """
+        count = f"{len(encrypted)} из {len(zip_file.infolist())} файлов"
+        if not self.passwords:
+            return None, EncryptedMessage(f"Зашифрованный архив ({count}), пароли не заданы")
+        failure = None
+        known = self.passwords.known(file_path) if depth == 0 else None
+        started = budget.total
+        for password in self.zip_password_candidates(zip_file, encrypted, file_path, depth):
+            zip_file.setpassword(password.encode("utf-8"))
+            budget.total = started  # Объем считается заново для каждого пароля
+            try:
+                is_valid, error_msg = self.verify_zip_members(zip_file, fp, file_path, members, budget, depth,
+                                                              check_password=True)
+            except ZipPasswordMismatch as e:
+                if password == known:
+                    failure = (False, ErrorMessage("data", str(e)))
+                continue
+            if is_valid and depth == 0:
+                self.passwords.remember(file_path, password)
+            return is_valid, error_msg
+        if failure:
+            return failure
+        if depth == 0:
+            self.passwords.remember(file_path, None)
+        return None, EncryptedMessage(f"Зашифрованный архив ({count}), ни один пароль не подошел")
+
+    def zip_password_candidates(self, zip_file, encrypted: list, file_path, depth: int) -> Iterator[str]:
+        """
+        Пароли, прошедшие проверочные байты ZipCrypto нескольких самых маленьких
+        зашифрованных файлов (подошедший раньше пароль пробуется первым)
+        """
+        zipfile = load_module("zip")
+        # Кеш паролей относится к архивам на диске, вложенные перебираются заново
+        candidates = self.passwords.candidates(file_path) if depth == 0 else self.passwords.passwords
+        probes = sorted(encrypted, key=lambda info: info.compress_size)[:ZIP_PASSWORD_PROBES]
+        for password in candidates:
+            pwd = password.encode("utf-8")
+            try:
+                with self.tracer.span("password"):
+                    for info in probes:
+                        zip_file.open(info, pwd=pwd).close()
+            except (RuntimeError, zipfile.BadZipFile, zlib.error):
+                continue  # Неверный пароль
+            yield password
+
+    def check_encrypted_external(self, command: List[str], file_path, kind: str):
+        """
+        Проверка зашифрованного архива внешней программой с перебором паролей.
+        Пароль не передается ключом -p: командную строку процесса видят все пользователи
+        системы (ps, /proc/PID/cmdline). Программа запрашивает пароль сама и читает его из stdin.
+
+        Args:
+            command: Команда проверки (без пароля)
+            file_path: Архив
+            kind (str): Что зашифровано (для сообщения)
+        """
+        if not self.passwords:
+            return None, EncryptedMessage(f"Зашифрованный архив ({kind}), пароли не заданы")
+        for password in self.passwords.candidates(file_path):
+            with self.tracer.span("subprocess"):
+                try:
+                    result = run_limited(command, self.limits, self.children, input=password + "\n")
+                except FileNotFoundError:
+                    return tool_missing(command[0], file_path)
+            if self.stop_flag:
+                return False, STOPPED_MESSAGE
+            violation = limit_violation(result.returncode, self.limits, result.stderr, result.args[0])
+            if violation:
+                return None, ErrorMessage("limits", f"Подозрительный архив: {violation}")
+            if result.returncode == 0:
+                self.passwords.remember(file_path, password)
+                return True, None
+        self.passwords.remember(file_path, None)
+        return None, EncryptedMessage(
+            f"Зашифрованный архив ({kind}), ни один пароль не подошел (или архив поврежден)"
+        )
+
+    def record_coverage(self, file_path, coverage: SampleCoverage) -> None:
+        """Учет доли архива, проверенной при выборочной проверке"""
+        self.coverage.record(str(file_path), coverage)
+        if not coverage.complete:
+            logger.info(f"Выборочная проверка {Path(file_path).name}: {coverage}")
+
+    def check_tar(self, file_path):
+        """Проверка архива tar (несжатого или сжатого gzip/bzip2/xz/zstd)"""
+        return verify_stream(file_path, True, self.checkpoint, tracer=self.tracer, limits=self.limits,
+                             children=self.children, io_limiter=self.io_limiter, read_hints=self.read_hints,
+                             read_ahead=self.read_ahead)
+
+    def check_compressed(self, file_path):
+        """Проверка одиночного сжатого файла (.gz, .bz2, .xz, .zst)"""
+        return verify_stream(file_path, False, self.checkpoint, tracer=self.tracer, limits=self.limits,
+                             children=self.children, io_limiter=self.io_limiter, read_hints=self.read_hints,
+                             read_ahead=self.read_ahead)
+
+    def check_rar(self, file_path):
+        """Проверка RAR архива"""
+        try:
+            # Проверяем наличие мультичастей
+            with self.tracer.span("multipart"):
+                parts = self.find_multipart_files(file_path)
+                if parts:
+                    if self.stop_flag:  # Проверяем флаг остановки
+                        return False, STOPPED_MESSAGE
+                    return self.check_multipart_sequence(parts)
+
+            # Заголовки проверяются без unrar: обрезанный или поврежденный архив
+            # определяется одним проходом по заголовкам
+            with self.tracer.span("headers"):
+                try:
+                    summary = check_rar_file(file_path)
+                except RarFormatError as e:
+                    return False, ErrorMessage(e.error_class, f"Ошибка в заголовках RAR архива: {str(e)}")
+            if summary.encryption:
+                kind = "зашифрованы заголовки" if summary.encryption == "headers" else "зашифрованы данные файлов"
+                if self.quick_for("rar"):
+                    # Заголовки файлов без пароля не проверить
+                    return (True, None) if summary.encryption == "files" else \
+                        (None, EncryptedMessage(f"Зашифрованный архив ({kind})"))
+                return self.check_encrypted_external(
+                    ['unrar', 't', '-idq', str(file_path)], file_path, kind
+                )
+            if self.quick_for("rar"):
+                return True, None
+
+            # Проверяем с помощью unrar (-p-: не запрашивать пароль)
+            with self.tracer.span("subprocess"):
+                try:
+                    result = run_limited(['unrar', 't', '-inul', '-p-', str(file_path)], self.limits, self.children)
+                except FileNotFoundError:
+                    return tool_missing('unrar', file_path)
+
+            if self.stop_flag:  # Проверяем флаг остановки
+                return False, STOPPED_MESSAGE
+
+            violation = limit_violation(result.returncode, self.limits, result.stderr, result.args[0])
+            if violation:
+                return None, ErrorMessage("limits", f"Подозрительный архив: {violation}")
+            if result.returncode != 0:
+                return False, ErrorMessage("data", f"Ошибка в RAR архиве: {result.stderr}")
+            return True, None
+        except Exception as e:
+            return False, ErrorMessage("other", f"Ошибка при проверке архива: {str(e)}")
+
+    def check_7z(self, file_path):
+        """Проверка 7Z архива"""
+        try:
+            # Проверяем наличие мультичастей
+            with self.tracer.span("multipart"):
+                parts = self.find_multipart_files(file_path)
+                if parts:
+                    if self.stop_flag:  # Проверяем флаг остановки
+                        return False, STOPPED_MESSAGE
+                    return self.check_multipart_sequence(parts)
+
+            # Заголовки проверяются без 7z: обрезанный архив определяется по смещению
+            # и размеру заголовка в конце файла
+            with self.tracer.span("headers"):
+                try:
+                    summary = check_7z_file(file_path)
+                except SevenZipFormatError as e:
+                    return False, ErrorMessage(e.error_class, f"Ошибка в заголовках 7Z архива: {str(e)}")
+            if summary.encryption:
+                kind = "зашифрованы заголовки" if summary.encryption == "headers" else "зашифрованы данные файлов"
+                if self.quick_for("7z"):
+                    return (True, None) if summary.encryption == "files" else \
+                        (None, EncryptedMessage(f"Зашифрованный архив ({kind})"))
+                return self.check_encrypted_external(
+                    ['7z', 't', str(file_path)], file_path, kind
+                )
+            if self.quick_for("7z"):
+                return True, None
+
+            # Проверяем с помощью 7z
+            with self.tracer.span("subprocess"):
+                try:
+                    result = run_limited(['7z', 't', str(file_path)], self.limits, self.children)
+                except FileNotFoundError:
+                    return tool_missing('7z', file_path)
+
+            if self.stop_flag:  # Проверяем флаг остановки
+                return False, STOPPED_MESSAGE
+
+            violation = limit_violation(result.returncode, self.limits, result.stderr, result.args[0])
+            if violation:
+                return None, ErrorMessage("limits", f"Подозрительный архив: {violation}")
+            if result.returncode != 0:
+                return False, ErrorMessage("data", f"Ошибка в 7Z архиве: {result.stderr}")
+            return True, None
+        except Exception as e:
+            return False, ErrorMessage("other", f"Ошибка при проверке архива: {str(e)}")
+
+
+class ScanEngine:
+    """
+    Движок сканирования: поиск архивов и их параллельная проверка.
+    Не зависит от Qt, поэтому используется и GUI-потоком, и консольными утилитами.
+    """
+
+    def __init__(self, directory, extensions, recursive=True, max_workers=None,
+                 tracer: Optional[PhaseTracer] = None, metrics: Optional[ScanMetrics] = None,
+                 autotune: bool = False, sampling: Optional[SamplingPolicy] = None,
+                 deduplicate: bool = False, limits: Optional[ResourceLimits] = None,
+                 recent_first: bool = False, rules: Optional[ScanRules] = None,
+                 io_limiter: Optional[IOLimiter] = None, read_hints: Optional[ReadHints] = None,
+                 read_ahead: Optional[ReadAhead] = None, passwords: Optional[PasswordStore] = None,
+                 quick: bool = False):
+        """
+        Инициализация движка
+
+        Args:
+            directory: Директория с архивами
+            extensions (List[str]): Расширения проверяемых файлов
+            recursive (bool): Проверять подпапки
+            max_workers (int): Количество потоков (по умолчанию - доступные ядра минус одно);
+                при автоподборе - начальное значение
+            tracer (PhaseTracer): Замер фаз проверки; включается через tracer.enabled
+            metrics (ScanMetrics): Счетчики для экспорта метрик (необязательно)
+            autotune (bool): Подбирать количество потоков во время проверки
+            sampling (SamplingPolicy): Выборочная проверка больших ZIP архивов (необязательно)
+            deduplicate (bool): Проверять одинаковые архивы один раз (см. dedup)
+            limits (ResourceLimits): Ограничения ресурсов на архив (по умолчанию - ResourceLimits())
+            recent_first (bool): Проверять недавно измененные архивы раньше остальных
+            rules (ScanRules): Шаблоны включения/исключения и фильтры размера и возраста
+            io_limiter (IOLimiter): Ограничение нагрузки на диск (скорость чтения, приоритет 7z/unrar)
+            read_hints (ReadHints): Подсказки кешу страниц при чтении архивов (см. page_cache)
+            read_ahead (ReadAhead): Упреждающее чтение блоков и заголовков следующего архива (см. prefetch)
+            passwords (PasswordStore): Пароли зашифрованных архивов (без них такие архивы
+                получают отдельный результат "зашифрован" без попытки расшифровки)
+            quick (bool): Быстрая проверка по заголовкам и оглавлению без распаковки
+                (для форматов без быстрой проверки - полная)
+        """
+        self.directory = Path(directory)
+        self.extensions = [ext.lower() for ext in extensions]
+        self.recursive = recursive
+        self.autotuner = None
+        if autotune:
+            # Пул создается с запасом, реальный параллелизм задает контроллер
+            self.autotuner = ConcurrencyController(initial=max_workers)
+            self.max_workers = self.autotuner.maximum
+            self.concurrency = self.autotuner.current
+        else:
+            # Если max_workers не указано, используем количество доступных ядер процессора
+            self.max_workers = max_workers or max(1, available_cpu_count() - 1)
+            self.concurrency = self.max_workers
+        self.start_time = None
+        self.total_files = 0
+        self.processed_files = 0
+        self.stop_flag = False
+        self.executor = None  # Сохраняем ссылку на executor
+        self.checker = None
+        self.tracer = tracer or PhaseTracer()
+        self.metrics = metrics
+        self.sampling = sampling
+        self.deduplicate = deduplicate
+        self.duplicates: Optional[DuplicateGroups] = None
+        self.limits = limits
+        self.results = ResultStore()  # Результаты всех проверенных архивов
+        self.recent_first = recent_first
+        self.rules = rules
+        self.io_limiter = io_limiter
+        self.read_hints = read_hints
+        self.read_ahead = read_ahead
+        self.passwords = passwords
+        self.quick = quick
+        self.queue: Optional[ArchiveQueue] = None  # Архивы, ожидающие проверки
+        # Поднятия в очереди, запрошенные до ее построения (применяются при построении)
+        self.deferred_priorities: List[Callable[[ArchiveQueue], int]] = []
+        self.paused = False
+        self.suspend_on_pause = True
+        self._resumed = threading.Event()  # Сброшен на паузе: новые архивы не выдаются
+        self._resumed.set()
+        self._lock = threading.Lock()
+        # Время (Unix time), после которого новые архивы не берутся в работу
+        self.deadline: Optional[float] = None
+
+        # Обработчики событий (назначаются вызывающей стороной)
+        self.on_progress: Optional[Callable[[int], None]] = None
+        self.on_stats: Optional[Callable[[dict], None]] = None
+        # Результат каждого архива: (путь, True/False/None - подозрительный, ошибка, время проверки)
+        self.on_archive: Optional[Callable[[Path, Optional[bool], Optional[str], float], None]] = None
+
+    def stop(self):
+        """Остановка проверки"""
+        self.stop_flag = True
+        if self.checker:
+            self.checker.stop_flag = True
+            # Приостановленные проверки должны продолжиться, чтобы завершиться
+            self.checker.resume()
+        self._resumed.set()
+        if self.executor:
+            self.executor.shutdown(wait=False)  # Принудительно завершаем все задачи
+
+    def pause(self, suspend: bool = True) -> None:
+        """
+        Пауза: новые архивы не берутся в работу, очередь сохраняется
+
+        Args:
+            suspend (bool): Приостановить и начатые проверки (чтение и внешние программы),
+                освобождая диск; иначе они завершаются как обычно
+        """
+        self.paused = True
+        self.suspend_on_pause = suspend
+        self._resumed.clear()
+        if suspend and self.checker:
+            self.checker.suspend()
+        if self.metrics:
+            self.metrics.set_paused(True)
+        logger.info("Проверка приостановлена")
+
+    def resume(self) -> None:
+        """Продолжение проверки с того же места очереди"""
+        if not self.paused:
+            return
+        self.paused = False
+        if self.checker:
+            self.checker.resume()
+        if self.autotuner:
+            # Интервал с паузой не отражает скорость проверки
+            self.autotuner.restart()
+        if self.metrics:
+            self.metrics.set_paused(False)
+        self._resumed.set()
+        logger.info("Проверка продолжена")
+
+    def matches(self, name: str) -> bool:
+        """Проверка, подходит ли имя файла под список расширений"""
+        name = name.lower()
+        return any(name.endswith(ext) for ext in self.extensions)
+
+    def find_archives(self) -> List[Path]:
+        """
+        Сбор списка всех архивов для проверки
+
+        Returns:
+            List[Path]: Пути к найденным архивам
+        """
+        archives = []
+        rules = self.rules
+        now = time.time()
+        skipped_dirs = 0
+        # Обход в глубину в порядке os.walk: сначала файлы директории, затем ее поддиректории
+        stack = [(str(self.directory), "")]
+        while stack:
+            directory, rel_dir = stack.pop()
+            subdirs = []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        rel_path = f"{rel_dir}{entry.name}"
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if not self.recursive:
+                                    continue
+                                # Исключенная директория не читается вовсе
+                                if rules and rules.skip_dir(rel_path):
+                                    skipped_dirs += 1
+                                    continue
+                                subdirs.append((entry.path, rel_path + "/"))
+                            elif entry.is_file() and self.matches(entry.name):
+                                if rules is None or rules.accepts_file(rel_path, entry, now):
+                                    archives.append(Path(entry.path))
+                        except OSError as e:
+                            logger.debug(f"Не удалось прочитать {entry.path}: {e}")
+            except OSError as e:
+                logger.debug(f"Не удалось прочитать директорию {directory}: {e}")
+            stack.extend(reversed(subdirs))
+        if skipped_dirs:
+            logger.info(f"Пропущено директорий по правилам исключения: {skipped_dirs}")
+        return archives
+
+    def get_check_method(self, fmt: Optional[str], checker: ArchiveChecker):
+        """Определение метода проверки по формату архива (см. format_backends)"""
+        backend = get_backend(fmt) if fmt else None
+        return getattr(checker, backend.method, None) if backend else None
+
+    @property
+    def corrupted_archives(self) -> Dict[str, str]:
+        """Поврежденные архивы {путь: ошибка} (из results)"""
+        return self.results.by_status(STATUS_CORRUPTED)
+
+    @property
+    def suspicious_archives(self) -> Dict[str, str]:
+        """Архивы, нарушившие ограничения {путь: причина} (из results)"""
+        return self.results.by_status(STATUS_SUSPICIOUS)
+
+    @property
+    def encrypted_archives(self) -> Dict[str, str]:
+        """Зашифрованные архивы, которые не удалось проверить {путь: причина} (из results)"""
+        return self.results.by_status(STATUS_ENCRYPTED)
+
+    @property
+    def unverified_archives(self) -> Dict[str, str]:
+        """Архивы, проверенные только по заголовкам без unrar/7z {путь: причина} (из results)"""
+        return self.results.by_status(STATUS_UNVERIFIED)
+
+    def get_stats(self) -> dict:
+        """Текущая статистика проверки"""
+        elapsed_time = time.time() - self.start_time
+        counts = self.results.counts()
+        stats = {
+            'total_files': self.total_files,
+            'processed_files': self.processed_files,
+            'corrupted_files': counts[STATUS_CORRUPTED],
+            'elapsed_time': int(elapsed_time),
+            'avg_time_per_file': round(elapsed_time / self.processed_files, 2) if self.processed_files > 0 else 0,
+            'workers': self.concurrency,
+            'suspicious_files': counts[STATUS_SUSPICIOUS],
+            'encrypted_files': counts[STATUS_ENCRYPTED],
+            'unverified_files': counts[STATUS_UNVERIFIED]
+        }
+        if self.duplicates:
+            stats['duplicate_files'] = self.duplicates.duplicates
+        if self.checker and self.checker.sampling:
+            coverage = self.checker.coverage
+            stats['sampled_files'] = coverage.sampled
+            stats['coverage'] = round(coverage.total.fraction * 100, 1)
+        return stats
+
+    def set_concurrency(self, workers: int) -> None:
+        """Изменение количества одновременно проверяемых архивов во время проверки"""
+        self.concurrency = max(1, min(self.max_workers, workers))
+        if self.metrics:
+            self.metrics.set_workers(self.concurrency)
+        logger.debug(f"Количество потоков: {self.concurrency}")
+
+    def verify_archive(self, file_path: Path, checker: ArchiveChecker
+                       ) -> Optional[Tuple[Optional[bool], Optional[str], int, float]]:
+        """
+        Проверка одного архива без учета общего прогресса: обновляет метрики
+        и автоподбор потоков, вызывает on_archive
+
+        Returns:
+            Optional[Tuple]: (результат True/False/None - подозрительный, сообщение, размер, время проверки)
+                или None, если формат не поддерживается или проверка остановлена
+        """
+        fmt = get_archive_format(file_path)
+        check_method = self.get_check_method(fmt, checker)
+        if not check_method:
+            return None
+
+        metrics = self.metrics
+        if metrics:
+            metrics.archive_started()
+        started = time.perf_counter()
+        size = 0
+        try:
+            with self.tracer.span("stat"):
+                size = file_path.stat().st_size
+            is_valid, error_msg = check_method(file_path)
+        except Exception as e:
+            is_valid, error_msg = False, ErrorMessage("other", str(e))
+        duration = time.perf_counter() - started
+
+        # Проверяем stop_flag после длительной операции
+        if self.stop_flag or checker.stop_flag:
+            if metrics:
+                metrics.archive_skipped()
+            return None
+
+        if metrics:
+            status = result_status(is_valid, error_msg)
+            metrics.archive_finished(fmt, bool(is_valid), size, duration, suspicious=status == STATUS_SUSPICIOUS,
+                                     encrypted=status == STATUS_ENCRYPTED, unverified=status == STATUS_UNVERIFIED)
+        if self.autotuner:
+            self.autotuner.record(size)
+        if self.on_archive:
+            self.on_archive(file_path, is_valid, error_msg, duration)
+        return is_valid, error_msg, size, duration
+
+    def process_archive(self, file_path: Path, checker: ArchiveChecker) -> None:
+        """Обработка одного архива в отдельном потоке: результат записывается в results"""
+        if self.stop_flag:
+            return
+
+        tracer = self.tracer
+        with tracer.span("archive", path=file_path):
+            result = self.verify_archive(file_path, checker)
+            if result is None:
+                return
+            is_valid, error_msg, size, duration = result
+
+            with tracer.span("deliver"):
+                self.results.add(file_path, get_archive_format(file_path), is_valid, error_msg, size, duration)
+                # Обновляем прогресс
+                with self._lock:
+                    self.processed_files += 1
+                    progress = int((self.processed_files / self.total_files) * 100)
+                if self.on_progress:
+                    self.on_progress(progress)
+                if self.on_stats:
+                    self.on_stats(self.get_stats())
+
+                if is_valid is None:
+                    # Подозрительный, зашифрованный или не проверенный архив не считается поврежденным
+                    logger.warning(f"Проверка архива: {file_path.name}; {error_msg}")
+                elif not is_valid:
+                    logger.error(f"Проверка архива: {file_path.name}; Ошибка: {error_msg}")
+                else:
+                    logger.info(f"Проверка архива: {file_path.name}; OK!")
+
+    def run(self, archives: Optional[Iterable[Path]] = None) -> Dict[str, str]:
+        """
+        Проверка архивов
+
+        Args:
+            archives: Явный список архивов (по умолчанию - поиск в директории)
+
+        Returns:
+            Dict[str, str]: Словарь поврежденных архивов {путь: ошибка} (все результаты - в results)
+        """
+        self.start_time = time.time()
+        self.processed_files = 0
+        self.stop_flag = False
+        self.duplicates = None
+        self.results.clear()
+        self.queue = None
+
+        archives_to_check = list(archives) if archives is not None else self.find_archives()
+        self.total_files = len(archives_to_check)
+
+        self.checker = self.make_checker()
+        if self.paused and self.suspend_on_pause:
+            self.checker.suspend()
+
+        futures = {}
+        try:
+            # Создаем пул потоков для параллельной обработки
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                self.executor = executor
+                if self.deduplicate:
+                    archives_to_check = self.remove_duplicates(archives_to_check, executor)
+                    self.total_files = len(archives_to_check)
+                if self.metrics:
+                    self.metrics.scan_started(self.total_files, self.concurrency)
+
+                queue = ArchiveQueue(archives_to_check, self.recent_first)
+                with self._lock:
+                    for prioritize in self.deferred_priorities:
+                        prioritize(queue)
+                    self.deferred_priorities = []
+                    self.queue = queue
+                while self.queue or futures:
+                    if self.stop_flag:
+                        executor.shutdown(wait=False)
+                        break
+
+                    expired = self.deadline is not None and time.time() >= self.deadline
+                    # В работе держим не больше concurrency архивов, остальные ждут в очереди
+                    while not self.paused and not expired and len(futures) < self.concurrency:
+                        archive = self.queue.pop()
+                        if archive is None:
+                            break
+                        futures[executor.submit(self.process_archive, archive, self.checker)] = archive
+                        if self.read_ahead:
+                            following = self.queue.peek()
+                            if following is not None:
+                                self.read_ahead.warm(following)
+
+                    if not futures and expired:
+                        logger.info(f"Время проверки истекло, не проверено архивов: {len(self.queue)}")
+                        break
+                    if not futures:
+                        # Пауза и все начатые проверки завершены: ждем продолжения
+                        self._resumed.wait(0.5)
+                        continue
+
+                    # Собираем результаты по мере их готовности
+                    done, _ = wait(futures, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        del futures[future]
+                        future.result()
+
+                    if self.autotuner and not self.paused:
+                        workers = self.autotuner.update()
+                        if workers:
+                            self.set_concurrency(workers)
+        except DedupInterrupted:
+            logger.info("Поиск копий архивов прерван")
+        finally:
+            self.executor = None
+            if self.read_ahead:
+                # Потоки ввода-вывода создаются заново при следующем запуске
+                self.read_ahead.close()
+            if self.passwords:
+                self.passwords.flush()
+            if self.metrics:
+                self.metrics.scan_finished()
+
+        if self.duplicates and not self.stop_flag:
+            for representative, copies in self.duplicates.copies.items():
+                for copy in copies:
+                    self.results.copy(representative, copy, f"копия {representative}")
+        return self.corrupted_archives
+
+    def make_checker(self) -> ArchiveChecker:
+        """Проверяющий с параметрами движка"""
+        return ArchiveChecker(self.directory, self.tracer, self.sampling, self.limits, self.io_limiter,
+                              self.read_hints, self.read_ahead, self.passwords, self.quick)
+
+    def reverify(self, paths: Iterable[Path]) -> int:
+        """
+        Повторная проверка архивов после run(): записи results заменяются новыми результатами
+
+        Returns:
+            int: Количество проверенных архивов
+        """
+        self.stop_flag = False
+        self.checker = self.make_checker()
+        checked = 0
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                self.executor = executor
+                futures = {executor.submit(self.verify_archive, Path(path), self.checker): Path(path)
+                           for path in paths}
+                for future in as_completed(futures):
+                    result = future.result()
+                    if result is None:
+                        continue
+                    file_path = futures[future]
+                    is_valid, error_msg, size, duration = result
+                    self.results.add(file_path, get_archive_format(file_path), is_valid, error_msg, size, duration)
+                    status = "OK!" if is_valid else f"Ошибка: {error_msg}" if is_valid is False else error_msg
+                    logger.info(f"Повторная проверка архива: {file_path.name}; {status}")
+                    checked += 1
+        finally:
+            self.executor = None
+            if self.read_ahead:
+                self.read_ahead.close()
+            if self.passwords:
+                self.passwords.flush()
+        return checked
+
+    def prioritize_folder(self, folder) -> int:
+        """
+        Проверка архивов из папки (и подпапок) раньше остальных; можно вызывать
+        из другого потока во время проверки
+
+        Returns:
+            int: Количество поднятых в очереди архивов
+        """
+        folder = Path(folder)
+        with self._lock:
+            queue = self.queue
+            if queue is None:
+                # Очередь еще не построена (поиск архивов) - применим при построении
+                self.deferred_priorities.append(lambda queue: queue.prioritize_folder(folder))
+                return 0
+        count = queue.prioritize_folder(folder)
+        logger.info(f"Архивов из {folder} поднято в начало очереди: {count}")
+        return count
+
+    def prioritize_recent(self, max_age: float) -> int:
+        """
+        Проверка архивов, измененных за последние max_age секунд, раньше остальных;
+        можно вызывать из другого потока во время проверки
+
+        Returns:
+            int: Количество поднятых в очереди архивов
+        """
+        with self._lock:
+            queue = self.queue
+            if queue is None:
+                # Отсчет max_age - от момента запроса, а не построения очереди
+                requested = time.time()
+                self.deferred_priorities.append(
+                    lambda queue: queue.prioritize_recent(max_age + time.time() - requested)
+                )
+                return 0
+        count = queue.prioritize_recent(max_age)
+        logger.info(f"Недавно измененных архивов поднято в начало очереди: {count}")
+        return count
+
+    def remove_duplicates(self, archives: List[Path], executor: ThreadPoolExecutor) -> List[Path]:
+        """
+        Поиск одинаковых архивов: проверяется только первый архив каждой группы,
+        остальные получают его результат после проверки
+
+        Returns:
+            List[Path]: Архивы, которые нужно проверить
+        """
+        checker = self.checker
+        self.duplicates = find_duplicates(
+            archives, executor.map, lambda: self.stop_flag,
+            # Результат проверки многотомного архива зависит от соседних файлов
+            exclude=lambda path: bool(checker.find_multipart_files(path))
+        )
+        if self.duplicates.duplicates:
+            logger.info(
+                f"Найдено копий архивов: {self.duplicates.duplicates} "
+                f"(жестких ссылок: {self.duplicates.hardlinks}), "
+                f"не проверяется {self.duplicates.bytes_skipped / (1 << 20):.1f} МБ"
+            )
+        return self.duplicates.representatives
@@ -0,0 +1,223 @@
+import os
+import math
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Верхняя граница автоподбора: потоков на одно доступное ядро
+# (проверка архивов часто упирается в диск, а не в процессор)
+MAX_WORKERS_PER_CPU = 4
+MAX_WORKERS_LIMIT = 64
+
+
+def _read_first_line(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.readline().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """
+    Ограничение CPU контейнера по cgroup (v2: cpu.max, v1: cpu.cfs_quota_us)
+
+    Returns:
+        Optional[float]: Количество доступных ядер или None, если ограничения нет
+    """
+    line = _read_first_line("/sys/fs/cgroup/cpu.max")
+    if line:
+        quota, _, period = line.partition(" ")
+        if quota != "max" and period:
+            try:
+                return int(quota) / int(period)
+            except ValueError:
+                pass
+        return None
+
+    quota = _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+    period = _read_first_line("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+    if quota and period:
+        try:
+            if int(quota) > 0 and int(period) > 0:
+                return int(quota) / int(period)
+        except ValueError:
+            pass
+    return None
+
+
+def available_cpu_count() -> int:
+    """
+    Количество ядер, реально доступных процессу: с учетом привязки к ядрам
+    (sched_getaffinity) и квоты CPU контейнера
+
+    Returns:
+        int: Количество ядер (не меньше 1)
+    """
+    count = os.cpu_count() or 1
+    if hasattr(os, "sched_getaffinity"):
+        try:
+            count = len(os.sched_getaffinity(0))
+        except OSError:
+            pass
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        count = min(count, max(1, math.ceil(limit)))
+    return max(1, count)
+
+
+def default_max_workers() -> int:
+    """Верхняя граница количества потоков при автоподборе"""
+    return min(MAX_WORKERS_LIMIT, available_cpu_count() * MAX_WORKERS_PER_CPU)
+
+
+def _cpu_seconds() -> float:
+    """Процессорное время процесса и завершенных дочерних процессов (7z, unrar)"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class ConcurrencyController:
+    """
+    Адаптивный подбор количества одновременно проверяемых архивов.
+
+    На каждом интервале измеряется пропускная способность (МБ/с) и загрузка CPU.
+    Контроллер работает как поиск восхождением: пока скорость растет, продолжает
+    менять количество потоков в том же направлении, при падении возвращается,
+    при равной скорости выбирает меньшее количество. При загрузке CPU близкой
+    к 100% потоки не добавляются. В стабильном состоянии соседний уровень
+    периодически проверяется снова, чтобы реагировать на смену набора архивов.
+    """
+
+    def __init__(self, initial: Optional[int] = None, minimum: int = 1, maximum: Optional[int] = None,
+                 interval: float = 2.0, tolerance: float = 0.05, cpu_saturation: float = 0.9,
+                 reprobe_intervals: int = 10):
+        """
+        Args:
+            initial (int): Начальное количество потоков (по умолчанию - доступные ядра)
+            minimum (int): Нижняя граница
+            maximum (int): Верхняя граница (по умолчанию - default_max_workers())
+            interval (float): Минимальная длительность интервала измерения, сек.
+            tolerance (float): Минимальный прирост скорости, считающийся улучшением
+            cpu_saturation (float): Доля загрузки CPU, выше которой потоки не добавляются
+            reprobe_intervals (int): Через сколько стабильных интервалов повторить пробы
+        """
+        self.cpus = available_cpu_count()
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum or default_max_workers())
+        self.current = min(self.maximum, max(self.minimum, initial or self.cpus))
+        self.interval = interval
+        self.tolerance = tolerance
+        self.cpu_saturation = cpu_saturation
+        self.reprobe_intervals = reprobe_intervals
+
+        self.samples: Dict[int, float] = {}  # уровень -> сглаженная скорость, байт/с
+        self.cpu_load = 0.0
+        self.previous: Optional[int] = None  # уровень до последней пробы
+        self.direction = 0  # направление поиска: +1, -1 или 0 (стабильно)
+        self.stable_intervals = 0
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self._completed = 0
+        self._start = time.perf_counter()
+        self._cpu_start = _cpu_seconds()
+
+    def record(self, nbytes: int) -> None:
+        """Учет проверенного архива (вызывается из рабочих потоков)"""
+        with self._lock:
+            self._bytes += nbytes
+            self._completed += 1
+
+    def restart(self) -> None:
+        """Начало нового интервала измерения (например, после паузы)"""
+        with self._lock:
+            self._bytes = 0
+            self._completed = 0
+        self._start = time.perf_counter()
+        self._cpu_start = _cpu_seconds()
+
+    def update(self) -> Optional[int]:
+        """
+        Завершение интервала измерения, если он истек
+
+        Returns:
+            Optional[int]: Новое количество потоков или None, если оно не меняется
+        """
+        now = time.perf_counter()
+        elapsed = now - self._start
+        with self._lock:
+            # Интервал должен содержать хотя бы по одному архиву на поток
+            if elapsed < self.interval or self._completed < self.current:
+                return None
+            nbytes = self._bytes
+            self._bytes = 0
+            self._completed = 0
+        cpu_now = _cpu_seconds()
+        self.cpu_load = (cpu_now - self._cpu_start) / (elapsed * self.cpus)
+        self._start = now
+        self._cpu_start = cpu_now
+
+        throughput = nbytes / elapsed
+        previous = self.samples.get(self.current)
+        self.samples[self.current] = throughput if previous is None else 0.5 * previous + 0.5 * throughput
+        return self._decide()
+
+    def _decide(self) -> Optional[int]:
+        current = self.current
+        speed = self.samples[current]
+        can_grow = current < self.maximum and self.cpu_load < self.cpu_saturation
+        can_shrink = current > self.minimum
+
+        if self.previous is None:
+            # Стабильное состояние: держим уровень, периодически пробуем соседний
+            self.stable_intervals += 1
+            if self.stable_intervals < self.reprobe_intervals and current in self.samples and len(self.samples) > 1:
+                return None
+            self.samples = {current: speed}
+            if can_grow:
+                return self._move(current + 1, speed, +1)
+            if can_shrink:
+                return self._move(current - 1, speed, -1)
+            return None
+
+        previous_speed = self.samples.get(self.previous, 0.0)
+        if speed > previous_speed * (1 + self.tolerance):
+            # Улучшение: продолжаем в том же направлении
+            if self.direction > 0 and can_grow:
+                return self._move(current + 1, speed, +1)
+            if self.direction < 0 and can_shrink:
+                return self._move(current - 1, speed, -1)
+            return self._settle()
+        if speed < previous_speed * (1 - self.tolerance):
+            # Ухудшение: возвращаемся; если шли вверх с первой пробы - пробуем вниз
+            target = self.previous
+            if self.direction > 0 and target - 1 >= self.minimum and target - 1 not in self.samples:
+                self.current = target
+                return self._move(target - 1, previous_speed, -1)
+            self._move(target, speed, 0)
+            return self._settle()
+        # Скорость не изменилась: меньшее число потоков предпочтительнее
+        target = min(current, self.previous)
+        if target != current:
+            self._move(target, speed, 0)
+        return self._settle()
+
+    def _settle(self) -> int:
+        """Переход в стабильное состояние на текущем уровне"""
+        self.previous = None
+        self.direction = 0
+        self.stable_intervals = 0
+        return self.current
+
+    def _move(self, target: int, speed: float, direction: int) -> int:
+        logger.debug(
+            f"Автоподбор потоков: {self.current} -> {target} "
+            f"({speed / (1 << 20):.1f} МБ/с, загрузка CPU {self.cpu_load:.0%})"
+        )
+        self.previous = self.current
+        self.direction = direction
+        self.current = target
+        return target
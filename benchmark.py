@@ -0,0 +1,537 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import zipfile
+import platform
+import argparse
+import subprocess
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from archive_engine import ScanEngine, logger as engine_logger
+from tracing import PhaseTracer
+from page_cache import ReadHints, cached_bytes, drop_cache
+from prefetch import ReadAhead
+
+logger = logging.getLogger(__name__)
+
+# Версия формата файлов манифеста и результатов
+BENCHMARK_VERSION = 1
+
+# Фиксированная дата для записей ZIP, чтобы корпус был побайтно воспроизводимым
+ZIP_DATE_TIME = (2020, 1, 1, 0, 0, 0)
+
+# Расширения, которые передаются движку при замерах
+BENCH_EXTENSIONS = [".zip", ".7z", ".rar", ".001", ".part1.rar"]
+
+
+def make_payload(rng: random.Random, size: int) -> bytes:
+    """
+    Генерация содержимого файла: половина - случайные байты, половина - повторяющийся текст.
+    Так сжатые архивы получаются с реалистичной степенью сжатия.
+    """
+    random_part = rng.getrandbits(8 * (size // 2)).to_bytes(size // 2, "little") if size >= 2 else b""
+    text = b"Archive checker benchmark line %d\n" % rng.randint(0, 1 << 30)
+    text_part = (text * (size // len(text) + 1))[:size - len(random_part)]
+    return random_part + text_part
+
+
+def write_zip(path: Path, rng: random.Random, members: int, member_size: int, compression: int) -> None:
+    """Создание ZIP архива с заданным количеством файлов"""
+    with zipfile.ZipFile(path, "w", compression=compression) as zf:
+        for i in range(members):
+            info = zipfile.ZipInfo(f"file_{i:05d}.bin", date_time=ZIP_DATE_TIME)
+            info.compress_type = compression
+            zf.writestr(info, make_payload(rng, member_size))
+
+
+def corrupt_file(path: Path, rng: random.Random, mode: str) -> None:
+    """
+    Порча архива
+
+    Args:
+        path (Path): Путь к архиву
+        rng (random.Random): Генератор случайных чисел корпуса
+        mode (str): "flip" - инверсия байта в данных, "truncate" - обрезка хвоста,
+            "directory" - порча сигнатуры центрального каталога
+    """
+    data = bytearray(path.read_bytes())
+    if mode == "flip":
+        # Портим байт в первой трети файла, где лежат данные первых записей
+        pos = rng.randint(64, max(65, len(data) // 3))
+        data[pos] ^= 0xFF
+    elif mode == "truncate":
+        del data[len(data) * 2 // 3:]
+    elif mode == "directory":
+        pos = data.rfind(b"PK\x01\x02")
+        if pos >= 0:
+            data[pos:pos + 4] = b"XX\x01\x02"
+    path.write_bytes(bytes(data))
+
+
+def run_tool(args: List[str], cwd: Path) -> bool:
+    """Запуск внешней программы упаковки, возвращает успешность"""
+    try:
+        result = subprocess.run(args, cwd=cwd, capture_output=True)
+        return result.returncode == 0
+    except OSError:
+        return False
+
+
+def generate_corpus(corpus_dir: Path, seed: int = 1234, scale: float = 1.0) -> dict:
+    """
+    Генерация детерминированного корпуса архивов для бенчмарка
+
+    Args:
+        corpus_dir (Path): Директория корпуса (пересоздается)
+        seed (int): Зерно генератора - одинаковое зерно дает одинаковый корпус
+        scale (float): Множитель размеров и количества файлов
+
+    Returns:
+        dict: Манифест корпуса (также сохраняется в manifest.json)
+    """
+    if corpus_dir.exists():
+        shutil.rmtree(corpus_dir)
+    corpus_dir.mkdir(parents=True)
+    rng = random.Random(seed)
+
+    tiny_count = max(1, int(400 * scale))
+    huge_count = max(1, int(3 * scale))
+    huge_size = max(1 << 20, int(48 * (1 << 20) * scale))
+
+    groups: Dict[str, dict] = {}
+
+    def add_group(name: str, fmt: str, expected_corrupted: int = 0) -> Path:
+        group_dir = corpus_dir / name
+        group_dir.mkdir()
+        groups[name] = {"format": fmt, "expected_corrupted": expected_corrupted}
+        return group_dir
+
+    # Много маленьких ZIP
+    for name, compression in (("zip_tiny_stored", zipfile.ZIP_STORED),
+                              ("zip_tiny_deflated", zipfile.ZIP_DEFLATED)):
+        group_dir = add_group(name, "zip")
+        for i in range(tiny_count):
+            write_zip(group_dir / f"tiny_{i:05d}.zip", rng, rng.randint(1, 4),
+                      rng.randint(512, 16 * 1024), compression)
+
+    # Несколько больших ZIP
+    for name, compression in (("zip_huge_stored", zipfile.ZIP_STORED),
+                              ("zip_huge_deflated", zipfile.ZIP_DEFLATED)):
+        group_dir = add_group(name, "zip")
+        for i in range(huge_count):
+            write_zip(group_dir / f"huge_{i:02d}.zip", rng, 4, huge_size // 4, compression)
+
+    # Поврежденные варианты
+    modes = ["flip", "truncate", "directory"]
+    corrupted_count = max(len(modes), int(30 * scale))
+    group_dir = add_group("zip_corrupted", "zip", expected_corrupted=corrupted_count)
+    for i in range(corrupted_count):
+        path = group_dir / f"broken_{i:04d}.zip"
+        write_zip(path, rng, 2, rng.randint(64 * 1024, 256 * 1024), zipfile.ZIP_DEFLATED)
+        corrupt_file(path, rng, modes[i % len(modes)])
+
+    # 7z и RAR создаются только если установлены соответствующие программы
+    source_dir = corpus_dir / "_source"
+    source_dir.mkdir()
+    for i in range(4):
+        (source_dir / f"data_{i}.bin").write_bytes(make_payload(rng, max(64 * 1024, huge_size // 16)))
+
+    if shutil.which("7z"):
+        group_dir = add_group("7z", "7z")
+        for i in range(max(1, int(10 * scale))):
+            run_tool(["7z", "a", "-bd", "-y", str(group_dir / f"set_{i:03d}.7z"), "."], source_dir)
+        group_dir = add_group("7z_multipart", "7z")
+        run_tool(["7z", "a", "-bd", "-y", "-v1m", str(group_dir / "volumes.7z"), "."], source_dir)
+    else:
+        logger.warning("7z не найден, архивы 7z не будут созданы")
+
+    if shutil.which("rar"):
+        group_dir = add_group("rar", "rar")
+        for i in range(max(1, int(10 * scale))):
+            run_tool(["rar", "a", "-idq", "-ep", str(group_dir / f"set_{i:03d}.rar"), "."], source_dir)
+        group_dir = add_group("rar_multipart", "rar")
+        run_tool(["rar", "a", "-idq", "-ep", "-v1m", str(group_dir / "volumes.rar"), "."], source_dir)
+    else:
+        logger.warning("rar не найден, архивы RAR не будут созданы")
+
+    shutil.rmtree(source_dir)
+
+    # Удаляем пустые группы (если программа упаковки завершилась с ошибкой)
+    for name in list(groups):
+        files = sorted(p for p in (corpus_dir / name).iterdir() if p.is_file())
+        if not files:
+            shutil.rmtree(corpus_dir / name)
+            del groups[name]
+            continue
+        groups[name]["files"] = len(files)
+        groups[name]["bytes"] = sum(p.stat().st_size for p in files)
+
+    manifest = {
+        "version": BENCHMARK_VERSION,
+        "seed": seed,
+        "scale": scale,
+        "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "groups": groups,
+    }
+    with open(corpus_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False)
+    return manifest
+
+
+def measure_group(group_dir: Path, workers: int, tracer: Optional[PhaseTracer] = None,
+                  read_ahead: int = 0, cold: bool = False) -> dict:
+    """
+    Один прогон движка по группе архивов (read_ahead - глубина упреждающего чтения, 0 - без него;
+    cold - вытеснить архивы из кеша страниц перед прогоном)
+
+    Returns:
+        dict: files, bytes, seconds, corrupted
+    """
+    engine = ScanEngine(group_dir, BENCH_EXTENSIONS, recursive=True, max_workers=workers, tracer=tracer,
+                        read_ahead=ReadAhead(read_ahead, workers=workers) if read_ahead else None)
+    archives = engine.find_archives()
+    total_bytes = sum(p.stat().st_size for p in archives)
+    if cold:
+        for path in archives:
+            drop_cache(path)
+    start = time.perf_counter()
+    corrupted = engine.run(archives)
+    seconds = time.perf_counter() - start
+    return {
+        "files": len(archives),
+        "bytes": total_bytes,
+        "seconds": seconds,
+        "corrupted": len(corrupted),
+    }
+
+
+def run_benchmark(corpus_dir: Path, workers_list: List[int], repeat: int = 3,
+                  groups: Optional[List[str]] = None, tracer: Optional[PhaseTracer] = None,
+                  read_ahead: int = 0, cold: bool = False) -> dict:
+    """
+    Замер пропускной способности по форматам и количеству потоков.
+    Для каждой комбинации берется лучший из repeat прогонов.
+    Если передан включенный tracer, в результаты добавляется статистика по фазам.
+
+    Returns:
+        dict: Результаты в формате, пригодном для сохранения в JSON
+    """
+    manifest_path = corpus_dir / "manifest.json"
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Манифест корпуса {manifest_path} не найден, выполните generate")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    results = []
+    for name, info in manifest["groups"].items():
+        if groups and name not in groups:
+            continue
+        for workers in workers_list:
+            runs = [measure_group(corpus_dir / name, workers, tracer, read_ahead, cold) for _ in range(repeat)]
+            best = min(runs, key=lambda r: r["seconds"])
+            seconds = max(best["seconds"], 1e-9)
+            record = {
+                "group": name,
+                "format": info["format"],
+                "workers": workers,
+                "files": best["files"],
+                "bytes": best["bytes"],
+                "seconds": round(seconds, 4),
+                "files_per_s": round(best["files"] / seconds, 2),
+                "mb_per_s": round(best["bytes"] / seconds / (1 << 20), 2),
+                "corrupted": best["corrupted"],
+                "expected_corrupted": info["expected_corrupted"],
+            }
+            results.append(record)
+            logger.info(
+                f"{name:<20} потоков: {workers:<3} {record['files_per_s']:>10} файл/с "
+                f"{record['mb_per_s']:>10} МБ/с  повреждено: {record['corrupted']}/{record['expected_corrupted']}"
+            )
+
+    return {
+        "version": BENCHMARK_VERSION,
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": multiprocessing.cpu_count(),
+        "corpus_seed": manifest["seed"],
+        "corpus_scale": manifest["scale"],
+        "repeat": repeat,
+        "read_ahead": read_ahead,
+        "cold": cold,
+        "results": results,
+        "phase_stats": tracer.histograms() if tracer and tracer.enabled else {},
+    }
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.10) -> List[str]:
+    """
+    Сравнение двух прогонов и поиск регрессий
+
+    Args:
+        baseline (dict): Результаты эталонного прогона
+        current (dict): Результаты текущего прогона
+        threshold (float): Допустимое падение пропускной способности (доля)
+
+    Returns:
+        List[str]: Описания найденных регрессий
+    """
+    regressions = []
+    if (baseline.get("corpus_seed"), baseline.get("corpus_scale")) != \
+            (current.get("corpus_seed"), current.get("corpus_scale")):
+        logger.warning("Прогоны выполнены на разных корпусах, сравнение может быть некорректным")
+
+    old = {(r["group"], r["workers"]): r for r in baseline.get("results", [])}
+    for record in current.get("results", []):
+        key = (record["group"], record["workers"])
+        if key not in old:
+            continue
+        before = old[key]["mb_per_s"]
+        after = record["mb_per_s"]
+        if before > 0 and after < before * (1 - threshold):
+            regressions.append(
+                f"{key[0]} ({key[1]} потоков): {before} -> {after} МБ/с "
+                f"({(after / before - 1) * 100:.1f}%)"
+            )
+        if record["corrupted"] != old[key]["corrupted"]:
+            regressions.append(
+                f"{key[0]} ({key[1]} потоков): найдено поврежденных {record['corrupted']}, "
+                f"ранее {old[key]['corrupted']}"
+            )
+    return regressions
+
+
+# Модули, время импорта которых измеряет команда startup
+STARTUP_MODULES = ["archive_engine", "archive_checker_cli", "check_archives", "archive_checker_gui"]
+
+
+def measure_startup(modules: List[str], repeat: int = 5) -> dict:
+    """
+    Замер времени запуска: импорт модуля в отдельном свежем процессе
+
+    Returns:
+        dict: {модуль: {"median_ms", "min_ms"}} (модули с ошибкой импорта пропускаются)
+    """
+    code = (
+        "import sys, time; start = time.perf_counter(); "
+        "__import__(sys.argv[1]); print(time.perf_counter() - start)"
+    )
+    cwd = Path(__file__).resolve().parent
+    results = {}
+    for module in modules:
+        times = []
+        for _ in range(repeat):
+            result = subprocess.run([sys.executable, "-c", code, module], cwd=cwd,
+                                    capture_output=True, text=True)
+            if result.returncode != 0:
+                logger.warning(f"Не удалось импортировать {module}: {result.stderr.strip().splitlines()[-1:]}")
+                break
+            times.append(float(result.stdout.strip()) * 1000)
+        if times:
+            times.sort()
+            results[module] = {"median_ms": round(times[len(times) // 2], 2), "min_ms": round(times[0], 2)}
+            logger.info(f"{module:<22} медиана: {results[module]['median_ms']:>8} мс  мин.: {results[module]['min_ms']:>8} мс")
+    return results
+
+
+# Режимы чтения при замере кеша страниц: (название, ReadHints или None)
+CACHE_MODES = [
+    ("buffered", None),
+    ("fadvise", ReadHints(sequential=True, drop_behind=True)),
+    ("fadvise+block", ReadHints(sequential=True, drop_behind=True, block_kb=1024)),
+]
+
+
+def _meminfo_cached() -> Optional[int]:
+    """Объем кеша страниц системы из /proc/meminfo, байт (None вне Linux)"""
+    try:
+        with open("/proc/meminfo", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Cached:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def measure_page_cache(corpus_dir: Path, workers: int = 2, hot_mb: int = 256,
+                       extensions: Optional[List[str]] = None) -> dict:
+    """
+    Влияние проверки на кеш страниц: для каждого режима чтения архивы вытесняются
+    из кеша, затем читается "горячий" файл (данные другой программы), выполняется
+    проверка и замеряется, какая часть архивов и горячего файла осталась в кеше (mincore).
+    Доля горячего файла в кеше - доля попаданий в кеш, которую увидит другая программа;
+    при достаточном объеме свободной памяти она близка к 100% в любом режиме, разницу
+    показывает корпус больше свободной памяти или ограничение памяти cgroup.
+
+    Returns:
+        dict: Результаты в формате, пригодном для сохранения в JSON
+    """
+    extensions = extensions or [".zip"]
+    archives = ScanEngine(corpus_dir, extensions).find_archives()
+    if not archives:
+        raise FileNotFoundError(f"В {corpus_dir} нет архивов {', '.join(extensions)}, выполните generate")
+    total_bytes = sum(p.stat().st_size for p in archives)
+    hot_path = corpus_dir / "page_cache_hot.bin"
+    chunk = os.urandom(1 << 20)
+    with open(hot_path, "wb") as f:
+        for _ in range(hot_mb):
+            f.write(chunk)
+
+    results = []
+    try:
+        for mode, hints in CACHE_MODES:
+            for path in archives:
+                drop_cache(path)
+            with open(hot_path, "rb") as f:
+                while f.read(1 << 20):
+                    pass
+            cached_before = _meminfo_cached()
+            engine = ScanEngine(corpus_dir, extensions, max_workers=workers, read_hints=hints)
+            start = time.perf_counter()
+            engine.run(archives)
+            seconds = max(time.perf_counter() - start, 1e-9)
+            cached_after = _meminfo_cached()
+            archive_cached = [cached_bytes(path) for path in archives]
+            hot_cached = cached_bytes(hot_path)
+            record = {
+                "mode": mode,
+                "files": len(archives),
+                "bytes": total_bytes,
+                "seconds": round(seconds, 4),
+                "mb_per_s": round(total_bytes / seconds / (1 << 20), 2),
+                "archives_cached_pct": None if None in archive_cached
+                else round(100 * sum(archive_cached) / max(total_bytes, 1), 1),
+                "hot_cached_pct": None if hot_cached is None else round(100 * hot_cached / (hot_mb << 20), 1),
+                "cached_delta_mb": None if cached_before is None or cached_after is None
+                else round((cached_after - cached_before) / (1 << 20), 1),
+            }
+            results.append(record)
+            logger.info(
+                f"{mode:<14} {record['mb_per_s']:>10} МБ/с  архивы в кеше: {record['archives_cached_pct']}%  "
+                f"горячий файл в кеше: {record['hot_cached_pct']}%  прирост кеша: {record['cached_delta_mb']} МБ"
+            )
+    finally:
+        hot_path.unlink()
+
+    return {
+        "version": BENCHMARK_VERSION,
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workers": workers,
+        "hot_mb": hot_mb,
+        "page_cache": results,
+    }
+
+
+def main() -> int:
+    """
+    Точка входа бенчмарка
+
+    Примеры:
+        python benchmark.py generate --corpus bench_corpus --seed 1234
+        python benchmark.py run --corpus bench_corpus --workers 1,2,4 --output results.json
+        python benchmark.py run --corpus bench_corpus --compare results.json
+        python benchmark.py startup
+        python benchmark.py cache --corpus bench_corpus --hot-mb 512
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарк проверки архивов")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    gen = subparsers.add_parser("generate", help="Создать корпус архивов")
+    gen.add_argument("--corpus", default="bench_corpus", help="Директория корпуса")
+    gen.add_argument("--seed", type=int, default=1234, help="Зерно генератора")
+    gen.add_argument("--scale", type=float, default=1.0, help="Множитель размера корпуса")
+
+    run = subparsers.add_parser("run", help="Выполнить замеры")
+    run.add_argument("--corpus", default="bench_corpus", help="Директория корпуса")
+    run.add_argument("--workers", default="1,2,4", help="Список количества потоков через запятую")
+    run.add_argument("--repeat", type=int, default=3, help="Количество повторов каждого замера")
+    run.add_argument("--groups", default="", help="Только указанные группы (через запятую)")
+    run.add_argument("--output", help="Файл для сохранения результатов (JSON)")
+    run.add_argument("--compare", help="Файл с эталонными результатами для поиска регрессий")
+    run.add_argument("--threshold", type=float, default=0.10, help="Допустимое падение МБ/с (доля)")
+    run.add_argument("--read-ahead", type=int, default=0,
+                     help="Глубина упреждающего чтения, блоков по 1 МБ (0 - без упреждения)")
+    run.add_argument("--cold", action="store_true",
+                     help="Вытеснять архивы из кеша страниц перед каждым прогоном (чтение с диска)")
+    run.add_argument("--trace", help="Замер фаз и сохранение трассы в формате Chrome trace-event")
+
+    startup = subparsers.add_parser("startup", help="Замерить время импорта модулей программы")
+    startup.add_argument("--modules", default=",".join(STARTUP_MODULES), help="Модули через запятую")
+    startup.add_argument("--repeat", type=int, default=5, help="Количество запусков каждого модуля")
+    startup.add_argument("--output", help="Файл для сохранения результатов (JSON)")
+
+    cache = subparsers.add_parser("cache", help="Замерить влияние проверки на кеш страниц")
+    cache.add_argument("--corpus", default="bench_corpus", help="Директория корпуса")
+    cache.add_argument("--workers", type=int, default=2, help="Количество потоков")
+    cache.add_argument("--hot-mb", type=int, default=256, help="Размер файла, изображающего данные других программ, МБ")
+    cache.add_argument("--extensions", default=".zip",
+                       help="Расширения архивов через запятую (внешние программы читают мимо подсказок)")
+    cache.add_argument("--output", help="Файл для сохранения результатов (JSON)")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Сообщения о каждом архиве искажают замеры
+    engine_logger.setLevel(logging.WARNING)
+
+    if args.command == "generate":
+        manifest = generate_corpus(Path(args.corpus), args.seed, args.scale)
+        for name, info in manifest["groups"].items():
+            logger.info(f"{name:<20} файлов: {info['files']:<6} байт: {info['bytes']}")
+        return 0
+
+    if args.command == "startup":
+        results = measure_startup([m.strip() for m in args.modules.split(",") if m.strip()], args.repeat)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump({"version": BENCHMARK_VERSION, "python": platform.python_version(),
+                           "startup": results}, f, indent=4, ensure_ascii=False)
+        return 0
+
+    if args.command == "cache":
+        extensions = [ext.strip() for ext in args.extensions.split(",") if ext.strip()]
+        results = measure_page_cache(Path(args.corpus), args.workers, args.hot_mb, extensions)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=4, ensure_ascii=False)
+        return 0
+
+    workers_list = [int(w) for w in args.workers.split(",") if w.strip()]
+    groups = [g.strip() for g in args.groups.split(",") if g.strip()] or None
+    tracer = PhaseTracer(enabled=bool(args.trace))
+    current = run_benchmark(Path(args.corpus), workers_list, args.repeat, groups, tracer, args.read_ahead,
+                            args.cold)
+
+    if args.trace:
+        tracer.export_chrome_trace(args.trace)
+        logger.info(f"Время по фазам проверки:\n{tracer.format_histograms()}")
+        logger.info(f"Трасса сохранена в файл: {args.trace}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=4, ensure_ascii=False)
+        logger.info(f"Результаты сохранены в файл: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, current, args.threshold)
+        if regressions:
+            for line in regressions:
+                logger.error(f"Регрессия: {line}")
+            return 1
+        logger.info("Регрессий не обнаружено")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
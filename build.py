@@ -24,6 +24,7 @@ def build_exe():
         '--add-data=settings.json;.',
         # Добавляем зависимости
         '--hidden-import=PyQt6',
+        '--hidden-import=numpy',  # Импортируется при проверке больших ZIP (zip_directory.py)
     ]
     
     # Если Windows, добавляем специфичные параметры
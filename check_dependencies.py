@@ -3,6 +3,8 @@ import importlib
 import subprocess
 import os
 
+from format_backends import BACKENDS
+
 def check_module(module_name):
     try:
         importlib.import_module(module_name)
@@ -33,12 +35,23 @@ def main():
         return False
     
     # Проверяем необходимые модули
-    required_modules = ['PyQt6', 'py7zr', 'rarfile']
+    required_modules = ['PyQt6']
     all_modules_ok = all(check_module(module) for module in required_modules)
     
+    # Необязательные модули: без NumPy оглавления ZIP читаются через zipfile (медленнее и с большим расходом памяти)
+    optional_modules = ['numpy']
+    for module in optional_modules:
+        check_module(module)
+    
     # Проверяем наличие WinRAR
     winrar_ok = check_winrar()
     
+    # Доступность форматов (без импорта их модулей)
+    print("\nФорматы архивов:")
+    for backend in BACKENDS.values():
+        mark = "✓" if backend.is_available() else "✗"
+        print(f"{mark} {backend.description}: {backend.tool or ', '.join(backend.modules)}")
+    
     print("\nРезультаты проверки:")
     print("-" * 50)
     if all_modules_ok and winrar_ok:
@@ -0,0 +1,181 @@
+import os
+import hashlib
+import logging
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Размер блоков в начале и в конце файла для предварительного сравнения
+EDGE_BLOCK_SIZE = 64 * 1024
+CHUNK_SIZE = 1 << 20
+
+
+class DedupInterrupted(Exception):
+    """Поиск копий прерван пользователем"""
+
+
+def _full_hasher():
+    """
+    Быстрая хеш-функция для полного сравнения: xxh3_128, если установлен xxhash,
+    иначе blake2b из стандартной библиотеки
+    """
+    try:
+        import xxhash
+        return xxhash.xxh3_128()
+    except ImportError:
+        return hashlib.blake2b(digest_size=16)
+
+
+def edge_hash(path: Path, size: int) -> bytes:
+    """Хеш первого и последнего блоков файла"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        digest.update(f.read(EDGE_BLOCK_SIZE))
+        if size > EDGE_BLOCK_SIZE:
+            f.seek(max(EDGE_BLOCK_SIZE, size - EDGE_BLOCK_SIZE))
+            digest.update(f.read(EDGE_BLOCK_SIZE))
+    return digest.digest()
+
+
+def full_hash(path: Path, stop_check: Optional[Callable[[], bool]] = None) -> bytes:
+    """Хеш всего содержимого файла"""
+    digest = _full_hasher()
+    with open(path, 'rb') as f:
+        while True:
+            if stop_check and stop_check():
+                raise DedupInterrupted()
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.digest()
+
+
+class DuplicateGroups:
+    """
+    Результат поиска копий: каждому проверяемому архиву (представителю группы)
+    соответствует список его копий, которые не проверяются, а получают его результат
+    """
+
+    def __init__(self):
+        self.representatives: List[Path] = []  # Архивы, которые нужно проверить
+        self.copies: Dict[Path, List[Path]] = {}  # представитель -> копии
+        self.hardlinks = 0  # Копии, найденные по номеру inode без чтения
+        self.bytes_skipped = 0
+
+    @property
+    def duplicates(self) -> int:
+        return sum(len(copies) for copies in self.copies.values())
+
+
+def find_duplicates(paths: Iterable[Path], map_func: Callable = map,
+                    stop_check: Optional[Callable[[], bool]] = None,
+                    exclude: Optional[Callable[[Path], bool]] = None) -> DuplicateGroups:
+    """
+    Группировка одинаковых архивов. Кандидаты последовательно отсеиваются:
+    жесткие ссылки (одинаковые st_dev/st_ino) объединяются без чтения, затем файлы
+    группируются по размеру, по хешу первого/последнего блоков и по хешу содержимого.
+
+    Args:
+        paths: Архивы в порядке проверки
+        map_func: Функция map для параллельного хеширования (например, executor.map)
+        stop_check: Функция, возвращающая True при остановке
+        exclude: Архивы, результат проверки которых зависит не только от содержимого
+            (например, части многотомных архивов); они всегда проверяются сами.
+            Вызывается только для файлов, у которых нашлись кандидаты в копии
+
+    Returns:
+        DuplicateGroups: Представители и их копии (представитель - первый по порядку)
+
+    Raises:
+        DedupInterrupted: Если поиск прерван
+    """
+    groups = DuplicateGroups()
+    order: Dict[Path, int] = {}
+    sizes: Dict[Path, int] = {}
+    by_inode: Dict[Tuple[int, int], Path] = {}
+    by_size: Dict[int, List[Path]] = defaultdict(list)
+
+    def add_copy(representative: Path, copy: Path) -> None:
+        groups.copies.setdefault(representative, []).append(copy)
+
+    for path in paths:
+        order[path] = len(order)
+        try:
+            st = os.stat(path)
+        except OSError:
+            # Файл исчез или недоступен - пусть ошибку сообщит проверка
+            groups.representatives.append(path)
+            continue
+        # На некоторых файловых системах st_ino равен 0 - такие файлы не объединяем
+        key = (st.st_dev, st.st_ino)
+        if st.st_ino and key in by_inode:
+            if exclude and (exclude(path) or exclude(by_inode[key])):
+                groups.representatives.append(path)
+                continue
+            add_copy(by_inode[key], path)
+            groups.hardlinks += 1
+            groups.bytes_skipped += st.st_size
+            continue
+        by_inode[key] = path
+        sizes[path] = st.st_size
+        by_size[st.st_size].append(path)
+
+    def refine(candidates: List[List[Path]], key_func) -> List[List[Path]]:
+        """Разбиение групп-кандидатов по значению key_func"""
+        flat = [path for group in candidates for path in group]
+        keys = iter(list(map_func(key_func, flat)))
+        refined = []
+        for group in candidates:
+            buckets: Dict[bytes, List[Path]] = defaultdict(list)
+            for path in group:
+                buckets[next(keys)].append(path)
+            for bucket in buckets.values():
+                if len(bucket) > 1:
+                    refined.append(bucket)
+                else:
+                    groups.representatives.extend(bucket)
+        return refined
+
+    candidates = []
+    for size, same_size in by_size.items():
+        if len(same_size) > 1 and size > 0 and exclude:
+            # Исключения проверяем только у кандидатов, чтобы не тратить время на остальные
+            kept = [path for path in same_size if not exclude(path)]
+            groups.representatives.extend(path for path in same_size if path not in kept)
+            same_size = kept
+        if len(same_size) > 1 and size > 0:
+            candidates.append(same_size)
+        else:
+            groups.representatives.extend(same_size)
+
+    def safe(hash_func):
+        def key(path: Path):
+            if stop_check and stop_check():
+                raise DedupInterrupted()
+            try:
+                return hash_func(path)
+            except OSError as e:
+                # Нечитаемый файл остается отдельной группой, ошибку сообщит проверка
+                logger.debug(f"Не удалось прочитать {path}: {e}")
+                return path
+        return key
+
+    candidates = refine(candidates, safe(lambda path: edge_hash(path, sizes[path])))
+    candidates = refine(candidates, safe(lambda path: full_hash(path, stop_check)))
+
+    for group in candidates:
+        group.sort(key=order.get)
+        representative = group[0]
+        groups.representatives.append(representative)
+        for copy in group[1:]:
+            add_copy(representative, copy)
+            groups.bytes_skipped += sizes[copy]
+            # Жесткие ссылки на копию тоже получают результат представителя
+            for link in groups.copies.pop(copy, []):
+                add_copy(representative, link)
+
+    groups.representatives.sort(key=order.get)
+    return groups
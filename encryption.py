@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from results import ErrorMessage
+
+logger = logging.getLogger(__name__)
+
+
+class EncryptedMessage(ErrorMessage):
+    """
+    Сообщение о зашифрованном архиве. Проверяющие возвращают его вместо текста ошибки
+    вместе с результатом None: архив не поврежден и не проверен, а по классу ошибки
+    результат отличается от подозрительного.
+    """
+
+    def __new__(cls, message: str):
+        return super().__new__(cls, "encrypted", message)
+
+
+def is_encrypted_result(is_valid: Optional[bool], error) -> bool:
+    return is_valid is None and isinstance(error, EncryptedMessage)
+
+
+def zip_encrypted_members(members) -> list:
+    """Зашифрованные файлы ZIP (бит 0 флагов записи; AES тоже его устанавливает)"""
+    return [info for info in members if info.flag_bits & 0x1]
+
+
+def _fingerprint(password: str) -> str:
+    """Отпечаток пароля для кеша: сами пароли на диск не записываются"""
+    return hashlib.sha256(("zip_check:" + password).encode("utf-8")).hexdigest()[:16]
+
+
+class PasswordStore:
+    """
+    Список паролей для зашифрованных архивов и кеш "какой пароль открыл какой архив".
+    В кеше хранятся отпечатки паролей (не пароли); архив, к которому не подошел
+    ни один пароль, не перебирается повторно, пока не изменится он сам или список паролей.
+    """
+
+    def __init__(self, passwords: List[str], cache_path=None, save_interval: float = 30.0):
+        """
+        Args:
+            passwords (List[str]): Пароли в порядке перебора
+            cache_path: Файл кеша (None - кеш только в памяти)
+            save_interval (float): Период промежуточного сохранения кеша, сек.
+        """
+        self.passwords = list(dict.fromkeys(p for p in passwords if p))
+        self._by_fingerprint = {_fingerprint(p): p for p in self.passwords}
+        self.list_digest = hashlib.sha256("\n".join(sorted(self._by_fingerprint)).encode()).hexdigest()[:16]
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self.entries: Dict[str, dict] = self.load()
+
+    @classmethod
+    def from_settings(cls, settings: dict, passwords_file: Optional[str] = None) -> Optional["PasswordStore"]:
+        """
+        Пароли из раздела "passwords" настроек
+
+        Args:
+            settings (dict): {"file": файл паролей (по одному в строке), "cache_file": файл кеша}
+            passwords_file (str): Файл паролей вместо указанного в настройках
+
+        Returns:
+            Optional[PasswordStore]: None, если файл паролей не задан
+        """
+        path = passwords_file or settings.get("file")
+        if not path:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                passwords = [line.rstrip("\r\n") for line in f]
+        except OSError as e:
+            logger.error(f"Не удалось прочитать файл паролей {path}: {e}")
+            return None
+        return cls(passwords, settings.get("cache_file") or None)
+
+    def load(self) -> Dict[str, dict]:
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("archives", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Не удалось загрузить кеш паролей {self.cache_path}: {e}")
+            return {}
+
+    def save(self) -> None:
+        """Сохранение кеша (через временный файл)"""
+        if not self.cache_path:
+            return
+        with self._lock:
+            data = json.dumps({"archives": self.entries}, ensure_ascii=False)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logger.error(f"Не удалось сохранить кеш паролей {self.cache_path}: {e}")
+
+    def flush(self) -> None:
+        if self._dirty:
+            self.save()
+
+    @staticmethod
+    def _key(path) -> str:
+        return os.path.abspath(path)
+
+    def _entry(self, path) -> Optional[dict]:
+        """Запись кеша, если архив не изменился (размер и время изменения)"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self.entries.get(self._key(path))
+        if not entry or entry.get("size") != st.st_size or entry.get("mtime") != st.st_mtime:
+            return None
+        return entry
+
+    def known(self, path) -> Optional[str]:
+        """Пароль, подходивший раньше к архиву в текущем виде"""
+        entry = self._entry(path)
+        return self._by_fingerprint.get(entry.get("password")) if entry else None
+
+    def candidates(self, path) -> List[str]:
+        """
+        Пароли для перебора: подходивший раньше - первым; пустой список, если с тем же
+        списком паролей уже ни один не подошел к архиву в текущем виде
+        """
+        entry = self._entry(path)
+        if not entry:
+            return list(self.passwords)
+        known = self._by_fingerprint.get(entry.get("password"))
+        if known is not None:
+            return [known] + [p for p in self.passwords if p != known]
+        if entry.get("list") == self.list_digest:
+            return []
+        return list(self.passwords)
+
+    def remember(self, path, password: Optional[str]) -> None:
+        """Запись результата перебора (None - ни один пароль не подошел)"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        entry = {"size": st.st_size, "mtime": st.st_mtime, "list": self.list_digest}
+        if password is not None:
+            entry["password"] = _fingerprint(password)
+        with self._lock:
+            self.entries[self._key(path)] = entry
+            self._dirty = True
+            save = time.monotonic() - self._saved_at >= self.save_interval
+        if save:
+            self.save()
+
+    def __len__(self) -> int:
+        return len(self.passwords)
@@ -0,0 +1,157 @@
+import time
+import logging
+import importlib
+import importlib.util
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class FormatBackend:
+    """
+    Описание формата архивов: расширения, метод проверки и зависимости.
+    Модули зависимостей импортируются при первом обращении, а не при запуске программы.
+    """
+
+    def __init__(self, name: str, description: str, extensions: List[str], method: str,
+                 modules: Tuple[str, ...] = (), tool: Optional[str] = None,
+                 supports_quick: bool = False, supports_parallel_members: bool = False):
+        """
+        Args:
+            name (str): Имя формата ("zip", "rar", ...)
+            description (str): Описание для интерфейса
+            extensions (List[str]): Окончания имен файлов этого формата
+            method (str): Имя метода ArchiveChecker, выполняющего проверку
+            modules (Tuple[str, ...]): Python-модули, нужные для проверки (первый - основной)
+            tool (str): Внешняя программа проверки, если используется
+            supports_quick (bool): Есть быстрая проверка без полной распаковки
+            supports_parallel_members (bool): Файлы внутри архива можно проверять параллельно
+        """
+        self.name = name
+        self.description = description
+        self.extensions = extensions
+        self.method = method
+        self.modules = modules
+        self.tool = tool
+        self.supports_quick = supports_quick
+        self.supports_parallel_members = supports_parallel_members
+        self.load_time = None  # Время импорта зависимостей, сек.
+        self._module = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self.load_time is not None
+
+    def load(self):
+        """
+        Импорт зависимостей формата (выполняется один раз)
+
+        Returns:
+            Основной модуль формата или None, если модули не нужны
+
+        Raises:
+            ImportError: Если модуль не установлен
+        """
+        if self.load_time is not None:
+            return self._module
+        with self._lock:
+            if self.load_time is None:
+                start = time.perf_counter()
+                loaded = [importlib.import_module(name) for name in self.modules]
+                self._module = loaded[0] if loaded else None
+                self.load_time = time.perf_counter() - start
+                logger.debug(f"Загружен формат {self.name} за {self.load_time * 1000:.1f} мс")
+        return self._module
+
+    def modules_available(self) -> bool:
+        """Python-модули формата установлены (проверка без импорта)"""
+        return bool(self.modules) and all(importlib.util.find_spec(name) for name in self.modules)
+
+    def is_available(self) -> bool:
+        """Проверка наличия зависимостей без их импорта: программы проверки или Python-модулей"""
+        import shutil
+        if self.tool and shutil.which(self.tool):
+            return True
+        if not self.modules:
+            return self.tool is None  # Формат без зависимостей (tar) доступен всегда
+        return self.modules_available()
+
+
+# Реестр форматов; порядок важен - окончания имен проверяются по очереди
+BACKENDS: Dict[str, FormatBackend] = {}
+
+
+def register_backend(backend: FormatBackend) -> None:
+    """Регистрация формата в реестре"""
+    BACKENDS[backend.name] = backend
+
+
+register_backend(FormatBackend(
+    "zip", "ZIP архивы", ['.zip'], "check_zip",
+    modules=("zipfile",),
+    supports_quick=True, supports_parallel_members=True
+))
+register_backend(FormatBackend(
+    "7z", "7-Zip архивы", ['.7z'], "check_7z",
+    tool="7z",
+    supports_quick=True
+))
+register_backend(FormatBackend(
+    "rar", "RAR архивы", ['.rar', '.r00', '.part1.rar', '.001'], "check_rar",
+    tool="unrar",
+    supports_quick=True
+))
+# Архивы tar (в том числе сжатые) должны идти раньше одиночных сжатых файлов:
+# ".tar.gz" заканчивается и на ".gz"
+register_backend(FormatBackend(
+    "tar", "Архивы tar", ['.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tbz',
+                          '.tar.xz', '.txz', '.tar.zst', '.tzst'], "check_tar"
+))
+register_backend(FormatBackend(
+    "gz", "Файлы gzip", ['.gz'], "check_compressed",
+    modules=("gzip",), tool="pigz"
+))
+register_backend(FormatBackend(
+    "bz2", "Файлы bzip2", ['.bz2'], "check_compressed",
+    modules=("bz2",), tool="lbzip2"
+))
+register_backend(FormatBackend(
+    "xz", "Файлы xz", ['.xz'], "check_compressed",
+    modules=("lzma",), tool="xz"
+))
+register_backend(FormatBackend(
+    "zst", "Файлы zstd", ['.zst'], "check_compressed",
+    modules=("zstandard",), tool="zstd"
+))
+
+
+def get_backend(name: str) -> Optional[FormatBackend]:
+    """Получение формата по имени"""
+    return BACKENDS.get(name)
+
+
+def backend_for_path(file_path) -> Optional[FormatBackend]:
+    """Определение формата по имени файла"""
+    name = Path(file_path).name.lower()
+    for backend in BACKENDS.values():
+        if any(name.endswith(ext) for ext in backend.extensions):
+            return backend
+    return None
+
+
+def load_module(name: str):
+    """
+    Основной модуль формата (импортируется при первом вызове)
+
+    Raises:
+        ImportError: Если модуль не установлен
+    """
+    return BACKENDS[name].load()
+
+
+def load_times() -> Dict[str, float]:
+    """Время загрузки уже использованных форматов, сек."""
+    return {name: b.load_time for name, b in BACKENDS.items() if b.load_time is not None}
@@ -0,0 +1,252 @@
+import os
+import shutil
+import signal
+import logging
+import threading
+import subprocess
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+MB = 1 << 20
+
+# Коэффициент сжатия проверяется только для данных больше этого объема:
+# маленькие файлы из нулей или повторов законно сжимаются очень сильно
+RATIO_MIN_BYTES = 16 * MB
+
+# Сигналы, которыми ядро завершает процесс при превышении лимитов
+_LIMIT_SIGNALS = {getattr(signal, name) for name in ("SIGXCPU", "SIGKILL") if hasattr(signal, name)}
+
+# При лимите адресного пространства malloc возвращает ошибку, и программа завершается сама:
+# коды возврата "недостаточно памяти" (7-Zip и RAR - 8; unrar с -inul ничего не пишет в stderr)
+_MEMORY_EXIT_CODES = {"7z": 8, "7za": 8, "7zz": 8, "unrar": 8, "rar": 8}
+
+# и сообщения распаковщиков о нехватке памяти (7z, xz/strerror(ENOMEM), zstd, bzip2, gzip/pigz)
+_MEMORY_MESSAGES = (
+    "can't allocate required memory", "cannot allocate memory", "not enough memory",
+    "allocation error", "memory usage limit", "couldn't allocate", "out of memory",
+)
+
+
+class SuspiciousArchive(Exception):
+    """Архив похож на zip-бомбу или превышает ограничения ресурсов"""
+
+
+class ResourceLimits:
+    """
+    Ограничения ресурсов на проверку одного архива. Архив, нарушивший их, не считается
+    поврежденным, а попадает в отдельную категорию "подозрительных".
+    Нулевое значение отключает соответствующее ограничение.
+    """
+
+    def __init__(self, max_total_mb: int = 0, max_ratio: int = 1000, max_depth: int = 2,
+                 cpu_seconds: int = 0, memory_mb: int = 0):
+        """
+        Args:
+            max_total_mb (int): Максимальный объем распакованных данных архива, МБ
+            max_ratio (int): Максимальный коэффициент сжатия (распакованный / сжатый объем)
+            max_depth (int): Максимальная глубина вложенных архивов, проверяемых внутри ZIP
+            cpu_seconds (int): Лимит процессорного времени внешней программы (7z, unrar, xz), сек.
+            memory_mb (int): Лимит адресного пространства внешней программы, МБ
+        """
+        self.max_total_bytes = max_total_mb * MB
+        self.max_ratio = max_ratio
+        self.max_depth = max_depth
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_mb * MB
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "ResourceLimits":
+        """Ограничения из раздела "limits" настроек"""
+        return cls(
+            settings.get("max_total_mb", 0), settings.get("max_ratio", 1000), settings.get("max_depth", 2),
+            settings.get("cpu_seconds", 0), settings.get("memory_mb", 0)
+        )
+
+    def check_declared(self, name: str, size: int, compressed: int) -> None:
+        """
+        Проверка объявленных размеров до распаковки
+
+        Raises:
+            SuspiciousArchive: Если размеры превышают ограничения
+        """
+        if self.max_total_bytes and size > self.max_total_bytes:
+            raise SuspiciousArchive(
+                f"{name}: объявленный размер {size / MB:.0f} МБ превышает ограничение "
+                f"{self.max_total_bytes / MB:.0f} МБ"
+            )
+        if self.max_ratio and size > RATIO_MIN_BYTES and size > compressed * self.max_ratio:
+            raise SuspiciousArchive(
+                f"{name}: коэффициент сжатия {size / max(compressed, 1):.0f}:1 "
+                f"превышает ограничение {self.max_ratio}:1"
+            )
+
+
+class DecompressionBudget:
+    """Учет распакованных данных одного архива (включая вложенные архивы)"""
+
+    def __init__(self, limits: ResourceLimits, compressed_size: int, name: str):
+        self.limits = limits
+        self.compressed_size = compressed_size
+        self.name = name
+        self.total = 0
+
+    def consume(self, nbytes: int) -> None:
+        """
+        Учет очередной порции распакованных данных
+
+        Raises:
+            SuspiciousArchive: Если превышен объем или коэффициент сжатия
+        """
+        self.total += nbytes
+        self.limits.check_declared(self.name, self.total, self.compressed_size)
+
+
+def _apply_rlimits(pid: int, limits: ResourceLimits) -> None:
+    """Установка лимитов CPU и памяти уже запущенному процессу (Linux, prlimit)"""
+    import resource
+    if not hasattr(resource, "prlimit"):
+        logger.debug("Ограничение ресурсов внешних программ не поддерживается в этой системе")
+        return
+    try:
+        if limits.cpu_seconds:
+            resource.prlimit(pid, resource.RLIMIT_CPU, (limits.cpu_seconds, limits.cpu_seconds + 5))
+        if limits.memory_bytes:
+            resource.prlimit(pid, resource.RLIMIT_AS, (limits.memory_bytes, limits.memory_bytes))
+    except (OSError, ValueError) as e:
+        # Процесс мог уже завершиться
+        logger.debug(f"Не удалось ограничить ресурсы процесса {pid}: {e}")
+
+
+class ChildProcesses:
+    """
+    Запущенные внешние программы проверки (7z, unrar, распаковщики).
+    На паузе они приостанавливаются сигналом SIGSTOP и продолжают работу после SIGCONT;
+    программа, запущенная во время паузы, приостанавливается сразу после запуска.
+    Программы запускаются с пониженным приоритетом процессора и ввода-вывода, если он задан.
+    """
+
+    def __init__(self, nice: int = 0, idle_io: bool = False):
+        """
+        Args:
+            nice (int): Приоритет процессора (0 - как у программы проверки, 19 - самый низкий)
+            idle_io (bool): Класс ввода-вывода idle (чтение только при простое диска, Linux)
+        """
+        self._lock = threading.Lock()
+        self._processes = set()
+        self.suspended = False
+        self.nice = nice
+        self.idle_io = idle_io
+
+    def command(self, cmd: List[str]) -> List[str]:
+        """
+        Команда запуска с учетом приоритета: ionice и nice заменяют себя программой (exec),
+        поэтому номер процесса, лимиты и сигналы паузы относятся к ней
+        """
+        if os.name != "posix":
+            return cmd
+        if self.nice and shutil.which("nice"):
+            cmd = ["nice", "-n", str(self.nice)] + cmd
+        if self.idle_io and shutil.which("ionice"):
+            cmd = ["ionice", "-c", "3"] + cmd
+        return cmd
+
+    def _signal(self, process: subprocess.Popen, signum: int) -> None:
+        try:
+            os.kill(process.pid, signum)
+        except OSError:
+            pass  # Процесс уже завершился
+
+    def add(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._processes.add(process)
+            if self.suspended and hasattr(signal, "SIGSTOP"):
+                self._signal(process, signal.SIGSTOP)
+
+    def remove(self, process: subprocess.Popen) -> None:
+        with self._lock:
+            self._processes.discard(process)
+
+    def suspend(self) -> None:
+        """Приостановка всех программ (только POSIX)"""
+        with self._lock:
+            self.suspended = True
+            if not hasattr(signal, "SIGSTOP"):
+                logger.debug("Приостановка внешних программ не поддерживается в этой системе")
+                return
+            for process in self._processes:
+                self._signal(process, signal.SIGSTOP)
+
+    def resume(self) -> None:
+        """Продолжение работы приостановленных программ"""
+        with self._lock:
+            self.suspended = False
+            if hasattr(signal, "SIGCONT"):
+                for process in self._processes:
+                    self._signal(process, signal.SIGCONT)
+
+
+def popen_limited(cmd: List[str], limits: Optional[ResourceLimits] = None,
+                  children: Optional[ChildProcesses] = None, **kwargs) -> subprocess.Popen:
+    """
+    Запуск внешней программы с ограничениями CPU и памяти.
+    Лимиты выставляются через prlimit сразу после запуска: preexec_fn небезопасен
+    в многопоточной программе. Процесс регистрируется в children (для паузы);
+    снять регистрацию после завершения должна вызывающая сторона.
+    """
+    if children:
+        cmd = children.command(cmd)
+    # Программа не должна ждать ввода (например, запроса пароля)
+    kwargs.setdefault("stdin", subprocess.DEVNULL)
+    process = subprocess.Popen(cmd, **kwargs)
+    if limits and (limits.cpu_seconds or limits.memory_bytes) and os.name == "posix":
+        _apply_rlimits(process.pid, limits)
+    if children:
+        children.add(process)
+    return process
+
+
+def run_limited(cmd: List[str], limits: Optional[ResourceLimits] = None,
+                children: Optional[ChildProcesses] = None, input: Optional[str] = None) -> subprocess.CompletedProcess:
+    """
+    Аналог subprocess.run(cmd, capture_output=True, text=True) с ограничениями ресурсов.
+    Если задан input, он передается программе через stdin, а программа запускается в новом
+    сеансе без управляющего терминала: запрос пароля (getpass) читает stdin, а не /dev/tty.
+    """
+    kwargs = {"stdin": subprocess.PIPE, "start_new_session": True} if input is not None else {}
+    with popen_limited(cmd, limits, children, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                       **kwargs) as process:
+        try:
+            stdout, stderr = process.communicate(input)
+        finally:
+            if children:
+                children.remove(process)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def limit_violation(returncode: int, limits: Optional[ResourceLimits], stderr: Optional[str] = None,
+                    tool: Optional[str] = None) -> Optional[str]:
+    """
+    Описание нарушения лимита по коду возврата внешней программы
+
+    Args:
+        returncode (int): Код возврата
+        limits (ResourceLimits): Ограничения, с которыми запущена программа
+        stderr (str): Вывод ошибок программы (для распознавания нехватки памяти)
+        tool (str): Программа (путь или имя) - по ней выбирается код "недостаточно памяти"
+
+    Returns:
+        Optional[str]: Сообщение, если процесс завершен ядром из-за лимита
+            или не смог выделить память при лимите памяти, иначе None
+    """
+    if not limits or not (limits.cpu_seconds or limits.memory_bytes):
+        return None
+    if returncode < 0 and -returncode in _LIMIT_SIGNALS:
+        return f"Внешняя программа завершена из-за превышения лимита ресурсов (сигнал {-returncode})"
+    if limits.memory_bytes and returncode > 0:
+        name = os.path.splitext(os.path.basename(tool))[0].lower() if tool else None
+        text = (stderr or "").lower()
+        if _MEMORY_EXIT_CODES.get(name) == returncode or any(message in text for message in _MEMORY_MESSAGES):
+            return (f"Внешней программе не хватило памяти при лимите "
+                    f"{limits.memory_bytes // MB} МБ (код возврата {returncode})")
+    return None
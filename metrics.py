@@ -0,0 +1,284 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Префикс имен всех метрик
+PREFIX = "archive_checker"
+
+# Границы корзин гистограммы времени проверки архива, в секундах
+LATENCY_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 1800)
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    """Экранирование значения метки"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    """Форматирование набора меток"""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class ScanMetrics:
+    """
+    Счетчики и гистограммы движка проверки.
+    Обновляются из рабочих потоков, читаются HTTP-сервером или экспортом в файл.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.archives: Dict[Tuple[str, str], int] = {}  # (формат, результат) -> количество
+        self.bytes: Dict[str, int] = {}  # формат -> байт проверено
+        self.failures: Dict[str, int] = {}  # формат -> количество поврежденных
+        self.latency: Dict[str, list] = {}  # формат -> [корзины..., сумма, количество]
+        self.in_flight = 0
+        self.queue_depth = 0
+        self.workers = 0
+        self.busy_seconds = 0.0
+        self.scans = 0
+        self.scan_running = 0
+        self.scan_paused = 0
+        self.last_scan_start = 0.0
+
+    def scan_started(self, total: int, workers: int) -> None:
+        """Начало сканирования"""
+        with self._lock:
+            self.scans += 1
+            self.scan_running = 1
+            self.queue_depth = total
+            self.workers = workers
+            self.last_scan_start = time.time()
+
+    def scan_finished(self) -> None:
+        """Окончание сканирования"""
+        with self._lock:
+            self.scan_running = 0
+            self.scan_paused = 0
+            self.queue_depth = 0
+
+    def set_workers(self, workers: int) -> None:
+        """Изменение количества потоков во время сканирования"""
+        with self._lock:
+            self.workers = workers
+
+    def set_paused(self, paused: bool) -> None:
+        """Пауза и продолжение сканирования"""
+        with self._lock:
+            self.scan_paused = int(paused)
+
+    def add_queued(self, count: int) -> None:
+        """Увеличение очереди (архивы, добавленные во время сканирования)"""
+        with self._lock:
+            self.queue_depth += count
+
+    def archive_started(self) -> None:
+        """Архив взят в работу"""
+        with self._lock:
+            self.in_flight += 1
+            self.queue_depth = max(0, self.queue_depth - 1)
+
+    def archive_finished(self, fmt: str, ok: bool, size: int, duration: float, suspicious: bool = False,
+                         encrypted: bool = False, unverified: bool = False) -> None:
+        """
+        Архив проверен
+
+        Args:
+            fmt (str): Формат архива
+            ok (bool): Результат проверки
+            size (int): Размер архива в байтах
+            duration (float): Время проверки в секундах
+            suspicious (bool): Архив нарушил ограничения ресурсов (не считается поврежденным)
+            encrypted (bool): Архив зашифрован и не проверен (не считается поврежденным)
+            unverified (bool): Данные не проверены без unrar/7z (не считается поврежденным)
+        """
+        result = "encrypted" if encrypted else "unverified" if unverified else "suspicious" if suspicious \
+            else "ok" if ok else "corrupted"
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+            self.busy_seconds += duration
+            self.archives[(fmt, result)] = self.archives.get((fmt, result), 0) + 1
+            self.bytes[fmt] = self.bytes.get(fmt, 0) + size
+            if not ok and not suspicious and not encrypted and not unverified:
+                self.failures[fmt] = self.failures.get(fmt, 0) + 1
+            hist = self.latency.setdefault(fmt, [0] * len(LATENCY_BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if duration <= bound:
+                    hist[i] += 1
+            hist[-2] += duration
+            hist[-1] += 1
+
+    def archive_skipped(self) -> None:
+        """Архив взят в работу, но не проверен (остановка)"""
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def render(self, openmetrics: bool = True) -> str:
+        """
+        Текст метрик
+
+        Args:
+            openmetrics (bool): Формат OpenMetrics (для HTTP) или текстовый формат
+                Prometheus (для textfile collector node_exporter)
+        """
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> str:
+            full = f"{PREFIX}_{name}"
+            # В OpenMetrics семейство счетчика называется без суффикса _total
+            type_name = full[:-len("_total")] if openmetrics and kind == "counter" else full
+            lines.append(f"# HELP {type_name} {help_text}")
+            lines.append(f"# TYPE {type_name} {kind}")
+            return full
+
+        with self._lock:
+            name = family("archives_verified_total", "counter", "Проверенные архивы по формату и результату")
+            for (fmt, result), value in sorted(self.archives.items()):
+                lines.append(f"{name}{_labels(format=fmt, result=result)} {value}")
+
+            name = family("bytes_verified_total", "counter", "Объем проверенных архивов в байтах")
+            for fmt, value in sorted(self.bytes.items()):
+                lines.append(f"{name}{_labels(format=fmt)} {value}")
+
+            name = family("failures_total", "counter", "Поврежденные архивы по формату")
+            for fmt, value in sorted(self.failures.items()):
+                lines.append(f"{name}{_labels(format=fmt)} {value}")
+
+            name = family("worker_busy_seconds_total", "counter", "Суммарное время работы потоков проверки")
+            lines.append(f"{name} {self.busy_seconds:.6f}")
+
+            name = family("scans_total", "counter", "Количество запущенных сканирований")
+            lines.append(f"{name} {self.scans}")
+
+            for metric, help_text, value in (
+                ("in_flight", "Архивы, проверяемые в данный момент", self.in_flight),
+                ("queue_depth", "Архивы, ожидающие проверки", self.queue_depth),
+                ("workers", "Количество потоков проверки", self.workers),
+                ("scan_running", "Идет ли сканирование", self.scan_running),
+                ("scan_paused", "Приостановлено ли сканирование", self.scan_paused),
+                ("last_scan_start_timestamp_seconds", "Время начала последнего сканирования", self.last_scan_start),
+            ):
+                name = family(metric, "gauge", help_text)
+                lines.append(f"{name} {value}")
+
+            name = family("archive_duration_seconds", "histogram", "Время проверки одного архива")
+            for fmt, hist in sorted(self.latency.items()):
+                for bound, count in zip(LATENCY_BUCKETS, hist):
+                    lines.append(f"{name}_bucket{_labels(format=fmt, le=bound)} {count}")
+                lines.append(f"{name}_bucket{_labels(format=fmt, le='+Inf')} {hist[-1]}")
+                lines.append(f"{name}_sum{_labels(format=fmt)} {hist[-2]:.6f}")
+                lines.append(f"{name}_count{_labels(format=fmt)} {hist[-1]}")
+
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsHTTPServer:
+    """Локальный HTTP-сервер, отдающий метрики по адресу /metrics"""
+
+    def __init__(self, metrics: ScanMetrics, port: int, host: str = "127.0.0.1"):
+        # http.server тянет за собой email и http.client, импортируем только при запуске сервера
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.metrics = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(handler):
+                if handler.path.split("?")[0] != "/metrics":
+                    handler.send_error(404)
+                    return
+                # Prometheus запрашивает OpenMetrics через Accept, остальным отдаем текстовый формат
+                openmetrics = "application/openmetrics-text" in handler.headers.get("Accept", "")
+                body = metrics.render(openmetrics).encode("utf-8")
+                handler.send_response(200)
+                handler.send_header(
+                    "Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+                )
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, format, *args):
+                logger.debug(format % args)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> None:
+        self.thread.start()
+        logger.info(f"Метрики доступны по адресу http://{self.server.server_address[0]}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TextfileExporter:
+    """
+    Периодическая запись метрик в файл для textfile collector node_exporter.
+    Файл заменяется атомарно, чтобы сборщик не прочитал его наполовину записанным.
+    """
+
+    def __init__(self, metrics: ScanMetrics, path: str, interval: float = 15.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self.thread = threading.Thread(target=self._loop, name="metrics-textfile", daemon=True)
+
+    def write(self) -> None:
+        """Запись текущих значений"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(self.metrics.render(openmetrics=False))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Ошибка при записи метрик в {self.path}: {e}")
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def start(self) -> None:
+        self.write()
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Остановка с финальной записью"""
+        self._stop.set()
+        self.write()
+
+
+def start_exporters(metrics: ScanMetrics, port: Optional[int] = None, path: Optional[str] = None,
+                    interval: float = 15.0) -> list:
+    """
+    Запуск выбранных способов экспорта метрик
+
+    Returns:
+        list: Запущенные экспортеры (у каждого есть stop())
+    """
+    exporters = []
+    if port is not None:
+        server = MetricsHTTPServer(metrics, port)
+        server.start()
+        exporters.append(server)
+    if path:
+        exporter = TextfileExporter(metrics, path, interval)
+        exporter.start()
+        exporters.append(exporter)
+    return exporters
@@ -0,0 +1,172 @@
+import io
+import os
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+MB = 1 << 20
+
+# Проверенные данные освобождаются из кеша страниц порциями такого размера
+DROP_WINDOW = 8 * MB
+
+
+def fadvise(fd: int, offset: int, length: int, advice: str) -> bool:
+    """
+    Подсказка ядру о доступе к файлу (POSIX_FADV_SEQUENTIAL, POSIX_FADV_DONTNEED, ...)
+
+    Returns:
+        bool: True, если подсказка передана (в системах без posix_fadvise - False)
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    try:
+        os.posix_fadvise(fd, offset, length, getattr(os, advice))
+        return True
+    except OSError as e:
+        logger.debug(f"posix_fadvise({advice}) не выполнен: {e}")
+        return False
+
+
+class ReadHints:
+    """
+    Режим чтения архивов, бережный к кешу страниц: ядру сообщается о последовательном
+    чтении (упреждающее чтение больше), а уже проверенные данные освобождаются из кеша
+    (POSIX_FADV_DONTNEED), чтобы проверка терабайтов архивов не вытесняла полезные данные
+    других программ. Освобождаются только чистые страницы: чужие изменения не теряются,
+    но файл, который одновременно читает другая программа, придется прочитать с диска заново.
+    """
+
+    def __init__(self, sequential: bool = True, drop_behind: bool = True, block_kb: int = 0):
+        """
+        Args:
+            sequential (bool): Подсказка POSIX_FADV_SEQUENTIAL при открытии
+            drop_behind (bool): Освобождать прочитанные данные (POSIX_FADV_DONTNEED)
+            block_kb (int): Размер блока чтения, КБ (0 - стандартная буферизация); округляется
+                до размера блока файловой системы, чтения выровнены по границам блоков
+        """
+        self.sequential = sequential
+        self.drop_behind = drop_behind
+        self.block_size = block_kb * 1024
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> Optional["ReadHints"]:
+        """Режим из раздела "page_cache" настроек; None, если ничего не включено"""
+        hints = cls(settings.get("sequential", True), settings.get("drop_behind", True), settings.get("block_kb", 0))
+        return hints if hints.active else None
+
+    @property
+    def active(self) -> bool:
+        fadvise_used = (self.sequential or self.drop_behind) and hasattr(os, "posix_fadvise")
+        return bool(fadvise_used or self.block_size)
+
+
+class HintedRaw(io.RawIOBase):
+    """Небуферизованное чтение файла с подсказками кешу страниц и выровненными блоками"""
+
+    def __init__(self, raw: io.FileIO, hints: ReadHints):
+        super().__init__()
+        self.raw = raw
+        self.hints = hints
+        self.name = raw.name
+        self._fd = raw.fileno()
+        self._pos = 0
+        self._dropped = 0  # Начало прочитанного, но еще не освобожденного участка
+        self.block_size = 0
+        if hints.block_size:
+            fs_block = getattr(os.fstat(self._fd), "st_blksize", 0) or 4096
+            self.block_size = max(fs_block, (hints.block_size + fs_block - 1) // fs_block * fs_block)
+        if hints.sequential:
+            fadvise(self._fd, 0, 0, "POSIX_FADV_SEQUENTIAL")
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self.raw.seekable()
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def tell(self) -> int:
+        return self._pos
+
+    def _drop(self) -> None:
+        """Освобождение прочитанного участка из кеша страниц"""
+        if self.hints.drop_behind and self._pos > self._dropped:
+            fadvise(self._fd, self._dropped, self._pos - self._dropped, "POSIX_FADV_DONTNEED")
+        self._dropped = self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        position = self.raw.seek(offset, whence)
+        if position != self._pos:
+            self._drop()
+            self._pos = self._dropped = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        size = len(buffer)
+        if self.block_size and size > self.block_size:
+            # Чтение заканчивается на границе блока: следующие чтения выровнены
+            size -= (self._pos + size) % self.block_size
+        n = self.raw.readinto(memoryview(buffer)[:size])
+        if n:
+            self._pos += n
+            if self._pos - self._dropped >= DROP_WINDOW:
+                self._drop()
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._drop()
+            self.raw.close()
+        super().close()
+
+
+def drop_cache(path) -> bool:
+    """Освобождение чистых страниц файла из кеша (для замеров)"""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        return fadvise(fd, 0, 0, "POSIX_FADV_DONTNEED")
+    finally:
+        os.close(fd)
+
+
+def cached_bytes(path) -> Optional[int]:
+    """
+    Объем файла, находящийся в кеше страниц (mincore, Linux и другие POSIX-системы)
+
+    Returns:
+        Optional[int]: Байт в кеше или None, если определить нельзя
+    """
+    import ctypes
+    import mmap
+
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.mmap.restype = ctypes.c_void_p
+        libc.mmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int, ctypes.c_int,
+                              ctypes.c_int, ctypes.c_long)
+        libc.munmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+        libc.mincore.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_void_p)
+    except (OSError, AttributeError):
+        return None
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        address = libc.mmap(None, size, mmap.PROT_READ, mmap.MAP_SHARED, fd, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            return None
+        try:
+            pages = (size + mmap.PAGESIZE - 1) // mmap.PAGESIZE
+            vector = (ctypes.c_ubyte * pages)()
+            if libc.mincore(address, size, vector) != 0:
+                return None
+            resident = sum(page & 1 for page in vector)
+        finally:
+            libc.munmap(address, size)
+    finally:
+        os.close(fd)
+    return min(size, resident * mmap.PAGESIZE)
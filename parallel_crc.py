@@ -0,0 +1,148 @@
+import zlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+from autotune import available_cpu_count
+from throttle import IOLimiter, open_archive_file
+
+MB = 1024 * 1024
+
+# Файлы без сжатия (stored) от этого размера хешируются частями в нескольких потоках
+PARALLEL_CRC_MIN_BYTES = 64 * MB
+
+# Часть файла, которую хеширует один поток
+CRC_CHUNK_SIZE = 16 * MB
+
+# Блок чтения внутри части (zlib.crc32 отпускает GIL на таких блоках)
+CRC_READ_SIZE = 1 * MB
+
+# Полином CRC-32 (обратный порядок битов)
+CRC32_POLY = 0xEDB88320
+
+
+class CrcInterrupted(Exception):
+    """Подсчет CRC прерван пользователем"""
+
+
+def _gf2_times(matrix: List[int], vector: int) -> int:
+    """Умножение матрицы 32x32 над GF(2) (столбцы - числа) на вектор"""
+    result = 0
+    index = 0
+    while vector:
+        if vector & 1:
+            result ^= matrix[index]
+        vector >>= 1
+        index += 1
+    return result
+
+
+def _gf2_square(matrix: List[int]) -> List[int]:
+    return [_gf2_times(matrix, column) for column in matrix]
+
+
+@lru_cache(maxsize=32)
+def _zeros_operator(length: int) -> tuple:
+    """
+    Матрица, переводящая CRC данных в CRC тех же данных с length нулевыми байтами
+    в конце (как crc32_combine в zlib: последовательные квадраты оператора одного нулевого бита)
+    """
+    odd = [CRC32_POLY] + [1 << n for n in range(31)]  # Один нулевой бит
+    even = _gf2_square(odd)  # Два бита
+    odd = _gf2_square(even)  # Четыре бита
+    result = [1 << n for n in range(32)]
+    while length:
+        even = _gf2_square(odd)
+        if length & 1:
+            result = [_gf2_times(even, column) for column in result]
+        length >>= 1
+        if not length:
+            break
+        odd = _gf2_square(even)
+        if length & 1:
+            result = [_gf2_times(odd, column) for column in result]
+        length >>= 1
+    return tuple(result)
+
+
+def crc32_combine(crc1: int, crc2: int, length2: int) -> int:
+    """
+    CRC-32 склейки двух блоков по их CRC и длине второго блока
+    (в zlib для Python нет crc32_combine). Операторы для длин кешируются:
+    части файла одинаковой длины склеиваются одним умножением матрицы на вектор.
+    """
+    if length2 <= 0:
+        return crc1
+    return _gf2_times(_zeros_operator(length2), crc1) ^ crc2
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Общий пул потоков подсчета CRC (по числу ядер на все проверяемые архивы)"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=available_cpu_count(), thread_name_prefix="crc")
+        return _executor
+
+
+def _chunk_crc(file_path, offset: int, length: int, limiter: Optional[IOLimiter], hints,
+               checkpoint: Optional[Callable[[], bool]]) -> int:
+    """CRC-32 части файла (файл открывается отдельно, чтобы потоки не делили позицию чтения)"""
+    crc = 0
+    with open_archive_file(file_path, limiter, hints) as f:
+        f.seek(offset)
+        while length:
+            if checkpoint and checkpoint():
+                raise CrcInterrupted()
+            data = f.read(min(CRC_READ_SIZE, length))
+            if not data:
+                raise EOFError("Данные файла выходят за конец файла архива")
+            crc = zlib.crc32(data, crc)
+            length -= len(data)
+    return crc
+
+
+def parallel_crc32(file_path, offset: int, length: int, limiter: Optional[IOLimiter] = None, hints=None,
+                   checkpoint: Optional[Callable[[], bool]] = None,
+                   on_chunk: Optional[Callable[[int], None]] = None) -> Optional[int]:
+    """
+    CRC-32 участка файла: части по CRC_CHUNK_SIZE хешируются в общем пуле потоков
+    и склеиваются crc32_combine по порядку
+
+    Args:
+        file_path: Файл
+        offset (int): Начало участка
+        length (int): Длина участка, байт
+        limiter (IOLimiter): Ограничение нагрузки на диск
+        hints (ReadHints): Подсказки кешу страниц
+        checkpoint (Callable): Пауза и проверка остановки (True - прервать)
+        on_chunk (Callable): Вызывается с длиной каждой готовой части (учет объема)
+
+    Returns:
+        Optional[int]: CRC-32 или None, если подсчет прерван
+
+    Raises:
+        EOFError: Если участок выходит за конец файла
+    """
+    executor = _get_executor()
+    chunks = [(start, min(CRC_CHUNK_SIZE, offset + length - start))
+              for start in range(offset, offset + length, CRC_CHUNK_SIZE)]
+    futures = [executor.submit(_chunk_crc, file_path, start, size, limiter, hints, checkpoint)
+               for start, size in chunks]
+    crc = 0
+    try:
+        for (_, size), future in zip(chunks, futures):
+            crc = crc32_combine(crc, future.result(), size)
+            if on_chunk:
+                on_chunk(size)
+    except CrcInterrupted:
+        return None
+    finally:
+        for future in futures:
+            future.cancel()
+    return crc
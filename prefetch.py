@@ -0,0 +1,274 @@
+import io
+import os
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MB = 1 << 20
+
+# Объем начала и конца следующего архива, который подгружается заранее
+# (заголовки RAR/7z в начале файла, центральный каталог ZIP в конце)
+HEADER_PREFETCH_BYTES = 64 * 1024
+
+
+class BufferPool:
+    """
+    Ограниченный набор переиспользуемых буферов одного размера: память под упреждающее
+    чтение выделяется один раз и не растет с количеством архивов.
+    """
+
+    def __init__(self, count: int, size: int):
+        self.size = size
+        self.count = count
+        self._lock = threading.Lock()
+        self._free: List[bytearray] = []
+        self._created = 0
+
+    def try_acquire(self) -> Optional[bytearray]:
+        """Свободный буфер или None, если все буферы заняты (без ожидания)"""
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            if self._created < self.count:
+                self._created += 1
+                return bytearray(self.size)
+            return None
+
+    def release(self, buffer: bytearray) -> None:
+        with self._lock:
+            self._free.append(buffer)
+
+
+class ReadAhead:
+    """
+    Упреждающее чтение: отдельные потоки ввода-вывода читают следующие блоки архива,
+    пока поток проверки распаковывает текущие, поэтому диск и процессор заняты одновременно.
+    Буферы берутся из общего пула; если он исчерпан, поток проверки читает сам,
+    как без упреждения. Заранее подгружаются и заголовки следующего архива в очереди.
+    """
+
+    def __init__(self, depth: int = 4, chunk_size: int = MB, io_threads: int = 2, workers: int = 1):
+        """
+        Args:
+            depth (int): Сколько блоков читать вперед для одного архива
+            chunk_size (int): Размер блока, байт
+            io_threads (int): Количество потоков ввода-вывода
+            workers (int): Количество потоков проверки (размер пула буферов - depth на поток)
+        """
+        self.depth = max(1, depth)
+        self.chunk_size = chunk_size
+        self.io_threads = max(1, io_threads)
+        self.pool = BufferPool(self.depth * max(1, workers), chunk_size)
+        self.min_size = 2 * chunk_size  # Маленькие архивы читаются без упреждения
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.prefetched = 0  # Байт прочитано заранее
+        self.waited = 0.0  # Время ожидания потоками проверки, сек.
+
+    @classmethod
+    def from_settings(cls, settings: dict, workers: int = 1) -> Optional["ReadAhead"]:
+        """Упреждающее чтение по разделу "read_ahead" настроек; None, если выключено"""
+        depth = settings.get("depth", 4)
+        if not depth:
+            return None
+        return cls(depth, settings.get("chunk_kb", 1024) * 1024, settings.get("io_threads", 2), workers)
+
+    def submit(self, fn, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.io_threads, thread_name_prefix="prefetch")
+            return self._executor.submit(fn, *args)
+
+    def close(self) -> None:
+        """Остановка потоков ввода-вывода"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def wrap(self, raw: io.RawIOBase) -> "PrefetchRaw":
+        """Упреждающее чтение файла (файлы меньше min_size выгоднее читать без него)"""
+        return PrefetchRaw(raw, self)
+
+    def warm(self, file_path) -> None:
+        """Подгрузка в кеш начала и конца архива, который будет проверяться следующим"""
+        self.submit(self._warm, file_path)
+
+    @staticmethod
+    def _warm(file_path) -> None:
+        try:
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        except OSError:
+            return
+        try:
+            size = os.fstat(fd).st_size
+            tail = max(0, size - HEADER_PREFETCH_BYTES)
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, HEADER_PREFETCH_BYTES, os.POSIX_FADV_WILLNEED)
+                os.posix_fadvise(fd, tail, size - tail, os.POSIX_FADV_WILLNEED)
+            else:
+                os.read(fd, HEADER_PREFETCH_BYTES)
+                os.lseek(fd, tail, os.SEEK_SET)
+                os.read(fd, HEADER_PREFETCH_BYTES)
+        except OSError as e:
+            logger.debug(f"Не удалось подгрузить заголовки {file_path}: {e}")
+        finally:
+            os.close(fd)
+
+    def __str__(self) -> str:
+        return (f"{self.depth} блоков по {self.chunk_size // 1024} КБ на архив, "
+                f"потоков ввода-вывода: {self.io_threads}")
+
+
+class PrefetchRaw(io.RawIOBase):
+    """
+    Небуферизованное чтение файла с упреждением: задача в потоке ввода-вывода читает
+    следующие блоки в буферы пула, readinto отдает их по порядку. Одновременно для файла
+    выполняется не больше одной задачи, поэтому порядок чтения из исходного файла сохраняется.
+    """
+
+    def __init__(self, raw: io.RawIOBase, read_ahead: ReadAhead):
+        super().__init__()
+        self.raw = raw
+        self.read_ahead = read_ahead
+        self.name = raw.name
+        self._cond = threading.Condition()
+        self._ready: Deque[Tuple[bytearray, int]] = deque()  # Прочитанные блоки (буфер, длина)
+        self._offset = 0  # Уже выданная часть первого блока
+        self._pos = raw.tell()  # Позиция, до которой данные выданы
+        self._running = False  # Выполняется задача чтения
+        self._cancel = False
+        self._eof = False
+        self._error: Optional[BaseException] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self.raw.seekable()
+
+    def fileno(self) -> int:
+        return self.raw.fileno()
+
+    def tell(self) -> int:
+        return self._pos
+
+    def _fill(self) -> None:
+        """Задача потока ввода-вывода: чтение следующих блоков, пока есть место и буферы"""
+        pool = self.read_ahead.pool
+        try:
+            while True:
+                with self._cond:
+                    if self._cancel or self._eof or len(self._ready) >= self.read_ahead.depth:
+                        break
+                buffer = pool.try_acquire()
+                if buffer is None:
+                    break
+                try:
+                    n = self.raw.readinto(buffer)
+                except BaseException:
+                    pool.release(buffer)
+                    raise
+                with self._cond:
+                    if n:
+                        self._ready.append((buffer, n))
+                        self.read_ahead.prefetched += n
+                    else:
+                        pool.release(buffer)
+                        self._eof = True
+                    self._cond.notify_all()
+        except BaseException as e:
+            with self._cond:
+                self._error = e
+        finally:
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+
+    def _schedule(self) -> None:
+        """Запуск задачи чтения, если она не выполняется (вызывается под self._cond)"""
+        if not self._running and not self._eof and not self._cancel and len(self._ready) < self.read_ahead.depth:
+            self._running = True
+            try:
+                self.read_ahead.submit(self._fill).add_done_callback(self._done)
+            except RuntimeError:
+                # Пул потоков остановлен - дальше без упреждения
+                self._running = False
+
+    def _done(self, future) -> None:
+        if future.cancelled():
+            # Задача отменена остановкой пула и не выполнялась
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+
+    def _stop(self) -> None:
+        """Остановка задачи чтения и возврат буферов (вызывается под self._cond)"""
+        self._cancel = True
+        while self._running:
+            self._cond.wait()
+        pool = self.read_ahead.pool
+        while self._ready:
+            pool.release(self._ready.popleft()[0])
+        self._offset = 0
+        self._cancel = False
+
+    def readinto(self, buffer) -> int:
+        with self._cond:
+            if self._error:
+                error, self._error = self._error, None
+                raise error
+            if not self._ready:
+                self._schedule()
+                if self._running:
+                    started = time.perf_counter()
+                    while self._running and not self._ready:
+                        self._cond.wait()
+                    self.read_ahead.waited += time.perf_counter() - started
+                if self._error:
+                    error, self._error = self._error, None
+                    raise error
+            if not self._ready:
+                if self._eof:
+                    return 0
+                # Буферов нет: чтение в текущем потоке, как без упреждения
+                n = self.raw.readinto(buffer)
+                self._pos += n or 0
+                return n
+            chunk, length = self._ready[0]
+            n = min(len(buffer), length - self._offset)
+            memoryview(buffer)[:n] = memoryview(chunk)[self._offset:self._offset + n]
+            self._offset += n
+            self._pos += n
+            if self._offset == length:
+                self._ready.popleft()
+                self._offset = 0
+                self.read_ahead.pool.release(chunk)
+            self._schedule()
+            return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        with self._cond:
+            if whence == io.SEEK_CUR:
+                offset, whence = self._pos + offset, io.SEEK_SET
+            if whence == io.SEEK_SET and offset == self._pos:
+                return self._pos
+            self._stop()
+            if self._error:
+                error, self._error = self._error, None
+                raise error
+            self._pos = self.raw.seek(offset, whence)
+            self._eof = False
+            return self._pos
+
+    def close(self) -> None:
+        if not self.closed:
+            with self._cond:
+                self._stop()
+            self.raw.close()
+        super().close()
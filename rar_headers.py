@@ -0,0 +1,329 @@
+import os
+import zlib
+import struct
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+RAR4_SIGNATURE = b"Rar!\x1a\x07\x00"
+RAR5_SIGNATURE = b"Rar!\x1a\x07\x01\x00"
+
+# Самораспаковывающийся архив: сигнатура ищется в начале файла
+SFX_SEARCH_BYTES = 1 << 20
+
+# Заголовок RAR 5.0 больше этого размера считается поврежденным
+RAR5_MAX_HEADER = 2 << 20
+
+# Типы блоков RAR 4.x
+RAR4_MAIN = 0x73
+RAR4_FILE = 0x74
+RAR4_END = 0x7B
+RAR4_OLD_BLOCKS = range(0x75, 0x7A)  # Блоки RAR 2.x: CRC покрывает не весь заголовок, не проверяется
+RAR4_LONG_BLOCK = 0x8000  # За заголовком следуют данные блока
+RAR4_MAIN_VOLUME = 0x0001
+RAR4_MAIN_COMMENT = 0x0002
+RAR4_MAIN_PASSWORD = 0x0080  # Заголовки зашифрованы
+RAR4_MAIN_FIRST_VOLUME = 0x0100
+RAR4_MAIN_ENCRYPT_VERSION = 0x0200
+RAR4_FILE_SPLIT_BEFORE = 0x0001
+RAR4_FILE_SPLIT_AFTER = 0x0002
+RAR4_FILE_PASSWORD = 0x0004
+RAR4_FILE_COMMENT = 0x0008
+RAR4_FILE_LARGE = 0x0100  # 64-битные размеры
+RAR4_END_NEXT_VOLUME = 0x0001
+
+# Типы заголовков RAR 5.0
+RAR5_MAIN = 1
+RAR5_FILE = 2
+RAR5_SERVICE = 3
+RAR5_ENCRYPTION = 4  # Заголовки архива зашифрованы
+RAR5_END = 5
+RAR5_HAS_EXTRA = 0x0001
+RAR5_HAS_DATA = 0x0002
+RAR5_SPLIT_BEFORE = 0x0008
+RAR5_SPLIT_AFTER = 0x0010
+RAR5_MAIN_VOLUME = 0x0001  # Флаги архива в заголовке MAIN
+RAR5_MAIN_VOLUME_NUMBER = 0x0002
+RAR5_END_NEXT_VOLUME = 0x0001  # Флаг заголовка END: это не последний том
+RAR5_EXTRA_ENCRYPTION = 1  # Запись дополнительной области: файл зашифрован
+
+
+class RarFormatError(Exception):
+    """Заголовки RAR не читаются (error_class - класс ошибки, см. results.ERROR_CLASSES)"""
+
+    def __init__(self, message: str, error_class: str = "headers"):
+        super().__init__(message)
+        self.error_class = error_class
+
+
+class RarBlock:
+    """Заголовок блока RAR (без данных)"""
+
+    __slots__ = ("offset", "type", "flags", "header_size", "data_size", "encrypted",
+                 "volume", "first_volume", "split_before", "split_after", "next_volume")
+
+    def __init__(self, offset: int, type: int, flags: int, header_size: int, data_size: int,
+                 encrypted: bool = False):
+        self.offset = offset  # Смещение заголовка в файле
+        self.type = type
+        self.flags = flags
+        self.header_size = header_size  # Полный размер заголовка, байт
+        self.data_size = data_size  # Размер данных после заголовка, байт
+        self.encrypted = encrypted  # Файл (или все заголовки после этого блока) зашифрован
+        # Флаги томов (заполняются для блоков MAIN, FILE и END)
+        self.volume = False  # MAIN: архив - том многотомного архива
+        self.first_volume = False  # MAIN: первый том
+        self.split_before = False  # FILE: данные начинаются в предыдущем томе
+        self.split_after = False  # FILE: данные продолжаются в следующем томе
+        self.next_volume = False  # END: есть следующий том
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.header_size + self.data_size
+
+
+def read_vint(data: bytes, pos: int) -> Tuple[int, int]:
+    """Число переменной длины RAR 5.0: (значение, позиция после него)"""
+    value = 0
+    for shift in range(0, 70, 7):
+        if pos >= len(data):
+            raise RarFormatError("Обрыв числа в заголовке")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+    raise RarFormatError("Слишком длинное число в заголовке")
+
+
+def find_signature(f: BinaryIO) -> Tuple[int, int]:
+    """
+    Поиск сигнатуры RAR
+
+    Returns:
+        Tuple[int, int]: (версия формата 4 или 5, смещение первого блока)
+
+    Raises:
+        RarFormatError: Сигнатура не найдена
+    """
+    f.seek(0)
+    head = f.read(SFX_SEARCH_BYTES)
+    positions = [(head.find(RAR5_SIGNATURE), 5, len(RAR5_SIGNATURE)),
+                 (head.find(RAR4_SIGNATURE), 4, len(RAR4_SIGNATURE))]
+    found = [item for item in positions if item[0] >= 0]
+    if not found:
+        raise RarFormatError("Не найдена сигнатура RAR")
+    offset, version, length = min(found)
+    return version, offset + length
+
+
+def _rar4_crc_end(block_type: int, flags: int, header: bytes) -> Optional[int]:
+    """Граница области заголовка RAR 4.x, покрытой CRC (None - CRC не проверяется)"""
+    if block_type in RAR4_OLD_BLOCKS:
+        return None
+    if block_type == RAR4_MAIN:
+        if flags & RAR4_MAIN_COMMENT:
+            return None  # Старый комментарий внутри заголовка
+        return 13 + (1 if flags & RAR4_MAIN_ENCRYPT_VERSION else 0)
+    if block_type == RAR4_FILE and flags & RAR4_FILE_COMMENT:
+        return None
+    return len(header)
+
+
+def _iter_rar4(f: BinaryIO, pos: int) -> Iterator[RarBlock]:
+    while True:
+        f.seek(pos)
+        head = f.read(7)
+        if not head:
+            return
+        if len(head) < 7:
+            raise RarFormatError(f"Обрыв заголовка блока по смещению {pos}", "truncated")
+        crc, block_type, flags, header_size = struct.unpack("<HBHH", head)
+        if header_size < 7:
+            raise RarFormatError(f"Некорректный размер заголовка по смещению {pos}")
+        header = head + f.read(header_size - 7)
+        if len(header) < header_size:
+            raise RarFormatError(f"Обрыв заголовка блока по смещению {pos}", "truncated")
+        crc_end = _rar4_crc_end(block_type, flags, header)
+        if crc_end is not None and zlib.crc32(header[2:crc_end]) & 0xFFFF != crc:
+            raise RarFormatError(f"Ошибка CRC заголовка блока 0x{block_type:02X} по смещению {pos}")
+        data_size = 0
+        if flags & RAR4_LONG_BLOCK or block_type == RAR4_FILE:
+            if header_size < 11:
+                raise RarFormatError(f"Некорректный размер заголовка по смещению {pos}")
+            data_size = struct.unpack_from("<I", header, 7)[0]
+            if block_type == RAR4_FILE and flags & RAR4_FILE_LARGE and header_size >= 36:
+                data_size |= struct.unpack_from("<I", header, 32)[0] << 32
+        encrypted = (block_type == RAR4_MAIN and bool(flags & RAR4_MAIN_PASSWORD)) or \
+                    (block_type == RAR4_FILE and bool(flags & RAR4_FILE_PASSWORD))
+        block = RarBlock(pos, block_type, flags, header_size, data_size, encrypted)
+        if block_type == RAR4_MAIN:
+            block.volume = bool(flags & RAR4_MAIN_VOLUME)
+            block.first_volume = bool(flags & RAR4_MAIN_FIRST_VOLUME)
+        elif block_type == RAR4_FILE:
+            block.split_before = bool(flags & RAR4_FILE_SPLIT_BEFORE)
+            block.split_after = bool(flags & RAR4_FILE_SPLIT_AFTER)
+        elif block_type == RAR4_END:
+            block.next_volume = bool(flags & RAR4_END_NEXT_VOLUME)
+        yield block
+        if block_type == RAR4_END or (block_type == RAR4_MAIN and encrypted):
+            return
+        pos = block.end
+
+
+def _iter_rar5(f: BinaryIO, pos: int) -> Iterator[RarBlock]:
+    while True:
+        f.seek(pos)
+        head = f.read(7)  # CRC32 и не больше 3 байт размера заголовка
+        if not head:
+            return
+        if len(head) < 5:
+            raise RarFormatError(f"Обрыв заголовка блока по смещению {pos}", "truncated")
+        crc = struct.unpack_from("<I", head)[0]
+        size, start = read_vint(head, 4)
+        if not size or size > RAR5_MAX_HEADER:
+            raise RarFormatError(f"Некорректный размер заголовка по смещению {pos}")
+        f.seek(pos + start)
+        header = f.read(size)
+        if len(header) < size:
+            raise RarFormatError(f"Обрыв заголовка блока по смещению {pos}", "truncated")
+        if zlib.crc32(header, zlib.crc32(head[4:start])) != crc:
+            raise RarFormatError(f"Ошибка CRC заголовка по смещению {pos}")
+        block_type, p = read_vint(header, 0)
+        flags, p = read_vint(header, p)
+        extra_size = data_size = 0
+        if flags & RAR5_HAS_EXTRA:
+            extra_size, p = read_vint(header, p)
+        if flags & RAR5_HAS_DATA:
+            data_size, p = read_vint(header, p)
+        if extra_size > size - p:
+            raise RarFormatError(f"Некорректный размер дополнительной области заголовка по смещению {pos}")
+        encrypted = block_type == RAR5_ENCRYPTION
+        if block_type == RAR5_FILE and extra_size:
+            encrypted = _rar5_extra_has(header[size - extra_size:], RAR5_EXTRA_ENCRYPTION)
+        block = RarBlock(pos, block_type, flags, start + size, data_size, encrypted)
+        if block_type == RAR5_MAIN:
+            archive_flags, p = read_vint(header, p)
+            block.volume = bool(archive_flags & RAR5_MAIN_VOLUME)
+            # Номер тома хранится, начиная со второго тома
+            block.first_volume = block.volume and not (
+                archive_flags & RAR5_MAIN_VOLUME_NUMBER and read_vint(header, p)[0]
+            )
+        elif block_type in (RAR5_FILE, RAR5_SERVICE):
+            block.split_before = bool(flags & RAR5_SPLIT_BEFORE)
+            block.split_after = bool(flags & RAR5_SPLIT_AFTER)
+        elif block_type == RAR5_END:
+            block.next_volume = bool(read_vint(header, p)[0] & RAR5_END_NEXT_VOLUME)
+        yield block
+        if block_type in (RAR5_END, RAR5_ENCRYPTION):
+            return
+        pos = block.end
+
+
+def _rar5_extra_has(extra: bytes, record_type: int) -> bool:
+    """Есть ли в дополнительной области заголовка запись заданного типа"""
+    p = 0
+    while p < len(extra):
+        size, start = read_vint(extra, p)
+        kind, _ = read_vint(extra, start)
+        if kind == record_type:
+            return True
+        p = start + size
+    return False
+
+
+def iter_blocks(f: BinaryIO) -> Iterator[RarBlock]:
+    """
+    Последовательный обход заголовков блоков RAR 4.x и 5.0 без чтения данных
+    (CRC каждого заголовка проверяется)
+
+    Raises:
+        RarFormatError: Сигнатура не найдена, заголовок не читается или не сходится его CRC
+    """
+    version, pos = find_signature(f)
+    yield from (_iter_rar5 if version == 5 else _iter_rar4)(f, pos)
+
+
+class RarSummary:
+    """Результат быстрой проверки заголовков RAR"""
+
+    __slots__ = ("version", "blocks", "files", "packed_size", "volume", "first_volume", "next_volume",
+                 "encryption")
+
+    def __init__(self, version: int):
+        self.version = version
+        self.blocks = 0
+        self.files = 0
+        self.packed_size = 0  # Сжатые данные файлов в этом томе, байт
+        self.volume = False
+        self.first_volume = False
+        self.next_volume = False
+        # "headers" - зашифрованы заголовки (и все файлы), "files" - зашифрованы данные файлов
+        self.encryption: Optional[str] = None
+
+
+def check_headers(f: BinaryIO, file_size: int) -> RarSummary:
+    """
+    Быстрая проверка RAR по заголовкам без распаковки: CRC заголовков, размеры блоков
+    относительно длины файла (обрезанный архив), флаги томов
+
+    Args:
+        f: Архив, открытый для чтения
+        file_size (int): Размер файла, байт
+
+    Returns:
+        RarSummary: Сводка по заголовкам
+
+    Raises:
+        RarFormatError: Заголовки повреждены или архив обрезан
+    """
+    version, pos = find_signature(f)
+    summary = RarSummary(version)
+    file_type, end_type = (RAR5_FILE, RAR5_END) if version == 5 else (RAR4_FILE, RAR4_END)
+    last_file = None
+    ended = False
+    for block in (_iter_rar5 if version == 5 else _iter_rar4)(f, pos):
+        summary.blocks += 1
+        if block.end > file_size:
+            raise RarFormatError(
+                f"Архив обрезан: блок по смещению {block.offset} заканчивается на {block.end}, "
+                f"размер файла {file_size}"
+            )
+        if block.type in (RAR4_MAIN, RAR5_MAIN) and summary.blocks == 1:
+            summary.volume = block.volume
+            summary.first_volume = block.first_volume
+        if block.encrypted and summary.encryption is None:
+            summary.encryption = "files" if block.type == file_type else "headers"
+        if block.type == file_type:
+            if block.split_before and (summary.files or summary.first_volume or not summary.volume):
+                raise RarFormatError(f"Файл по смещению {block.offset} отмечен как продолжение из предыдущего тома")
+            if last_file is not None and last_file.split_after:
+                raise RarFormatError(
+                    f"Файл по смещению {last_file.offset} отмечен как продолжающийся в следующем томе, "
+                    f"но за ним следуют другие файлы"
+                )
+            summary.files += 1
+            summary.packed_size += block.data_size
+            last_file = block
+        elif block.type == end_type:
+            ended = True
+            summary.next_volume = block.next_volume
+    if summary.encryption == "headers":
+        return summary  # Остальные заголовки зашифрованы
+    if not ended and version == 5:
+        raise RarFormatError("Архив обрезан: нет заголовка конца архива", "truncated")
+    if not summary.volume and (summary.next_volume or (last_file is not None and last_file.split_after)):
+        raise RarFormatError("Флаги многотомного архива в архиве, который не отмечен как том")
+    if ended and last_file is not None and last_file.split_after and not summary.next_volume:
+        raise RarFormatError("Последний файл продолжается в следующем томе, но том отмечен как последний")
+    return summary
+
+
+def check_rar_file(file_path) -> RarSummary:
+    """
+    Быстрая проверка RAR файла по заголовкам (см. check_headers)
+
+    Raises:
+        RarFormatError: Заголовки повреждены или архив обрезан
+        OSError: Файл не читается
+    """
+    with open(file_path, 'rb') as f:
+        return check_headers(f, os.fstat(f.fileno()).st_size)
@@ -0,0 +1,298 @@
+import json
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from format_backends import BACKENDS
+
+# Состояния архива: вердикт проверки
+STATUS_OK = "ok"
+STATUS_CORRUPTED = "corrupted"
+STATUS_SUSPICIOUS = "suspicious"
+STATUS_ENCRYPTED = "encrypted"
+STATUS_UNVERIFIED = "unverified"  # Данные не проверены: нет внешней программы (проверены только заголовки)
+# Результаты, которые не являются вердиктом проверки
+STATUS_UNSUPPORTED = "unsupported"  # Формат не поддерживается
+STATUS_MISSING = "missing"  # Путь не найден
+
+# Коды состояний в записях результатов (индекс в кортеже)
+# (новые состояния добавляются в конец: коды сохраняются в файлах результатов)
+STATUSES = (STATUS_OK, STATUS_CORRUPTED, STATUS_SUSPICIOUS, STATUS_ENCRYPTED, STATUS_UNSUPPORTED, STATUS_MISSING,
+            STATUS_UNVERIFIED)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Коды форматов: 0 - формат не определен
+FORMATS = (None,) + tuple(BACKENDS)
+FORMAT_CODES = {name: code for code, name in enumerate(FORMATS)}
+
+# Классы ошибок (индекс в кортеже); 0 - нет ошибки
+ERROR_CLASSES = ("", "stopped", "truncated", "headers", "data", "multipart", "limits", "encrypted", "unverified",
+                 "other")
+ERROR_CLASS_CODES = {name: code for code, name in enumerate(ERROR_CLASSES)}
+
+# Класс ошибки по состоянию, если проверка не указала его сама
+STATUS_ERROR_CLASSES = {STATUS_CORRUPTED: "other", STATUS_SUSPICIOUS: "limits", STATUS_ENCRYPTED: "encrypted",
+                        STATUS_UNVERIFIED: "unverified"}
+
+# Состояния архивов, которые не проверялись, по классу ошибки результата None
+UNCHECKED_STATUSES = {"encrypted": STATUS_ENCRYPTED, "unverified": STATUS_UNVERIFIED}
+
+
+class ErrorMessage(str):
+    """
+    Сообщение проверки вместе с классом ошибки (см. ERROR_CLASSES). Проверяющие возвращают
+    его вместо текста ошибки, поэтому класс не приходится угадывать по тексту сообщения.
+    Форматирование строки дает обычную строку: класс переносится явно (error_class_of).
+    """
+
+    def __new__(cls, error_class: str, message: str):
+        if error_class not in ERROR_CLASS_CODES:
+            raise ValueError(f"Неизвестный класс ошибки: {error_class}")
+        self = super().__new__(cls, message)
+        self.error_class = error_class
+        return self
+
+
+# Сообщение о проверке, остановленной пользователем
+STOPPED_MESSAGE = ErrorMessage("stopped", "Проверка прервана пользователем")
+
+
+def error_class_of(error, default: str = "other") -> str:
+    """Класс ошибки из сообщения проверки (default для обычной строки)"""
+    return getattr(error, "error_class", None) or default
+
+
+def result_status(is_valid: Optional[bool], error: Optional[str]) -> str:
+    """Состояние архива по результату проверки (is_valid, сообщение)"""
+    if is_valid:
+        return STATUS_OK
+    if is_valid is None:
+        return UNCHECKED_STATUSES.get(error_class_of(error, ""), STATUS_SUSPICIOUS)
+    return STATUS_CORRUPTED
+
+
+def error_class(status: str, error: Optional[str]) -> str:
+    """Класс ошибки архива с состоянием status: указанный проверкой или по состоянию"""
+    if status not in STATUS_ERROR_CLASSES:
+        return ""
+    return error_class_of(error, STATUS_ERROR_CLASSES[status])
+
+
+class ArchiveRecord:
+    """
+    Компактная запись результата проверки архива: путь хранится в ResultStore
+    и задается номером, формат, состояние и класс ошибки - кодами
+    """
+
+    __slots__ = ("path_id", "format_code", "status_code", "error_class_code", "size", "duration")
+
+    def __init__(self, path_id: int, format_code: int, status_code: int, error_class_code: int, size: int,
+                 duration: float):
+        self.path_id = path_id
+        self.format_code = format_code  # Индекс в FORMATS
+        self.status_code = status_code  # Индекс в STATUSES
+        self.error_class_code = error_class_code  # Индекс в ERROR_CLASSES
+        self.size = size  # Размер архива, байт
+        self.duration = duration  # Время проверки, сек.
+
+    @property
+    def format(self) -> Optional[str]:
+        """Формат архива (см. format_backends) или None"""
+        return FORMATS[self.format_code]
+
+    @property
+    def status(self) -> str:
+        """Состояние архива (STATUS_*)"""
+        return STATUSES[self.status_code]
+
+    @property
+    def error_class(self) -> str:
+        return ERROR_CLASSES[self.error_class_code]
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 0
+
+
+def record_codes(fmt: Optional[str], status: str, error: Optional[str]) -> tuple:
+    """Коды формата, состояния и класса ошибки для записи результата"""
+    return FORMAT_CODES.get(fmt, 0), STATUS_CODES[status], ERROR_CLASS_CODES[error_class(status, error)]
+
+
+def record_dict(record: ArchiveRecord, path, error: Optional[str]) -> dict:
+    """Запись результата в виде словаря (JSON Lines ResultStore, archive_api, служба проверки)"""
+    return {
+        "path": str(path),
+        "format": record.format,
+        "status": record.status,
+        "error_class": record.error_class or None,
+        "error": error,
+        "size": record.size,
+        "duration": round(record.duration, 4),
+    }
+
+
+class ArchiveResult(ArchiveRecord):
+    """
+    Запись результата вместе с путем и текстом ошибки - для результатов вне ResultStore
+    (archive_api, задания службы проверки)
+    """
+
+    __slots__ = ("path", "error")
+
+    def __init__(self, path, fmt: Optional[str], status: str, error: Optional[str] = None,
+                 size: int = 0, duration: float = 0.0):
+        super().__init__(-1, *record_codes(fmt, status, error), size, duration)
+        self.path = path
+        self.error = error if status != STATUS_OK else None
+
+    @classmethod
+    def from_check(cls, path, fmt: Optional[str], is_valid: Optional[bool], error: Optional[str],
+                   size: int = 0, duration: float = 0.0) -> "ArchiveResult":
+        """Запись по результату проверки (is_valid, сообщение)"""
+        return cls(path, fmt, result_status(is_valid, error), error, size, duration)
+
+    def to_dict(self) -> dict:
+        return record_dict(self, self.path, self.error)
+
+    def __repr__(self) -> str:
+        error = f", {self.error!r}" if self.error else ""
+        return f"ArchiveResult({str(self.path)!r}, {self.status}{error})"
+
+
+class ResultStore:
+    """
+    Результаты проверки архивов: одна запись на путь (повторная проверка заменяет запись),
+    записи идут в порядке первой проверки. Тексты ошибок хранятся отдельно и только
+    для архивов с ошибками, поэтому миллионы корректных архивов занимают немного памяти.
+    Заполняется из рабочих потоков.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.paths: List[str] = []  # path_id -> путь
+        self._ids: Dict[str, int] = {}
+        self.records: List[ArchiveRecord] = []  # Записи по номеру пути
+        self.errors: Dict[int, str] = {}  # path_id -> текст ошибки
+        self.replaced: List[int] = []  # Номера путей замененных записей по порядку замены
+        self._counts = [0] * len(STATUSES)  # Количество записей по кодам состояний
+        self.version = 0  # Увеличивается при каждом изменении
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> ArchiveRecord:
+        return self.records[index]
+
+    def __iter__(self) -> Iterator[ArchiveRecord]:
+        return iter(self.records[:])
+
+    def clear(self) -> None:
+        with self._lock:
+            self.paths = []
+            self._ids = {}
+            self.records = []
+            self.errors = {}
+            self.replaced = []
+            self._counts = [0] * len(STATUSES)
+            self.version += 1
+
+    def _store(self, path: str, record_args: tuple, error: Optional[str]) -> ArchiveRecord:
+        """Добавление или замена записи (вызывается под блокировкой)"""
+        path_id = self._ids.get(path)
+        if path_id is None:
+            # Путь добавляется раньше записи: читатели без блокировки видят только готовые записи
+            path_id = len(self.paths)
+            record = ArchiveRecord(path_id, *record_args)
+            self.paths.append(path)
+            self._ids[path] = path_id
+            self.records.append(record)
+        else:
+            record = ArchiveRecord(path_id, *record_args)
+            self._counts[self.records[path_id].status_code] -= 1
+            self.records[path_id] = record
+            self.replaced.append(path_id)
+        self._counts[record.status_code] += 1
+        if error and record.status_code:
+            self.errors[path_id] = error
+        else:
+            self.errors.pop(path_id, None)
+        self.version += 1
+        return record
+
+    def add(self, path, fmt: Optional[str], is_valid: Optional[bool], error: Optional[str],
+            size: int = 0, duration: float = 0.0) -> ArchiveRecord:
+        """
+        Запись результата проверки
+
+        Args:
+            path: Архив
+            fmt (str): Формат (см. format_backends) или None
+            is_valid: Результат проверки: True, False, None - подозрительный или зашифрованный
+            error (str): Сообщение проверки
+            size (int): Размер архива, байт
+            duration (float): Время проверки, сек.
+        """
+        status = result_status(is_valid, error)
+        record_args = (*record_codes(fmt, status, error), size, duration)
+        with self._lock:
+            return self._store(str(path), record_args, error)
+
+    def copy(self, source, target, note: str = "") -> Optional[ArchiveRecord]:
+        """Запись для копии архива с результатом источника (время проверки - 0)"""
+        with self._lock:
+            path_id = self._ids.get(str(source))
+            if path_id is None:
+                return None
+            record = self.records[path_id]
+            error = self.errors.get(path_id)
+            if error and note:
+                error = f"{error} ({note})"
+            record_args = (record.format_code, record.status_code, record.error_class_code, record.size, 0.0)
+            return self._store(str(target), record_args, error)
+
+    def path(self, record: ArchiveRecord) -> str:
+        return self.paths[record.path_id]
+
+    def error(self, record: ArchiveRecord) -> Optional[str]:
+        return self.errors.get(record.path_id)
+
+    def find(self, path) -> Optional[ArchiveRecord]:
+        """Запись архива или None, если он не проверялся"""
+        path_id = self._ids.get(str(path))
+        return None if path_id is None else self.records[path_id]
+
+    def counts(self) -> Dict[str, int]:
+        """Количество архивов по состояниям"""
+        return dict(zip(STATUSES, self._counts))
+
+    def by_status(self, status: str) -> Dict[str, str]:
+        """Архивы с заданным состоянием {путь: ошибка}"""
+        code = STATUS_CODES[status]
+        return {self.paths[r.path_id]: self.errors.get(r.path_id, "")
+                for r in self.records[:] if r.status_code == code}
+
+    def to_dict(self, record: ArchiveRecord) -> dict:
+        return record_dict(record, self.path(record), self.error(record))
+
+    def save(self, output_file) -> None:
+        """Сохранение результатов в формате JSON Lines (одна запись на строку)"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for record in self:
+                f.write(json.dumps(self.to_dict(record), ensure_ascii=False) + "\n")
+
+    @classmethod
+    def load(cls, input_file) -> "ResultStore":
+        """Чтение результатов, сохраненных save()"""
+        store = cls()
+        with open(input_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                status = data["status"]
+                record_args = (FORMAT_CODES.get(data.get("format"), 0), STATUS_CODES[status],
+                               ERROR_CLASS_CODES.get(data.get("error_class") or "", 0),
+                               data.get("size", 0), data.get("duration", 0.0))
+                store._store(data["path"], record_args, data.get("error"))
+        return store
+
@@ -0,0 +1,502 @@
+import itertools
+from bisect import bisect_left
+from typing import Callable, Iterable, List, Optional, Set
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox,
+    QSpinBox, QDoubleSpinBox, QTableView, QHeaderView, QAbstractItemView, QMenu, QApplication
+)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor
+
+from format_backends import BACKENDS
+from results import (
+    FORMAT_CODES, STATUS_CODES, STATUS_CORRUPTED, STATUS_ENCRYPTED, STATUS_OK, STATUS_SUSPICIOUS, STATUS_UNVERIFIED,
+    ResultStore
+)
+
+# Строк, добавляемых в таблицу за один fetchMore (остальные подгружаются при прокрутке)
+FETCH_BATCH = 1000
+
+# Период опроса хранилища результатов во время проверки, мс
+REFRESH_INTERVAL = 500
+
+# Новые записи вставляются в индекс двоичным поиском, пока их меньше 1/MERGE_RATIO индекса;
+# большая порция добавляется с полной пересортировкой
+MERGE_RATIO = 16
+
+COLUMNS = ("Архив", "Формат", "Состояние", "Ошибка", "Размер", "Время, сек.")
+COLUMN_PATH, COLUMN_FORMAT, COLUMN_STATUS, COLUMN_ERROR, COLUMN_SIZE, COLUMN_DURATION = range(len(COLUMNS))
+
+STATUS_TITLES = {
+    STATUS_OK: "Корректен",
+    STATUS_CORRUPTED: "Поврежден",
+    STATUS_SUSPICIOUS: "Подозрительный",
+    STATUS_ENCRYPTED: "Зашифрован",
+    STATUS_UNVERIFIED: "Не проверен",
+}
+
+# Цвета строк по состоянию (как в логе проверки)
+STATUS_COLORS = {
+    STATUS_CORRUPTED: QColor("#ff6b6b"),
+    STATUS_SUSPICIOUS: QColor("#e0a030"),
+    STATUS_ENCRYPTED: QColor("#6b9bff"),
+    STATUS_UNVERIFIED: QColor("#909090"),
+}
+
+# Пункты фильтра по состоянию: (название, состояния; None - все)
+STATUS_FILTERS = (
+    ("Все", None),
+    ("С ошибками", (STATUS_CORRUPTED, STATUS_SUSPICIOUS, STATUS_ENCRYPTED)),
+) + tuple((title, (status,)) for status, title in STATUS_TITLES.items())
+
+
+def format_size(size: int) -> str:
+    for unit in ("Б", "КБ", "МБ", "ГБ"):
+        if size < 1024 or unit == "ГБ":
+            return f"{size:.0f} {unit}" if unit == "Б" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    Таблица результатов поверх ResultStore. Модель хранит только номера путей
+    отобранных записей в порядке сортировки: фильтр и сортировка перестраивают этот
+    индекс, данные читаются из хранилища при отрисовке. Строки отдаются представлению
+    порциями по FETCH_BATCH (canFetchMore/fetchMore), поэтому сотни тысяч записей
+    не замедляют ни заполнение, ни прокрутку. Порядок индекса строгий (при равных ключах -
+    по номеру пути, то есть в порядке проверки): новые записи вставляются двоичным поиском,
+    без пересортировки всего индекса.
+    """
+
+    def __init__(self, store: Optional[ResultStore] = None, parent=None):
+        super().__init__(parent)
+        self.store = store if store is not None else ResultStore()
+        self._index: List[int] = []  # Номера путей отобранных записей
+        self._loaded = 0  # Строк, отданных представлению
+        self._seen = 0  # Записей хранилища, прошедших через фильтр
+        self._replaced = len(self.store.replaced)  # Учтенных замен записей
+        self._version = self.store.version
+        self._records = self.store.records  # Список записей, по которому построен индекс
+        self._statuses: Optional[Set[int]] = None
+        self._format: Optional[int] = None
+        self._min_size = 0
+        self._min_duration = 0.0
+        self._text = ""
+        self._sort_column: Optional[int] = None
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+    def set_store(self, store: ResultStore) -> None:
+        self.store = store
+        self._rebuild()
+
+    # Размеры и заголовки
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._loaded < len(self._index)
+
+    def fetchMore(self, parent=QModelIndex()) -> None:
+        self._expose(self._loaded + FETCH_BATCH)
+
+    def _expose(self, limit: int) -> None:
+        """Отдача представлению строк до limit"""
+        limit = min(limit, len(self._index))
+        if limit <= self._loaded:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, limit - 1)
+        self._loaded = limit
+        self.endInsertRows()
+
+    # Данные
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded or self.store.records is not self._records:
+            return None
+        path_id = self._index[index.row()]
+        record = self.store.records[path_id]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == COLUMN_PATH:
+                return self.store.paths[path_id]
+            if column == COLUMN_FORMAT:
+                return (record.format or "").upper()
+            if column == COLUMN_STATUS:
+                return STATUS_TITLES[record.status]
+            if column == COLUMN_ERROR:
+                return self.store.errors.get(path_id, "")
+            if column == COLUMN_SIZE:
+                return format_size(record.size)
+            if column == COLUMN_DURATION:
+                return f"{record.duration:.2f}"
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            return STATUS_COLORS.get(record.status)
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            return self.store.errors.get(path_id) or self.store.paths[path_id]
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            if column in (COLUMN_SIZE, COLUMN_DURATION):
+                return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        elif role == Qt.ItemDataRole.UserRole:
+            return self.store.paths[path_id]
+        return None
+
+    def path_at(self, row: int) -> str:
+        return self.store.paths[self._index[row]]
+
+    def total(self) -> int:
+        """Всего записей в хранилище"""
+        return len(self.store)
+
+    def matched(self) -> int:
+        """Записей, прошедших фильтр"""
+        return len(self._index)
+
+    # Фильтр
+
+    def set_filter(self, statuses=None, fmt: Optional[str] = None, min_size: int = 0,
+                   min_duration: float = 0.0, text: str = "") -> None:
+        """
+        Отбор записей
+
+        Args:
+            statuses: Состояния (см. results) или None - все
+            fmt (str): Формат (см. format_backends) или None - все
+            min_size (int): Минимальный размер архива, байт
+            min_duration (float): Минимальное время проверки, сек.
+            text (str): Подстрока пути или текста ошибки (без учета регистра)
+        """
+        self._statuses = None if statuses is None else {STATUS_CODES[s] for s in statuses}
+        self._format = None if fmt is None else FORMAT_CODES.get(fmt, 0)
+        self._min_size = min_size
+        self._min_duration = min_duration
+        self._text = text.lower()
+        self._rebuild()
+
+    def _matching(self, path_ids: Iterable[int]) -> List[int]:
+        """Номера путей из path_ids, записи которых проходят фильтр"""
+        records, paths, errors = self.store.records, self.store.paths, self.store.errors
+        statuses, fmt, text = self._statuses, self._format, self._text
+        min_size, min_duration = self._min_size, self._min_duration
+        matched = []
+        for path_id in path_ids:
+            record = records[path_id]
+            if statuses is not None and record.status_code not in statuses:
+                continue
+            if fmt is not None and record.format_code != fmt:
+                continue
+            if record.size < min_size or record.duration < min_duration:
+                continue
+            if text and text not in paths[path_id].lower() and text not in errors.get(path_id, "").lower():
+                continue
+            matched.append(path_id)
+        return matched
+
+    def _rebuild(self) -> None:
+        self.beginResetModel()
+        self._records = self.store.records
+        self._seen = len(self._records)
+        self._replaced = len(self.store.replaced)
+        self._version = self.store.version
+        self._index = self._matching(range(self._seen))
+        self._sort_index()
+        self._loaded = min(FETCH_BATCH, len(self._index))
+        self.endResetModel()
+
+    # Сортировка
+
+    def _sort_key(self, column: int):
+        records, paths, errors = self.store.records, self.store.paths, self.store.errors
+        if column == COLUMN_PATH:
+            return lambda path_id: paths[path_id].lower()
+        if column == COLUMN_FORMAT:
+            return lambda path_id: records[path_id].format or ""
+        if column == COLUMN_STATUS:
+            return lambda path_id: records[path_id].status_code
+        if column == COLUMN_ERROR:
+            return lambda path_id: (records[path_id].error_class_code, errors.get(path_id, ""))
+        if column == COLUMN_SIZE:
+            return lambda path_id: records[path_id].size
+        return lambda path_id: records[path_id].duration
+
+    def _sort_index(self) -> None:
+        if self._sort_column is None:
+            return
+        # Сначала по номеру пути: при равных ключах сохраняется порядок проверки
+        # (sort устойчива, в том числе с reverse)
+        self._index.sort()
+        self._index.sort(key=self._sort_key(self._sort_column),
+                         reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+
+    def _order(self, path_ids: List[int]) -> None:
+        """Упорядочивание списка номеров путей так же, как индекс"""
+        path_ids.sort()
+        if self._sort_column is not None:
+            path_ids.sort(key=self._sort_key(self._sort_column),
+                          reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+
+    def _position(self, index: List[int], path_id: int, lo: int = 0) -> int:
+        """Место номера пути в упорядоченном как индекс списке (двоичный поиск)"""
+        if self._sort_column is None:
+            return bisect_left(index, path_id, lo)
+        key = self._sort_key(self._sort_column)
+        descending = self._sort_order == Qt.SortOrder.DescendingOrder
+        target = key(path_id)
+        hi = len(index)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            other = index[mid]
+            value = key(other)
+            if (value > target if descending else value < target) or (value == target and other < path_id):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _row_of(self, path_id: int) -> Optional[int]:
+        """Строка архива в индексе или None, если он не прошел фильтр"""
+        row = self._position(self._index, path_id)
+        return row if row < len(self._index) and self._index[row] == path_id else None
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder) -> None:
+        self._sort_column = column
+        self._sort_order = order
+        self._relayout(self._sort_index)
+
+    def _relayout(self, update: Callable[[], None]) -> None:
+        """Изменение индекса с сохранением выделения и текущей строки представления"""
+        self.layoutAboutToBeChanged.emit()
+        persistent = self.persistentIndexList()
+        path_ids = [self._index[index.row()] for index in persistent]
+        update()
+        moved = []
+        for index, path_id in zip(persistent, path_ids):
+            row = self._row_of(path_id)
+            moved.append(self.index(row, index.column()) if row is not None and row < self._loaded
+                         else QModelIndex())
+        self.changePersistentIndexList(persistent, moved)
+        self.layoutChanged.emit()
+
+    # Обновление во время проверки
+
+    def refresh(self) -> None:
+        """
+        Учет изменений хранилища: новые записи проходят фильтр и вставляются на свои места,
+        замененные при повторной проверке проверяются фильтром заново и переставляются
+        """
+        store = self.store
+        if store.version == self._version:
+            return
+        if store.records is not self._records:
+            # Хранилище очищено (новая проверка)
+            self._rebuild()
+            return
+        self._version = store.version
+        seen, self._seen = self._seen, len(store)
+        replaced = store.replaced[self._replaced:]
+        self._replaced += len(replaced)
+        changed = {path_id for path_id in replaced if path_id < seen}  # Новые записи учтены ниже
+        added = self._matching(sorted(changed)) + self._matching(range(seen, self._seen))
+        if changed or added:
+            self._update_index(changed, added)
+        # Дальше первой порции строки подгружает представление (fetchMore)
+        self._expose(FETCH_BATCH)
+
+    def _update_index(self, removed: Set[int], added: List[int]) -> None:
+        """
+        Удаление номеров путей из индекса и вставка новых слиянием: места вставки ищутся
+        двоичным поиском, индекс собирается из срезов. Если изменения не задевают
+        показанные строки, представление не перерисовывается.
+        """
+        index = self._index
+        first = len(index)
+        if removed:
+            first = next((row for row, path_id in enumerate(index) if path_id in removed), first)
+            index = [path_id for path_id in index if path_id not in removed]
+        if len(added) * MERGE_RATIO > len(index):
+            # Крупная порция (начало проверки): дешевле отсортировать индекс целиком
+            merged = index + added
+            self._order(merged)
+            first = 0
+        else:
+            self._order(added)
+            parts, start = [], 0
+            for path_id in added:
+                position = self._position(index, path_id, start)
+                parts.append(index[start:position])
+                parts.append((path_id,))
+                start = position
+                first = min(first, position)
+            parts.append(index[start:])
+            merged = list(itertools.chain.from_iterable(parts))
+        if first >= self._loaded:
+            self._index = merged  # Показанные строки не изменились
+            return
+        if len(merged) < self._loaded:
+            # Строк стало меньше, чем показано: лишние удаляются с конца до перестановки
+            self.beginRemoveRows(QModelIndex(), len(merged), self._loaded - 1)
+            self._loaded = len(merged)
+            self.endRemoveRows()
+
+        def replace_index():
+            self._index = merged
+
+        self._relayout(replace_index)
+
+
+class ResultsPanel(QWidget):
+    """Фильтры, таблица результатов и действия с выбранными архивами"""
+
+    reverify_requested = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.model = ResultsTableModel(parent=self)
+        self.setup_ui()
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        # Фильтры
+        filter_layout = QHBoxLayout()
+        filter_layout.addWidget(QLabel("Состояние:"))
+        self.status_combo = QComboBox()
+        self.status_combo.addItems([title for title, _ in STATUS_FILTERS])
+        filter_layout.addWidget(self.status_combo)
+
+        filter_layout.addWidget(QLabel("Формат:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItem("Все")
+        self.format_combo.addItems([name.upper() for name in BACKENDS])
+        filter_layout.addWidget(self.format_combo)
+
+        filter_layout.addWidget(QLabel("Размер от, МБ:"))
+        self.size_spin = QSpinBox()
+        self.size_spin.setRange(0, 1024 * 1024)
+        filter_layout.addWidget(self.size_spin)
+
+        filter_layout.addWidget(QLabel("Время от, сек.:"))
+        self.duration_spin = QDoubleSpinBox()
+        self.duration_spin.setRange(0, 24 * 3600)
+        self.duration_spin.setDecimals(1)
+        filter_layout.addWidget(self.duration_spin)
+
+        self.text_edit = QLineEdit()
+        self.text_edit.setPlaceholderText("Путь или ошибка")
+        self.text_edit.setClearButtonEnabled(True)
+        filter_layout.addWidget(self.text_edit, 1)
+        layout.addLayout(filter_layout)
+
+        self.status_combo.currentIndexChanged.connect(self.apply_filter)
+        self.format_combo.currentIndexChanged.connect(self.apply_filter)
+        self.size_spin.valueChanged.connect(self.apply_filter)
+        self.duration_spin.valueChanged.connect(self.apply_filter)
+        # Текстовый фильтр применяется после паузы в наборе, а не на каждый символ
+        self.text_timer = QTimer(self)
+        self.text_timer.setSingleShot(True)
+        self.text_timer.setInterval(300)
+        self.text_timer.timeout.connect(self.apply_filter)
+        self.text_edit.textChanged.connect(self.text_timer.start)
+
+        # Таблица: строки одинаковой высоты, ширина колонок не пересчитывается по содержимому
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setWordWrap(False)
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.table.verticalHeader().setDefaultSectionSize(self.table.fontMetrics().height() + 6)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setStretchLastSection(False)
+        header.resizeSection(COLUMN_PATH, 360)
+        header.resizeSection(COLUMN_ERROR, 300)
+        self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.table.customContextMenuRequested.connect(self.show_menu)
+        self.table.selectionModel().selectionChanged.connect(self.update_actions)
+        layout.addWidget(self.table)
+
+        # Счетчик и действия
+        actions_layout = QHBoxLayout()
+        self.count_label = QLabel()
+        actions_layout.addWidget(self.count_label)
+        actions_layout.addStretch()
+        self.reverify_btn = QPushButton("Перепроверить выбранные")
+        self.reverify_btn.clicked.connect(self.reverify_selected)
+        actions_layout.addWidget(self.reverify_btn)
+        layout.addLayout(actions_layout)
+
+        self.reverify_enabled = True
+        self.update_actions()
+
+    def set_store(self, store: ResultStore) -> None:
+        """Показ результатов проверки; во время проверки таблица обновляется по таймеру"""
+        self.model.set_store(store)
+        self.update_actions()
+        self.timer.start()
+
+    def stop_updates(self) -> None:
+        self.timer.stop()
+        self.refresh()
+
+    def refresh(self) -> None:
+        self.model.refresh()
+        self.update_count()
+
+    def apply_filter(self) -> None:
+        statuses = STATUS_FILTERS[self.status_combo.currentIndex()][1]
+        fmt = self.format_combo.currentText().lower() if self.format_combo.currentIndex() else None
+        self.model.set_filter(statuses, fmt, self.size_spin.value() * 1024 * 1024,
+                              self.duration_spin.value(), self.text_edit.text().strip())
+        self.update_actions()
+
+    def update_count(self) -> None:
+        self.count_label.setText(f"Показано архивов: {self.model.matched()} из {self.model.total()}")
+
+    def selected_paths(self) -> List[str]:
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.model.path_at(row) for row in rows]
+
+    def set_reverify_enabled(self, enabled: bool) -> None:
+        """Повторная проверка недоступна, пока идет проверка"""
+        self.reverify_enabled = enabled
+        self.update_actions()
+
+    def update_actions(self, *args) -> None:
+        self.reverify_btn.setEnabled(self.reverify_enabled and self.table.selectionModel().hasSelection())
+        self.update_count()
+
+    def reverify_selected(self) -> None:
+        paths = self.selected_paths()
+        if paths and self.reverify_enabled:
+            self.reverify_requested.emit(paths)
+
+    def show_menu(self, position):
+        if not self.table.selectionModel().hasSelection():
+            return
+        menu = QMenu(self)
+        reverify_action = menu.addAction("Перепроверить выбранные")
+        reverify_action.setEnabled(self.reverify_enabled)
+        copy_action = menu.addAction("Копировать пути")
+        action = menu.exec(self.table.viewport().mapToGlobal(position))
+        if action == reverify_action:
+            self.reverify_selected()
+        elif action == copy_action:
+            QApplication.clipboard().setText("\n".join(self.selected_paths()))
@@ -0,0 +1,132 @@
+import random
+import threading
+from typing import Callable, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+MB = 1 << 20
+
+
+class SamplingPolicy:
+    """
+    Параметры выборочной проверки больших архивов.
+
+    Структура архива (оглавление, границы записей) проверяется всегда, а полностью
+    распаковывается только случайная выборка файлов: не больше max_members файлов
+    и не больше max_bytes сжатых данных. Выборка зависит только от seed и имени
+    архива, поэтому повторный запуск проверяет те же файлы.
+    """
+
+    def __init__(self, max_members: Optional[int] = None, max_bytes: Optional[int] = None, seed: int = 0):
+        """
+        Args:
+            max_members (int): Сколько файлов архива проверять (None или 0 - без ограничения)
+            max_bytes (int): Сколько сжатых байт архива читать (None или 0 - без ограничения)
+            seed (int): Начальное значение генератора случайных чисел
+        """
+        self.max_members = max_members or None
+        self.max_bytes = max_bytes or None
+        self.seed = seed
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_members is not None or self.max_bytes is not None
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> Optional["SamplingPolicy"]:
+        """Политика из раздела "sampling" настроек; None, если выборка выключена"""
+        if not settings.get("enabled"):
+            return None
+        policy = cls(settings.get("max_members"), settings.get("max_mb", 0) * MB, settings.get("seed", 0))
+        return policy if policy.enabled else None
+
+    def select(self, archive_name: str, members: Sequence[T], size_of: Callable[[T], int]) -> List[T]:
+        """
+        Выбор файлов архива для полной проверки
+
+        Args:
+            archive_name (str): Имя архива (входит в начальное значение генератора)
+            members (Sequence): Файлы архива в порядке оглавления
+            size_of (Callable): Объем чтения для файла, байт
+
+        Returns:
+            List: Выбранные файлы в исходном порядке (чтение идет по возрастанию смещения)
+        """
+        if (self.max_members is None or len(members) <= self.max_members) and (
+                self.max_bytes is None or sum(size_of(m) for m in members) <= self.max_bytes):
+            return list(members)
+
+        order = list(range(len(members)))
+        random.Random(f"{self.seed}:{archive_name}").shuffle(order)
+
+        chosen = []
+        budget = self.max_bytes
+        for index in order:
+            if self.max_members is not None and len(chosen) >= self.max_members:
+                break
+            if budget is not None:
+                size = size_of(members[index])
+                if size > budget:
+                    # Файл не помещается в остаток бюджета, но меньшие еще могут поместиться
+                    continue
+                budget -= size
+            chosen.append(index)
+        return [members[i] for i in sorted(chosen)]
+
+
+class SampleCoverage:
+    """Доля архива, проверенная полностью: по количеству файлов и по объему"""
+
+    __slots__ = ("members_checked", "members_total", "bytes_checked", "bytes_total")
+
+    def __init__(self, members_checked: int = 0, members_total: int = 0,
+                 bytes_checked: int = 0, bytes_total: int = 0):
+        self.members_checked = members_checked
+        self.members_total = members_total
+        self.bytes_checked = bytes_checked
+        self.bytes_total = bytes_total
+
+    @property
+    def complete(self) -> bool:
+        return self.members_checked == self.members_total
+
+    @property
+    def fraction(self) -> float:
+        """Проверенная доля объема (1.0 для пустого архива)"""
+        return self.bytes_checked / self.bytes_total if self.bytes_total else 1.0
+
+    def add(self, other: "SampleCoverage") -> None:
+        self.members_checked += other.members_checked
+        self.members_total += other.members_total
+        self.bytes_checked += other.bytes_checked
+        self.bytes_total += other.bytes_total
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __str__(self) -> str:
+        return (f"{self.members_checked} из {self.members_total} файлов, "
+                f"{self.bytes_checked / MB:.1f} из {self.bytes_total / MB:.1f} МБ ({self.fraction:.1%})")
+
+
+class CoverageLog:
+    """Покрытие выборочной проверки по архивам и в сумме (заполняется из рабочих потоков)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.archives = {}  # путь -> SampleCoverage
+        self.total = SampleCoverage()
+        self.sampled = 0  # Архивы, проверенные не полностью
+
+    def record(self, path: str, coverage: SampleCoverage) -> None:
+        with self._lock:
+            self.archives[path] = coverage
+            self.total.add(coverage)
+            if not coverage.complete:
+                self.sampled += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.archives.clear()
+            self.total = SampleCoverage()
+            self.sampled = 0
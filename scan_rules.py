@@ -0,0 +1,167 @@
+import re
+import time
+from typing import List, Optional, Pattern, Tuple
+
+MB = 1 << 20
+DAY = 24 * 3600
+
+
+def translate_pattern(pattern: str) -> Tuple[str, bool]:
+    """
+    Перевод шаблона в стиле .gitignore в регулярное выражение для пути
+    относительно корня сканирования (разделитель - "/")
+
+    Поддерживаются "*", "?", "[...]", "**", привязка к корню ("/" в начале или
+    в середине шаблона) и "/" в конце (только директории).
+
+    Returns:
+        Tuple[str, bool]: (регулярное выражение без якоря конца, шаблон только для директорий)
+    """
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+
+    parts = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                if pattern.startswith("**/", i):
+                    parts.append("(?:.*/)?")  # Любое количество директорий, в том числе ни одной
+                    i += 3
+                else:
+                    parts.append(".*")
+                    i += 2
+                continue
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) else i + 1)
+            if end < 0:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+
+    prefix = "^" if anchored else "^(?:.*/)?"
+    return prefix + "".join(parts), dir_only
+
+
+class _Rule:
+    __slots__ = ("regex", "negate", "dir_only")
+
+    def __init__(self, regex: Pattern, negate: bool, dir_only: bool):
+        self.regex = regex
+        self.negate = negate
+        self.dir_only = dir_only
+
+
+def _compile(patterns: List[str], suffix: str, dir_suffix: str) -> List[_Rule]:
+    rules = []
+    for pattern in patterns:
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith("#"):
+            continue
+        negate = pattern.startswith("!")
+        if negate:
+            pattern = pattern[1:]
+        body, dir_only = translate_pattern(pattern)
+        rules.append(_Rule(re.compile(body + (dir_suffix if dir_only else suffix)), negate, dir_only))
+    return rules
+
+
+class ScanRules:
+    """
+    Правила отбора файлов при поиске архивов: шаблоны включения и исключения
+    в стиле .gitignore, ограничения размера и возраста.
+    Шаблоны компилируются один раз; исключенные директории не обходятся вовсе.
+    """
+
+    def __init__(self, include: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+                 min_size: int = 0, max_size: int = 0, min_age: float = 0, max_age: float = 0):
+        """
+        Args:
+            include (List[str]): Шаблоны путей, среди которых искать архивы (пусто - все пути)
+            exclude (List[str]): Шаблоны исключаемых файлов и директорий; "!" в начале -
+                возврат ранее исключенного, действует последний подходящий шаблон
+            min_size (int): Минимальный размер файла, байт (0 - без ограничения)
+            max_size (int): Максимальный размер файла, байт (0 - без ограничения)
+            min_age (float): Минимальный возраст (время с изменения), сек. - пропуск файлов,
+                которые, возможно, еще записываются
+            max_age (float): Максимальный возраст, сек. - только недавно измененные файлы
+        """
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        # Шаблон включения директории включает и все ее содержимое
+        self._include = _compile(self.include, "(?:/.*)?$", "/.*$")
+        self._exclude = _compile(self.exclude, "$", "$")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.min_age = min_age
+        self.max_age = max_age
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "ScanRules":
+        """Правила из настроек (размеры в МБ, возраст в днях)"""
+        return cls(
+            settings.get("include", []), settings.get("exclude", []),
+            int(settings.get("min_size_mb", 0) * MB), int(settings.get("max_size_mb", 0) * MB),
+            settings.get("min_age_days", 0) * DAY, settings.get("max_age_days", 0) * DAY
+        )
+
+    @property
+    def needs_stat(self) -> bool:
+        """Для отбора нужны размер или время изменения файла"""
+        return bool(self.min_size or self.max_size or self.min_age or self.max_age)
+
+    def _excluded(self, rel_path: str, is_dir: bool) -> bool:
+        excluded = False
+        for rule in self._exclude:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.negate == excluded and rule.regex.match(rel_path):
+                excluded = not rule.negate
+        return excluded
+
+    def skip_dir(self, rel_path: str) -> bool:
+        """Директорию не нужно обходить"""
+        return self._excluded(rel_path, True)
+
+    def accepts_file(self, rel_path: str, entry=None, now: Optional[float] = None) -> bool:
+        """
+        Подходит ли файл под правила
+
+        Args:
+            rel_path (str): Путь относительно корня сканирования через "/"
+            entry (os.DirEntry): Запись каталога (нужна для фильтров размера и возраста)
+            now (float): Текущее время (для серии вызовов)
+        """
+        if self._include and not any(rule.regex.match(rel_path) for rule in self._include):
+            return False
+        if self._exclude and self._excluded(rel_path, False):
+            return False
+        if entry is not None and self.needs_stat:
+            st = entry.stat()
+            if self.min_size and st.st_size < self.min_size:
+                return False
+            if self.max_size and st.st_size > self.max_size:
+                return False
+            age = (now or time.time()) - st.st_mtime
+            if self.min_age and age < self.min_age:
+                return False
+            if self.max_age and age > self.max_age:
+                return False
+        return True
@@ -0,0 +1,135 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+# Приоритет архивов, которые не поднимались в очереди
+NORMAL_LEVEL = 0
+
+
+class ArchiveQueue:
+    """
+    Очередь архивов с приоритетами, которые можно менять во время проверки.
+
+    Архив с меньшим ключом (уровень, порядок) выдается раньше. Обычные архивы имеют
+    уровень 0 и идут в порядке поиска (или от новых к старым). Каждое поднятие
+    получает уровень меньше предыдущего, поэтому последний запрос пользователя
+    обслуживается первым. Устаревшие записи кучи не удаляются, а пропускаются при выдаче.
+    """
+
+    def __init__(self, archives: Iterable[Path] = (), recent_first: bool = False):
+        """
+        Args:
+            archives: Архивы в порядке поиска
+            recent_first (bool): Выдавать недавно измененные архивы раньше
+        """
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[int, float, int, Path]] = []
+        self._entries = {}  # путь -> актуальная запись кучи
+        self._counter = itertools.count()
+        self._boost_level = NORMAL_LEVEL
+        for archive in archives:
+            order = -self._mtime(archive) if recent_first else 0.0
+            self._push(archive, NORMAL_LEVEL, order)
+
+    @staticmethod
+    def _mtime(path: Path) -> float:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return 0.0
+
+    def _push(self, path: Path, level: int, order: float) -> None:
+        entry = (level, order, next(self._counter), path)
+        self._entries[path] = entry
+        heapq.heappush(self._heap, entry)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def push(self, path: Path) -> None:
+        """Добавление архива в конец обычной очереди"""
+        with self._lock:
+            if path not in self._entries:
+                self._push(path, NORMAL_LEVEL, 0.0)
+
+    def pop(self) -> Optional[Path]:
+        """Следующий архив для проверки или None, если очередь пуста"""
+        with self._lock:
+            while self._heap:
+                entry = heapq.heappop(self._heap)
+                path = entry[3]
+                if self._entries.get(path) is entry:
+                    del self._entries[path]
+                    return path
+            return None
+
+    def peek(self) -> Optional[Path]:
+        """Архив, который будет выдан следующим (без удаления из очереди)"""
+        with self._lock:
+            while self._heap:
+                entry = self._heap[0]
+                if self._entries.get(entry[3]) is entry:
+                    return entry[3]
+                heapq.heappop(self._heap)  # Устаревшая запись
+            return None
+
+    def pending(self) -> List[Path]:
+        """Архивы в очереди в порядке выдачи"""
+        with self._lock:
+            return [entry[3] for entry in sorted(self._entries.values())]
+
+    def _boost(self, paths: List[Tuple[Path, Optional[float]]]) -> int:
+        """
+        Поднятие архивов выше всех ранее поднятых (вызывается под блокировкой)
+
+        Args:
+            paths: (путь, новый порядок внутри уровня или None - прежний)
+        """
+        paths = [(path, order) for path, order in paths if path in self._entries]
+        if not paths:
+            return 0
+        self._boost_level -= 1
+        for path, order in paths:
+            self._push(path, self._boost_level, self._entries[path][1] if order is None else order)
+        return len(paths)
+
+    def prioritize_folder(self, folder: Path) -> int:
+        """
+        Поднятие в начало очереди всех ожидающих архивов из папки (и ее подпапок)
+
+        Returns:
+            int: Количество поднятых архивов
+        """
+        folder = Path(os.path.abspath(folder))
+        with self._lock:
+            paths = [(path, None) for path in self._entries
+                     if Path(os.path.abspath(path)) == folder or folder in Path(os.path.abspath(path)).parents]
+            return self._boost(paths)
+
+    def prioritize_recent(self, max_age: float) -> int:
+        """
+        Поднятие в начало очереди архивов, измененных за последние max_age секунд
+        (от новых к старым)
+
+        Returns:
+            int: Количество поднятых архивов
+        """
+        threshold = time.time() - max_age
+        with self._lock:
+            candidates = list(self._entries)
+        # Обращения к диску выполняем без блокировки, чтобы не задерживать выдачу архивов
+        recent = []
+        for path in candidates:
+            mtime = self._mtime(path)
+            if mtime >= threshold:
+                recent.append((path, -mtime))
+        with self._lock:
+            return self._boost(recent)
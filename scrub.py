@@ -0,0 +1,241 @@
+import os
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from results import result_status
+
+logger = logging.getLogger(__name__)
+
+GB = 1 << 30
+
+
+class VerificationHistory:
+    """
+    История проверок архивов: когда и с каким результатом проверен каждый архив.
+    Хранится в JSON-файле; запись сохраняется не реже раза в save_interval секунд,
+    поэтому прерванный запуск не теряет сделанную работу. Архив, у которого
+    изменились размер или время изменения, считается непроверенным.
+    """
+
+    def __init__(self, path, save_interval: float = 30.0):
+        """
+        Args:
+            path: Файл истории
+            save_interval (float): Период промежуточного сохранения, сек.
+        """
+        self.path = Path(path)
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._saved_at = time.monotonic()
+        self._dirty = False
+        self.entries: Dict[str, dict] = self.load()
+
+    @staticmethod
+    def key(path) -> str:
+        return os.path.abspath(path)
+
+    def load(self) -> Dict[str, dict]:
+        """Загрузка истории из файла (пустая история, если файла нет или он поврежден)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("archives", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Не удалось загрузить историю проверок {self.path}: {e}")
+            return {}
+
+    def save(self) -> None:
+        """Сохранение истории (через временный файл, чтобы не повредить ее при сбое)"""
+        with self._lock:
+            data = json.dumps({"archives": self.entries}, ensure_ascii=False)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Не удалось сохранить историю проверок {self.path}: {e}")
+
+    def record(self, path, status: str, error: Optional[str] = None,
+               duration: float = 0.0, st: Optional[os.stat_result] = None) -> None:
+        """
+        Запись результата проверки архива (можно вызывать из рабочих потоков)
+
+        Args:
+            path: Архив
+            status (str): Состояние архива (results.STATUS_*)
+            error (str): Сообщение об ошибке
+            duration (float): Время проверки, сек.
+            st: Результат stat архива (если уже известен)
+        """
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return  # Архив исчез - записывать нечего
+        entry = {
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "verified": time.time(),
+            "status": status,
+            "duration": round(duration, 3),
+        }
+        if error:
+            entry["error"] = error
+        with self._lock:
+            self.entries[self.key(path)] = entry
+            self._dirty = True
+            save = time.monotonic() - self._saved_at >= self.save_interval
+        if save:
+            self.save()
+
+    def record_result(self, path, is_valid: Optional[bool], error: Optional[str], duration: float) -> None:
+        """Запись результата в формате обработчика ScanEngine.on_archive"""
+        self.record(path, result_status(is_valid, error), error, duration)
+
+    def record_copies(self, duplicates, since: float) -> None:
+        """
+        Перенос результатов на копии архивов, не проверявшиеся отдельно
+
+        Args:
+            duplicates (DuplicateGroups): Группы одинаковых архивов
+            since (float): Начало проверки: переносятся только результаты, полученные после него
+        """
+        for representative, copies in duplicates.copies.items():
+            entry = self.get(representative)
+            if entry and entry["verified"] >= since:
+                for copy in copies:
+                    self.record(copy, entry["status"], entry.get("error"), entry.get("duration", 0.0))
+
+    def flush(self) -> None:
+        """Сохранение несохраненных записей"""
+        if self._dirty:
+            self.save()
+
+    def get(self, path) -> Optional[dict]:
+        with self._lock:
+            return self.entries.get(self.key(path))
+
+    def last_verified(self, path, st: os.stat_result) -> Optional[float]:
+        """
+        Время последней проверки архива в текущем виде
+
+        Returns:
+            Optional[float]: Время (Unix time) или None, если архив не проверялся или изменился
+        """
+        entry = self.get(path)
+        if not entry or entry.get("size") != st.st_size or entry.get("mtime") != st.st_mtime:
+            return None
+        return entry.get("verified")
+
+
+class ScrubPlan:
+    """Архивы, выбранные для очередного прохода, и состояние цикла перепроверки"""
+
+    def __init__(self):
+        self.archives: List[Path] = []  # В порядке проверки: сначала самые давние
+        self.planned_bytes = 0
+        self.total_archives = 0
+        self.total_bytes = 0
+        self.never_verified = 0
+        self.oldest_verified: Optional[float] = None  # Самая давняя проверка среди всех архивов
+
+    def __str__(self) -> str:
+        text = (f"выбрано {len(self.archives)} из {self.total_archives} архивов "
+                f"({self.planned_bytes / GB:.2f} из {self.total_bytes / GB:.2f} ГБ), "
+                f"ни разу не проверялись: {self.never_verified}")
+        if self.oldest_verified is not None:
+            days = (time.time() - self.oldest_verified) / 86400
+            text += f", самая давняя проверка: {days:.1f} дн. назад"
+        return text
+
+
+def plan_scrub(archives: Iterable[Path], history: VerificationHistory, max_bytes: int = 0) -> ScrubPlan:
+    """
+    Выбор архивов для прохода перепроверки: сначала ни разу не проверенные
+    (и измененные после проверки) в порядке поиска, затем проверенные раньше всех.
+
+    Args:
+        archives: Найденные архивы
+        history (VerificationHistory): История проверок
+        max_bytes (int): Бюджет прохода по объему, байт (0 - без ограничения).
+            Выбор идет строго по давности: первый не поместившийся архив завершает выбор,
+            чтобы большие архивы не откладывались бесконечно; если не помещается
+            даже первый архив, он проверяется один.
+
+    Returns:
+        ScrubPlan: План прохода
+    """
+    plan = ScrubPlan()
+    candidates: List[Tuple[float, int, Path, int]] = []
+    for index, path in enumerate(archives):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        verified = history.last_verified(path, st)
+        if verified is None:
+            plan.never_verified += 1
+        elif plan.oldest_verified is None or verified < plan.oldest_verified:
+            plan.oldest_verified = verified
+        candidates.append((verified or 0.0, index, path, st.st_size))
+        plan.total_bytes += st.st_size
+    plan.total_archives = len(candidates)
+
+    candidates.sort(key=lambda item: item[:2])
+    for _, _, path, size in candidates:
+        if max_bytes and plan.archives and plan.planned_bytes + size > max_bytes:
+            break
+        plan.archives.append(path)
+        plan.planned_bytes += size
+    return plan
+
+
+def run_scrub(engine, history: VerificationHistory, max_bytes: int = 0,
+              seconds: float = 0) -> Tuple[Dict[str, str], ScrubPlan]:
+    """
+    Проход перепроверки: выбор самых давно проверенных архивов в пределах бюджета,
+    их проверка и запись результатов в историю.
+
+    Args:
+        engine (ScanEngine): Движок проверки (задает директорию, расширения и правила поиска)
+        history (VerificationHistory): История проверок
+        max_bytes (int): Бюджет по объему, байт (0 - без ограничения)
+        seconds (float): Бюджет по времени, сек. (0 - без ограничения). По истечении
+            новые архивы не берутся в работу, начатые проверки завершаются
+
+    Returns:
+        Tuple[Dict[str, str], ScrubPlan]: Поврежденные архивы {путь: ошибка} и план прохода
+    """
+    engine.deadline = time.time() + seconds if seconds else None
+    plan = plan_scrub(engine.find_archives(), history, max_bytes)
+    logger.info(f"Перепроверка: {plan}")
+
+    previous = engine.on_archive
+
+    def on_archive(path: Path, is_valid: Optional[bool], error: Optional[str], duration: float) -> None:
+        history.record_result(path, is_valid, error, duration)
+        if previous:
+            previous(path, is_valid, error, duration)
+
+    # Порядок плана важнее порядка по времени изменения
+    recent_first = engine.recent_first
+    engine.on_archive = on_archive
+    engine.recent_first = False
+    try:
+        corrupted_archives = engine.run(plan.archives)
+    finally:
+        engine.on_archive = previous
+        engine.recent_first = recent_first
+        engine.deadline = None
+
+    if engine.duplicates:
+        history.record_copies(engine.duplicates, engine.start_time)
+    history.flush()
+    return corrupted_archives, plan
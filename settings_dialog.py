@@ -1,10 +1,13 @@
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QPushButton, QFileDialog, QSpinBox, QCheckBox,
-    QGroupBox, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
+    QGroupBox, QGridLayout, QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox,
+    QComboBox, QPlainTextEdit, QDoubleSpinBox
 )
 from PyQt6.QtCore import Qt
 from settings_manager import SettingsManager
+from autotune import default_max_workers
+from throttle import parse_schedule
 
 class SettingsDialog(QDialog):
     """
@@ -41,21 +44,165 @@ class SettingsDialog(QDialog):
         threads_label = QLabel("Максимальное количество потоков:")
         self.threads_spin = QSpinBox()
         self.threads_spin.setMinimum(1)
-        self.threads_spin.setMaximum(32)
+        self.threads_spin.setMaximum(max(32, default_max_workers()))
         self.threads_spin.setValue(self.settings_manager.get_max_threads())
         threads_layout.addWidget(threads_label)
         threads_layout.addWidget(self.threads_spin)
         threads_layout.addStretch()
         general_layout.addLayout(threads_layout)
         
+        # Автоподбор количества потоков во время проверки
+        self.auto_threads_check = QCheckBox("Автоподбор количества потоков (по скорости проверки и загрузке CPU)")
+        self.auto_threads_check.setChecked(self.settings_manager.get_auto_threads())
+        self.auto_threads_check.toggled.connect(lambda checked: self.threads_spin.setEnabled(not checked))
+        self.threads_spin.setEnabled(not self.auto_threads_check.isChecked())
+        general_layout.addWidget(self.auto_threads_check)
+        
         # Настройка рекурсивного сканирования
         self.recursive_check = QCheckBox("Рекурсивное сканирование подпапок")
         self.recursive_check.setChecked(self.settings_manager.get_recursive_scan())
         general_layout.addWidget(self.recursive_check)
         
+        # Однократная проверка одинаковых архивов
+        self.dedup_check = QCheckBox("Проверять одинаковые архивы (копии и жесткие ссылки) один раз")
+        self.dedup_check.setChecked(self.settings_manager.get_deduplicate())
+        general_layout.addWidget(self.dedup_check)
+        
         general_group.setLayout(general_layout)
         layout.addWidget(general_group)
         
+        # Группа ограничений ресурсов (защита от zip-бомб)
+        limits = self.settings_manager.get_limits()
+        limits_group = QGroupBox("Ограничения на один архив (0 - без ограничения)")
+        limits_layout = QGridLayout()
+        self.limit_spins = {}
+        for row, (key, label, maximum) in enumerate((
+            ("max_total_mb", "Распакованный объем, МБ:", 100000000),
+            ("max_ratio", "Коэффициент сжатия:", 1000000),
+            ("max_depth", "Глубина вложенных архивов:", 16),
+            ("cpu_seconds", "Время CPU внешней программы, сек.:", 1000000),
+            ("memory_mb", "Память внешней программы, МБ:", 1000000),
+        )):
+            spin = QSpinBox()
+            spin.setRange(0, maximum)
+            spin.setValue(limits[key])
+            limits_layout.addWidget(QLabel(label), row, 0)
+            limits_layout.addWidget(spin, row, 1)
+            self.limit_spins[key] = spin
+        limits_group.setLayout(limits_layout)
+        layout.addWidget(limits_group)
+        
+        # Группа ограничения нагрузки на диск
+        io_limits = self.settings_manager.get_io_limits()
+        io_group = QGroupBox("Нагрузка на диск (0 - без ограничения)")
+        io_layout = QGridLayout()
+        self.io_mbps_spin = QDoubleSpinBox()
+        self.io_mbps_spin.setRange(0, 100000)
+        self.io_mbps_spin.setDecimals(1)
+        self.io_mbps_spin.setValue(io_limits["mb_per_sec"])
+        self.io_iops_spin = QSpinBox()
+        self.io_iops_spin.setRange(0, 1000000)
+        self.io_iops_spin.setValue(int(io_limits["iops"]))
+        self.io_schedule_edit = QLineEdit("; ".join(
+            f"{window['from']}-{window['to']}={window['mb_per_sec']:g}/{window['iops']:g}"
+            for window in io_limits["schedule"]
+        ))
+        self.io_schedule_edit.setPlaceholderText("09:00-19:00=50/200; 19:00-23:00=200/0")
+        self.io_schedule_edit.setToolTip("Интервалы суток со своими ограничениями: ЧЧ:ММ-ЧЧ:ММ=МБ/с/IOPS")
+        self.nice_spin = QSpinBox()
+        self.nice_spin.setRange(0, 19)
+        self.nice_spin.setValue(io_limits["nice"])
+        self.idle_io_check = QCheckBox("7z/unrar читают диск только при простое (ionice)")
+        self.idle_io_check.setChecked(io_limits["idle_io"])
+        io_layout.addWidget(QLabel("Скорость чтения, МБ/с:"), 0, 0)
+        io_layout.addWidget(self.io_mbps_spin, 0, 1)
+        io_layout.addWidget(QLabel("Операций чтения в секунду:"), 0, 2)
+        io_layout.addWidget(self.io_iops_spin, 0, 3)
+        io_layout.addWidget(QLabel("По расписанию:"), 1, 0)
+        io_layout.addWidget(self.io_schedule_edit, 1, 1, 1, 3)
+        io_layout.addWidget(QLabel("Приоритет 7z/unrar (nice):"), 2, 0)
+        io_layout.addWidget(self.nice_spin, 2, 1)
+        io_layout.addWidget(self.idle_io_check, 2, 2, 1, 2)
+        self.drop_behind_check = QCheckBox("Освобождать проверенные данные из кеша страниц")
+        self.drop_behind_check.setToolTip("Проверка не вытесняет из памяти данные других программ (posix_fadvise)")
+        self.drop_behind_check.setChecked(self.settings_manager.get_page_cache()["drop_behind"])
+        io_layout.addWidget(self.drop_behind_check, 3, 0, 1, 4)
+        io_group.setLayout(io_layout)
+        layout.addWidget(io_group)
+        
+        # Группа выборочной проверки больших ZIP архивов
+        sampling = self.settings_manager.get_sampling()
+        self.sampling_group = QGroupBox("Выборочная проверка больших ZIP архивов")
+        self.sampling_group.setCheckable(True)
+        self.sampling_group.setChecked(sampling["enabled"])
+        sampling_layout = QHBoxLayout()
+        self.sample_members_spin = QSpinBox()
+        self.sample_members_spin.setRange(0, 1000000)
+        self.sample_members_spin.setSpecialValueText("без ограничения")
+        self.sample_members_spin.setValue(sampling["max_members"] or 0)
+        self.sample_mb_spin = QSpinBox()
+        self.sample_mb_spin.setRange(0, 1000000)
+        self.sample_mb_spin.setSpecialValueText("без ограничения")
+        self.sample_mb_spin.setValue(sampling["max_mb"] or 0)
+        self.sample_seed_spin = QSpinBox()
+        self.sample_seed_spin.setRange(0, 2147483647)
+        self.sample_seed_spin.setValue(sampling["seed"])
+        sampling_layout.addWidget(QLabel("Файлов:"))
+        sampling_layout.addWidget(self.sample_members_spin)
+        sampling_layout.addWidget(QLabel("МБ:"))
+        sampling_layout.addWidget(self.sample_mb_spin)
+        sampling_layout.addWidget(QLabel("Seed:"))
+        sampling_layout.addWidget(self.sample_seed_spin)
+        sampling_layout.addStretch()
+        self.sampling_group.setLayout(sampling_layout)
+        layout.addWidget(self.sampling_group)
+        
+        # Группа правил поиска архивов (свои для каждого корня сканирования)
+        rules_group = QGroupBox("Правила поиска архивов")
+        rules_layout = QGridLayout()
+        self.rules_root_combo = QComboBox()
+        self.rules_root_combo.setEditable(True)
+        self.rules_root_combo.addItem("Все директории", "*")
+        roots = self.settings_manager.get_scan_rules_roots()
+        default_directory = self.settings_manager.get_default_directory()
+        if default_directory and SettingsManager._rules_key(default_directory) not in roots:
+            roots.insert(0, default_directory)
+        for root in roots:
+            self.rules_root_combo.addItem(root, root)
+        # Правила, измененные в диалоге: корень -> настройки (сохраняются вместе с остальными)
+        self.edited_rules = {}
+        self.rules_root = "*"
+        self.include_edit = QPlainTextEdit()
+        self.include_edit.setPlaceholderText("Например: incoming/")
+        self.exclude_edit = QPlainTextEdit()
+        self.exclude_edit.setPlaceholderText("Например: node_modules/\n*.tmp.zip\n!important.tmp.zip")
+        for edit in (self.include_edit, self.exclude_edit):
+            edit.setMaximumHeight(70)
+        self.rule_spins = {}
+        rules_layout.addWidget(QLabel("Корень сканирования:"), 0, 0)
+        rules_layout.addWidget(self.rules_root_combo, 0, 1, 1, 3)
+        rules_layout.addWidget(QLabel("Искать только в (по шаблону на строку):"), 1, 0, 1, 2)
+        rules_layout.addWidget(QLabel("Исключить:"), 1, 2, 1, 2)
+        rules_layout.addWidget(self.include_edit, 2, 0, 1, 2)
+        rules_layout.addWidget(self.exclude_edit, 2, 2, 1, 2)
+        for index, (key, label) in enumerate((
+            ("min_size_mb", "Размер от, МБ:"),
+            ("max_size_mb", "Размер до, МБ:"),
+            ("min_age_days", "Изменен не позже, дней назад:"),
+            ("max_age_days", "Изменен не раньше, дней назад:"),
+        )):
+            spin = QDoubleSpinBox()
+            spin.setRange(0, 100000000)
+            spin.setDecimals(1)
+            spin.setSpecialValueText("-")
+            rules_layout.addWidget(QLabel(label), 3 + index // 2, (index % 2) * 2)
+            rules_layout.addWidget(spin, 3 + index // 2, (index % 2) * 2 + 1)
+            self.rule_spins[key] = spin
+        self.load_rules("*")
+        self.rules_root_combo.currentIndexChanged.connect(lambda _: self.switch_rules_root())
+        rules_group.setLayout(rules_layout)
+        layout.addWidget(rules_group)
+        
         # Группа настроек архивов
         archives_group = QGroupBox("Настройки типов архивов")
         archives_layout = QVBoxLayout()
@@ -116,14 +263,75 @@ class SettingsDialog(QDialog):
         if directory:
             self.dir_edit.setText(directory)
             
+    def current_rules(self) -> dict:
+        """Правила поиска из полей диалога"""
+        rules = {
+            "include": [line.strip() for line in self.include_edit.toPlainText().splitlines() if line.strip()],
+            "exclude": [line.strip() for line in self.exclude_edit.toPlainText().splitlines() if line.strip()],
+        }
+        rules.update({key: spin.value() for key, spin in self.rule_spins.items()})
+        return rules
+        
+    def load_rules(self, root: str):
+        """Заполнение полей правилами корня сканирования"""
+        rules = self.edited_rules.get(root) or self.settings_manager.get_scan_rules(root)
+        self.rules_root = root
+        self.include_edit.setPlainText("\n".join(rules["include"]))
+        self.exclude_edit.setPlainText("\n".join(rules["exclude"]))
+        for key, spin in self.rule_spins.items():
+            spin.setValue(rules[key])
+            
+    def switch_rules_root(self):
+        """Смена корня сканирования в группе правил"""
+        self.edited_rules[self.rules_root] = self.current_rules()
+        root = self.rules_root_combo.currentData() or self.rules_root_combo.currentText().strip()
+        if root:
+            self.load_rules(root)
+            
     def save_settings(self):
         """Сохранение настроек"""
+        try:
+            schedule = parse_schedule(self.io_schedule_edit.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Ошибка", str(e))
+            return
+        self.settings_manager.settings["io_limits"] = {
+            "mb_per_sec": self.io_mbps_spin.value(),
+            "iops": self.io_iops_spin.value(),
+            "schedule": [window.to_dict() for window in schedule],
+            "nice": self.nice_spin.value(),
+            "idle_io": self.idle_io_check.isChecked()
+        }
+        self.settings_manager.settings["page_cache"] = {
+            **self.settings_manager.get_page_cache(),
+            "drop_behind": self.drop_behind_check.isChecked()
+        }
+        
         # Сохраняем директорию
         self.settings_manager.settings["default_directory"] = self.dir_edit.text()
         
         # Сохраняем общие настройки
         self.settings_manager.settings["max_threads"] = self.threads_spin.value()
+        self.settings_manager.settings["auto_threads"] = self.auto_threads_check.isChecked()
         self.settings_manager.settings["recursive_scan"] = self.recursive_check.isChecked()
+        self.settings_manager.settings["deduplicate"] = self.dedup_check.isChecked()
+        self.settings_manager.settings["limits"] = {
+            key: spin.value() for key, spin in self.limit_spins.items()
+        }
+        self.settings_manager.settings["sampling"] = {
+            "enabled": self.sampling_group.isChecked(),
+            "max_members": self.sample_members_spin.value(),
+            "max_mb": self.sample_mb_spin.value(),
+            "seed": self.sample_seed_spin.value()
+        }
+        
+        # Сохраняем правила поиска
+        self.edited_rules[self.rules_root] = self.current_rules()
+        general_rules = self.edited_rules.get("*") or self.settings_manager.get_scan_rules("*")
+        for root, rules in self.edited_rules.items():
+            # Корень с общими правилами не хранит собственную копию
+            same = root != "*" and rules == general_rules
+            self.settings_manager.set_scan_rules(root, None if same else rules)
         
         # Сохраняем настройки архивов
         archive_types = self.settings_manager.settings["archive_types"]
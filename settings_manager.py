@@ -16,7 +16,13 @@ class SettingsManager:
         try:
             if self.settings_file.exists():
                 with open(self.settings_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    settings = json.load(f)
+                # Типы архивов, появившиеся в новых версиях, добавляем к сохраненным настройкам
+                defaults = self.get_default_settings()
+                archive_types = settings.setdefault("archive_types", {})
+                for archive_type, type_settings in defaults["archive_types"].items():
+                    archive_types.setdefault(archive_type, type_settings)
+                return settings
             return self.get_default_settings()
         except Exception as e:
             print(f"Ошибка при загрузке настроек: {e}")
@@ -54,10 +60,83 @@ class SettingsManager:
                     "check_method": "7z",
                     "description": "7-Zip архивы",
                     "extensions": [".7z", ".001"]
+                },
+                ".tar": {
+                    "enabled": True,
+                    "check_method": "internal",
+                    "description": "Архивы tar",
+                    "extensions": [".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz", ".tar.zst", ".tzst"]
+                },
+                ".gz": {
+                    "enabled": True,
+                    "check_method": "internal",
+                    "description": "Сжатые файлы (gzip, bzip2, xz, zstd)",
+                    "extensions": [".gz", ".bz2", ".xz", ".zst"]
                 }
             },
             "max_threads": 4,
-            "recursive_scan": True
+            "auto_threads": True,
+            "recursive_scan": True,
+            "deduplicate": False,
+            "limits": {
+                "max_total_mb": 0,
+                "max_ratio": 1000,
+                "max_depth": 2,
+                "cpu_seconds": 0,
+                "memory_mb": 0
+            },
+            "sampling": {
+                "enabled": False,
+                "max_members": 100,
+                "max_mb": 1024,
+                "seed": 0
+            },
+            # Ограничение нагрузки на диск (0 - без ограничения); schedule - интервалы суток
+            # со своими ограничениями: [{"from": "09:00", "to": "19:00", "mb_per_sec": 50, "iops": 200}]
+            "io_limits": {
+                "mb_per_sec": 0,
+                "iops": 0,
+                "schedule": [],
+                "nice": 0,
+                "idle_io": False
+            },
+            # Чтение архивов, бережное к кешу страниц: подсказка о последовательном чтении,
+            # освобождение проверенных данных из кеша, размер блока чтения (0 - стандартный)
+            "page_cache": {
+                "sequential": True,
+                "drop_behind": True,
+                "block_kb": 0
+            },
+            # Упреждающее чтение: depth блоков по chunk_kb КБ на архив (0 - выключено),
+            # io_threads потоков ввода-вывода
+            "read_ahead": {
+                "depth": 4,
+                "chunk_kb": 1024,
+                "io_threads": 2
+            },
+            # Пароли зашифрованных архивов: файл паролей (по одному в строке, пусто - не перебирать)
+            # и кеш отпечатков паролей, подошедших к архивам
+            "passwords": {
+                "file": "",
+                "cache_file": "password_cache.json"
+            },
+            # Перепроверка по истории: за один запуск не дольше minutes минут и не больше max_gb ГБ
+            "scrub": {
+                "history_file": "verification_history.json",
+                "minutes": 60,
+                "max_gb": 0
+            },
+            # Правила поиска архивов: "*" - для всех директорий, иначе по пути корня сканирования
+            "scan_rules": {
+                "*": {
+                    "include": [],
+                    "exclude": [],
+                    "min_size_mb": 0,
+                    "max_size_mb": 0,
+                    "min_age_days": 0,
+                    "max_age_days": 0
+                }
+            }
         }
         
     def get_enabled_extensions(self) -> List[str]:
@@ -81,6 +160,67 @@ class SettingsManager:
         """Получение максимального количества потоков"""
         return self.settings.get("max_threads", 4)
         
+    def get_auto_threads(self) -> bool:
+        """Получение настройки автоподбора количества потоков"""
+        return self.settings.get("auto_threads", True)
+        
+    def get_deduplicate(self) -> bool:
+        """Получение настройки однократной проверки одинаковых архивов"""
+        return self.settings.get("deduplicate", False)
+        
+    def get_limits(self) -> dict:
+        """Получение ограничений ресурсов на проверку одного архива"""
+        return {**self.get_default_settings()["limits"], **self.settings.get("limits", {})}
+        
+    def get_sampling(self) -> dict:
+        """Получение настроек выборочной проверки больших архивов"""
+        return {**self.get_default_settings()["sampling"], **self.settings.get("sampling", {})}
+        
+    def get_io_limits(self) -> dict:
+        """Получение ограничений нагрузки проверки на диск"""
+        return {**self.get_default_settings()["io_limits"], **self.settings.get("io_limits", {})}
+        
+    def get_page_cache(self) -> dict:
+        """Получение настроек чтения архивов с учетом кеша страниц"""
+        return {**self.get_default_settings()["page_cache"], **self.settings.get("page_cache", {})}
+        
+    def get_read_ahead(self) -> dict:
+        """Получение настроек упреждающего чтения архивов"""
+        return {**self.get_default_settings()["read_ahead"], **self.settings.get("read_ahead", {})}
+        
+    def get_passwords(self) -> dict:
+        """Получение настроек паролей зашифрованных архивов"""
+        return {**self.get_default_settings()["passwords"], **self.settings.get("passwords", {})}
+        
+    def get_scrub(self) -> dict:
+        """Получение настроек перепроверки архивов по истории проверок"""
+        return {**self.get_default_settings()["scrub"], **self.settings.get("scrub", {})}
+        
+    @staticmethod
+    def _rules_key(directory: str) -> str:
+        return "*" if directory == "*" else os.path.normcase(os.path.abspath(directory))
+        
+    def get_scan_rules(self, directory: str = "*") -> dict:
+        """Получение правил поиска архивов для корня сканирования (или общих правил)"""
+        defaults = self.get_default_settings()["scan_rules"]["*"]
+        rules = self.settings.get("scan_rules", {})
+        root_rules = rules.get(self._rules_key(directory))
+        if root_rules is None:
+            root_rules = rules.get("*", {})
+        return {**defaults, **root_rules}
+        
+    def set_scan_rules(self, directory: str, rules: Optional[dict]) -> None:
+        """Установка правил поиска для корня сканирования (None - использовать общие правила)"""
+        all_rules = self.settings.setdefault("scan_rules", {})
+        if rules is None:
+            all_rules.pop(self._rules_key(directory), None)
+        else:
+            all_rules[self._rules_key(directory)] = rules
+        
+    def get_scan_rules_roots(self) -> List[str]:
+        """Корни сканирования, для которых заданы собственные правила"""
+        return [root for root in self.settings.get("scan_rules", {}) if root != "*"]
+        
     def get_recursive_scan(self) -> bool:
         """Получение настройки рекурсивного сканирования"""
         return self.settings.get("recursive_scan", True)
@@ -0,0 +1,421 @@
+import os
+import zlib
+import struct
+from typing import List, Optional, Tuple
+
+SIGNATURE = b"7z\xbc\xaf\x27\x1c"
+SIGNATURE_HEADER_SIZE = 32
+
+# Идентификаторы свойств заголовка
+K_END = 0x00
+K_HEADER = 0x01
+K_ARCHIVE_PROPERTIES = 0x02
+K_ADDITIONAL_STREAMS_INFO = 0x03
+K_MAIN_STREAMS_INFO = 0x04
+K_FILES_INFO = 0x05
+K_PACK_INFO = 0x06
+K_UNPACK_INFO = 0x07
+K_SUBSTREAMS_INFO = 0x08
+K_SIZE = 0x09
+K_CRC = 0x0A
+K_FOLDER = 0x0B
+K_CODERS_UNPACK_SIZE = 0x0C
+K_ENCODED_HEADER = 0x17
+
+# Методы сжатия и шифрования
+METHOD_COPY = b"\x00"
+METHOD_LZMA = b"\x03\x01\x01"
+METHOD_LZMA2 = b"\x21"
+METHOD_AES = b"\x06\xf1\x07\x01"
+
+# Заголовок больше этого размера не читается в память
+MAX_HEADER_BYTES = 256 << 20
+
+
+class SevenZipFormatError(Exception):
+    """Заголовки 7z не читаются (error_class - класс ошибки, см. results.ERROR_CLASSES)"""
+
+    def __init__(self, message: str, error_class: str = "headers"):
+        super().__init__(message)
+        self.error_class = error_class
+
+
+class Coder:
+    """Метод сжатия (шифрования) в цепочке папки"""
+
+    __slots__ = ("method", "properties", "num_in", "num_out")
+
+    def __init__(self, method: bytes, properties: bytes, num_in: int = 1, num_out: int = 1):
+        self.method = method
+        self.properties = properties
+        self.num_in = num_in
+        self.num_out = num_out
+
+
+class Folder:
+    """Папка 7z: цепочка методов, распаковывающая один или несколько сжатых потоков"""
+
+    __slots__ = ("coders", "bind_pairs", "packed_streams", "unpack_sizes", "crc")
+
+    def __init__(self):
+        self.coders: List[Coder] = []
+        self.bind_pairs: List[Tuple[int, int]] = []
+        self.packed_streams: List[int] = []
+        self.unpack_sizes: List[int] = []
+        self.crc: Optional[int] = None
+
+    @property
+    def encrypted(self) -> bool:
+        return any(coder.method == METHOD_AES for coder in self.coders)
+
+
+class StreamsInfo:
+    """Сжатые потоки и папки, которые их распаковывают"""
+
+    def __init__(self):
+        self.pack_pos = 0  # Смещение первого сжатого потока от конца заголовка-сигнатуры
+        self.pack_sizes: List[int] = []
+        self.folders: List[Folder] = []
+
+
+class Reader:
+    """Разбор байтов заголовка 7z"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def byte(self) -> int:
+        if self.pos >= len(self.data):
+            raise SevenZipFormatError("Обрыв заголовка")
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def read_bytes(self, size: int) -> bytes:
+        if self.pos + size > len(self.data):
+            raise SevenZipFormatError("Обрыв заголовка")
+        value = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return value
+
+    def number(self) -> int:
+        """Число 7z: количество единичных старших битов первого байта - число дополнительных байт"""
+        first = self.byte()
+        mask = 0x80
+        value = 0
+        for i in range(8):
+            if not first & mask:
+                high = first & (mask - 1)
+                return value | (high << (8 * i))
+            value |= self.byte() << (8 * i)
+            mask >>= 1
+        return value
+
+    def uint32(self) -> int:
+        return struct.unpack("<I", self.read_bytes(4))[0]
+
+    def bits(self, count: int) -> List[bool]:
+        """Битовый вектор (старший бит первым)"""
+        result = []
+        byte = mask = 0
+        for _ in range(count):
+            if not mask:
+                byte, mask = self.byte(), 0x80
+            result.append(bool(byte & mask))
+            mask >>= 1
+        return result
+
+    def defined_bits(self, count: int) -> List[bool]:
+        """Вектор с признаком "все определены" перед ним"""
+        return [True] * count if self.byte() else self.bits(count)
+
+    def crcs(self, count: int) -> List[Optional[int]]:
+        defined = self.defined_bits(count)
+        return [self.uint32() if flag else None for flag in defined]
+
+    def expect(self, property_id: int) -> None:
+        found = self.byte()
+        if found != property_id:
+            raise SevenZipFormatError(f"Ожидалось свойство {property_id:#x}, найдено {found:#x}")
+
+    def skip_property(self) -> None:
+        self.read_bytes(self.number())
+
+
+def read_pack_info(reader: Reader, info: StreamsInfo) -> None:
+    info.pack_pos = reader.number()
+    count = reader.number()
+    while True:
+        property_id = reader.byte()
+        if property_id == K_END:
+            break
+        if property_id == K_SIZE:
+            info.pack_sizes = [reader.number() for _ in range(count)]
+        elif property_id == K_CRC:
+            reader.crcs(count)
+        else:
+            reader.skip_property()
+
+
+def read_folder(reader: Reader) -> Folder:
+    folder = Folder()
+    total_in = total_out = 0
+    for _ in range(reader.number()):
+        flags = reader.byte()
+        method = reader.read_bytes(flags & 0x0F)
+        num_in = num_out = 1
+        if flags & 0x10:
+            num_in, num_out = reader.number(), reader.number()
+        properties = reader.read_bytes(reader.number()) if flags & 0x20 else b""
+        if flags & 0x80:
+            raise SevenZipFormatError("Альтернативные методы не поддерживаются")
+        folder.coders.append(Coder(method, properties, num_in, num_out))
+        total_in += num_in
+        total_out += num_out
+    if not folder.coders:
+        raise SevenZipFormatError("Папка без методов сжатия")
+    for _ in range(total_out - 1):
+        folder.bind_pairs.append((reader.number(), reader.number()))
+    packed = total_in - len(folder.bind_pairs)
+    if packed == 1:
+        bound = {in_index for in_index, _ in folder.bind_pairs}
+        folder.packed_streams = [next((i for i in range(total_in) if i not in bound), 0)]
+    else:
+        folder.packed_streams = [reader.number() for _ in range(packed)]
+    return folder
+
+
+def read_unpack_info(reader: Reader, info: StreamsInfo) -> None:
+    reader.expect(K_FOLDER)
+    count = reader.number()
+    if reader.byte():
+        raise SevenZipFormatError("Внешние описания папок не поддерживаются")
+    info.folders = [read_folder(reader) for _ in range(count)]
+    reader.expect(K_CODERS_UNPACK_SIZE)
+    for folder in info.folders:
+        folder.unpack_sizes = [reader.number() for _ in range(sum(c.num_out for c in folder.coders))]
+    while True:
+        property_id = reader.byte()
+        if property_id == K_END:
+            break
+        if property_id == K_CRC:
+            for folder, crc in zip(info.folders, reader.crcs(count)):
+                folder.crc = crc
+        else:
+            reader.skip_property()
+
+
+def read_streams_info(reader: Reader, substreams: bool = True) -> StreamsInfo:
+    """Описание потоков; substreams=False - разбор до SubStreamsInfo (оставшиеся байты не читаются)"""
+    info = StreamsInfo()
+    while True:
+        property_id = reader.byte()
+        if property_id == K_END:
+            return info
+        if property_id == K_PACK_INFO:
+            read_pack_info(reader, info)
+        elif property_id == K_UNPACK_INFO:
+            read_unpack_info(reader, info)
+        elif property_id == K_SUBSTREAMS_INFO:
+            if not substreams:
+                return info
+            raise SevenZipFormatError("Разбор SubStreamsInfo не поддерживается")
+        else:
+            raise SevenZipFormatError(f"Неизвестное свойство описания потоков {property_id:#x}")
+
+
+def read_signature_header(f) -> Tuple[int, int, int, int]:
+    """
+    Заголовок-сигнатура 7z
+
+    Returns:
+        Tuple[int, int, int, int]: (CRC заголовка-сигнатуры, смещение следующего заголовка,
+            его размер, его CRC)
+
+    Raises:
+        SevenZipFormatError: Нет сигнатуры или заголовок оборван
+    """
+    f.seek(0)
+    head = f.read(SIGNATURE_HEADER_SIZE)
+    if len(head) < SIGNATURE_HEADER_SIZE or not head.startswith(SIGNATURE):
+        raise SevenZipFormatError("Не найдена сигнатура 7z")
+    start_crc, next_offset, next_size, next_crc = struct.unpack_from("<IQQI", head, 8)
+    if zlib.crc32(head[12:]) != start_crc:
+        if not any(head[12:]):
+            raise SevenZipFormatError("Архив не завершен: заголовок-сигнатура не заполнен", "truncated")
+        raise SevenZipFormatError("Ошибка CRC заголовка-сигнатуры")
+    return start_crc, next_offset, next_size, next_crc
+
+
+def decode_folder(data: bytes, folder: Folder) -> bytes:
+    """Распаковка папки из одного метода (COPY, LZMA, LZMA2) - так сжимаются заголовки"""
+    import lzma
+
+    if len(folder.coders) != 1:
+        raise SevenZipFormatError("Цепочка методов в заголовке не поддерживается")
+    coder = folder.coders[0]
+    size = folder.unpack_sizes[0]
+    # Объявленный размер проверяется до распаковки: в процессе нет ни prlimit, ни учета объема
+    if size > MAX_HEADER_BYTES:
+        raise SevenZipFormatError(f"Слишком большой распакованный заголовок: {size} байт")
+    if coder.method == METHOD_COPY:
+        return data[:size]
+    if coder.method == METHOD_LZMA and len(coder.properties) >= 5:
+        d = coder.properties[0]
+        lzma_filter = {"id": lzma.FILTER_LZMA1, "lc": d % 9, "lp": d // 9 % 5, "pb": d // 45,
+                       "dict_size": struct.unpack_from("<I", coder.properties, 1)[0]}
+    elif coder.method == METHOD_LZMA2 and coder.properties:
+        p = coder.properties[0]
+        dict_size = 0xFFFFFFFF if p >= 40 else (2 | (p & 1)) << (p // 2 + 11)
+        lzma_filter = {"id": lzma.FILTER_LZMA2, "dict_size": dict_size}
+    else:
+        raise SevenZipFormatError(f"Метод сжатия заголовка не поддерживается: {coder.method.hex()}")
+    try:
+        decoded = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[lzma_filter]).decompress(data, size)
+    except lzma.LZMAError as e:
+        raise SevenZipFormatError(f"Заголовок не распаковывается: {e}")
+    if len(decoded) < size:
+        raise SevenZipFormatError("Заголовок распакован не полностью")
+    if folder.crc is not None and zlib.crc32(decoded) != folder.crc:
+        raise SevenZipFormatError("Ошибка CRC распакованного заголовка")
+    return decoded
+
+
+def read_header(f, next_offset: int, next_size: int, next_crc: Optional[int] = None,
+                pack_limit: Optional[int] = None) -> Tuple[bytes, List[StreamsInfo]]:
+    """
+    Чтение основного заголовка 7z с распаковкой сжатых заголовков
+
+    Args:
+        next_crc (int): CRC заголовка из заголовка-сигнатуры (None - не проверять)
+        pack_limit (int): Граница сжатых заголовков (см. _check_pack_bounds; None - не проверять)
+
+    Returns:
+        Tuple[bytes, List[StreamsInfo]]: (заголовок, начинающийся с K_HEADER, или пустые байты,
+            если заголовок зашифрован; описания сжатых заголовков)
+    """
+    if next_size > MAX_HEADER_BYTES:
+        raise SevenZipFormatError(f"Слишком большой заголовок: {next_size} байт")
+    f.seek(SIGNATURE_HEADER_SIZE + next_offset)
+    data = f.read(next_size)
+    if len(data) < next_size:
+        raise SevenZipFormatError("Заголовок выходит за конец файла", "truncated")
+    if next_crc is not None and zlib.crc32(data) != next_crc:
+        raise SevenZipFormatError("Ошибка CRC заголовка")
+    encoded = []
+    while data and data[0] == K_ENCODED_HEADER:
+        reader = Reader(data)
+        reader.byte()
+        info = read_streams_info(reader)
+        encoded.append(info)
+        if not info.folders or not info.pack_sizes:
+            raise SevenZipFormatError("Сжатый заголовок без потоков")
+        if pack_limit is not None:
+            _check_pack_bounds(info, pack_limit, "Сжатый заголовок")
+        folder = info.folders[0]
+        if folder.encrypted:
+            return b"", encoded
+        if info.pack_sizes[0] > MAX_HEADER_BYTES:
+            raise SevenZipFormatError(f"Слишком большой сжатый заголовок: {info.pack_sizes[0]} байт")
+        f.seek(SIGNATURE_HEADER_SIZE + info.pack_pos)
+        packed = f.read(info.pack_sizes[0])
+        if len(packed) < info.pack_sizes[0]:
+            raise SevenZipFormatError("Сжатый заголовок выходит за конец файла", "truncated")
+        data = decode_folder(packed, folder)
+    return data, encoded
+
+
+def main_streams(header: bytes) -> Optional[StreamsInfo]:
+    """Описание основных потоков из распакованного заголовка (до SubStreamsInfo)"""
+    reader = Reader(header)
+    reader.expect(K_HEADER)
+    while True:
+        property_id = reader.byte()
+        if property_id == K_END or property_id == K_FILES_INFO:
+            return None
+        if property_id == K_ARCHIVE_PROPERTIES:
+            while reader.byte() != K_END:
+                reader.skip_property()
+        elif property_id == K_ADDITIONAL_STREAMS_INFO:
+            read_streams_info(reader, substreams=False)
+            return None
+        elif property_id == K_MAIN_STREAMS_INFO:
+            return read_streams_info(reader, substreams=False)
+        else:
+            raise SevenZipFormatError(f"Неизвестное свойство заголовка {property_id:#x}")
+
+
+class SevenZipSummary:
+    """Результат быстрой проверки заголовков 7z"""
+
+    __slots__ = ("folders", "pack_size", "header_size", "encryption")
+
+    def __init__(self):
+        self.folders = 0
+        self.pack_size = 0  # Сжатые данные архива, байт
+        self.header_size = 0  # Размер заголовка в конце архива, байт
+        # "headers" - зашифрован заголовок (список файлов), "files" - зашифрованы данные
+        self.encryption: Optional[str] = None
+
+
+def _check_pack_bounds(info: StreamsInfo, limit: int, what: str) -> int:
+    """Сжатые потоки должны лежать между заголовком-сигнатурой и смещением limit"""
+    total = sum(info.pack_sizes)
+    if info.folders and sum(len(folder.packed_streams) for folder in info.folders) != len(info.pack_sizes):
+        raise SevenZipFormatError(f"{what}: количество сжатых потоков не совпадает с описанием папок")
+    if info.pack_pos + total > limit:
+        raise SevenZipFormatError(
+            f"{what}: сжатые данные ({info.pack_pos} + {total} байт) выходят за границу {limit}"
+        )
+    return total
+
+
+def check_headers(f, file_size: int) -> SevenZipSummary:
+    """
+    Быстрая проверка 7z по заголовкам без распаковки данных: CRC заголовка-сигнатуры,
+    смещение, размер и CRC заголовка относительно длины файла, размеры сжатых потоков
+    из (распакованного) заголовка
+
+    Args:
+        f: Архив, открытый для чтения
+        file_size (int): Размер файла, байт
+
+    Raises:
+        SevenZipFormatError: Заголовки повреждены или архив обрезан
+    """
+    summary = SevenZipSummary()
+    _, next_offset, next_size, next_crc = read_signature_header(f)
+    if not next_size:
+        if next_offset or file_size > SIGNATURE_HEADER_SIZE:
+            raise SevenZipFormatError("Нулевой размер заголовка в непустом архиве")
+        return summary  # Пустой архив
+    header_end = SIGNATURE_HEADER_SIZE + next_offset + next_size
+    if header_end > file_size:
+        raise SevenZipFormatError(
+            f"Архив обрезан: заголовок заканчивается на {header_end}, размер файла {file_size}"
+        )
+    summary.header_size = next_size
+    header, encoded = read_header(f, next_offset, next_size, next_crc, pack_limit=next_offset)
+    if not header:
+        summary.encryption = "headers"
+        return summary
+    streams = main_streams(header)
+    if streams:
+        summary.folders = len(streams.folders)
+        summary.pack_size = _check_pack_bounds(streams, next_offset, "Данные архива")
+        if any(folder.encrypted for folder in streams.folders):
+            summary.encryption = "files"
+    return summary
+
+
+def check_7z_file(file_path) -> SevenZipSummary:
+    """
+    Быстрая проверка 7z файла по заголовкам (см. check_headers)
+
+    Raises:
+        SevenZipFormatError: Заголовки повреждены или архив обрезан
+        OSError: Файл не читается
+    """
+    with open(file_path, 'rb') as f:
+        return check_headers(f, os.fstat(f.fileno()).st_size)
@@ -0,0 +1,467 @@
+import shutil
+import subprocess
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+
+from format_backends import get_backend, load_module
+from guards import (
+    ChildProcesses, DecompressionBudget, ResourceLimits, SuspiciousArchive, limit_violation, popen_limited, run_limited
+)
+from throttle import IOLimiter, open_archive_file
+from page_cache import ReadHints
+from prefetch import ReadAhead
+from results import STOPPED_MESSAGE, ErrorMessage
+
+# Размер блока чтения: память на проверку не зависит от размера архива
+CHUNK_SIZE = 1 << 20
+
+# Порция сжатых данных zstd на один вызов распаковки и наибольшая степень сжатия zstd
+# (блок RLE: 4 байта на 128 КБ) - один вызов дает не больше 32 МБ
+ZSTD_FEED_SIZE = 1 << 10
+ZSTD_MAX_RATIO = 1 << 15
+
+TAR_BLOCK = 512
+ZERO_BLOCK = bytes(TAR_BLOCK)
+
+# Типы записей tar без данных после заголовка (ссылки, каталоги, устройства, FIFO)
+TAR_TYPES_WITHOUT_DATA = set(b"123456")
+
+# Сигнатуры сжатых потоков
+MAGIC = (
+    (b"\x1f\x8b", "gz"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zst"),
+)
+
+# Внешние программы распаковки: (программа, аргументы проверки, аргументы распаковки в stdout).
+# Используются, если установлены: распаковывают в несколько потоков
+# или хотя бы параллельно с разбором tar в нашем процессе.
+EXTERNAL_DECODERS = {
+    "gz": [("pigz", ["-t"], ["-dc"])],
+    "bz2": [("lbzip2", ["-t"], ["-dc"]), ("pbzip2", ["-t"], ["-dc"])],
+    "xz": [("xz", ["-t", "-T0"], ["-dc", "-T0"])],
+    "zst": [("zstd", ["-t", "-q"], ["-dc", "-q"])],
+}
+
+
+class StreamError(Exception):
+    """Ошибка целостности потока (error_class - класс ошибки, см. results.ERROR_CLASSES)"""
+
+    def __init__(self, message: str, error_class: str = "data"):
+        super().__init__(message)
+        self.error_class = error_class
+
+
+class StreamInterrupted(Exception):
+    """Проверка прервана пользователем"""
+
+
+def detect_compression(file_path) -> Optional[str]:
+    """
+    Определение сжатия по сигнатуре файла
+
+    Returns:
+        Optional[str]: "gz", "bz2", "xz", "zst" или None для несжатого файла
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(8)
+    for magic, name in MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def find_external_decoder(compression: str):
+    """Поиск установленной программы распаковки для формата сжатия"""
+    for tool, test_args, decode_args in EXTERNAL_DECODERS.get(compression, []):
+        path = shutil.which(tool)
+        if path:
+            return path, test_args, decode_args
+    return None
+
+
+class _ZstdReader:
+    """
+    Последовательное чтение zstd через модуль zstandard с проверкой целостности кадров.
+    Сжатые данные подаются распаковщику по ZSTD_FEED_SIZE байт, поэтому один вызов
+    распаковки (у zstandard нет ограничения размера результата) дает не больше
+    ZSTD_FEED_SIZE * ZSTD_MAX_RATIO байт.
+    """
+
+    def __init__(self, raw):
+        zstandard = load_module("zst")
+        self.raw = raw
+        self.dctx = zstandard.ZstdDecompressor()
+        self.obj = self.dctx.decompressobj()
+        self.error = zstandard.ZstdError
+        self.input = memoryview(b"")
+        self.pending = bytearray()
+        self.eof = False
+
+    def read(self, size: int) -> bytes:
+        while len(self.pending) < size and not self.eof:
+            if not self.input:
+                data = self.raw.read(CHUNK_SIZE)
+                if not data:
+                    self.eof = True
+                    if not self.obj.eof:
+                        raise StreamError("Поток zstd обрывается до конца кадра", "truncated")
+                    break
+                self.input = memoryview(data)
+            piece, self.input = self.input[:ZSTD_FEED_SIZE], self.input[ZSTD_FEED_SIZE:]
+            try:
+                if self.obj.eof:
+                    self.obj = self.dctx.decompressobj()  # Следующий кадр
+                self.pending += self.obj.decompress(piece)
+                # Следующий кадр начинается в неиспользованных данных
+                while self.obj.eof and self.obj.unused_data:
+                    rest = self.obj.unused_data
+                    self.obj = self.dctx.decompressobj()
+                    self.pending += self.obj.decompress(rest)
+            except self.error as e:
+                raise StreamError(f"Ошибка zstd: {e}")
+        # Удаление из начала bytearray не копирует остаток
+        result = bytes(self.pending[:size])
+        del self.pending[:size]
+        return result
+
+    def close(self) -> None:
+        pass
+
+
+class DecodedStream:
+    """
+    Распакованный поток сжатого файла: читается один раз последовательно.
+    Ошибки целостности (CRC, размер, обрыв) выбрасываются как StreamError
+    при чтении или при закрытии (для внешней программы - по коду возврата).
+    """
+
+    def __init__(self, file_path, compression: Optional[str], external: bool = True,
+                 limits: Optional[ResourceLimits] = None, children: Optional[ChildProcesses] = None,
+                 io_limiter: Optional[IOLimiter] = None, read_hints: Optional[ReadHints] = None,
+                 read_ahead: Optional[ReadAhead] = None):
+        self.file_path = Path(file_path)
+        self.compression = compression
+        self.limits = limits
+        self.children = children
+        self.budget = DecompressionBudget(limits, self.file_path.stat().st_size, self.file_path.name) \
+            if limits else None
+        self.process = None
+        self.tool = None
+        self.raw = None
+        self.reader = None
+
+        decoder = find_external_decoder(compression) if external and compression else None
+        if decoder:
+            path, _, decode_args = decoder
+            self.tool = path
+            self.process = popen_limited(
+                [path] + decode_args + [str(self.file_path)], limits, children,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+            self.reader = self.process.stdout
+            return
+
+        self.raw = open_archive_file(self.file_path, io_limiter, read_hints, read_ahead)
+        if compression == "gz":
+            self.reader = load_module("gz").GzipFile(fileobj=self.raw)
+        elif compression == "bz2":
+            self.reader = load_module("bz2").BZ2File(self.raw)
+        elif compression == "xz":
+            self.reader = load_module("xz").LZMAFile(self.raw)
+        elif compression == "zst":
+            self.reader = _ZstdReader(self.raw)
+        else:
+            self.reader = self.raw
+
+    def read(self, size: int) -> bytes:
+        try:
+            data = self.reader.read(size)
+        except StreamError:
+            raise
+        except Exception as e:
+            # gzip/bz2/lzma/zlib сообщают о CRC, длине и обрыве собственными исключениями
+            raise StreamError(str(e), "truncated" if isinstance(e, EOFError) else "data")
+        if self.budget:
+            self.budget.consume(len(data))
+        return data
+
+    def _check_limits(self, returncode: int, stderr: str) -> None:
+        """Процесс распаковки завершен ядром из-за лимита ресурсов или не получил память"""
+        violation = limit_violation(returncode, self.limits, stderr, self.tool)
+        if violation:
+            raise SuspiciousArchive(violation)
+
+    def decoder_error(self) -> Optional[str]:
+        """Сообщение внешней программы распаковки, если она уже завершилась с ошибкой"""
+        if not self.process:
+            return None
+        try:
+            returncode = self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            return None
+        if returncode == 0:
+            return None
+        stderr = self.process.stderr.read().decode(errors="replace").strip()
+        self._check_limits(returncode, stderr)
+        return stderr or f"Код возврата {returncode}"
+
+    def finish(self) -> None:
+        """Проверка результата внешней программы распаковки"""
+        if self.process:
+            self.process.stdout.close()
+            stderr = self.process.stderr.read().decode(errors="replace").strip()
+            if self.process.wait() != 0:
+                self._check_limits(self.process.returncode, stderr)
+                raise StreamError(stderr or f"Код возврата {self.process.returncode}")
+
+    def close(self) -> None:
+        if self.process and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        if self.process:
+            self.process.stdout.close()
+            self.process.stderr.close()
+            if self.children:
+                self.children.remove(self.process)
+        if self.reader is not None and self.reader is not self.raw and not self.process:
+            self.reader.close()
+        if self.raw:
+            self.raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def read_exact(stream, size: int) -> bytes:
+    """Чтение ровно size байт (меньше - только в конце потока)"""
+    data = stream.read(size)
+    while data and len(data) < size:
+        more = stream.read(size - len(data))
+        if not more:
+            break
+        data += more
+    return data
+
+
+def skip(stream, size: int, stop_check: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Пропуск size байт потока с распаковкой
+
+    Returns:
+        int: Количество реально прочитанных байт
+    """
+    done = 0
+    while done < size:
+        if stop_check and stop_check():
+            raise StreamInterrupted()
+        data = stream.read(min(CHUNK_SIZE, size - done))
+        if not data:
+            break
+        done += len(data)
+    return done
+
+
+def drain(stream, stop_check: Optional[Callable[[], bool]] = None) -> int:
+    """Чтение потока до конца (проверка CRC выполняется распаковщиком)"""
+    total = 0
+    while True:
+        if stop_check and stop_check():
+            raise StreamInterrupted()
+        data = stream.read(CHUNK_SIZE)
+        if not data:
+            return total
+        total += len(data)
+
+
+def _tar_number(field: bytes) -> int:
+    """Разбор числового поля заголовка tar (восьмеричное или base-256)"""
+    if field[0] in (0o200, 0o377):
+        value = int.from_bytes(field[1:], "big")
+        if field[0] == 0o377:
+            value -= 256 ** (len(field) - 1)
+        return value
+    text = field.split(b"\0", 1)[0].strip()
+    if not text:
+        return 0
+    try:
+        return int(text, 8)
+    except ValueError:
+        raise StreamError(f"Некорректное числовое поле заголовка tar: {field!r}", "headers")
+
+
+def _tar_checksum_ok(header: bytes) -> bool:
+    """Проверка контрольной суммы заголовка (беззнаковый и знаковый варианты)"""
+    stored = _tar_number(header[148:156])
+    unsigned = sum(header[:148]) + 8 * 0x20 + sum(header[156:])
+    if stored == unsigned:
+        return True
+    signed = sum(b - 256 if b > 127 else b for b in header[:148]) + 8 * 0x20 + \
+        sum(b - 256 if b > 127 else b for b in header[156:])
+    return stored == signed
+
+
+def _pax_size(data: bytes) -> Optional[int]:
+    """Размер файла из расширенного заголовка pax (записи вида "len key=value\\n")"""
+    size = None
+    pos = 0
+    while pos < len(data):
+        space = data.find(b" ", pos)
+        if space < 0:
+            break
+        try:
+            length = int(data[pos:space])
+        except ValueError:
+            raise StreamError("Некорректный расширенный заголовок pax", "headers")
+        if length <= 0:
+            raise StreamError("Некорректный расширенный заголовок pax", "headers")
+        record = data[space + 1:pos + length - 1]
+        key, _, value = record.partition(b"=")
+        if key == b"size":
+            size = int(value)
+        pos += length
+    return size
+
+
+def verify_tar(stream, stop_check: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Последовательная проверка структуры tar: контрольные суммы заголовков,
+    наличие данных каждого файла целиком и блока конца архива
+
+    Returns:
+        int: Количество записей в архиве
+    """
+    members = 0
+    pax_size = None
+    offset = 0
+    while True:
+        header = read_exact(stream, TAR_BLOCK)
+        if not header:
+            if members == 0:
+                raise StreamError("Пустой архив tar", "truncated")
+            raise StreamError("Архив tar обрывается: нет блока конца архива", "truncated")
+        if len(header) < TAR_BLOCK:
+            raise StreamError(f"Архив tar обрывается в заголовке (смещение {offset})", "truncated")
+        if header == ZERO_BLOCK:
+            # Блок конца архива; остальное (выравнивание) дочитываем, чтобы проверить сжатие
+            drain(stream, stop_check)
+            return members
+        if not _tar_checksum_ok(header):
+            raise StreamError(f"Неверная контрольная сумма заголовка tar (смещение {offset})", "headers")
+
+        name = header[:100].split(b"\0", 1)[0].decode("utf-8", "replace")
+        typeflag = header[156]
+        size = _tar_number(header[124:136])
+        offset += TAR_BLOCK
+
+        if typeflag in (ord("x"), ord("g")):
+            data = read_exact(stream, size)
+            if len(data) < size:
+                raise StreamError(f"Архив tar обрывается в расширенном заголовке (смещение {offset})", "truncated")
+            if typeflag == ord("x"):
+                pax_size = _pax_size(data)
+            padding = -size % TAR_BLOCK
+            if len(read_exact(stream, padding)) < padding:
+                raise StreamError(f"Архив tar обрывается (смещение {offset})", "truncated")
+            offset += size + padding
+            continue
+
+        if pax_size is not None and typeflag not in (ord("L"), ord("K")):
+            size = pax_size
+            pax_size = None
+        if typeflag in TAR_TYPES_WITHOUT_DATA:
+            size = 0
+
+        padded = size + (-size % TAR_BLOCK)
+        if skip(stream, padded, stop_check) < padded:
+            raise StreamError(f"Архив tar обрывается в файле {name}", "truncated")
+        offset += padded
+        if typeflag not in (ord("L"), ord("K")):
+            members += 1
+
+
+def verify_stream(file_path, is_tar: bool, stop_check: Optional[Callable[[], bool]] = None,
+                  external: bool = True, tracer=None,
+                  limits: Optional[ResourceLimits] = None,
+                  children: Optional[ChildProcesses] = None,
+                  io_limiter: Optional[IOLimiter] = None,
+                  read_hints: Optional[ReadHints] = None,
+                  read_ahead: Optional[ReadAhead] = None) -> Tuple[Optional[bool], Optional[str]]:
+    """
+    Проверка сжатого файла или архива tar за одно последовательное чтение
+
+    Args:
+        file_path: Путь к файлу
+        is_tar (bool): Файл содержит архив tar (проверяются и заголовки)
+        stop_check (Callable): Функция, возвращающая True при остановке проверки
+        external (bool): Разрешить внешние многопоточные распаковщики
+        tracer (PhaseTracer): Замер фаз проверки
+        limits (ResourceLimits): Ограничения объема распаковки и ресурсов внешних программ
+        children (ChildProcesses): Учет внешних программ для приостановки на паузе
+        io_limiter (IOLimiter): Ограничение нагрузки на диск
+        read_hints (ReadHints): Подсказки кешу страниц (только при чтении в процессе)
+        read_ahead (ReadAhead): Упреждающее чтение (только при чтении в процессе)
+
+    Returns:
+        Tuple[Optional[bool], Optional[str]]: (результат проверки, сообщение об ошибке);
+            None вместо результата - архив подозрителен
+    """
+    span = tracer.span if tracer else (lambda name: nullcontext())
+    try:
+        compression = detect_compression(file_path)
+        if not is_tar and compression is None:
+            return False, ErrorMessage("headers", "Неизвестный формат сжатия")
+        if io_limiter and io_limiter.throttles and compression and get_backend(compression).modules_available():
+            # Внешняя программа читает файл сама, мимо ограничения скорости; если поток можно
+            # распаковать в нашем процессе (для zstd нужен модуль zstandard), она не запускается
+            external = False
+
+        # Для одиночного сжатого файла внешней программе достаточно режима проверки,
+        # если не нужно считать объем распакованных данных
+        counted = limits is not None and bool(limits.max_total_bytes or limits.max_ratio)
+        decoder = find_external_decoder(compression) if external and compression and not is_tar and not counted \
+            else None
+        if decoder:
+            path, test_args, _ = decoder
+            with span("subprocess"):
+                result = run_limited([path] + test_args + [str(file_path)], limits, children)
+            violation = limit_violation(result.returncode, limits, result.stderr, path)
+            if violation:
+                return None, ErrorMessage("limits", f"Подозрительный архив: {violation}")
+            if result.returncode != 0:
+                return False, ErrorMessage("data", f"Поврежденный сжатый файл: {result.stderr.strip()}")
+            return True, None
+
+        with DecodedStream(file_path, compression, external, limits, children, io_limiter, read_hints,
+                           read_ahead) as stream:
+            with span("decompress"):
+                try:
+                    if is_tar:
+                        verify_tar(stream, stop_check)
+                    else:
+                        drain(stream, stop_check)
+                except StreamError:
+                    # Обрыв потока из-за ошибки распаковщика точнее описывает его сообщение
+                    error = stream.decoder_error()
+                    if error:
+                        raise StreamError(error, "data")
+                    raise
+                stream.finish()
+        return True, None
+    except StreamInterrupted:
+        return False, STOPPED_MESSAGE
+    except SuspiciousArchive as e:
+        return None, ErrorMessage("limits", f"Подозрительный архив: {str(e)}")
+    except StreamError as e:
+        kind = "архив tar" if is_tar else "сжатый файл"
+        return False, ErrorMessage(e.error_class, f"Поврежденный {kind}: {e}")
+    except ImportError as e:
+        return False, ErrorMessage("other", f"Модуль для проверки не установлен: {e}")
+    except Exception as e:
+        return False, ErrorMessage("other", f"Ошибка при проверке архива: {str(e)}")
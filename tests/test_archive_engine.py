@@ -0,0 +1,78 @@
+import zipfile
+
+import pytest
+
+from archive_checker_cli import main
+from archive_engine import ArchiveChecker, ScanEngine, tool_missing
+from format_backends import get_backend
+
+
+@pytest.fixture
+def corrupted_zip(tmp_path):
+    """ZIP с испорченными данными файла: оглавление цело, CRC не совпадает"""
+    path = tmp_path / "data.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("a.txt", b"payload " * 100)
+    data = bytearray(path.read_bytes())
+    data[data.index(b"payload")] ^= 0xFF
+    path.write_bytes(bytes(data))
+    return path
+
+
+def test_full_check_finds_crc_error(tmp_path, corrupted_zip):
+    is_valid, message = ArchiveChecker(tmp_path).check_zip(corrupted_zip)
+    assert is_valid is False
+    assert "CRC" in message
+
+
+def test_quick_check_reads_directory_only(tmp_path, corrupted_zip):
+    assert ArchiveChecker(tmp_path, quick=True).check_zip(corrupted_zip) == (True, None)
+
+
+def test_quick_follows_backend_flag(tmp_path, corrupted_zip, monkeypatch):
+    # Формат без быстрой проверки проверяется полностью и при quick=True
+    monkeypatch.setattr(get_backend("zip"), "supports_quick", False)
+    checker = ArchiveChecker(tmp_path, quick=True)
+    assert not checker.quick_for("zip")
+    assert checker.check_zip(corrupted_zip)[0] is False
+
+
+def test_quick_for_unknown_format(tmp_path):
+    checker = ArchiveChecker(tmp_path, quick=True)
+    assert checker.quick_for("rar")
+    assert not checker.quick_for("tar")
+    assert not checker.quick_for("unknown")
+    assert not ArchiveChecker(tmp_path).quick_for("zip")
+
+
+def test_crc_error_class(tmp_path, corrupted_zip):
+    assert ArchiveChecker(tmp_path).check_zip(corrupted_zip)[1].error_class == "data"
+
+
+def test_scan_results_from_store(tmp_path, corrupted_zip):
+    copy = tmp_path / "copy.zip"
+    copy.write_bytes(corrupted_zip.read_bytes())
+    engine = ScanEngine(tmp_path, [".zip"], max_workers=2, deduplicate=True)
+    corrupted = engine.run()
+    assert set(corrupted) == {str(corrupted_zip), str(copy)}
+    assert corrupted == engine.corrupted_archives
+    assert engine.get_stats()["corrupted_files"] == 2
+    assert not engine.suspicious_archives and not engine.encrypted_archives
+    records = [engine.results.find(path) for path in (corrupted_zip, copy)]
+    assert [record.error_class for record in records] == ["data", "data"]
+    # Одна из копий не проверялась и получила результат другой
+    assert sum("копия" in engine.results.error(record) for record in records) == 1
+
+
+def test_tool_missing_is_unverified(tmp_path, corrupted_zip, monkeypatch):
+    monkeypatch.setattr(ArchiveChecker, "check_zip", lambda self, file_path: tool_missing("7z", file_path))
+    engine = ScanEngine(tmp_path, [".zip"], max_workers=1)
+    assert engine.run() == {}
+    assert list(engine.unverified_archives) == [str(corrupted_zip)]
+    assert not engine.suspicious_archives
+    stats = engine.get_stats()
+    assert (stats["unverified_files"], stats["suspicious_files"]) == (1, 0)
+    # Непроверенный архив не меняет код возврата, но попадает в отчет
+    report = tmp_path / "report.txt"
+    assert main([str(tmp_path), "--extensions", ".zip", "--report", str(report)]) == 0
+    assert str(corrupted_zip) in report.read_text(encoding="utf-8")
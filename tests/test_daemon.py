@@ -0,0 +1,136 @@
+import http.client
+import json
+import threading
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from archive_checker_daemon import MAX_REQUEST_BYTES, VerificationDaemon, create_server
+from settings_manager import SettingsManager
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """Служба с настройками по умолчанию на свободном локальном порту"""
+    monkeypatch.chdir(tmp_path)
+    daemon = VerificationDaemon(SettingsManager(), max_workers=1, cache_size=100)
+    daemon.start()
+    server = create_server(daemon, "127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    daemon.stop()
+
+
+def request(server, method, path, body=None, headers=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    headers = {"Content-Type": "application/json", **(headers or {})}
+    if isinstance(body, (dict, list, str)):
+        body = json.dumps(body)
+    connection.request(method, path, body, headers)
+    response = connection.getresponse()
+    data = response.read()
+    connection.close()
+    return response.status, data
+
+
+def test_submit_job(server, tmp_path):
+    status, data = request(server, "POST", "/jobs", {"paths": [str(tmp_path)], "level": "quick"})
+    assert status == 201
+    assert json.loads(data)["paths"] == [str(tmp_path)]
+
+
+def test_single_path(server, tmp_path):
+    status, data = request(server, "POST", "/jobs", {"path": str(tmp_path)})
+    assert status == 201
+    assert json.loads(data)["paths"] == [str(tmp_path)]
+
+
+@pytest.mark.parametrize("body", [
+    {"paths": "/tmp/bc"},  # Строка вместо списка не разбирается по символам
+    {"paths": []},
+    {"paths": [1, 2]},
+    {"paths": [""]},
+    {"paths": {"a": 1}},
+    {"paths": None},
+    {"path": ["/tmp"]},
+    {},
+    ["/tmp"],
+    "/tmp",
+    {"paths": ["/tmp"], "level": "deep"},
+    {"paths": ["/tmp"], "priority": "high"},
+])
+def test_invalid_job(server, body):
+    status, data = request(server, "POST", "/jobs", body)
+    assert status == 400
+    assert "error" in json.loads(data)
+    assert json.loads(request(server, "GET", "/jobs")[1]) == []
+
+
+def test_invalid_json(server):
+    assert request(server, "POST", "/jobs", b"{not json")[0] == 400
+
+
+def test_request_too_large(server):
+    body = json.dumps({"paths": ["x" * MAX_REQUEST_BYTES]})
+    status, data = request(server, "POST", "/jobs", body)
+    assert status == 413
+    assert "error" in json.loads(data)
+
+
+def test_bad_content_length(server):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+    connection.putrequest("POST", "/jobs")
+    connection.putheader("Content-Type", "application/json")
+    connection.putheader("Content-Length", "-5")
+    connection.endheaders()
+    assert connection.getresponse().status == 400
+    connection.close()
+
+
+def test_content_type_required(server, tmp_path):
+    body = json.dumps({"paths": [str(tmp_path)]})
+    assert request(server, "POST", "/jobs", body, {"Content-Type": "text/plain"})[0] == 415
+
+
+def test_foreign_host(server):
+    assert request(server, "GET", "/status", headers={"Host": "evil.example"})[0] == 403
+
+
+def test_results_bad_from(server, tmp_path):
+    status, data = request(server, "POST", "/jobs", {"paths": [str(tmp_path)]})
+    job_id = json.loads(data)["id"]
+    assert request(server, "GET", f"/jobs/{job_id}/results?from=-1")[0] == 400
+
+
+def test_unknown_job(server):
+    assert request(server, "GET", "/jobs/999")[0] == 404
+    assert request(server, "DELETE", "/jobs/999")[0] == 404
+
+
+def test_results_stream(server, tmp_path):
+    archives = tmp_path / "archives"
+    archives.mkdir()
+    with zipfile.ZipFile(archives / "good.zip", "w") as archive:
+        archive.writestr("a.txt", b"payload")
+    (archives / "bad.zip").write_bytes(b"PK\x03\x04 not really a zip")
+
+    def results():
+        status, data = request(server, "POST", "/jobs", {"paths": [str(archives)]})
+        job_id = json.loads(data)["id"]
+        status, data = request(server, "GET", f"/jobs/{job_id}/results")
+        return {Path(record["path"]).name: record for record in map(json.loads, data.splitlines())}
+
+    first = results()
+    assert first["good.zip"]["status"] == "ok"
+    assert first["bad.zip"]["status"] == "corrupted"
+    assert first["bad.zip"]["format"] == "zip"
+    assert first["bad.zip"]["error_class"] == "headers"
+    assert not first["bad.zip"]["cached"]
+    # Неизмененные архивы второго задания берутся из кеша
+    second = results()
+    assert second["bad.zip"]["cached"]
+    assert second["bad.zip"]["error"] == first["bad.zip"]["error"]
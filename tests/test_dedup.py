@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+from dedup import EDGE_BLOCK_SIZE, DedupInterrupted, find_duplicates
+
+
+def write(path, data: bytes):
+    path.write_bytes(data)
+    return path
+
+
+def test_identical_files(tmp_path):
+    first = write(tmp_path / "a.zip", b"archive" * 100)
+    second = write(tmp_path / "b.zip", b"archive" * 100)
+    other = write(tmp_path / "c.zip", b"ARCHIVE" * 100)
+    groups = find_duplicates([first, second, other])
+    assert groups.representatives == [first, other]
+    assert groups.copies == {first: [second]}
+    assert groups.duplicates == 1
+    assert groups.bytes_skipped == 700
+
+
+def test_same_edges_different_middle(tmp_path):
+    # Первый и последний блоки совпадают, различие только в середине файла
+    size = 3 * EDGE_BLOCK_SIZE
+    first = write(tmp_path / "a.zip", bytes(size))
+    middle = bytearray(size)
+    middle[size // 2] = 1
+    second = write(tmp_path / "b.zip", bytes(middle))
+    groups = find_duplicates([first, second])
+    assert groups.representatives == [first, second]
+    assert not groups.copies
+
+
+def test_hardlinks(tmp_path):
+    first = write(tmp_path / "a.zip", b"data")
+    link = tmp_path / "link.zip"
+    os.link(first, link)
+    groups = find_duplicates([first, link])
+    assert groups.copies == {first: [link]}
+    assert groups.hardlinks == 1
+
+
+def test_representative_is_first_in_order(tmp_path):
+    paths = [write(tmp_path / f"{name}.zip", b"same") for name in "cab"]
+    groups = find_duplicates(paths)
+    assert groups.representatives == [paths[0]]
+    assert groups.copies[paths[0]] == paths[1:]
+
+
+def test_empty_files_are_not_grouped(tmp_path):
+    paths = [write(tmp_path / f"{name}.zip", b"") for name in "ab"]
+    assert find_duplicates(paths).representatives == paths
+
+
+def test_excluded_files_are_checked(tmp_path):
+    first = write(tmp_path / "a.part1.rar", b"volume")
+    second = write(tmp_path / "b.part1.rar", b"volume")
+    groups = find_duplicates([first, second], exclude=lambda path: ".part" in path.name)
+    assert groups.representatives == [first, second]
+    assert not groups.copies
+
+
+def test_missing_file(tmp_path):
+    existing = write(tmp_path / "a.zip", b"data")
+    missing = tmp_path / "missing.zip"
+    assert find_duplicates([existing, missing]).representatives == [existing, missing]
+
+
+def test_interrupted(tmp_path):
+    paths = [write(tmp_path / f"{name}.zip", b"same") for name in "ab"]
+    with pytest.raises(DedupInterrupted):
+        find_duplicates(paths, stop_check=lambda: True)
@@ -0,0 +1,36 @@
+import pytest
+
+from guards import MB, RATIO_MIN_BYTES, DecompressionBudget, ResourceLimits, SuspiciousArchive
+
+
+def test_declared_size_limit():
+    limits = ResourceLimits(max_total_mb=10, max_ratio=0)
+    limits.check_declared("ok.bin", 10 * MB, 1)
+    with pytest.raises(SuspiciousArchive, match="big.bin"):
+        limits.check_declared("big.bin", 10 * MB + 1, 10 * MB)
+
+
+def test_declared_ratio_limit():
+    limits = ResourceLimits(max_ratio=100)
+    # Небольшие файлы законно сжимаются сильнее ограничения
+    limits.check_declared("zeros.bin", RATIO_MIN_BYTES, 1)
+    with pytest.raises(SuspiciousArchive, match="коэффициент"):
+        limits.check_declared("bomb.bin", RATIO_MIN_BYTES + 1, (RATIO_MIN_BYTES + 1) // 200)
+
+
+def test_disabled_limits():
+    ResourceLimits(max_total_mb=0, max_ratio=0).check_declared("any", 1 << 40, 1)
+
+
+def test_from_settings():
+    limits = ResourceLimits.from_settings({"max_total_mb": 5, "max_ratio": 20, "memory_mb": 64})
+    assert (limits.max_total_bytes, limits.max_ratio, limits.memory_bytes) == (5 * MB, 20, 64 * MB)
+    assert ResourceLimits.from_settings({}).max_ratio == 1000
+
+
+def test_budget_counts_total():
+    budget = DecompressionBudget(ResourceLimits(max_total_mb=1, max_ratio=0), 100, "archive.zip")
+    budget.consume(MB // 2)
+    budget.consume(MB // 2)
+    with pytest.raises(SuspiciousArchive, match="archive.zip"):
+        budget.consume(1)
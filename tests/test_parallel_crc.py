@@ -0,0 +1,64 @@
+import os
+import random
+import zlib
+
+import pytest
+
+import parallel_crc
+from parallel_crc import crc32_combine, parallel_crc32
+
+
+def test_combine_random_splits():
+    generator = random.Random(1)
+    for _ in range(200):
+        data = generator.randbytes(generator.randrange(0, 5000))
+        split = generator.randint(0, len(data))
+        first, second = data[:split], data[split:]
+        assert crc32_combine(zlib.crc32(first), zlib.crc32(second), len(second)) == zlib.crc32(data)
+
+
+@pytest.mark.parametrize("length", [0, 1, 2, 3, 4, 7, 8, 255, 256, 1 << 16, (1 << 20) + 3])
+def test_combine_lengths(length):
+    first = b"prefix data"
+    second = os.urandom(length)
+    assert crc32_combine(zlib.crc32(first), zlib.crc32(second), length) == zlib.crc32(first + second)
+
+
+def test_combine_empty_first():
+    second = b"only the second block"
+    assert crc32_combine(0, zlib.crc32(second), len(second)) == zlib.crc32(second)
+
+
+def test_combine_many_parts():
+    data = os.urandom(10000)
+    generator = random.Random(2)
+    cuts = sorted(generator.sample(range(1, len(data)), 30))
+    crc = 0
+    for start, stop in zip([0] + cuts, cuts + [len(data)]):
+        crc = crc32_combine(crc, zlib.crc32(data[start:stop]), stop - start)
+    assert crc == zlib.crc32(data)
+
+
+@pytest.mark.parametrize("offset,length", [(0, 10000), (123, 7777), (5000, 0), (9999, 1)])
+def test_parallel_crc32(tmp_path, monkeypatch, offset, length):
+    monkeypatch.setattr(parallel_crc, "CRC_CHUNK_SIZE", 1000)
+    monkeypatch.setattr(parallel_crc, "CRC_READ_SIZE", 300)
+    data = os.urandom(10000)
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    assert parallel_crc32(path, offset, length) == zlib.crc32(data[offset:offset + length])
+
+
+def test_parallel_crc32_past_end(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel_crc, "CRC_CHUNK_SIZE", 1000)
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * 1500)
+    with pytest.raises(EOFError):
+        parallel_crc32(path, 0, 3000)
+
+
+def test_parallel_crc32_interrupted(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel_crc, "CRC_CHUNK_SIZE", 1000)
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * 5000)
+    assert parallel_crc32(path, 0, 5000, checkpoint=lambda: True) is None
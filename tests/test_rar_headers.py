@@ -0,0 +1,187 @@
+import io
+import struct
+import zlib
+
+import pytest
+
+from rar_headers import (
+    RAR4_SIGNATURE, RAR5_SIGNATURE, RarFormatError, check_headers
+)
+
+
+# RAR 5.0
+
+def vint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        out.append(byte | (0x80 if value else 0))
+        if not value:
+            return bytes(out)
+
+
+def rar5_block(block_type: int, flags: int = 0, body: bytes = b"", extra: bytes = b"", data: bytes = b"") -> bytes:
+    header = vint(block_type) + vint(flags | (0x0001 if extra else 0) | (0x0002 if data else 0))
+    if extra:
+        header += vint(len(extra))
+    if data:
+        header += vint(len(data))
+    header += body + extra
+    size = vint(len(header))
+    return struct.pack("<I", zlib.crc32(size + header)) + size + header + data
+
+
+def rar5_main(volume: bool = False, number: int = 0) -> bytes:
+    archive_flags = (0x0001 if volume else 0) | (0x0002 if number else 0)
+    return rar5_block(1, body=vint(archive_flags) + (vint(number) if number else b""))
+
+
+def rar5_file(data: bytes = b"payload", flags: int = 0, encrypted: bool = False) -> bytes:
+    # Флаги файла, распакованный размер, атрибуты, метод, ОС, имя
+    body = vint(0) + vint(len(data)) + vint(0x20) + vint(0) + vint(0) + vint(5) + b"a.txt"
+    extra = b""
+    if encrypted:
+        # Запись шифрования: версия, флаги, степень KDF, соль, вектор инициализации
+        record = vint(1) + vint(0) + vint(0) + bytes([15]) + b"\x11" * 16 + b"\x22" * 16
+        extra = vint(len(record)) + record
+    return rar5_block(2, flags, body, extra, data)
+
+
+def rar5_end(next_volume: bool = False) -> bytes:
+    return rar5_block(5, body=vint(1 if next_volume else 0))
+
+
+def rar5(*blocks: bytes) -> bytes:
+    return RAR5_SIGNATURE + rar5_main() + b"".join(blocks)
+
+
+# RAR 4.x
+
+def rar4_block(block_type: int, flags: int, body: bytes, data: bytes = b"") -> bytes:
+    header = struct.pack("<BHH", block_type, flags, 7 + len(body)) + body
+    return struct.pack("<H", zlib.crc32(header) & 0xFFFF) + header + data
+
+
+def rar4_main(flags: int = 0) -> bytes:
+    return rar4_block(0x73, flags, b"\x00" * 6)
+
+
+def rar4_file(data: bytes = b"payload", flags: int = 0) -> bytes:
+    name = b"a.txt"
+    body = struct.pack("<IIBIIBBHI", len(data), len(data), 0, zlib.crc32(data), 0, 29, 0x30, len(name), 0) + name
+    return rar4_block(0x74, flags | 0x8000, body, data)
+
+
+def rar4_end(flags: int = 0) -> bytes:
+    return rar4_block(0x7B, flags, b"")
+
+
+def check(data: bytes):
+    return check_headers(io.BytesIO(data), len(data))
+
+
+def test_rar5_valid():
+    summary = check(rar5(rar5_file(), rar5_file(b"more data"), rar5_end()))
+    assert summary.version == 5
+    assert summary.files == 2
+    assert summary.packed_size == len(b"payload") + len(b"more data")
+    assert summary.encryption is None
+
+
+def test_rar5_sfx_prefix():
+    summary = check(b"MZ" + b"\x90" * 4000 + rar5(rar5_file(), rar5_end()))
+    assert summary.files == 1
+
+
+def test_rar5_truncated_data():
+    data = rar5(rar5_file(b"x" * 1000), rar5_end())
+    with pytest.raises(RarFormatError, match="обрезан"):
+        check(data[:len(data) - len(rar5_end()) - 10])
+
+
+def test_rar5_missing_end():
+    with pytest.raises(RarFormatError, match="нет заголовка конца"):
+        check(rar5(rar5_file()))
+
+
+def test_rar5_truncated_header():
+    data = rar5(rar5_file(), rar5_end())
+    with pytest.raises(RarFormatError, match="Обрыв"):
+        check(data[:-2])
+
+
+def test_rar5_bad_header_crc():
+    block = bytearray(rar5_file())
+    block[8] ^= 0xFF  # Байт внутри заголовка, CRC не пересчитан
+    with pytest.raises(RarFormatError, match="CRC"):
+        check(rar5(bytes(block), rar5_end()))
+
+
+def test_rar5_encrypted_files():
+    summary = check(rar5(rar5_file(encrypted=True), rar5_end()))
+    assert summary.encryption == "files"
+
+
+def test_rar5_encrypted_headers():
+    data = RAR5_SIGNATURE + rar5_block(4, body=b"\x00" * 24) + b"\xAA" * 100
+    assert check(data).encryption == "headers"
+
+
+def test_rar5_volume_flags():
+    split_after = 0x0010
+    first = RAR5_SIGNATURE + rar5_main(volume=True) + rar5_file(flags=split_after) + rar5_end(next_volume=True)
+    summary = check(first)
+    assert summary.volume and summary.first_volume and summary.next_volume
+
+    second = RAR5_SIGNATURE + rar5_main(volume=True, number=1) + rar5_file(flags=0x0008) + rar5_end()
+    summary = check(second)
+    assert summary.volume and not summary.first_volume
+
+
+def test_rar5_split_in_single_archive():
+    with pytest.raises(RarFormatError, match="многотомного"):
+        check(rar5(rar5_file(flags=0x0010), rar5_end(next_volume=True)))
+
+
+def test_rar5_split_before_in_first_volume():
+    data = RAR5_SIGNATURE + rar5_main(volume=True) + rar5_file(flags=0x0008) + rar5_end()
+    with pytest.raises(RarFormatError, match="продолжение из предыдущего тома"):
+        check(data)
+
+
+def test_rar5_last_volume_with_split_file():
+    data = RAR5_SIGNATURE + rar5_main(volume=True, number=2) + rar5_file(flags=0x0010) + rar5_end()
+    with pytest.raises(RarFormatError, match="отмечен как последний"):
+        check(data)
+
+
+def test_rar4_valid():
+    summary = check(RAR4_SIGNATURE + rar4_main() + rar4_file() + rar4_end())
+    assert summary.version == 4
+    assert summary.files == 1
+    assert summary.encryption is None
+
+
+def test_rar4_truncated():
+    data = RAR4_SIGNATURE + rar4_main() + rar4_file(b"x" * 500)
+    with pytest.raises(RarFormatError, match="обрезан"):
+        check(data[:-100])
+
+
+def test_rar4_bad_header_crc():
+    block = bytearray(rar4_file())
+    block[12] ^= 0xFF
+    with pytest.raises(RarFormatError, match="CRC"):
+        check(RAR4_SIGNATURE + rar4_main() + bytes(block) + rar4_end())
+
+
+def test_rar4_encryption_markers():
+    assert check(RAR4_SIGNATURE + rar4_main() + rar4_file(flags=0x0004) + rar4_end()).encryption == "files"
+    data = RAR4_SIGNATURE + rar4_main(0x0080) + b"\xAA" * 64
+    assert check(data).encryption == "headers"
+
+
+def test_no_signature():
+    with pytest.raises(RarFormatError, match="сигнатура"):
+        check(b"PK\x03\x04" + b"\x00" * 100)
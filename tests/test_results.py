@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+from encryption import EncryptedMessage
+from results import (
+    STATUS_CORRUPTED, STATUS_ENCRYPTED, STATUS_MISSING, STATUS_OK, STATUS_SUSPICIOUS, STATUS_UNVERIFIED, STOPPED_MESSAGE,
+    ArchiveResult, ErrorMessage, ResultStore, error_class, result_status
+)
+
+
+def test_error_message_keeps_class():
+    message = ErrorMessage("multipart", "Поврежденный том: отсутствуют части архива")
+    assert message == "Поврежденный том: отсутствуют части архива"
+    # Класс задан проверкой, а не найден в тексте ("Поврежденный" не делает ошибку ошибкой данных)
+    assert error_class(STATUS_CORRUPTED, message) == "multipart"
+
+
+def test_unknown_error_class():
+    with pytest.raises(ValueError):
+        ErrorMessage("strange", "текст")
+
+
+def test_default_classes():
+    assert error_class(STATUS_OK, None) == ""
+    assert error_class(STATUS_CORRUPTED, "Ошибка CRC") == "other"
+    assert error_class(STATUS_SUSPICIOUS, "Подозрительный архив") == "limits"
+    assert error_class(STATUS_MISSING, "Путь не найден") == ""
+    assert error_class(STATUS_CORRUPTED, STOPPED_MESSAGE) == "stopped"
+
+
+def test_result_status():
+    assert result_status(True, None) == STATUS_OK
+    assert result_status(False, "ошибка") == STATUS_CORRUPTED
+    assert result_status(None, ErrorMessage("limits", "Подозрительный архив")) == STATUS_SUSPICIOUS
+    assert result_status(None, EncryptedMessage("Зашифрованный архив")) == STATUS_ENCRYPTED
+    assert result_status(None, ErrorMessage("unverified", "Не проверен: программа 7z не найдена")) == STATUS_UNVERIFIED
+
+
+def test_store_counts_follow_replacement():
+    store = ResultStore()
+    store.add("a.zip", "zip", False, ErrorMessage("data", "Ошибка CRC"))
+    store.add("b.zip", "zip", True, None)
+    assert store.counts()[STATUS_CORRUPTED] == 1
+    record = store.add("a.zip", "zip", True, None)
+    assert record.status == STATUS_OK and record.error_class == ""
+    assert store.counts()[STATUS_CORRUPTED] == 0
+    assert store.counts()[STATUS_OK] == 2
+    assert store.by_status(STATUS_CORRUPTED) == {}
+
+
+def test_store_round_trip(tmp_path):
+    store = ResultStore()
+    store.add("a.7z", "7z", False, ErrorMessage("truncated", "Архив не завершен"), 100, 0.5)
+    store.add("b.zip", "zip", None, EncryptedMessage("Зашифрованный архив"))
+    path = tmp_path / "results.jsonl"
+    store.save(path)
+    loaded = ResultStore.load(path)
+    assert [loaded.to_dict(record) for record in loaded] == [store.to_dict(record) for record in store]
+    assert loaded.find("a.7z").error_class == "truncated"
+    assert loaded.counts()[STATUS_ENCRYPTED] == 1
+
+
+def test_archive_result_matches_store_format():
+    error = ErrorMessage("headers", "Ошибка в заголовках")
+    result = ArchiveResult.from_check("a.rar", "rar", False, error, 10, 0.25)
+    store = ResultStore()
+    record = store.add("a.rar", "rar", False, error, 10, 0.25)
+    assert result.to_dict() == store.to_dict(record)
+    assert (result.status, result.format, result.error_class) == (STATUS_CORRUPTED, "rar", "headers")
+    assert json.loads(json.dumps(result.to_dict()))["error"] == error
+
+
+def test_archive_result_ok_has_no_error():
+    result = ArchiveResult.from_check("a.zip", "zip", True, None)
+    assert result.ok
+    assert result.to_dict()["error"] is None
@@ -0,0 +1,75 @@
+import os
+import time
+from pathlib import Path
+
+from scheduler import ArchiveQueue
+
+
+def drain(queue: ArchiveQueue):
+    result = []
+    while True:
+        path = queue.pop()
+        if path is None:
+            return result
+        result.append(path)
+
+
+PATHS = [Path("/data/a/1.zip"), Path("/data/b/2.zip"), Path("/data/a/sub/3.zip"), Path("/data/c/4.zip")]
+
+
+def test_search_order():
+    queue = ArchiveQueue(PATHS)
+    assert len(queue) == 4
+    assert drain(queue) == PATHS
+    assert not queue
+
+
+def test_prioritize_folder():
+    queue = ArchiveQueue(PATHS)
+    assert queue.prioritize_folder(Path("/data/a")) == 2
+    assert queue.pending() == [PATHS[0], PATHS[2], PATHS[1], PATHS[3]]
+
+
+def test_latest_request_first():
+    queue = ArchiveQueue(PATHS)
+    queue.prioritize_folder(Path("/data/a"))
+    queue.prioritize_folder(Path("/data/c"))
+    assert drain(queue) == [PATHS[3], PATHS[0], PATHS[2], PATHS[1]]
+
+
+def test_prioritize_skips_taken_archives():
+    queue = ArchiveQueue(PATHS)
+    queue.pop()
+    assert queue.prioritize_folder(Path("/data/a")) == 1
+    assert queue.prioritize_folder(Path("/missing")) == 0
+    assert drain(queue) == [PATHS[2], PATHS[1], PATHS[3]]
+
+
+def test_push():
+    queue = ArchiveQueue(PATHS[:1])
+    queue.push(PATHS[1])
+    queue.push(PATHS[0])  # Уже в очереди
+    assert drain(queue) == PATHS[:2]
+
+
+def make_files(tmp_path, ages):
+    now = time.time()
+    paths = []
+    for index, age in enumerate(ages):
+        path = tmp_path / f"{index}.zip"
+        path.write_bytes(b"")
+        os.utime(path, (now - age, now - age))
+        paths.append(path)
+    return paths
+
+
+def test_recent_first(tmp_path):
+    paths = make_files(tmp_path, [300, 100, 200])
+    assert drain(ArchiveQueue(paths, recent_first=True)) == [paths[1], paths[2], paths[0]]
+
+
+def test_prioritize_recent(tmp_path):
+    paths = make_files(tmp_path, [10 * 86400, 60, 5 * 86400, 3600])
+    queue = ArchiveQueue(paths)
+    assert queue.prioritize_recent(86400) == 2
+    assert drain(queue) == [paths[1], paths[3], paths[0], paths[2]]
@@ -0,0 +1,143 @@
+import io
+import lzma
+import struct
+import time
+import zlib
+
+import pytest
+
+from sevenzip_headers import (
+    MAX_HEADER_BYTES, METHOD_AES, METHOD_COPY, METHOD_LZMA, METHOD_LZMA2, SIGNATURE,
+    SevenZipFormatError, check_headers
+)
+
+
+def num(value: int) -> bytes:
+    """Число 7z: короткая форма до 0x7F, иначе 0xFF и 8 байт"""
+    return bytes([value]) if value < 0x80 else b"\xff" + value.to_bytes(8, "little")
+
+
+def streams_info(pack_pos: int, pack_sizes, method: bytes, props: bytes, unpack_size: int,
+                 crc=None) -> bytes:
+    """PackInfo и UnpackInfo с одной папкой из одного метода"""
+    data = b"\x06" + num(pack_pos) + num(len(pack_sizes)) + b"\x09" + b"".join(map(num, pack_sizes)) + b"\x00"
+    coder = bytes([len(method) | (0x20 if props else 0)]) + method + (num(len(props)) + props if props else b"")
+    data += b"\x07\x0b" + num(1) + b"\x00" + num(1) + coder + b"\x0c" + num(unpack_size)
+    if crc is not None:
+        data += b"\x0a\x01" + struct.pack("<I", crc)
+    return data + b"\x00\x00"
+
+
+def plain_header(pack_sizes, method: bytes = METHOD_COPY, props: bytes = b"") -> bytes:
+    return b"\x01\x04" + streams_info(0, pack_sizes, method, props, sum(pack_sizes)) + b"\x00"
+
+
+def encoded_header(pack_pos: int, pack_size: int, method: bytes, props: bytes, unpack_size: int,
+                   crc=None) -> bytes:
+    return b"\x17" + streams_info(pack_pos, [pack_size], method, props, unpack_size, crc)
+
+
+def archive(payload: bytes, header: bytes) -> bytes:
+    tail = struct.pack("<QQI", len(payload), len(header), zlib.crc32(header))
+    return SIGNATURE + b"\x00\x04" + struct.pack("<I", zlib.crc32(tail)) + tail + payload + header
+
+
+def check(data: bytes):
+    return check_headers(io.BytesIO(data), len(data))
+
+
+def lzma_raw(data: bytes):
+    """Сырой поток LZMA и свойства метода 7z (lc/lp/pb и размер словаря)"""
+    packed = lzma.compress(data, lzma.FORMAT_RAW, filters=[{"id": lzma.FILTER_LZMA1, "dict_size": 1 << 16}])
+    return packed, bytes([3 + 9 * 0 + 45 * 2]) + struct.pack("<I", 1 << 16)
+
+
+def test_valid_archive():
+    payload = b"x" * 100
+    summary = check(archive(payload, plain_header([len(payload)])))
+    assert summary.folders == 1
+    assert summary.pack_size == len(payload)
+    assert summary.encryption is None
+
+
+def test_empty_archive():
+    assert check(archive(b"", b"")).folders == 0
+
+
+def test_unfinished_archive():
+    data = bytearray(archive(b"data", plain_header([4])))
+    data[8:32] = bytes(24)  # 7-Zip заполняет заголовок-сигнатуру в конце записи
+    with pytest.raises(SevenZipFormatError, match="не завершен"):
+        check(bytes(data))
+
+
+def test_bad_signature_header_crc():
+    data = bytearray(archive(b"data", plain_header([4])))
+    data[20] ^= 0x01
+    with pytest.raises(SevenZipFormatError, match="CRC заголовка-сигнатуры"):
+        check(bytes(data))
+
+
+def test_truncated():
+    data = archive(b"y" * 1000, plain_header([1000]))
+    with pytest.raises(SevenZipFormatError, match="обрезан"):
+        check(data[:-5])
+
+
+def test_bad_header_crc():
+    data = bytearray(archive(b"data", plain_header([4])))
+    data[-3] ^= 0x01
+    with pytest.raises(SevenZipFormatError, match="Ошибка CRC заголовка"):
+        check(bytes(data))
+
+
+def test_pack_sizes_beyond_header():
+    with pytest.raises(SevenZipFormatError, match="выходят за границу"):
+        check(archive(b"data", plain_header([4000])))
+
+
+def test_encrypted_files():
+    summary = check(archive(b"secret", plain_header([6], METHOD_AES, b"\x00")))
+    assert summary.encryption == "files"
+
+
+def test_lzma_encoded_header():
+    header = plain_header([4])
+    packed, props = lzma_raw(header)
+    payload = b"data" + packed
+    summary = check(archive(payload, encoded_header(4, len(packed), METHOD_LZMA, props, len(header),
+                                                    zlib.crc32(header))))
+    assert summary.folders == 1
+    assert summary.pack_size == 4
+
+
+def test_encoded_header_bad_crc():
+    header = plain_header([4])
+    packed, props = lzma_raw(header)
+    data = archive(b"data" + packed, encoded_header(4, len(packed), METHOD_LZMA, props, len(header),
+                                                    zlib.crc32(header) ^ 1))
+    with pytest.raises(SevenZipFormatError, match="CRC распакованного заголовка"):
+        check(data)
+
+
+def test_encrypted_header():
+    data = archive(b"\xAA" * 64, encoded_header(0, 64, METHOD_AES, b"\x00", 60))
+    assert check(data).encryption == "headers"
+
+
+def test_encoded_header_out_of_bounds():
+    data = archive(b"\x00" * 16, encoded_header(0, 1 << 40, METHOD_COPY, b"", 16))
+    with pytest.raises(SevenZipFormatError, match="Сжатый заголовок"):
+        check(data)
+
+
+def test_header_bomb_rejected_before_decoding():
+    # Объявленный размер проверяется до распаковки, поэтому сжатые данные не важны
+    size = 400 << 20
+    assert size > MAX_HEADER_BYTES
+    packed = b"\x00" * 64
+    data = archive(packed, encoded_header(0, len(packed), METHOD_LZMA2, b"\x10", size))
+    start = time.perf_counter()
+    with pytest.raises(SevenZipFormatError, match="Слишком большой распакованный заголовок"):
+        check(data)
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,140 @@
+import bz2
+import gzip
+import io
+import lzma
+import tarfile
+
+import pytest
+
+from stream_verifiers import TAR_BLOCK, StreamError, StreamInterrupted, detect_compression, verify_stream, verify_tar
+
+
+def make_tar(files, format=tarfile.GNU_FORMAT, pax_headers=None) -> bytes:
+    """Архив tar из файлов {имя: данные}"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w", format=format) as archive:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.pax_headers = dict(pax_headers or {})
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+FILES = {"a.txt": b"hello" * 100, "dir/b.bin": bytes(range(256)) * 10, "empty": b""}
+
+
+def verify(data: bytes) -> int:
+    return verify_tar(io.BytesIO(data))
+
+
+def test_valid_tar():
+    assert verify(make_tar(FILES)) == 3
+
+
+def test_pax_tar():
+    # Длинное имя и размер в расширенном заголовке pax
+    files = {"x" * 150: b"data" * 1000}
+    assert verify(make_tar(files, tarfile.PAX_FORMAT)) == 1
+
+
+def test_pax_size_overrides_header():
+    data = bytearray(make_tar({"big": b"data" * 1000}, tarfile.PAX_FORMAT, {"size": "4000"}))
+    # Размер файла в основном заголовке обнуляется: данные пропускаются по размеру из pax
+    header = data.index(b"data" * 10) - TAR_BLOCK
+    data[header + 124:header + 136] = b"0" * 11 + b"\0"
+    data[header + 148:header + 156] = b" " * 8
+    checksum = sum(data[header:header + TAR_BLOCK])
+    data[header + 148:header + 156] = b"%06o\0 " % checksum
+    assert verify(bytes(data)) == 1
+
+
+def test_empty_input():
+    with pytest.raises(StreamError, match="Пустой"):
+        verify(b"")
+
+
+def test_truncated_in_data():
+    data = make_tar(FILES)
+    with pytest.raises(StreamError, match="a.txt"):
+        verify(data[:TAR_BLOCK + 100])
+
+
+def test_truncated_in_header():
+    data = make_tar(FILES)
+    with pytest.raises(StreamError, match="заголовке"):
+        verify(data[:2 * TAR_BLOCK + 10])
+
+
+def test_missing_end_block():
+    data = make_tar({"a.txt": b"x" * TAR_BLOCK})
+    with pytest.raises(StreamError, match="конца архива"):
+        verify(data[:2 * TAR_BLOCK])
+
+
+def test_bad_checksum():
+    data = bytearray(make_tar(FILES))
+    data[2 * TAR_BLOCK] ^= 0x01  # Имя второго файла
+    with pytest.raises(StreamError, match="контрольная сумма"):
+        verify(bytes(data))
+
+
+def test_bad_number_field():
+    data = bytearray(make_tar(FILES))
+    data[124:136] = b"not a number"
+    with pytest.raises(StreamError):
+        verify(bytes(data))
+
+
+def test_interrupted():
+    with pytest.raises(StreamInterrupted):
+        verify_tar(io.BytesIO(make_tar({"big": b"x" * (3 << 20)})), stop_check=lambda: True)
+
+
+@pytest.mark.parametrize("suffix,compress", [
+    (".tar.gz", gzip.compress), (".tar.bz2", bz2.compress), (".tar.xz", lzma.compress),
+])
+def test_compressed_tar(tmp_path, suffix, compress):
+    path = tmp_path / f"archive{suffix}"
+    path.write_bytes(compress(make_tar(FILES)))
+    assert detect_compression(path) == suffix.rsplit(".", 1)[1]
+    assert verify_stream(path, True, external=False) == (True, None)
+
+
+@pytest.mark.parametrize("suffix,compress", [
+    (".tar.gz", gzip.compress), (".tar.bz2", bz2.compress), (".tar.xz", lzma.compress),
+])
+def test_truncated_compressed_tar(tmp_path, suffix, compress):
+    data = compress(make_tar({"random": bytes(range(256)) * 400}))
+    path = tmp_path / f"archive{suffix}"
+    path.write_bytes(data[:len(data) // 2])
+    is_valid, message = verify_stream(path, True, external=False)
+    assert is_valid is False
+    assert message.error_class == "truncated"
+
+
+def test_gzip_bad_crc(tmp_path):
+    data = bytearray(gzip.compress(b"payload" * 1000))
+    data[-8] ^= 0xFF  # CRC-32 в конце потока gzip
+    path = tmp_path / "file.gz"
+    path.write_bytes(bytes(data))
+    is_valid, message = verify_stream(path, False, external=False)
+    assert is_valid is False
+    assert "сжатый файл" in message
+
+
+def test_corrupted_tar_inside_gzip(tmp_path):
+    data = bytearray(make_tar(FILES))
+    data[2 * TAR_BLOCK + 148] ^= 0x01
+    path = tmp_path / "archive.tar.gz"
+    path.write_bytes(gzip.compress(bytes(data)))
+    is_valid, message = verify_stream(path, True, external=False)
+    assert is_valid is False
+    assert "архив tar" in message
+    assert message.error_class == "headers"
+
+
+def test_unknown_compression(tmp_path):
+    path = tmp_path / "file.gz"
+    path.write_bytes(b"not compressed at all")
+    assert verify_stream(path, False, external=False)[0] is False
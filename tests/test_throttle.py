@@ -0,0 +1,67 @@
+import time
+
+import pytest
+
+from throttle import MB, IOLimiter, ScheduleWindow, TokenBucket, open_archive_file, parse_schedule
+
+
+def test_parse_schedule():
+    windows = parse_schedule("09:00-19:00=50/200; 23:30-06:00=0/0")
+    assert [str(window) for window in windows] == ["09:00-19:00=50/200", "23:30-06:00=0/0"]
+    assert windows[0].contains(9 * 60) and not windows[0].contains(19 * 60)
+    # Интервал через полночь
+    assert windows[1].contains(23 * 60 + 45) and windows[1].contains(60) and not windows[1].contains(12 * 60)
+
+
+@pytest.mark.parametrize("text", ["09:00=50/0", "09:00-19:00", "25:00-26:00=1/1", "aa:00-10:00=1/1"])
+def test_parse_schedule_errors(text):
+    with pytest.raises(ValueError):
+        parse_schedule(text)
+
+
+def test_schedule_window_roundtrip():
+    window = ScheduleWindow(90, 600, 10, 5)
+    assert str(ScheduleWindow.from_dict(window.to_dict())) == str(window)
+
+
+def test_limits_at():
+    limiter = IOLimiter(100, 0, parse_schedule("09:00-18:00=20/50"))
+    assert limiter.limits_at(10 * 60) == (20, 50)
+    assert limiter.limits_at(20 * 60) == (100, 0)
+
+
+def test_from_settings():
+    assert IOLimiter.from_settings({}) is None
+    assert IOLimiter.from_settings({"nice": 10}).enabled
+    assert not IOLimiter.from_settings({"nice": 10}).throttles
+    limiter = IOLimiter.from_settings({"schedule": [{"from": "01:00", "to": "02:00", "mb_per_sec": 5}]})
+    assert limiter.throttles
+
+
+def test_token_bucket_unlimited():
+    assert TokenBucket().consume(10 ** 9) == 0
+
+
+def test_token_bucket_waits_for_debt():
+    bucket = TokenBucket(1000)
+    bucket.tokens = 0
+    start = time.monotonic()
+    waited = bucket.consume(100)
+    assert waited == pytest.approx(0.1, abs=0.02)
+    assert time.monotonic() - start >= 0.09
+
+
+def test_token_bucket_burst():
+    bucket = TokenBucket(1000, burst=500)
+    time.sleep(0.6)
+    bucket.set_rate(1000, burst=500)
+    assert bucket.tokens <= 500
+
+
+def test_throttled_file(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * MB)
+    limiter = IOLimiter(mb_per_sec=100)
+    with open_archive_file(path, limiter) as f:
+        assert len(f.read()) == MB
+    assert limiter.waited >= 0
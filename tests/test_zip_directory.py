@@ -0,0 +1,226 @@
+import io
+import struct
+import zipfile
+import zlib
+
+import pytest
+
+from zip_directory import (
+    HASH_BATCH, ZIP64_END, ZIP64_LOCATOR, ZIP64_MARK, ZIP_CENTRAL, ZIP_DEFLATED, ZIP_END, ZIP_LOCAL,
+    ZIP_STORED, ZipFormatError, read_directory, read_end_record
+)
+
+np = pytest.importorskip("numpy")
+
+
+def build(members, prefix: bytes = b"", zip64: bool = False, offsets=None) -> bytes:
+    """
+    ZIP из записей (имя, данные, метод). Смещения в оглавлении считаются от начала
+    архива без prefix (как у самораспаковывающихся архивов); offsets заменяет их по номеру записи
+    """
+    body = b""
+    central = b""
+    for index, (name, data, method) in enumerate(members):
+        packed = data
+        if method == ZIP_DEFLATED:
+            compressor = zlib.compressobj(6, zlib.DEFLATED, -15)
+            packed = compressor.compress(data) + compressor.flush()
+        crc = zlib.crc32(data)
+        offset = len(body)
+        body += struct.pack("<4s5H3L2H", ZIP_LOCAL, 20, 0, method, 0, 0x21, crc, len(packed), len(data),
+                            len(name), 0) + name + packed
+        if offsets and index in offsets:
+            offset = offsets[index]
+        sizes = (len(packed), len(data), offset)
+        extra = b""
+        if zip64:
+            extra = struct.pack("<2H3Q", 1, 24, len(data), len(packed), offset)
+            sizes = (ZIP64_MARK,) * 3
+        central += struct.pack("<4s6H3L5H2L", ZIP_CENTRAL, 45, 45, 0, method, 0, 0x21, crc, sizes[0], sizes[1],
+                               len(name), len(extra), 0, 0, 0, 0, sizes[2]) + name + extra
+    tail = b""
+    count, directory_size, directory_offset = len(members), len(central), len(body)
+    if zip64:
+        tail = struct.pack("<4sQ2H2L4Q", ZIP64_END, 44, 45, 45, 0, 0, count, count, directory_size,
+                           directory_offset)
+        tail += struct.pack("<4sLQL", ZIP64_LOCATOR, 0, directory_offset + directory_size, 1)
+        count, directory_size, directory_offset = 0xFFFF, ZIP64_MARK, ZIP64_MARK
+    tail += struct.pack("<4s4H2LH", ZIP_END, 0, 0, count, count, directory_size, directory_offset, 0)
+    return prefix + body + central + tail
+
+
+def directory(data: bytes, min_entries: int = 0):
+    return read_directory(io.BytesIO(data), len(data), min_entries, np)
+
+
+def contents(data: bytes, index: int) -> bytes:
+    f = io.BytesIO(data)
+    return b"".join(directory(data).read_member(f, index))
+
+
+MEMBERS = [
+    (b"a.txt", b"hello " * 100, ZIP_DEFLATED),
+    (b"b.bin", bytes(range(256)) * 4, ZIP_STORED),
+    (b"empty", b"", ZIP_STORED),
+]
+
+
+def check_all(data: bytes) -> None:
+    """Все проверки оглавления проходят, данные совпадают с zipfile"""
+    result = directory(data)
+    assert result.check_bounds() is None
+    assert result.check_overlaps() is None
+    assert result.check_duplicates() is None
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert [result.name(i) for i in range(len(result))] == archive.namelist()
+        for index, name in enumerate(archive.namelist()):
+            assert contents(data, index) == archive.read(name)
+
+
+def test_zipfile_archive():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("deflated.txt", b"text " * 1000, zipfile.ZIP_DEFLATED)
+        archive.writestr("bzip2.txt", b"data " * 1000, zipfile.ZIP_BZIP2)
+        archive.writestr("stored.bin", b"\x00\x01" * 100)
+        archive.writestr("имя.txt", b"utf-8")
+    data = buffer.getvalue()
+    end = read_end_record(io.BytesIO(data), len(data))
+    assert (end.entries, end.concat, end.zip64) == (4, 0, False)
+    check_all(data)
+
+
+def test_handmade_archive():
+    check_all(build(MEMBERS))
+
+
+def test_sfx_prefix():
+    stub = b"MZ" + b"\x90" * 4094
+    data = build(MEMBERS, prefix=stub)
+    end = read_end_record(io.BytesIO(data), len(data))
+    assert end.concat == len(stub)
+    assert directory(data).entries["offset"][0] == len(stub)
+    check_all(data)
+
+
+def test_sfx_prefix_zipfile():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("a.txt", b"payload" * 50, zipfile.ZIP_DEFLATED)
+    data = b"#!/bin/sh\nexit 0\n" + buffer.getvalue()
+    assert read_end_record(io.BytesIO(data), len(data)).concat == 17
+    check_all(data)
+
+
+def test_zip64():
+    data = build(MEMBERS, zip64=True)
+    end = read_end_record(io.BytesIO(data), len(data))
+    assert end.zip64
+    assert end.entries == len(MEMBERS)
+    result = directory(data)
+    assert result.compress_size(1) == 1024
+    assert int(result.entries["file_size"][0]) == 600
+    check_all(data)
+
+
+def test_zip64_with_prefix():
+    data = build(MEMBERS, prefix=b"stub" * 100, zip64=True)
+    assert read_end_record(io.BytesIO(data), len(data)).concat == 400
+    check_all(data)
+
+
+def test_zip64_missing_extra():
+    data = bytearray(build(MEMBERS[:1], zip64=True))
+    # Длина дополнительного поля ZIP64 обнуляется: размеры остаются отметками 0xFFFFFFFF
+    central = data.index(ZIP_CENTRAL)
+    data[central + 30:central + 32] = b"\x00\x00"
+    with pytest.raises(ZipFormatError):
+        directory(bytes(data))
+
+
+def test_duplicate_names():
+    data = build(MEMBERS + [(b"b.bin", b"other", ZIP_STORED)])
+    assert "b.bin" in directory(data).check_duplicates()
+
+
+def test_duplicate_names_across_batches():
+    members = [(f"{n:05}.txt".encode(), b"", ZIP_STORED) for n in range(HASH_BATCH + 100)]
+    assert directory(build(members)).check_duplicates() is None
+    members.append((b"00003.txt", b"", ZIP_STORED))
+    assert "00003.txt" in directory(build(members)).check_duplicates()
+
+
+def test_same_prefix_names_differ():
+    members = [(b"a", b"", ZIP_STORED), (b"a\x00", b"", ZIP_STORED), (b"", b"", ZIP_STORED)]
+    assert directory(build(members)).check_duplicates() is None
+
+
+def test_overlapping_entries():
+    # Вторая запись ссылается на данные первой (zip-бомба с перекрытием)
+    data = build(MEMBERS[:2], offsets={1: 0})
+    message = directory(data).check_overlaps()
+    assert "a.txt" in message and "b.bin" in message
+
+
+def test_overlaps_with_prefix():
+    data = build(MEMBERS[:2], prefix=b"x" * 64, offsets={1: 10})
+    assert directory(data).check_overlaps() is not None
+
+
+def test_entry_outside_data():
+    data = build(MEMBERS[:2])
+    start = data.index(ZIP_CENTRAL)
+    data = build(MEMBERS[:2], offsets={1: start - 40})
+    assert "b.bin" in directory(data).check_bounds()
+
+
+def test_crc_mismatch():
+    data = bytearray(build(MEMBERS[1:2]))
+    data[30 + len(b"b.bin")] ^= 0xFF
+    with pytest.raises(ZipFormatError, match="CRC"):
+        contents(bytes(data), 0)
+
+
+def test_local_name_mismatch():
+    data = bytearray(build(MEMBERS[1:2]))
+    data[30] = ord("c")
+    with pytest.raises(ZipFormatError, match="локальном"):
+        contents(bytes(data), 0)
+
+
+def test_truncated_deflate():
+    packed = zlib.compressobj(6, zlib.DEFLATED, -15)
+    stream = packed.compress(b"hello " * 100) + packed.flush()
+    data = bytearray(build(MEMBERS[:1]))
+    # Последний байт потока deflate заменяется: поток не завершается или CRC не совпадает
+    data[30 + len(b"a.txt") + len(stream) - 1] ^= 0xFF
+    with pytest.raises(ZipFormatError):
+        contents(bytes(data), 0)
+
+
+def test_wrong_entry_count():
+    data = bytearray(build(MEMBERS))
+    end = data.rindex(ZIP_END)
+    data[end + 10:end + 12] = struct.pack("<H", 5)
+    with pytest.raises(ZipFormatError, match="записей"):
+        directory(bytes(data))
+
+
+def test_directory_outside_file():
+    data = bytearray(build(MEMBERS))
+    end = data.rindex(ZIP_END)
+    data[end + 16:end + 20] = struct.pack("<L", len(data))
+    with pytest.raises(ZipFormatError):
+        read_end_record(io.BytesIO(bytes(data)), len(data))
+    # Без записи о конце каталога ошибку сообщает zipfile
+    assert directory(bytes(data)) is None
+
+
+def test_min_entries():
+    data = build(MEMBERS)
+    assert directory(data, min_entries=len(MEMBERS) + 1) is None
+    assert directory(data, min_entries=len(MEMBERS)) is not None
+
+
+def test_not_a_zip():
+    assert directory(b"not a zip archive" * 10) is None
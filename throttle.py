@@ -0,0 +1,288 @@
+import io
+import os
+import time
+import threading
+from typing import List, Optional, Tuple
+
+MB = 1 << 20
+
+# Размер буфера чтения при ограничении нагрузки: меньше операций ввода-вывода на мегабайт
+THROTTLED_BUFFER_SIZE = 256 * 1024
+
+# Как часто пересчитывать ограничения по расписанию, сек.
+SCHEDULE_CHECK_INTERVAL = 1.0
+
+
+class TokenBucket:
+    """
+    Ограничение скорости "ведро токенов": за секунду добавляется rate токенов,
+    запас не больше burst. Потребитель забирает токены сразу (запас может уйти в минус)
+    и ждет, пока долг не покроется, поэтому общая скорость всех потоков не превышает rate.
+    """
+
+    def __init__(self, rate: float = 0, burst: Optional[float] = None):
+        """
+        Args:
+            rate (float): Токенов в секунду (0 - без ограничения)
+            burst (float): Максимальный запас (по умолчанию - на одну секунду)
+        """
+        self._lock = threading.Lock()
+        self.rate = 0.0
+        self.burst = 0.0
+        self.tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate: float, burst: Optional[float] = None) -> None:
+        """Изменение скорости (можно во время работы)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(0.0, float(rate))
+            self.burst = float(burst) if burst else self.rate
+            self.tokens = min(self.tokens, self.burst)
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def consume(self, amount: float) -> float:
+        """
+        Получение amount токенов (с ожиданием)
+
+        Returns:
+            float: Время ожидания, сек.
+        """
+        with self._lock:
+            if not self.rate:
+                return 0.0
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+def _parse_time(text: str) -> int:
+    """Время "ЧЧ:ММ" в минутах от начала суток"""
+    hours, _, minutes = text.strip().partition(":")
+    value = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= value <= 24 * 60:
+        raise ValueError(f"Некорректное время: {text}")
+    return value
+
+
+class ScheduleWindow:
+    """Интервал времени суток со своими ограничениями (может переходить через полночь)"""
+
+    __slots__ = ("start", "end", "mb_per_sec", "iops")
+
+    def __init__(self, start: int, end: int, mb_per_sec: float = 0, iops: float = 0):
+        self.start = start  # Минуты от начала суток
+        self.end = end
+        self.mb_per_sec = mb_per_sec
+        self.iops = iops
+
+    def contains(self, minute: int) -> bool:
+        if self.start <= self.end:
+            return self.start <= minute < self.end
+        return minute >= self.start or minute < self.end
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ScheduleWindow":
+        return cls(_parse_time(data["from"]), _parse_time(data["to"]),
+                   data.get("mb_per_sec", 0), data.get("iops", 0))
+
+    def to_dict(self) -> dict:
+        return {
+            "from": f"{self.start // 60:02d}:{self.start % 60:02d}",
+            "to": f"{self.end // 60:02d}:{self.end % 60:02d}",
+            "mb_per_sec": self.mb_per_sec,
+            "iops": self.iops,
+        }
+
+    def __str__(self) -> str:
+        data = self.to_dict()
+        return f"{data['from']}-{data['to']}={self.mb_per_sec:g}/{self.iops:g}"
+
+
+def parse_schedule(text: str) -> List[ScheduleWindow]:
+    """
+    Расписание из строки "09:00-19:00=50/200; 19:00-23:00=200/0":
+    интервал, затем МБ/с и операций в секунду (0 - без ограничения)
+
+    Raises:
+        ValueError: Некорректная запись
+    """
+    windows = []
+    for item in text.replace(",", ";").split(";"):
+        item = item.strip()
+        if not item:
+            continue
+        interval, _, caps = item.partition("=")
+        start, _, end = interval.partition("-")
+        mb_per_sec, _, iops = caps.partition("/")
+        if not end or not caps:
+            raise ValueError(f"Некорректный интервал расписания: {item} (нужно ЧЧ:ММ-ЧЧ:ММ=МБ/с/IOPS)")
+        windows.append(ScheduleWindow(_parse_time(start), _parse_time(end),
+                                      float(mb_per_sec or 0), float(iops or 0)))
+    return windows
+
+
+class IOLimiter:
+    """
+    Ограничение нагрузки проверки на диск, общее для всех потоков: объем чтения
+    в секунду и количество операций чтения в секунду, с расписанием по времени суток.
+    Внешние программы (7z, unrar, распаковщики) читают файлы сами - для них
+    задаются приоритеты процессора (nice) и ввода-вывода (ionice).
+    """
+
+    def __init__(self, mb_per_sec: float = 0, iops: float = 0,
+                 schedule: Optional[List[ScheduleWindow]] = None, nice: int = 0, idle_io: bool = False):
+        """
+        Args:
+            mb_per_sec (float): Ограничение скорости чтения, МБ/с (0 - без ограничения)
+            iops (float): Ограничение операций чтения в секунду (0 - без ограничения)
+            schedule (List[ScheduleWindow]): Интервалы суток со своими ограничениями
+                (вне интервалов действуют mb_per_sec и iops)
+            nice (int): Приоритет процессора внешних программ (0 - как у программы, 19 - самый низкий)
+            idle_io (bool): Внешние программы читают диск только при его простое (класс idle ionice)
+        """
+        self.mb_per_sec = mb_per_sec
+        self.iops = iops
+        self.schedule = list(schedule or [])
+        self.nice = nice
+        self.idle_io = idle_io
+        self.bytes = TokenBucket()
+        self.ops = TokenBucket()
+        self.current: Optional[Tuple[float, float]] = None  # Действующие (МБ/с, IOPS)
+        self._checked = 0.0
+        self.waited = 0.0  # Суммарное время ожидания из-за ограничений, сек.
+        self._refresh(force=True)
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> Optional["IOLimiter"]:
+        """Ограничения из раздела "io_limits" настроек; None, если ничего не ограничено"""
+        limiter = cls(
+            settings.get("mb_per_sec", 0), settings.get("iops", 0),
+            [ScheduleWindow.from_dict(window) for window in settings.get("schedule", [])],
+            settings.get("nice", 0), settings.get("idle_io", False)
+        )
+        return limiter if limiter.enabled else None
+
+    @property
+    def throttles(self) -> bool:
+        """Ограничивается ли чтение (сейчас или по расписанию)"""
+        return bool(self.mb_per_sec or self.iops or self.schedule)
+
+    @property
+    def enabled(self) -> bool:
+        return self.throttles or bool(self.nice or self.idle_io)
+
+    def limits_at(self, minute: int) -> Tuple[float, float]:
+        """Ограничения (МБ/с, IOPS) в заданную минуту суток"""
+        for window in self.schedule:
+            if window.contains(minute):
+                return window.mb_per_sec, window.iops
+        return self.mb_per_sec, self.iops
+
+    def _refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked < SCHEDULE_CHECK_INTERVAL:
+            return
+        self._checked = now
+        local = time.localtime()
+        limits = self.limits_at(local.tm_hour * 60 + local.tm_min)
+        if limits != self.current:
+            self.current = limits
+            mb_per_sec, iops = limits
+            self.bytes.set_rate(mb_per_sec * MB)
+            self.ops.set_rate(iops)
+
+    def acquire(self, nbytes: int) -> None:
+        """Учет одной операции чтения nbytes байт (с ожиданием при превышении ограничений)"""
+        if self.schedule:
+            self._refresh()
+        self.waited += self.ops.consume(1) + self.bytes.consume(nbytes)
+
+    def __str__(self) -> str:
+        parts = []
+        if self.mb_per_sec or self.iops:
+            parts.append(f"{self.mb_per_sec:g} МБ/с, {self.iops:g} IOPS (0 - без ограничения)")
+        if self.schedule:
+            parts.append("по расписанию " + "; ".join(str(window) for window in self.schedule))
+        if self.nice or self.idle_io:
+            parts.append(f"внешние программы: nice {self.nice}" + (", ionice idle" if self.idle_io else ""))
+        return ", ".join(parts)
+
+
+class ThrottledRaw(io.RawIOBase):
+    """Небуферизованное чтение файла, каждая операция которого проходит через IOLimiter"""
+
+    def __init__(self, raw: io.RawIOBase, limiter: IOLimiter):
+        super().__init__()
+        self.raw = raw
+        self.limiter = limiter
+        self.name = raw.name
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return self.raw.seekable()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.raw.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self.raw.tell()
+
+    def fileno(self) -> int:
+        return self.raw.fileno()
+
+    def readinto(self, buffer) -> int:
+        n = self.raw.readinto(buffer)
+        if n:
+            self.limiter.acquire(n)
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+def open_archive_file(file_path, limiter: Optional[IOLimiter] = None, hints=None, read_ahead=None):
+    """
+    Открытие архива для чтения проверяющими в процессе (ZIP, tar, сжатые файлы)
+
+    Args:
+        file_path: Архив
+        limiter (IOLimiter): Ограничение нагрузки на диск
+        hints (ReadHints): Подсказки кешу страниц и размер блока чтения (см. page_cache)
+        read_ahead (ReadAhead): Упреждающее чтение в потоках ввода-вывода (см. prefetch)
+
+    Returns:
+        Буферизованный файл; при ограничении нагрузки каждое чтение с диска
+        учитывается в limiter
+    """
+    throttled = limiter is not None and limiter.throttles
+    hinted = hints is not None and hints.active
+    if not throttled and not hinted and read_ahead is None:
+        return open(file_path, 'rb')
+    raw = io.FileIO(file_path, 'rb')
+    buffer_size = io.DEFAULT_BUFFER_SIZE
+    if hinted:
+        from page_cache import HintedRaw
+
+        raw = HintedRaw(raw, hints)
+        buffer_size = raw.block_size or buffer_size
+    if throttled:
+        raw = ThrottledRaw(raw, limiter)
+        buffer_size = max(buffer_size, THROTTLED_BUFFER_SIZE)
+    if read_ahead is not None and os.fstat(raw.fileno()).st_size >= read_ahead.min_size:
+        # Блоки передаются целиком: меньше переключений между потоками на мегабайт
+        raw = read_ahead.wrap(raw)
+        buffer_size = max(buffer_size, read_ahead.chunk_size)
+    return io.BufferedReader(raw, buffer_size)
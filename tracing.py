@@ -0,0 +1,162 @@
+import json
+import time
+import threading
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+# Фазы проверки одного архива
+PHASES = ("archive", "stat", "open", "directory", "decompress", "subprocess", "multipart", "deliver")
+
+# Границы корзин гистограммы в миллисекундах
+HISTOGRAM_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 60000)
+
+# Общий пустой контекст: при выключенной трассировке span() не создает объектов
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    """Замер одной фазы, запись выполняется при выходе из контекста"""
+
+    __slots__ = ("tracer", "name", "args", "start")
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns() - self.start, self.args)
+        return False
+
+
+class PhaseTracer:
+    """
+    Сбор времени фаз проверки архивов по потокам.
+    Включается и выключается во время работы; в выключенном состоянии
+    span() возвращает общий пустой контекст и почти ничего не стоит.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.events: List[tuple] = []  # (name, tid, start_ns, dur_ns, args)
+        self.thread_names: Dict[int, str] = {}
+        self.origin_ns = time.perf_counter_ns()
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **args):
+        """
+        Контекст замера фазы
+
+        Args:
+            name (str): Имя фазы (см. PHASES)
+            **args: Дополнительные данные, попадающие в трассу (например, путь к архиву)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args)
+
+    def record(self, name: str, start_ns: int, dur_ns: int, args: Optional[dict] = None) -> None:
+        """Запись готового интервала"""
+        tid = threading.get_ident()
+        with self._lock:
+            if tid not in self.thread_names:
+                self.thread_names[tid] = threading.current_thread().name
+            self.events.append((name, tid, start_ns, dur_ns, args))
+
+    def clear(self) -> None:
+        """Очистка собранных данных"""
+        with self._lock:
+            self.events = []
+            self.thread_names = {}
+            self.origin_ns = time.perf_counter_ns()
+
+    def to_chrome_trace(self) -> dict:
+        """
+        Преобразование в формат Chrome trace-event (chrome://tracing, Perfetto)
+
+        Returns:
+            dict: Объект с ключом traceEvents
+        """
+        with self._lock:
+            events = list(self.events)
+            thread_names = dict(self.thread_names)
+
+        # Короткие номера потоков читаются лучше, чем идентификаторы ОС
+        tids = {tid: i + 1 for i, tid in enumerate(thread_names)}
+        trace = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tids[tid], "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        for name, tid, start_ns, dur_ns, args in events:
+            event = {
+                "name": name,
+                "cat": "archive",
+                "ph": "X",
+                "pid": 1,
+                "tid": tids[tid],
+                "ts": (start_ns - self.origin_ns) / 1000,
+                "dur": dur_ns / 1000,
+            }
+            if args:
+                event["args"] = {key: str(value) for key, value in args.items()}
+            trace.append(event)
+        return {"traceEvents": trace, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Сохранение трассы в JSON файл"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+
+    def histograms(self) -> Dict[str, dict]:
+        """
+        Агрегированная статистика по фазам
+
+        Returns:
+            Dict[str, dict]: {фаза: {count, total_ms, mean_ms, p50_ms, p90_ms, p99_ms, max_ms, buckets}}
+        """
+        with self._lock:
+            events = list(self.events)
+
+        durations: Dict[str, List[float]] = {}
+        for name, _, _, dur_ns, _ in events:
+            durations.setdefault(name, []).append(dur_ns / 1e6)
+
+        result = {}
+        for name, values in durations.items():
+            values.sort()
+            count = len(values)
+            buckets = [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)
+            for value in values:
+                index = 0
+                while index < len(HISTOGRAM_BUCKETS_MS) and value > HISTOGRAM_BUCKETS_MS[index]:
+                    index += 1
+                buckets[index] += 1
+            labels = [f"<={b}" for b in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}"]
+            result[name] = {
+                "count": count,
+                "total_ms": round(sum(values), 3),
+                "mean_ms": round(sum(values) / count, 3),
+                "p50_ms": round(values[int(count * 0.5)], 3),
+                "p90_ms": round(values[min(count - 1, int(count * 0.9))], 3),
+                "p99_ms": round(values[min(count - 1, int(count * 0.99))], 3),
+                "max_ms": round(values[-1], 3),
+                "buckets": {label: n for label, n in zip(labels, buckets) if n},
+            }
+        # Фазы в порядке выполнения
+        order = {name: i for i, name in enumerate(PHASES)}
+        return dict(sorted(result.items(), key=lambda item: order.get(item[0], len(order))))
+
+    def format_histograms(self) -> str:
+        """Текстовая таблица статистики по фазам для лога и отчетов"""
+        lines = [f"{'Фаза':<12}{'Кол-во':>8}{'Всего, мс':>14}{'Сред.':>10}{'p50':>10}{'p90':>10}{'p99':>10}{'Макс.':>10}"]
+        for name, h in self.histograms().items():
+            lines.append(
+                f"{name:<12}{h['count']:>8}{h['total_ms']:>14}{h['mean_ms']:>10}"
+                f"{h['p50_ms']:>10}{h['p90_ms']:>10}{h['p99_ms']:>10}{h['max_ms']:>10}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,488 @@
+import zlib
+import struct
+from array import array
+from typing import BinaryIO, Iterator, Optional, Sequence
+
+from guards import RATIO_MIN_BYTES
+
+# Сигнатуры ZIP
+ZIP_END = b"PK\x05\x06"
+ZIP64_END = b"PK\x06\x06"
+ZIP64_LOCATOR = b"PK\x06\x07"
+ZIP_CENTRAL = b"PK\x01\x02"
+ZIP_LOCAL = b"PK\x03\x04"
+
+ZIP_END_SIZE = 22
+ZIP64_END_SIZE = 56
+ZIP64_LOCATOR_SIZE = 20
+ZIP_CENTRAL_SIZE = 46
+ZIP_LOCAL_SIZE = 30
+ZIP_MAX_COMMENT = 0xFFFF
+ZIP64_MARK = 0xFFFFFFFF  # Значение вынесено в дополнительное поле ZIP64
+ZIP64_EXTRA = 0x0001
+
+ZIP_FLAG_ENCRYPTED = 0x1
+ZIP_FLAG_UTF8 = 0x800
+
+# Методы сжатия, которые распаковываются без zipfile
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_BZIP2 = 12
+RANGE_METHODS = (ZIP_STORED, ZIP_DEFLATED, ZIP_BZIP2)
+
+# Размер блока чтения данных файла
+CHUNK_SIZE = 64 * 1024
+
+# Блок центрального каталога для поиска сигнатур записей
+SCAN_BLOCK = 4 << 20
+
+# Сколько имен хешируется за раз при поиске повторов (ограничивает временную память)
+HASH_BATCH = 1 << 13
+
+
+class ZipFormatError(Exception):
+    """Оглавление или данные ZIP повреждены (error_class - класс ошибки, см. results.ERROR_CLASSES)"""
+
+    def __init__(self, message: str, error_class: str = "headers"):
+        super().__init__(message)
+        self.error_class = error_class
+
+
+def load_numpy():
+    """NumPy, если установлен (без него оглавление читает zipfile)"""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+class ZipEndRecord:
+    """Запись о конце центрального каталога (с учетом ZIP64)"""
+
+    __slots__ = ("entries", "directory_size", "directory_offset", "concat", "zip64")
+
+    def __init__(self, entries: int, directory_size: int, directory_offset: int, concat: int, zip64: bool):
+        self.entries = entries  # Количество записей по данным архива
+        self.directory_size = directory_size
+        self.directory_offset = directory_offset  # Смещение каталога в файле (с учетом concat)
+        self.concat = concat  # Данные перед архивом (самораспаковывающийся архив)
+        self.zip64 = zip64
+
+
+def read_end_record(f: BinaryIO, file_size: int) -> ZipEndRecord:
+    """
+    Поиск записи о конце центрального каталога
+
+    Raises:
+        ZipFormatError: Если запись не найдена или указывает за границы файла
+    """
+    tail_size = min(file_size, ZIP_END_SIZE + ZIP_MAX_COMMENT + ZIP64_END_SIZE + ZIP64_LOCATOR_SIZE)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+    position = len(tail) - ZIP_END_SIZE
+    if tail[position:position + 4] != ZIP_END:
+        # Архив с комментарием: последняя сигнатура в пределах длины комментария
+        position = tail.rfind(ZIP_END, max(0, len(tail) - ZIP_END_SIZE - ZIP_MAX_COMMENT))
+        if position < 0:
+            raise ZipFormatError("Не найдена запись о конце центрального каталога")
+    if len(tail) - position < ZIP_END_SIZE:
+        raise ZipFormatError("Запись о конце центрального каталога обрезана", "truncated")
+    _, disk, directory_disk, _, entries, directory_size, directory_offset, _ = struct.unpack_from(
+        "<4s4H2LH", tail, position)
+    end_offset = file_size - tail_size + position
+
+    zip64 = False
+    locator = position - ZIP64_LOCATOR_SIZE
+    if locator >= 0 and tail[locator:locator + 4] == ZIP64_LOCATOR:
+        record = locator - ZIP64_END_SIZE
+        if record < 0 or tail[record:record + 4] != ZIP64_END:
+            raise ZipFormatError("Не найдена запись ZIP64 о конце центрального каталога")
+        (_, _, _, _, disk, directory_disk, _, entries, directory_size,
+         directory_offset) = struct.unpack_from("<4sQ2H2L4Q", tail, record)
+        end_offset -= ZIP64_LOCATOR_SIZE + ZIP64_END_SIZE
+        zip64 = True
+    if disk or directory_disk:
+        raise ZipFormatError("Многотомные ZIP архивы не поддерживаются")
+
+    concat = end_offset - directory_size - directory_offset
+    if concat < 0:
+        raise ZipFormatError("Центральный каталог выходит за границы архива", "truncated")
+    return ZipEndRecord(entries, directory_size, directory_offset + concat, concat, zip64)
+
+
+class ZipDirectory:
+    """
+    Центральный каталог ZIP в структурированном массиве NumPy: поля записей
+    (смещения, размеры, CRC, методы, флаги) извлекаются сразу для всех записей,
+    объекты ZipInfo не создаются. Имена хранятся в прочитанных байтах каталога.
+    Проверки границ, перекрытий и повторов имен выполняются операциями над массивами.
+    """
+
+    def __init__(self, np, end: ZipEndRecord, data: bytes, entries):
+        self.np = np
+        self.end = end
+        self.start_dir = end.directory_offset
+        self.data = data  # Байты центрального каталога
+        self.entries = entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def read(cls, f: BinaryIO, end: ZipEndRecord, np) -> "ZipDirectory":
+        """
+        Чтение центрального каталога
+
+        Raises:
+            ZipFormatError: Если каталог обрезан или записи повреждены
+        """
+        f.seek(end.directory_offset)
+        data = f.read(end.directory_size)
+        if len(data) < end.directory_size:
+            raise ZipFormatError("Центральный каталог обрезан", "truncated")
+
+        raw = np.frombuffer(data, dtype=np.uint8)
+        starts = _entry_starts(np, raw)
+        if starts is None:
+            starts = np.frombuffer(_walk_entries(data), dtype=np.int64)
+        count = len(starts)
+        if count != end.entries and (end.zip64 or count & 0xFFFF != end.entries):
+            raise ZipFormatError(f"В центральном каталоге {count} записей вместо {end.entries}")
+
+        def field(offset: int, dtype: str):
+            return _gather(np, raw, starts, offset, dtype)
+
+        entries = np.zeros(count, dtype=[
+            ("offset", "<u8"), ("compress_size", "<u8"), ("file_size", "<u8"), ("crc", "<u4"),
+            ("method", "<u2"), ("flags", "<u2"), ("name_start", "<u8"), ("name_length", "<u2"),
+            ("extra_length", "<u2"),
+        ])
+        entries["flags"] = field(8, "<u2")
+        entries["method"] = field(10, "<u2")
+        entries["crc"] = field(16, "<u4")
+        entries["compress_size"] = field(20, "<u4")
+        entries["file_size"] = field(24, "<u4")
+        entries["name_length"] = field(28, "<u2")
+        entries["extra_length"] = field(30, "<u2")
+        entries["offset"] = field(42, "<u4")
+        entries["name_start"] = starts + ZIP_CENTRAL_SIZE
+        directory = cls(np, end, data, entries)
+
+        # Записи ZIP64 (размеры и смещения в дополнительном поле) встречаются редко
+        marked = np.flatnonzero((entries["compress_size"] == ZIP64_MARK) | (entries["file_size"] == ZIP64_MARK)
+                                | (entries["offset"] == ZIP64_MARK))
+        for index in marked:
+            directory._read_zip64_extra(int(index))
+        entries["offset"] += end.concat
+        return directory
+
+    def _read_zip64_extra(self, index: int) -> None:
+        entry = self.entries[index]
+        position = int(entry["name_start"]) + int(entry["name_length"])
+        end = position + int(entry["extra_length"])
+        fields = [name for name in ("file_size", "compress_size", "offset") if int(entry[name]) == ZIP64_MARK]
+        while position + 4 <= end:
+            tag, size = struct.unpack_from("<2H", self.data, position)
+            if tag == ZIP64_EXTRA:
+                if size < 8 * len(fields):
+                    break
+                values = struct.unpack_from(f"<{len(fields)}Q", self.data, position + 4)
+                for name, value in zip(fields, values):
+                    self.entries[name][index] = value
+                return
+            position += 4 + size
+        raise ZipFormatError(f"Поврежденная запись ZIP64 файла {self.name(index)}")
+
+    def name_bytes(self, index: int) -> bytes:
+        start = int(self.entries["name_start"][index])
+        return self.data[start:start + int(self.entries["name_length"][index])]
+
+    def name(self, index: int) -> str:
+        raw = self.name_bytes(index)
+        if int(self.entries["flags"][index]) & ZIP_FLAG_UTF8:
+            return raw.decode("utf-8", "replace")
+        return raw.decode("cp437")
+
+    def compress_size(self, index: int) -> int:
+        return int(self.entries["compress_size"][index])
+
+    @property
+    def encrypted(self) -> int:
+        """Количество зашифрованных файлов"""
+        return int(self.np.count_nonzero(self.entries["flags"] & ZIP_FLAG_ENCRYPTED))
+
+    def unsupported_methods(self) -> list:
+        """Методы сжатия, которые распаковывает только zipfile"""
+        return [int(m) for m in self.np.unique(self.entries["method"]) if int(m) not in RANGE_METHODS]
+
+    # Проверки оглавления
+
+    def _end_of_data(self):
+        """Конец данных каждого файла по оглавлению (имя в локальном заголовке той же длины)"""
+        entries = self.entries
+        return (entries["offset"] + ZIP_LOCAL_SIZE + entries["name_length"].astype(self.np.uint64)
+                + entries["compress_size"])
+
+    def check_bounds(self) -> Optional[str]:
+        """Данные каждого файла должны помещаться между его смещением и началом центрального каталога"""
+        entries = self.entries
+        outside = self.np.flatnonzero(entries["offset"] + ZIP_LOCAL_SIZE + entries["compress_size"]
+                                      > self.start_dir)
+        if not len(outside):
+            return None
+        index = int(outside[0])
+        return (f"Файл {self.name(index)} выходит за границы данных архива "
+                f"(смещение {int(entries['offset'][index])}, размер {self.compress_size(index)})")
+
+    def check_overlaps(self) -> Optional[str]:
+        """Записи, ссылающиеся на одни и те же сжатые данные (прием zip-бомб)"""
+        np = self.np
+        order = np.argsort(self.entries["offset"], kind="stable")
+        ends = self._end_of_data()[order]
+        overlaps = np.flatnonzero(self.entries["offset"][order[1:]] < ends[:-1])
+        if not len(overlaps):
+            return None
+        current, following = int(order[overlaps[0]]), int(order[overlaps[0] + 1])
+        return f"Записи {self.name(current)} и {self.name(following)} перекрываются"
+
+    def check_duplicates(self) -> Optional[str]:
+        """
+        Повторяющиеся имена файлов: распаковщики по-разному выбирают одну из записей,
+        чем пользуются для подмены содержимого
+        """
+        np = self.np
+        count = len(self.entries)
+        if count < 2:
+            return None
+        hashes = np.empty(count, dtype=np.uint64)
+        raw = np.frombuffer(self.data, dtype=np.uint8)
+        for first in range(0, count, HASH_BATCH):
+            hashes[first:first + HASH_BATCH] = self._name_hashes(raw, first, min(count, first + HASH_BATCH))
+        # Одинаковые хеши проверяются сравнением самих имен
+        order = np.argsort(hashes, kind="stable")
+        same = np.flatnonzero(hashes[order[1:]] == hashes[order[:-1]])
+        for position in same:
+            current, following = int(order[position]), int(order[position + 1])
+            if self.name_bytes(current) == self.name_bytes(following):
+                return f"Повторяющееся имя файла в оглавлении: {self.name(following)}"
+        return None
+
+    def _name_hashes(self, raw, first: int, stop: int):
+        """Полиномиальные хеши имен записей [first, stop) (арифметика по модулю 2**64)"""
+        np = self.np
+        lengths = self.entries["name_length"][first:stop].astype(np.int64)
+        starts = self.entries["name_start"][first:stop].astype(np.int64)
+        hashes = lengths.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+        total = int(lengths.sum())
+        if not total:
+            return hashes
+        bounds = np.cumsum(lengths) - lengths  # Начало имени в склеенных байтах
+        positions = np.arange(total) - np.repeat(bounds, lengths)  # Номер байта внутри имени
+        values = raw[np.repeat(starts, lengths) + positions].astype(np.uint64) + np.uint64(1)
+        powers = np.cumprod(np.full(int(lengths.max()), 1099511628211, dtype=np.uint64))
+        present = np.flatnonzero(lengths)
+        hashes[present] += np.add.reduceat(values * powers[positions], bounds[present])
+        return hashes
+
+    def check_declared(self, limits, members: Sequence[int]) -> int:
+        """
+        Проверка объявленных размеров выбранных файлов (см. ResourceLimits.check_declared)
+
+        Returns:
+            int: Суммарный объявленный размер выбранных файлов, байт
+
+        Raises:
+            SuspiciousArchive: Если размеры превышают ограничения
+        """
+        np = self.np
+        selected = self.entries[np.asarray(members, dtype=np.int64)]
+        sizes = selected["file_size"].astype(np.float64)
+        violations = np.zeros(len(selected), dtype=bool)
+        if limits.max_total_bytes:
+            violations |= sizes > limits.max_total_bytes
+        if limits.max_ratio:
+            violations |= (sizes > RATIO_MIN_BYTES) & (
+                sizes > selected["compress_size"].astype(np.float64) * limits.max_ratio)
+        for position in np.flatnonzero(violations):
+            index = int(members[int(position)])
+            limits.check_declared(self.name(index), int(self.entries["file_size"][index]), self.compress_size(index))
+        return int(selected["file_size"].sum())
+
+    # Данные файлов
+
+    def data_offset(self, f: BinaryIO, index: int) -> int:
+        """Начало данных файла (за локальным заголовком)"""
+        return local_data_offset(f, int(self.entries["offset"][index]), self.name_bytes(index))
+
+    def read_member(self, f: BinaryIO, index: int, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        Распаковка файла по смещению и размеру из оглавления с проверкой CRC
+
+        Yields:
+            bytes: Распакованные данные по частям
+
+        Raises:
+            ZipFormatError: Если локальный заголовок, данные или CRC не совпадают с оглавлением
+        """
+        entry = self.entries[index]
+        compress_size, file_size, method = int(entry["compress_size"]), int(entry["file_size"]), int(entry["method"])
+        f.seek(self.data_offset(f, index))
+
+        if method == ZIP_DEFLATED:
+            decompressor = zlib.decompressobj(-15)
+        elif method == ZIP_BZIP2:
+            import bz2
+            decompressor = bz2.BZ2Decompressor()
+        else:
+            decompressor = None
+        crc = produced = 0
+        remaining = compress_size
+        try:
+            while remaining:
+                data = f.read(min(chunk_size, remaining))
+                if not data:
+                    raise ZipFormatError("Данные файла выходят за конец файла архива", "truncated")
+                remaining -= len(data)
+                for chunk in _decompress(decompressor, data, chunk_size):
+                    crc = zlib.crc32(chunk, crc)
+                    produced += len(chunk)
+                    yield chunk
+            if decompressor is not None and not decompressor.eof:
+                raise ZipFormatError("Сжатые данные файла не завершены", "truncated")
+        except (zlib.error, OSError, EOFError) as e:
+            raise ZipFormatError(f"Ошибка распаковки: {e}", "data")
+        if produced != file_size:
+            raise ZipFormatError(f"Размер данных {produced} вместо {file_size} по оглавлению", "data")
+        if crc != int(entry["crc"]):
+            raise ZipFormatError(f"Неверная CRC-32 файла {self.name(index)}", "data")
+
+
+def _gather(np, raw, starts, offset: int, dtype: str):
+    """Поле записей по смещению offset от их начал"""
+    dtype = np.dtype(dtype)
+    value = raw[starts + offset].astype(dtype)
+    for byte in range(1, dtype.itemsize):
+        value |= raw[starts + (offset + byte)].astype(dtype) << dtype.type(8 * byte)
+    return value
+
+
+def _entry_starts(np, raw):
+    """
+    Начала записей центрального каталога по сигнатурам: каждая запись должна
+    заканчиваться там, где начинается следующая. None, если цепочка не сходится
+    (сигнатура внутри имени или каталог поврежден) - тогда записи проходятся по порядку
+    """
+    size = len(raw)
+    if size < ZIP_CENTRAL_SIZE:
+        return None
+    found = []
+    for first in range(0, size - 3, SCAN_BLOCK):
+        stop = min(size - 3, first + SCAN_BLOCK)
+        mask = raw[first:stop] == ZIP_CENTRAL[0]
+        for byte in range(1, 4):
+            mask &= raw[first + byte:stop + byte] == ZIP_CENTRAL[byte]
+        found.append(np.flatnonzero(mask) + first)
+    starts = np.concatenate(found)
+    starts = starts[starts <= size - ZIP_CENTRAL_SIZE].astype(np.int64)
+    if not len(starts) or starts[0]:
+        return None
+    ends = starts + ZIP_CENTRAL_SIZE
+    for offset in (28, 30, 32):
+        ends += _gather(np, raw, starts, offset, "<u2")
+    if ends[-1] != size or not np.array_equal(ends[:-1], starts[1:]):
+        return None
+    return starts
+
+
+def _walk_entries(data: bytes) -> array:
+    """
+    Последовательный проход записей центрального каталога
+
+    Raises:
+        ZipFormatError: Если запись повреждена или обрезана
+    """
+    starts = array("q")
+    position = 0
+    unpack = struct.Struct("<3H").unpack_from
+    while position < len(data):
+        if data[position:position + 4] != ZIP_CENTRAL:
+            raise ZipFormatError(f"Неверная сигнатура записи центрального каталога (смещение {position})")
+        if position + ZIP_CENTRAL_SIZE > len(data):
+            raise ZipFormatError("Запись центрального каталога обрезана")
+        starts.append(position)
+        name_length, extra_length, comment_length = unpack(data, position + 28)
+        position += ZIP_CENTRAL_SIZE + name_length + extra_length + comment_length
+    if position > len(data):
+        raise ZipFormatError("Запись центрального каталога обрезана")
+    return starts
+
+
+def local_data_offset(f: BinaryIO, header_offset: int, name: Optional[bytes] = None) -> int:
+    """
+    Начало данных файла по его локальному заголовку
+
+    Args:
+        f: Открытый архив
+        header_offset (int): Смещение локального заголовка
+        name (bytes): Имя файла из оглавления (None - не сравнивать)
+
+    Raises:
+        ZipFormatError: Если заголовок поврежден или имя не совпадает с оглавлением
+    """
+    f.seek(header_offset)
+    header = f.read(ZIP_LOCAL_SIZE)
+    if len(header) < ZIP_LOCAL_SIZE or header[:4] != ZIP_LOCAL:
+        raise ZipFormatError("Неверная сигнатура локального заголовка")
+    name_length, extra_length = struct.unpack_from("<2H", header, 26)
+    if name is not None and f.read(name_length) != name:
+        raise ZipFormatError("Имя файла в оглавлении и в локальном заголовке различается")
+    return header_offset + ZIP_LOCAL_SIZE + name_length + extra_length
+
+
+def _decompress(decompressor, data: bytes, chunk_size: int) -> Iterator[bytes]:
+    """Распаковка блока порциями не больше chunk_size (защита памяти от zip-бомб)"""
+    if decompressor is None:
+        yield data
+    elif hasattr(decompressor, "unconsumed_tail"):
+        chunk = decompressor.decompress(data, chunk_size)
+        while chunk:
+            yield chunk
+            chunk = decompressor.decompress(decompressor.unconsumed_tail, chunk_size)
+    else:
+        chunk = decompressor.decompress(data, chunk_size)
+        while chunk:
+            yield chunk
+            if decompressor.eof or decompressor.needs_input:
+                break
+            chunk = decompressor.decompress(b"", chunk_size)
+
+
+def read_directory(f: BinaryIO, file_size: int, min_entries: int = 0,
+                   np=None) -> Optional[ZipDirectory]:
+    """
+    Чтение центрального каталога в массивы NumPy
+
+    Args:
+        f: Открытый архив
+        file_size (int): Размер архива, байт
+        min_entries (int): Каталоги с меньшим числом записей не читаются (их дешевле прочитать zipfile)
+        np: Модуль NumPy (по умолчанию импортируется)
+
+    Returns:
+        Optional[ZipDirectory]: None, если NumPy не установлен, записей мало или запись
+            о конце каталога не найдена (ошибку в этом случае сообщит zipfile)
+
+    Raises:
+        ZipFormatError: Если поврежден центральный каталог
+    """
+    np = np or load_numpy()
+    if np is None:
+        return None
+    try:
+        end = read_end_record(f, file_size)
+    except ZipFormatError:
+        return None
+    if end.entries < min_entries:
+        return None
+    return ZipDirectory.read(f, end, np)